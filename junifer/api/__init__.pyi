@@ -6,14 +6,18 @@ __all__ = [
     "reset",
     "list_elements",
     "parse_yaml",
+    "status",
+    "estimate",
 ]
 
 from . import decorators
 from .functions import (
     collect,
+    estimate,
     list_elements,
     parse_yaml,
     reset,
     run,
     queue,
+    status,
 )
@@ -0,0 +1,287 @@
+"""Provide functions for caching element listings of DataGrabbers."""
+
+# Authors: Synchon Mandal <s.mandal@fz-juelich.de>
+# License: AGPL
+
+import hashlib
+import json
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+import structlog
+
+from ..datagrabber._file_index import get_file_index
+from ..typing import DataGrabberLike
+from ..utils import config
+
+
+__all__ = [
+    "get_dataset_info",
+    "load_element_listing",
+    "save_element_listing",
+]
+
+_log = structlog.get_logger("junifer")
+logger = _log.bind(pkg="api")
+
+# Version of the listing file format
+_LISTING_VERSION = 2
+
+# Fields set on install of datalad-based DataGrabbers
+_DATASET_FIELDS = ["datalad_commit_id", "datalad_id", "datalad_dirty"]
+
+
+def _iter_datagrabbers(datagrabber: DataGrabberLike) -> Iterator:
+    """Iterate over a DataGrabber and the ones it wraps.
+
+    Parameters
+    ----------
+    datagrabber : DataGrabber-like object
+        The DataGrabber.
+
+    Yields
+    ------
+    DataGrabber-like object
+        The DataGrabbers, depth-first.
+
+    """
+    yield datagrabber
+    for dg in getattr(datagrabber, "datagrabbers", []):
+        yield from _iter_datagrabbers(dg)
+
+
+def _strip_params(params: Any) -> Any:
+    """Remove parameters which differ between processes.
+
+    Parameters
+    ----------
+    params : object
+        The dumped parameters.
+
+    Returns
+    -------
+    object
+        The parameters without dataset state and automatic data directories.
+
+    """
+    if isinstance(params, dict):
+        out = {}
+        for k, v in params.items():
+            if k in _DATASET_FIELDS:
+                continue
+            # Temporary directory for datalad datasets
+            if k == "datadir" and Path(str(v)).name.endswith("juniferauto"):
+                continue
+            out[k] = _strip_params(v)
+        return out
+    if isinstance(params, list | tuple):
+        return [_strip_params(x) for x in params]
+    return params
+
+
+def _get_listing_key(datagrabber: DataGrabberLike) -> str:
+    """Get the listing key of a DataGrabber.
+
+    Parameters
+    ----------
+    datagrabber : DataGrabber-like object
+        The DataGrabber.
+
+    Returns
+    -------
+    str
+        The MD5 hash of the class and parameters of ``datagrabber``.
+
+    """
+    params = (
+        datagrabber.model_dump()
+        if hasattr(datagrabber, "model_dump")
+        else vars(datagrabber)
+    )
+    return hashlib.md5(
+        json.dumps(
+            [type(datagrabber).__name__, _strip_params(params)],
+            sort_keys=True,
+            default=str,
+        ).encode("utf-8"),
+        usedforsecurity=False,
+    ).hexdigest()
+
+
+def get_dataset_info(datagrabber: DataGrabberLike) -> list[dict]:
+    """Get the state of the datalad datasets of a DataGrabber.
+
+    Parameters
+    ----------
+    datagrabber : DataGrabber-like object
+        The installed DataGrabber.
+
+    Returns
+    -------
+    list of dict
+        The ID, commit and dirtiness of the dataset of each datalad-based
+        DataGrabber in ``datagrabber``.
+
+    """
+    return [
+        {
+            "id": dg.datalad_id,
+            "commit": dg.datalad_commit_id,
+            "dirty": dg.datalad_dirty,
+        }
+        for dg in _iter_datagrabbers(datagrabber)
+        if hasattr(dg, "datalad_id")
+    ]
+
+
+def _get_filesystem_info(datagrabber: DataGrabberLike) -> list[dict] | None:
+    """Get the state of the directories of a DataGrabber.
+
+    Parameters
+    ----------
+    datagrabber : DataGrabber-like object
+        The listed DataGrabber.
+
+    Returns
+    -------
+    list of dict or None
+        The root and the modification times of the indexed directories of
+        each DataGrabber in ``datagrabber`` not based on datalad, or None if
+        the state of one of them is not known.
+
+    """
+    info = []
+    for dg in _iter_datagrabbers(datagrabber):
+        # Wrapping DataGrabbers and datasets are checked elsewhere
+        if hasattr(dg, "datagrabbers") or hasattr(dg, "datalad_id"):
+            continue
+        # Only pattern-based DataGrabbers index the directories
+        if not hasattr(dg, "patterns") or not config.get(
+            "datagrabber.index", True
+        ):
+            return None
+        root = Path(dg.fulldir).absolute()
+        mtimes = get_file_index(root).get_mtimes()
+        if not mtimes:
+            return None
+        info.append({"root": str(root), "mtimes": mtimes})
+    return info
+
+
+def _is_filesystem_unchanged(info: list[dict]) -> bool:
+    """Check if the directories of a DataGrabber did not change.
+
+    Parameters
+    ----------
+    info : list of dict
+        The state from :func:`_get_filesystem_info`.
+
+    Returns
+    -------
+    bool
+        Whether all the directories have the same modification times.
+
+    """
+    for x in info:
+        root = Path(x["root"])
+        for rel_dir, mtime in x["mtimes"].items():
+            try:
+                if (root / rel_dir).stat().st_mtime_ns != mtime:
+                    return False
+            except OSError:
+                return False
+    return True
+
+
+def save_element_listing(
+    path: Path, datagrabber: DataGrabberLike, elements: list
+) -> None:
+    """Save the element listing of a DataGrabber.
+
+    The listing is only saved if changes to the data of ``datagrabber`` can
+    be detected, via the state of the datalad datasets or the modification
+    times of the directories indexed by pattern-based DataGrabbers.
+
+    Parameters
+    ----------
+    path : pathlib.Path
+        The path to the listing file.
+    datagrabber : DataGrabber-like object
+        The installed and listed DataGrabber.
+    elements : list
+        The elements of ``datagrabber``.
+
+    """
+    filesystem = _get_filesystem_info(datagrabber)
+    if filesystem is None:
+        logger.info(
+            "Not writing element listing, changes to the files of the "
+            "DataGrabber cannot be detected"
+        )
+        return
+    logger.info(f"Writing element listing to {path.resolve()!s}")
+    with Path(path).open("w") as f:
+        json.dump(
+            {
+                "version": _LISTING_VERSION,
+                "key": _get_listing_key(datagrabber),
+                "datasets": get_dataset_info(datagrabber),
+                "filesystem": filesystem,
+                "elements": elements,
+            },
+            f,
+        )
+
+
+def load_element_listing(
+    path: Path, datagrabber: DataGrabberLike
+) -> dict | None:
+    """Load the element listing of a DataGrabber.
+
+    The known dataset IDs are set on the datalad-based DataGrabbers of
+    ``datagrabber``, so that the remote ID check on install is skipped when
+    the installed dataset has the same ID. The listing is only valid if
+    :func:`get_dataset_info` for the installed ``datagrabber`` is the same
+    as the one in the listing and the directories indexed by the other
+    DataGrabbers did not change.
+
+    Parameters
+    ----------
+    path : pathlib.Path
+        The path to the listing file.
+    datagrabber : DataGrabber-like object
+        The DataGrabber, not installed yet.
+
+    Returns
+    -------
+    dict or None
+        The listing with ``"datasets"`` and ``"elements"`` keys, or None if
+        not found, created for a different DataGrabber or the directories
+        changed.
+
+    """
+    try:
+        with Path(path).open("r") as f:
+            listing = json.load(f)
+    except (OSError, ValueError):
+        logger.debug(f"No valid element listing at {path}")
+        return None
+    if listing.get("version") != _LISTING_VERSION or listing.get(
+        "key"
+    ) != _get_listing_key(datagrabber):
+        logger.debug(f"Element listing at {path} is for another DataGrabber")
+        return None
+    if not _is_filesystem_unchanged(listing["filesystem"]):
+        logger.info("Files changed, ignoring element listing")
+        return None
+    datalad_dgs = [
+        x for x in _iter_datagrabbers(datagrabber) if hasattr(x, "datalad_id")
+    ]
+    for dg, info in zip(datalad_dgs, listing["datasets"], strict=False):
+        dg._known_dataset = info
+    # JSON does not have tuples
+    listing["elements"] = [
+        tuple(x) if isinstance(x, list) else x for x in listing["elements"]
+    ]
+    return listing
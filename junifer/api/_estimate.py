@@ -0,0 +1,272 @@
+"""Provide functions for estimating the resources needed by a run."""
+
+# Authors: Synchon Mandal <s.mandal@fz-juelich.de>
+# License: AGPL
+
+import math
+from typing import Any
+
+import structlog
+
+from ..pipeline import read_data_headers
+from ..typing import DataGrabberLike, Element, MarkerLike, PreprocessorLike
+from ..utils import config, warn_with_log
+from ._element_listing import _iter_datagrabbers
+
+
+__all__ = [
+    "estimate_element",
+    "format_estimates",
+    "get_resource_requests",
+    "sample_elements",
+]
+
+_log = structlog.get_logger("junifer")
+logger = _log.bind(pkg="api")
+
+# Default safety margin applied to the estimates for resource requests
+_MARGIN = 1.5
+
+# Resources estimated for an element and its components
+_RESOURCES = ["memory", "disk", "output"]
+
+
+def sample_elements(elements: list[Element], n_elements: int) -> list:
+    """Sample elements evenly spread over a list.
+
+    Parameters
+    ----------
+    elements : list of `Element`
+        The elements.
+    n_elements : int
+        The number of elements to sample.
+
+    Returns
+    -------
+    list of `Element`
+        The sampled elements, in order.
+
+    """
+    if n_elements >= len(elements):
+        return list(elements)
+    if n_elements <= 1:
+        return list(elements[:1])
+    step = (len(elements) - 1) / (n_elements - 1)
+    return [elements[round(i * step)] for i in range(n_elements)]
+
+
+def _estimate_component(
+    name: str, func: Any, *args: Any
+) -> dict[str, int] | None:
+    """Estimate the cost of a pipeline component.
+
+    Parameters
+    ----------
+    name : str
+        The name of the component for the warnings.
+    func : callable
+        The ``estimate_cost`` method of the component.
+    *args : tuple
+        The positional arguments of ``func``.
+
+    Returns
+    -------
+    dict or None
+        The estimated cost or None if it cannot be estimated.
+
+    """
+    try:
+        return func(*args)
+    except Exception as e:  # noqa: BLE001
+        # Estimates are best-effort, e.g., atlases may not be available
+        warn_with_log(f"Cannot estimate the cost of {name}: {e}")
+        return None
+
+
+def estimate_element(
+    datagrabber: DataGrabberLike,
+    input: dict[str, dict],
+    preprocessors: list[PreprocessorLike] | None,
+    markers: list[MarkerLike],
+    baseline: int = 0,
+) -> dict[str, Any]:
+    """Estimate the resources needed to run the pipeline on an element.
+
+    Only the NIfTI headers of the data are read and combined with the
+    ``estimate_cost`` method of every preprocessor and marker. The
+    components run one after the other, so the peak memory is ``baseline``
+    plus the maximum memory of a component. The temporary disk usage is the
+    sum of the temporary disk usage of the components plus, for
+    DataLad-based DataGrabbers, the size of the input files. The output size
+    is the sum of the feature sizes.
+
+    Parameters
+    ----------
+    datagrabber : DataGrabber-like object
+        The DataGrabber the element was indexed from.
+    input : dict
+        The Junifer Data object of the element.
+    preprocessors : list of preprocessor-like or None
+        The preprocessors.
+    markers : list of marker-like
+        The markers.
+    baseline : int, optional
+        The resident memory in bytes of the process after loading the
+        pipeline (default 0).
+
+    Returns
+    -------
+    dict
+        The estimated peak ``"memory"``, temporary ``"disk"`` and
+        ``"output"`` size in bytes of the element, and the estimates of the
+        ``"components"`` by name.
+
+    """
+    headers = read_data_headers(input)
+    components = {}
+    for preprocessor in preprocessors or []:
+        if not hasattr(preprocessor, "estimate_cost"):
+            continue
+        for type_ in preprocessor.on:
+            if type_ in headers.keys():
+                extra_input = headers.copy()
+                extra_input.pop(type_)
+                name = (
+                    f"{preprocessor.__class__.__name__} "
+                    f"({getattr(type_, 'value', type_)})"
+                )
+                components[name] = _estimate_component(
+                    name,
+                    preprocessor.estimate_cost,
+                    headers[type_],
+                    extra_input,
+                )
+    for marker in markers:
+        if hasattr(marker, "estimate_cost"):
+            components[marker.name] = _estimate_component(
+                marker.name, marker.estimate_cost, headers
+            )
+    costs = [x for x in components.values() if x is not None]
+    disk = sum(x["disk"] for x in costs)
+    # Input files are fetched to the temporary dataset directory
+    if any(hasattr(x, "datalad_id") for x in _iter_datagrabbers(datagrabber)):
+        disk += sum(
+            x["size"]
+            for x in headers.values()
+            if isinstance(x, dict) and "size" in x
+        )
+    return {
+        "memory": baseline + max((x["memory"] for x in costs), default=0),
+        "disk": disk,
+        "output": sum(x["output"] for x in costs),
+        "components": components,
+    }
+
+
+def _get_element_key(element: Element) -> str:
+    """Get the display key of an element.
+
+    Parameters
+    ----------
+    element : `Element`
+        The element.
+
+    Returns
+    -------
+    str
+        The element, comma-separated if a tuple.
+
+    """
+    return ",".join(element) if isinstance(element, tuple) else str(element)
+
+
+def _format_size(n_bytes: float) -> str:
+    """Format a size for display.
+
+    Parameters
+    ----------
+    n_bytes : float
+        The size in bytes.
+
+    Returns
+    -------
+    str
+        The size with a binary unit.
+
+    """
+    for unit in ["B", "KB", "MB", "GB"]:
+        if n_bytes < 1024:
+            return f"{n_bytes:.1f} {unit}" if unit != "B" else f"{n_bytes} B"
+        n_bytes /= 1024
+    return f"{n_bytes:.1f} TB"
+
+
+def format_estimates(
+    estimates: dict[Element, dict], show_components: bool = False
+) -> str:
+    """Format the estimates of elements for display.
+
+    Parameters
+    ----------
+    estimates : dict
+        The estimates from :func:`estimate_element` by element.
+    show_components : bool, optional
+        Whether to list the estimates of the components (default False).
+
+    Returns
+    -------
+    str
+        The formatted estimates with the maximum over the elements.
+
+    """
+    lines = [f"{'Element':<30} {'Memory':>10} {'Disk':>10} {'Output':>10}"]
+    for element, estimate in estimates.items():
+        lines.append(
+            f"{_get_element_key(element):<30} "
+            + " ".join(f"{_format_size(estimate[x]):>10}" for x in _RESOURCES)
+        )
+        if show_components:
+            for name, cost in estimate["components"].items():
+                values = (
+                    " ".join(
+                        f"{_format_size(cost[x]):>10}" for x in _RESOURCES
+                    )
+                    if cost is not None
+                    else f"{'unknown':>10}"
+                )
+                lines.append(f"  {name:<28} {values}")
+    if len(estimates) > 1:
+        lines.append(
+            f"{'Maximum':<30} "
+            + " ".join(
+                f"{_format_size(max(x[r] for x in estimates.values())):>10}"
+                for r in _RESOURCES
+            )
+        )
+    return "\n".join(lines)
+
+
+def get_resource_requests(estimates: list[dict]) -> dict[str, str]:
+    """Get the resource requests of a job from estimates of elements.
+
+    The maximum of the estimates is multiplied by ``estimate.margin``
+    (default 1.5).
+
+    Parameters
+    ----------
+    estimates : list of dict
+        The estimates from :func:`estimate_element`.
+
+    Returns
+    -------
+    dict
+        The ``"mem"`` and ``"disk"`` requests in mebibytes, as accepted by
+        :class:`.HTCondorAdapter`.
+
+    """
+    margin = float(config.get("estimate.margin", _MARGIN))
+    requests = {}
+    for key, resource in [("mem", "memory"), ("disk", "disk")]:
+        n_bytes = max((x[resource] for x in estimates), default=0) * margin
+        requests[key] = f"{max(math.ceil(n_bytes / 1024**2), 1)}M"
+    return requests
@@ -0,0 +1,499 @@
+"""Provide functions for journaling and retrying elements of a run."""
+
+# Authors: Synchon Mandal <s.mandal@fz-juelich.de>
+# License: AGPL
+
+import json
+import os
+import socket
+import statistics
+import threading
+import time
+from collections import Counter, defaultdict
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from typing import Any
+
+import structlog
+
+from ..typing import Element
+from ..utils import config, warn_with_log
+
+
+__all__ = [
+    "JOURNAL_NAME",
+    "ElementJournal",
+    "RetryPolicy",
+    "format_journal_summary",
+    "get_current_memory",
+    "is_transient_error",
+    "read_journal",
+    "summarize_journal",
+]
+
+_log = structlog.get_logger("junifer")
+logger = _log.bind(pkg="api")
+
+# Name of the journal directory in the job directory
+JOURNAL_NAME = "journal"
+
+# Exception classes considered transient by default, matched by name
+# against the exception, its base classes and the exceptions it was raised
+# from
+_TRANSIENT_ERRORS = [
+    "IncompleteResultsError",
+    "CommandError",
+    "ConnectionError",
+    "TimeoutError",
+]
+
+# Maximum length of the error message in the journal
+_MESSAGE_LENGTH = 500
+
+# Interval in seconds between samples of the memory of running elements
+_MEMORY_INTERVAL = 0.5
+
+
+def get_current_memory() -> int | None:
+    """Get the current resident memory of the process.
+
+    Returns
+    -------
+    int or None
+        The current resident memory in bytes or None if not available. It is
+        read from ``/proc/self/statm`` and thus only available on Linux.
+
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE")
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """Check if an error is transient.
+
+    An error is transient if the name of its class or of a base class is in
+    ``pipeline.retry.errors`` (default: datalad ``IncompleteResultsError``
+    and ``CommandError``, ``ConnectionError`` and ``TimeoutError``), for the
+    error or any error it was raised from.
+
+    Parameters
+    ----------
+    error : BaseException
+        The error.
+
+    Returns
+    -------
+    bool
+        Whether retrying might succeed.
+
+    """
+    names = config.get("pipeline.retry.errors", _TRANSIENT_ERRORS)
+    if isinstance(names, str):
+        names = [x.strip() for x in names.split(",")]
+    seen = set()
+    t_error: BaseException | None = error
+    while t_error is not None and id(t_error) not in seen:
+        seen.add(id(t_error))
+        if any(x.__name__ in names for x in type(t_error).__mro__):
+            return True
+        t_error = t_error.__cause__ or t_error.__context__
+    return False
+
+
+class RetryPolicy:
+    """Class for calling functions with retries on transient errors.
+
+    The function is retried up to ``pipeline.retry.count`` times (default
+    0) if it raises a transient error (see :func:`is_transient_error`),
+    waiting ``pipeline.retry.delay`` seconds (default 10) before the first
+    retry and doubling the wait before each of the next ones.
+
+    Attributes
+    ----------
+    attempts : int
+        The number of attempts of the last call.
+
+    """
+
+    def __init__(self) -> None:
+        self.count = max(int(config.get("pipeline.retry.count", 0)), 0)
+        self.delay = float(config.get("pipeline.retry.delay", 10))
+        self.attempts = 0
+
+    def call(
+        self, description: str, func: Callable, *args: Any, **kwargs: Any
+    ) -> Any:
+        """Call a function, retrying on transient errors.
+
+        Parameters
+        ----------
+        description : str
+            The description of the call for logging.
+        func : callable
+            The function to call.
+        *args : tuple
+            The positional arguments of ``func``.
+        **kwargs : dict
+            The keyword arguments of ``func``.
+
+        Returns
+        -------
+        object
+            The return value of ``func``.
+
+        """
+        self.attempts = 0
+        while True:
+            self.attempts += 1
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                if self.attempts > self.count or not is_transient_error(e):
+                    raise
+                wait = self.delay * 2 ** (self.attempts - 1)
+                warn_with_log(
+                    f"Attempt {self.attempts} of {description} failed "
+                    f"with {type(e).__name__}: {e}. Retrying in {wait} "
+                    "seconds"
+                )
+                time.sleep(wait)
+
+
+class ElementJournal:
+    """Class for journaling the status of elements.
+
+    Every record is a line of JSON appended with a single write to a file
+    of the process in the journal directory, named after the host and the
+    process ID. Concurrent jobs thus share a journal directory without
+    writing to the same file, which is not safe on network filesystems.
+
+    The memory of an element is the peak resident memory of the process
+    between :meth:`begin` and :meth:`record`, sampled every 0.5 seconds in
+    a background thread. With ``pipeline.stream``, elements overlap and the
+    memory of an element includes the memory of the elements processed at
+    the same time.
+
+    Parameters
+    ----------
+    path : pathlib.Path
+        The path to the journal directory.
+
+    Attributes
+    ----------
+    path : pathlib.Path
+        The path to the journal file of the process.
+
+    """
+
+    def __init__(self, path: Path) -> None:
+        self._host = socket.gethostname()
+        self.path = Path(path) / f"{self._host}-{os.getpid()}.jsonl"
+        self._lock = threading.Lock()
+        # Peak memory of the running elements
+        self._memory: dict[Element, int] = {}
+        self._memory_lock = threading.Lock()
+        self._sampler: threading.Thread | None = None
+
+    def begin(self, element: Element) -> None:
+        """Start measuring the memory of an element.
+
+        Parameters
+        ----------
+        element : `Element`
+            The element.
+
+        """
+        memory = get_current_memory()
+        if memory is None:
+            return
+        with self._memory_lock:
+            self._memory[element] = max(self._memory.get(element, 0), memory)
+            if self._sampler is None:
+                self._sampler = threading.Thread(
+                    target=self._sample,
+                    name="junifer-journal-memory",
+                    daemon=True,
+                )
+                self._sampler.start()
+
+    def _sample(self) -> None:
+        """Sample the memory of the running elements until none is left."""
+        while True:
+            time.sleep(_MEMORY_INTERVAL)
+            memory = get_current_memory() or 0
+            with self._memory_lock:
+                if not self._memory:
+                    self._sampler = None
+                    return
+                for element, peak in self._memory.items():
+                    self._memory[element] = max(peak, memory)
+
+    def record(
+        self,
+        element: Element,
+        status: str,
+        start: float,
+        end: float | None = None,
+        attempts: int = 1,
+        error: BaseException | None = None,
+    ) -> None:
+        """Record the status of an element.
+
+        Parameters
+        ----------
+        element : `Element`
+            The element.
+        status : {"success", "failed", "skipped"}
+            The status of the element.
+        start : float
+            The start time as seconds since the epoch.
+        end : float or None, optional
+            The end time as seconds since the epoch. If None, the current
+            time is used (default None).
+        attempts : int, optional
+            The number of attempts (default 1).
+        error : BaseException or None, optional
+            The error of a failed element (default None).
+
+        """
+        with self._memory_lock:
+            memory = self._memory.pop(element, None)
+        if memory is not None:
+            memory = max(memory, get_current_memory() or 0)
+        entry = {
+            "element": element,
+            "status": status,
+            "start": start,
+            "end": end if end is not None else time.time(),
+            "attempts": attempts,
+            "error": type(error).__name__ if error is not None else None,
+            "message": (
+                str(error)[:_MESSAGE_LENGTH] if error is not None else None
+            ),
+            "memory": memory,
+            "host": self._host,
+            "pid": os.getpid(),
+        }
+        line = (json.dumps(entry, default=str) + "\n").encode("utf-8")
+        with self._lock:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT)
+                try:
+                    os.write(fd, line)
+                finally:
+                    os.close(fd)
+            except OSError as e:
+                # The journal must not fail the run
+                warn_with_log(f"Cannot write to journal at {self.path}: {e}")
+
+
+def _is_record(record: Any) -> bool:
+    """Check if a parsed journal line is a valid record.
+
+    Parameters
+    ----------
+    record : object
+        The parsed line.
+
+    Returns
+    -------
+    bool
+        Whether ``record`` has an element, a status and numeric times.
+
+    """
+    return (
+        isinstance(record, dict)
+        and "element" in record
+        and isinstance(record.get("status"), str)
+        and all(
+            isinstance(record.get(x), int | float)
+            and not isinstance(record.get(x), bool)
+            for x in ["start", "end"]
+        )
+        and isinstance(record.get("memory"), int | float | None)
+    )
+
+
+def read_journal(path: Path) -> Iterator[dict]:
+    """Read the records of a journal.
+
+    Parameters
+    ----------
+    path : pathlib.Path
+        The path to the journal directory or to a journal file.
+
+    Yields
+    ------
+    dict
+        The records, in order for every file, with the files in order of
+        name. Malformed lines are skipped.
+
+    """
+    path = Path(path)
+    files = sorted(path.glob("*.jsonl")) if path.is_dir() else [path]
+    for file in files:
+        with file.open("rb") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Partially written line of a killed job
+                    continue
+                if _is_record(record):
+                    yield record
+
+
+def _get_key(element: Any) -> str:
+    """Get the key of an element of a journal record.
+
+    Parameters
+    ----------
+    element : object
+        The element as read from the journal.
+
+    Returns
+    -------
+    str
+        The key.
+
+    """
+    if isinstance(element, list):
+        return ",".join(str(x) for x in element)
+    return str(element)
+
+
+def summarize_journal(path: Path) -> dict:
+    """Summarize a journal.
+
+    The record of every element with the latest end time is its status.
+
+    Parameters
+    ----------
+    path : pathlib.Path
+        The path to the journal directory or to a journal file.
+
+    Returns
+    -------
+    dict
+        The summary with keys ``"elements"`` (number of elements),
+        ``"status"`` (number of elements by status), ``"attempts"`` (number
+        of records), ``"start"`` and ``"end"`` (first and last time),
+        ``"throughput"`` (successful elements per hour), ``"duration"``
+        (median and maximum seconds of the successful elements),
+        ``"memory"`` (maximum peak memory of an element in bytes),
+        ``"errors"`` (number of failed elements by error class) and
+        ``"failed"`` (failed elements by error class).
+
+    """
+    latest: dict[str, dict] = {}
+    n_records = 0
+    start = end = None
+    for record in read_journal(path):
+        n_records += 1
+        key = _get_key(record["element"])
+        # Records of an element can be in the files of several jobs
+        if key not in latest or record["end"] >= latest[key]["end"]:
+            latest[key] = record
+        if start is None or record["start"] < start:
+            start = record["start"]
+        if end is None or record["end"] > end:
+            end = record["end"]
+    status = Counter(x.get("status") for x in latest.values())
+    durations = [
+        x["end"] - x["start"]
+        for x in latest.values()
+        if x.get("status") == "success"
+    ]
+    memory = [x["memory"] for x in latest.values() if x.get("memory")]
+    failed: dict[str, list] = defaultdict(list)
+    for x in latest.values():
+        if x.get("status") == "failed":
+            failed[x.get("error") or "Unknown"].append(x.get("element"))
+    elapsed = end - start if start is not None and end is not None else 0
+    return {
+        "elements": len(latest),
+        "status": dict(status),
+        "attempts": n_records,
+        "start": start,
+        "end": end,
+        "throughput": (
+            status["success"] / elapsed * 3600 if elapsed > 0 else None
+        ),
+        "duration": {
+            "median": statistics.median(durations) if durations else None,
+            "max": max(durations) if durations else None,
+        },
+        "memory": max(memory) if memory else None,
+        "errors": {k: len(v) for k, v in failed.items()},
+        "failed": dict(failed),
+    }
+
+
+def _format_time(t: float) -> str:
+    """Format a time for display.
+
+    Parameters
+    ----------
+    t : float
+        The time as seconds since the epoch.
+
+    Returns
+    -------
+    str
+        The local time.
+
+    """
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(t))
+
+
+def format_journal_summary(summary: dict, show_failed: bool = False) -> str:
+    """Format a journal summary for display.
+
+    Parameters
+    ----------
+    summary : dict
+        The summary from :func:`summarize_journal`.
+    show_failed : bool, optional
+        Whether to list the failed elements (default False).
+
+    Returns
+    -------
+    str
+        The formatted summary.
+
+    """
+    lines = [
+        f"Elements: {summary['elements']} ({summary['attempts']} records)",
+    ]
+    for status in ["success", "failed", "skipped"]:
+        lines.append(f"  {status}: {summary['status'].get(status, 0)}")
+    if summary["start"] is not None:
+        lines.append(
+            f"Period: {_format_time(summary['start'])} - "
+            f"{_format_time(summary['end'])}"
+        )
+    if summary["throughput"] is not None:
+        lines.append(f"Throughput: {summary['throughput']:.1f} elements/hour")
+    if summary["duration"]["median"] is not None:
+        lines.append(
+            f"Duration: {summary['duration']['median']:.1f} s median, "
+            f"{summary['duration']['max']:.1f} s max"
+        )
+    if summary["memory"] is not None:
+        lines.append(f"Peak memory: {summary['memory'] / 1024**3:.2f} GB")
+    if summary["errors"]:
+        lines.append("Errors:")
+        for error, count in sorted(
+            summary["errors"].items(), key=lambda x: -x[1]
+        ):
+            lines.append(f"  {error}: {count}")
+            if show_failed:
+                lines.extend(
+                    f"    {_get_key(x)}" for x in summary["failed"][error]
+                )
+    return "\n".join(lines)
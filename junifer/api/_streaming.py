@@ -0,0 +1,324 @@
+"""Provide function for running the pipeline with overlapped stages."""
+
+# Authors: Synchon Mandal <s.mandal@fz-juelich.de>
+# License: AGPL
+
+import queue
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+import structlog
+
+from ..pipeline import MarkerCollection
+from ..storage import StorageType
+from ..typing import DataGrabberLike, Element
+from ..utils import config
+from ._journal import ElementJournal, RetryPolicy
+
+
+__all__ = ["run_streaming"]
+
+_log = structlog.get_logger("junifer")
+logger = _log.bind(pkg="api")
+
+# Chunk size for reading input files ahead
+_CHUNK_SIZE = 16 * 1024 * 1024
+
+# Marker for no more elements to fetch
+_DONE = object()
+
+
+class _StorageBuffer:
+    """Class for collecting the features of an element to store later.
+
+    Markers call :meth:`store` as they would on a storage.
+
+    """
+
+    def __init__(self) -> None:
+        self.calls: list[tuple[StorageType, dict[str, Any]]] = []
+
+    def store(self, kind: StorageType, **kwargs: Any) -> None:
+        """Collect extracted features data.
+
+        Parameters
+        ----------
+        kind : :enum:`.StorageType`
+            The storage kind.
+        **kwargs
+            The keyword arguments.
+
+        """
+        self.calls.append((kind, kwargs))
+
+
+def _get_paths(obj: Any) -> list[Path]:
+    """Get the paths of existing files from the input of a pipeline.
+
+    Parameters
+    ----------
+    obj : Any
+        The input or a value of it.
+
+    Returns
+    -------
+    list of pathlib.Path
+        The paths.
+
+    """
+    paths = []
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            if k == "path" and isinstance(v, str | Path):
+                if Path(v).is_file():
+                    paths.append(Path(v))
+            else:
+                paths.extend(_get_paths(v))
+    elif isinstance(obj, list):
+        for x in obj:
+            paths.extend(_get_paths(x))
+    return paths
+
+
+def _read_ahead(paths: list[Path]) -> int:
+    """Read files so that they are in the page cache when computing.
+
+    Parameters
+    ----------
+    paths : list of pathlib.Path
+        The paths to read.
+
+    Returns
+    -------
+    int
+        The number of bytes read.
+
+    """
+    n_bytes = 0
+    buffer = bytearray(_CHUNK_SIZE)
+    for path in dict.fromkeys(paths):
+        try:
+            with path.open("rb", buffering=0) as f:
+                while n_read := f.readinto(buffer):
+                    n_bytes += n_read
+        except OSError as e:
+            # Raised again when computing
+            logger.debug(f"Cannot read {path} ahead: {e}")
+    return n_bytes
+
+
+def _fetch_ahead(
+    executor: ThreadPoolExecutor,
+    fetch: Callable[[Element], tuple],
+    pending: deque[tuple[Element, Future]],
+    to_fetch: Iterator[Element],
+    n_elements: int,
+    size: int | None,
+) -> None:
+    """Submit elements for fetching within the limits.
+
+    Parameters
+    ----------
+    executor : concurrent.futures.ThreadPoolExecutor
+        The executor of the fetch stage.
+    fetch : callable
+        The function fetching an element, returning the number of bytes read
+        ahead as third item.
+    pending : collections.deque
+        The elements submitted and not computed yet, with their futures.
+        Modified in place.
+    to_fetch : iterator
+        The elements not submitted yet.
+    n_elements : int
+        The maximum number of pending elements.
+    size : int or None
+        The maximum number of bytes read ahead by the pending elements. If
+        None, the size is not limited.
+
+    """
+    while len(pending) < n_elements:
+        if size is not None and pending:
+            fetched = sum(
+                x.result()[2]
+                for _, x in pending
+                if x.done() and x.exception() is None
+            )
+            if fetched >= size:
+                return
+        element = next(to_fetch, _DONE)
+        if element is _DONE:
+            return
+        pending.append((element, executor.submit(fetch, element)))
+
+
+def run_streaming(  # noqa: C901
+    datagrabber: DataGrabberLike,
+    marker_collection: MarkerCollection,
+    elements: list[Element],
+    markers: dict | None = None,
+    journal: ElementJournal | None = None,
+) -> None:
+    """Run the pipeline on elements with overlapped stages.
+
+    The elements are processed in three stages connected by bounded queues:
+
+    * fetch: index ``datagrabber``, read the data via the data reader and
+      read the input files ahead, in ``pipeline.stream.fetch.njobs``
+      threads (default 1), for up to ``pipeline.stream.fetch.elements``
+      elements (default 2) and ``pipeline.stream.fetch.size`` gigabytes of
+      input files (default unlimited) ahead of the compute stage. Files
+      are not read ahead if the preprocessed data can be restored from a
+      cache or checkpoint.
+    * compute: preprocess and compute the markers, one element at a time in
+      the calling thread, as the element directory of
+      :class:`.WorkDirManager` is shared by the process.
+    * store: store the features in a background thread, for up to
+      ``pipeline.stream.store.elements`` elements (default 2) pending.
+
+    Elements are computed and stored in order and the first error of any
+    stage is raised. Fetching is retried on transient errors as configured
+    for :class:`.RetryPolicy`.
+
+    Parameters
+    ----------
+    datagrabber : DataGrabber-like object
+        The DataGrabber, already entered.
+    marker_collection : MarkerCollection
+        The validated pipeline to run.
+    elements : list of `Element`
+        The elements to process.
+    markers : dict or None, optional
+        The names of the markers to compute by element. If None, all the
+        markers are computed (default None).
+    journal : ElementJournal or None, optional
+        The journal to record the status of the elements in, from the start
+        of fetching to the end of storing (default None).
+
+    """
+    n_jobs = max(int(config.get("pipeline.stream.fetch.njobs", 1)), 1)
+    fetch_elements = max(
+        int(config.get("pipeline.stream.fetch.elements", 2)), 1
+    )
+    fetch_size = config.get("pipeline.stream.fetch.size")
+    fetch_size = int(float(fetch_size) * 1e9) if fetch_size else None
+    store_elements = max(
+        int(config.get("pipeline.stream.store.elements", 2)), 1
+    )
+    read_ahead = (
+        config.get("preprocessing.cache.location") is None
+        and config.get("preprocessing.checkpoint.location") is None
+    )
+    storage = marker_collection._storage
+
+    def _read(element: Element) -> tuple[dict, dict]:
+        input = datagrabber[element]
+        return input, marker_collection._read_data(input)
+
+    def _fetch(element: Element) -> tuple[dict, dict, int, float, int]:
+        start = time.time()
+        if journal is not None:
+            journal.begin(element)
+        retry = RetryPolicy()
+        try:
+            input, data = retry.call(f"element {element}", _read, element)
+        except Exception as e:
+            _record(element, "failed", start, retry.attempts, e)
+            raise
+        n_bytes = _read_ahead(_get_paths(input)) if read_ahead else 0
+        return input, data, n_bytes, start, retry.attempts
+
+    def _record(
+        element: Element,
+        status: str,
+        start: float,
+        attempts: int,
+        error: BaseException | None = None,
+    ) -> None:
+        if journal is not None:
+            journal.record(
+                element, status, start, attempts=attempts, error=error
+            )
+
+    store_queue: queue.Queue = queue.Queue(maxsize=store_elements)
+    store_errors: list[BaseException] = []
+
+    def _store() -> None:
+        while (item := store_queue.get()) is not None:
+            # Drain the queue after an error
+            if store_errors:
+                continue
+            element, calls, start, attempts = item
+            logger.info(f"Storing element {element}")
+            try:
+                for kind, kwargs in calls:
+                    storage.store(kind=kind, **kwargs)
+            except BaseException as e:  # noqa: BLE001
+                store_errors.append(e)
+                _record(element, "failed", start, attempts, e)
+            else:
+                _record(element, "success", start, attempts)
+
+    store_thread = threading.Thread(
+        target=_store, name="junifer-store", daemon=True
+    )
+    store_thread.start()
+    pending: deque[tuple[Element, Future]] = deque()
+    to_fetch = iter(elements)
+    try:
+        with ThreadPoolExecutor(
+            max_workers=n_jobs, thread_name_prefix="junifer-fetch"
+        ) as executor:
+            try:
+                while True:
+                    _fetch_ahead(
+                        executor,
+                        _fetch,
+                        pending,
+                        to_fetch,
+                        fetch_elements,
+                        fetch_size,
+                    )
+                    if not pending:
+                        break
+                    element, future = pending.popleft()
+                    input, data, _, start, attempts = future.result()
+                    buffer = _StorageBuffer() if storage is not None else None
+                    try:
+                        marker_collection.fit(
+                            input,
+                            read_data=data,
+                            storage=buffer,
+                            markers=(
+                                markers[element]
+                                if markers is not None
+                                else None
+                            ),
+                        )
+                    except Exception as e:
+                        _record(element, "failed", start, attempts, e)
+                        raise
+                    # Allow the datagrabber to free the element's data
+                    if hasattr(datagrabber, "release"):
+                        datagrabber.release(element)
+                    if store_errors:
+                        break
+                    if buffer is not None:
+                        store_queue.put(
+                            (element, buffer.calls, start, attempts)
+                        )
+                    else:
+                        _record(element, "success", start, attempts)
+            finally:
+                # Do not fetch elements which are not needed anymore
+                for _, future in pending:
+                    future.cancel()
+    finally:
+        store_queue.put(None)
+        store_thread.join()
+    if store_errors:
+        raise store_errors[0]
@@ -11,6 +11,8 @@ import importlib.util
 import os
 import shutil
 import sys
+import time
+from copy import deepcopy
 from pathlib import Path
 
 import structlog
@@ -27,21 +29,44 @@ from ..preprocess import BasePreprocessor
 from ..storage import BaseFeatureStorage
 from ..typing import (
     DataGrabberLike,
+    Element,
     Elements,
     MarkerLike,
     PreprocessorLike,
     StorageLike,
 )
-from ..utils import raise_error, warn_with_log, yaml
+from ..utils import config, raise_error, warn_with_log, yaml
+from ._element_listing import (
+    get_dataset_info,
+    load_element_listing,
+    save_element_listing,
+)
+from ._estimate import (
+    estimate_element,
+    format_estimates,
+    get_resource_requests,
+    sample_elements,
+)
+from ._journal import (
+    JOURNAL_NAME,
+    ElementJournal,
+    RetryPolicy,
+    format_journal_summary,
+    get_current_memory,
+    summarize_journal,
+)
+from ._streaming import run_streaming
 
 
 __all__ = [
     "collect",
+    "estimate",
     "list_elements",
     "parse_yaml",
     "queue",
     "reset",
     "run",
+    "status",
 ]
 
 _log = structlog.get_logger("junifer")
@@ -136,6 +161,139 @@ def _get_storage(storage_config: dict) -> StorageLike:
     )
 
 
+def _get_missing_markers(
+    datagrabber: DataGrabberLike,
+    marker_collection: MarkerCollection,
+    elements: list,
+) -> dict:
+    """Get the markers to compute for elements not completely stored.
+
+    Parameters
+    ----------
+    datagrabber : DataGrabber-like object
+        The DataGrabber, already entered.
+    marker_collection : MarkerCollection
+        The validated pipeline.
+    elements : list
+        The elements to check.
+
+    Returns
+    -------
+    dict
+        The names of the markers to compute by element, in order, for the
+        elements with features missing in the storage.
+
+    """
+    # Index without fetching if possible
+    index = getattr(datagrabber, "_index", None)
+    if index is None:
+        warn_with_log(
+            "DataGrabber cannot index elements without fetching, not "
+            "skipping existing elements"
+        )
+        return dict.fromkeys(elements)
+    out = {}
+    n_markers = len(marker_collection._markers)
+    for element in elements:
+        missing = marker_collection.get_missing_markers(index(element))
+        if not missing:
+            logger.info(f"Skipping element {element}, features are stored")
+            continue
+        if len(missing) < n_markers:
+            logger.info(
+                f"Computing only missing markers {missing} for element "
+                f"{element}"
+            )
+        out[element] = missing
+    logger.info(
+        f"Skipping {len(elements) - len(out)} of {len(elements)} elements "
+        "with features stored"
+    )
+    return out
+
+
+def _fit_elements(
+    datagrabber: DataGrabberLike,
+    marker_collection: MarkerCollection,
+    elements: list,
+    journal: ElementJournal | None = None,
+) -> None:
+    """Fit the pipeline on elements.
+
+    If ``pipeline.skipexisting`` config is True, elements whose features are
+    all in the storage are skipped and only the markers with missing
+    features are computed for the other ones.
+
+    If ``pipeline.stream`` config is True, the elements are fetched, computed
+    and stored in overlapped stages via :func:`.run_streaming`, else one
+    after another. Elements failing with transient errors are retried as
+    configured for :class:`.RetryPolicy`.
+
+    Parameters
+    ----------
+    datagrabber : DataGrabber-like object
+        The DataGrabber, already entered.
+    marker_collection : MarkerCollection
+        The validated pipeline to fit.
+    elements : list
+        The elements to fit.
+    journal : ElementJournal or None, optional
+        The journal to record the status of the elements in (default None).
+
+    """
+    # Check the storage before fetching data
+    markers = None
+    if config.get("pipeline.skipexisting", False):
+        start = time.time()
+        markers = _get_missing_markers(
+            datagrabber, marker_collection, elements
+        )
+        if journal is not None:
+            for t_element in elements:
+                if t_element not in markers:
+                    journal.record(t_element, "skipped", start)
+        elements = list(markers)
+    # Plan the order for datagrabbers fetching in the background
+    if hasattr(datagrabber, "prefetch"):
+        datagrabber.prefetch(elements)
+    if config.get("pipeline.stream", False):
+        run_streaming(
+            datagrabber, marker_collection, elements, markers, journal
+        )
+        return
+
+    def _fit(element: Element) -> None:
+        marker_collection.fit(
+            datagrabber[element],
+            markers=markers[element] if markers is not None else None,
+        )
+
+    retry = RetryPolicy()
+    for t_element in elements:
+        start = time.time()
+        if journal is not None:
+            journal.begin(t_element)
+        try:
+            retry.call(f"element {t_element}", _fit, t_element)
+        except Exception as e:
+            if journal is not None:
+                journal.record(
+                    t_element,
+                    "failed",
+                    start,
+                    attempts=retry.attempts,
+                    error=e,
+                )
+            raise
+        if journal is not None:
+            journal.record(
+                t_element, "success", start, attempts=retry.attempts
+            )
+        # Allow the datagrabber to free the element's data
+        if hasattr(datagrabber, "release"):
+            datagrabber.release(t_element)
+
+
 def run(
     workdir: str | Path | dict,
     datagrabber: dict,
@@ -143,6 +301,8 @@ def run(
     storage: dict,
     preprocessors: list[dict] | None = None,
     elements: Elements | None = None,
+    elements_listing: str | Path | None = None,
+    journal: str | Path | None = None,
 ) -> None:
     """Run the pipeline on the selected element.
 
@@ -171,6 +331,15 @@ def run(
     elements : list or None, optional
         Element(s) to process. Will be used to index the DataGrabber
         (default None).
+    elements_listing : str or pathlib.Path or None, optional
+        Path to the element listing written by :func:`queue`. If valid for
+        the DataGrabber, elements are validated against it instead of
+        listing the DataGrabber again (default None).
+    journal : str or pathlib.Path or None, optional
+        Path to the journal directory to record the status, times,
+        attempts, error and peak memory of every element in, as JSON lines
+        in a file of the process. If None, no journal is kept
+        (default None).
 
     Raises
     ------
@@ -229,14 +398,36 @@ def run(
     # Validate the marker collection for the datagrabber
     mc.validate(datagrabber_object)
 
+    # Load element listing
+    listing = None
+    if elements_listing is not None:
+        listing = load_element_listing(
+            Path(elements_listing), datagrabber_object
+        )
+
+    # Journal the status of the elements
+    journal_object = (
+        ElementJournal(Path(journal)) if journal is not None else None
+    )
+
     # Fit elements
     with datagrabber_object:
+        # Use listed elements if the datasets did not change
+        listed_elements = None
+        if listing is not None:
+            if listing["datasets"] == get_dataset_info(datagrabber_object):
+                logger.info("Using element listing")
+                listed_elements = listing["elements"]
+            else:
+                logger.info("Datasets changed, ignoring element listing")
         if elements is not None:
             # Keep track of valid selectors
-            valid_elements = []
-            for t_element in datagrabber_object.filter(elements):
-                valid_elements.append(t_element)
-                mc.fit(datagrabber_object[t_element])
+            valid_elements = list(
+                datagrabber_object.filter(elements, listed_elements)
+            )
+            _fit_elements(
+                datagrabber_object, mc, valid_elements, journal_object
+            )
             # Compute invalid selectors
             invalid_elements = set(elements) - set(valid_elements)
             # Report if invalid selectors are found
@@ -249,8 +440,12 @@ def run(
                     klass=RuntimeError,
                 )
         else:
-            for t_element in datagrabber_object:
-                mc.fit(datagrabber_object[t_element])
+            all_elements = (
+                listed_elements
+                if listed_elements is not None
+                else list(datagrabber_object)
+            )
+            _fit_elements(datagrabber_object, mc, all_elements, journal_object)
 
 
 def collect(storage: dict) -> None:
@@ -298,7 +493,10 @@ def queue(
         Element(s) to process. Will be used to index the DataGrabber
         (default None).
     **kwargs : dict
-        The keyword arguments to pass to the job queue system.
+        The keyword arguments to pass to the job queue system. For
+        ``kind="HTCondor"``, ``mem`` and ``disk`` can be ``"auto"`` to
+        request the maximum of the estimates of a sample of elements (see
+        :func:`estimate`) times ``estimate.margin`` (default 1.5).
 
     Raises
     ------
@@ -364,20 +562,49 @@ def queue(
     logger.info(f"Writing YAML config to {yaml_config.resolve()!s}")
     yaml.dump(config, stream=yaml_config)
 
-    # Get list of elements
+    # Get list of elements; only a listing of the datagrabber is complete,
+    # other elements are selectors
+    listed_elements = None
     if elements is None:
         if "elements" in config:
             elements = config["elements"]
         else:
             # If no elements are specified, use all elements from the
             # datagrabber
-            datagrabber = _get_datagrabber(config["datagrabber"])
+            datagrabber = _get_datagrabber(config["datagrabber"].copy())
             with datagrabber as dg:
                 elements = dg.get_elements()
+                listed_elements = elements
+                # Allow jobs to skip listing the datagrabber again
+                save_element_listing(
+                    jobdir / "element_listing.json", dg, elements
+                )
     # Listify elements
     if not isinstance(elements, list):
         elements: Elements = [elements]
 
+    # Estimate resource requests
+    auto_resources = [
+        x
+        for x in ["mem", "disk"]
+        if kind == "HTCondor" and kwargs.get(x) == "auto"
+    ]
+    if auto_resources:
+        preprocessors = config.get("preprocess")
+        if preprocessors is not None and not isinstance(preprocessors, list):
+            preprocessors = [preprocessors]
+        estimates = _estimate_elements(
+            datagrabber=deepcopy(config["datagrabber"]),
+            markers=deepcopy(config["markers"]),
+            preprocessors=deepcopy(preprocessors),
+            elements=elements,
+            listed_elements=listed_elements,
+        )
+        requests = get_resource_requests(list(estimates.values()))
+        for x in auto_resources:
+            logger.info(f"Requesting {requests[x]} of {x} from estimates")
+            kwargs[x] = requests[x]
+
     # Check job queueing system
     adapter = None
     if kind == "HTCondor":
@@ -480,6 +707,167 @@ def list_elements(
     return "\n".join(elements_to_list)
 
 
+def _estimate_elements(
+    datagrabber: dict,
+    markers: list[dict],
+    preprocessors: list[dict] | None = None,
+    elements: Elements | None = None,
+    listed_elements: list | None = None,
+    n_elements: int = 3,
+) -> dict:
+    """Estimate the resources needed by a sample of elements.
+
+    Parameters
+    ----------
+    datagrabber : dict
+        DataGrabber to use. Must have a key ``kind`` with the kind of
+        DataGrabber to use. All other keys are passed to the DataGrabber
+        constructor.
+    markers : list of dict
+        List of markers to extract, as for :func:`run`.
+    preprocessors : list of dict or None, optional
+        List of preprocessors to use, as for :func:`run` (default None).
+    elements : list or None, optional
+        Element(s) to sample from. Will be used to index the DataGrabber
+        (default None).
+    listed_elements : list or None, optional
+        The elements of the DataGrabber. If None, the DataGrabber is listed
+        (default None).
+    n_elements : int, optional
+        The number of elements to sample (default 3).
+
+    Returns
+    -------
+    dict
+        The estimates of :func:`.estimate_element` by element.
+
+    """
+    datagrabber_object = _get_datagrabber(datagrabber)
+    built_markers = [_get_marker(marker) for marker in markers]
+    built_preprocessors = (
+        [_get_preprocessor(x) for x in preprocessors]
+        if preprocessors is not None
+        else None
+    )
+    MarkerCollection(
+        markers=built_markers, preprocessors=built_preprocessors
+    ).validate(datagrabber_object)
+    # Memory of the process running the pipeline, measured before any data
+    # is fetched or estimated
+    baseline = get_current_memory() or 0
+    estimates = {}
+    with datagrabber_object:
+        if elements is not None:
+            all_elements = list(
+                datagrabber_object.filter(elements, listed_elements)
+            )
+        elif listed_elements is not None:
+            all_elements = listed_elements
+        else:
+            all_elements = datagrabber_object.get_elements()
+        for element in sample_elements(all_elements, n_elements):
+            logger.info(f"Estimating resources for element {element}")
+            estimates[element] = estimate_element(
+                datagrabber_object,
+                datagrabber_object[element],
+                built_preprocessors,
+                built_markers,
+                baseline=baseline,
+            )
+            # Only the headers were needed, do not keep the data
+            if hasattr(datagrabber_object, "drop"):
+                datagrabber_object.drop(element)
+    return estimates
+
+
+def estimate(
+    datagrabber: dict,
+    markers: list[dict],
+    preprocessors: list[dict] | None = None,
+    elements: Elements | None = None,
+    n_elements: int = 3,
+    show_components: bool = False,
+) -> str:
+    """Estimate the resources needed to run the pipeline.
+
+    For a sample of elements, only the NIfTI headers of the data are read
+    and combined with the cost models of the preprocessors and markers to
+    estimate the peak memory, temporary disk usage and output size per
+    element. Data of DataLad-based DataGrabbers is fetched for the sampled
+    elements.
+
+    Parameters
+    ----------
+    datagrabber : dict
+        DataGrabber to use. Must have a key ``kind`` with the kind of
+        DataGrabber to use. All other keys are passed to the DataGrabber
+        constructor.
+    markers : list of dict
+        List of markers to extract, as for :func:`run`.
+    preprocessors : list of dict or None, optional
+        List of preprocessors to use, as for :func:`run` (default None).
+    elements : list or None, optional
+        Element(s) to sample from. Will be used to index the DataGrabber
+        (default None).
+    n_elements : int, optional
+        The number of elements to sample, evenly spread over the elements
+        (default 3).
+    show_components : bool, optional
+        Whether to list the estimates of every preprocessor and marker
+        (default False).
+
+    Returns
+    -------
+    str
+        The estimates per element and their maximum.
+
+    """
+    estimates = _estimate_elements(
+        datagrabber=deepcopy(datagrabber),
+        markers=deepcopy(markers),
+        preprocessors=deepcopy(preprocessors),
+        elements=elements,
+        n_elements=n_elements,
+    )
+    return format_estimates(estimates, show_components=show_components)
+
+
+def status(path: str | Path, show_failed: bool = False) -> str:
+    """Summarize the journal of a job.
+
+    Parameters
+    ----------
+    path : str or pathlib.Path
+        The job directory, the journal directory or the path to a journal
+        file.
+    show_failed : bool, optional
+        Whether to list the failed elements (default False).
+
+    Returns
+    -------
+    str
+        The number of elements by status, throughput, durations, peak memory
+        and failures by error class.
+
+    Raises
+    ------
+    FileNotFoundError
+        If no journal is found.
+
+    """
+    path = Path(path)
+    if (path / JOURNAL_NAME).is_dir():
+        path = path / JOURNAL_NAME
+    if not (path.is_file() or any(path.glob("*.jsonl"))):
+        raise_error(
+            msg=f"No journal found at {path.resolve()!s}",
+            klass=FileNotFoundError,
+        )
+    return format_journal_summary(
+        summarize_journal(path), show_failed=show_failed
+    )
+
+
 def parse_yaml(filepath: str | Path) -> dict:  # noqa: C901
     """Parse YAML.
 
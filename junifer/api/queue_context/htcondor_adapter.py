@@ -11,6 +11,7 @@ from typing import Any
 
 from ...typing import Elements
 from ...utils import make_executable, raise_error, run_ext_cmd
+from .._journal import JOURNAL_NAME
 from .queue_context_adapter import (
     EnvKind,
     EnvShell,
@@ -149,6 +150,7 @@ class HTCondorAdapter(QueueContextAdapter):
             "run "
             f"{self.yaml_config_path.resolve()!s} "
             f"{verbose_args}"
+            f"--journal {self.job_dir.resolve()!s}/{JOURNAL_NAME} "
             "--element $(element)"
         )
         log_dir_prefix = (
@@ -0,0 +1,188 @@
+"""Provide tests for element listings of DataGrabbers."""
+
+# Authors: Synchon Mandal <s.mandal@fz-juelich.de>
+# License: AGPL
+
+import os
+from pathlib import Path
+
+import pytest
+from pydantic import AnyUrl
+
+from junifer.api._element_listing import (
+    get_dataset_info,
+    load_element_listing,
+    save_element_listing,
+)
+from junifer.datagrabber import (
+    MultipleDataGrabber,
+    PatternDataGrabber,
+    PatternDataladDataGrabber,
+)
+from junifer.testing.datagrabbers import OasisVBMTestingDataGrabber
+from junifer.utils import config
+
+
+def _make_datagrabber(
+    datadir: Path, space: str = "native"
+) -> MultipleDataGrabber:
+    """Create a DataGrabber with a datalad-based one.
+
+    Parameters
+    ----------
+    datadir : pathlib.Path
+        The data directory of the pattern-based DataGrabber.
+    space : str, optional
+        The space of the T1w data type (default "native").
+
+    Returns
+    -------
+    MultipleDataGrabber
+        The DataGrabber.
+
+    """
+    dg1 = PatternDataGrabber(
+        datadir=datadir,
+        types=["T1w"],
+        patterns={
+            "T1w": {
+                "pattern": "{subject}/{session}/{subject}_T1w.nii.gz",
+                "space": space,
+            },
+        },
+        replacements=["subject", "session"],
+    )
+    dg2 = PatternDataladDataGrabber(
+        uri=AnyUrl("https://gin.g-node.org/juaml/datalad-example-bids"),
+        types=["BOLD"],
+        patterns={
+            "BOLD": {
+                "pattern": "{subject}/{session}/{subject}_bold.nii.gz",
+                "space": "MNI152NLin6Asym",
+            },
+        },
+        replacements=["subject", "session"],
+    )
+    return MultipleDataGrabber(datagrabbers=[dg1, dg2])
+
+
+def _make_data(datadir: Path) -> None:
+    """Create the data of the pattern-based DataGrabber.
+
+    Parameters
+    ----------
+    datadir : pathlib.Path
+        The data directory.
+
+    """
+    for subject in ["sub-01", "sub-02"]:
+        (datadir / subject / "ses-01").mkdir(parents=True)
+        (datadir / subject / "ses-01" / f"{subject}_T1w.nii.gz").touch()
+    # Directories modified just before listing are not trusted
+    for path in [datadir, *datadir.glob("**")]:
+        os.utime(path, (0, 0))
+
+
+def test_element_listing(tmp_path: Path) -> None:
+    """Test saving and loading element listings.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+
+    """
+    path = tmp_path / "element_listing.json"
+    elements = [("sub-01", "ses-01"), ("sub-02", "ses-01")]
+    datadir = tmp_path / "data"
+    _make_data(datadir)
+    dg = _make_datagrabber(datadir)
+    # Listing the pattern-based DataGrabber indexes its directories
+    assert sorted(dg.datagrabbers[0].get_elements()) == elements
+    save_element_listing(path, dg, elements)
+
+    # Missing listing
+    assert load_element_listing(tmp_path / "missing.json", dg) is None
+    # Different parameters
+    assert (
+        load_element_listing(path, _make_datagrabber(datadir, "MNI")) is None
+    )
+
+    # Same parameters but different temporary datalad directory
+    new_dg = _make_datagrabber(datadir)
+    assert new_dg.datagrabbers[1].datadir != dg.datagrabbers[1].datadir
+    listing = load_element_listing(path, new_dg)
+    assert listing is not None
+    assert listing["elements"] == elements
+    assert listing["datasets"] == get_dataset_info(new_dg)
+    # Known dataset state is set on datalad-based DataGrabbers
+    assert new_dg.datagrabbers[1]._known_dataset == listing["datasets"][0]
+    # Elements are filtered without listing the DataGrabber
+    assert list(new_dg.filter(["sub-02"], listing["elements"])) == [
+        ("sub-02", "ses-01")
+    ]
+
+
+def test_element_listing_files_changed(tmp_path: Path) -> None:
+    """Test element listings are ignored if the directories change.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+
+    """
+    path = tmp_path / "element_listing.json"
+    datadir = tmp_path / "data"
+    _make_data(datadir)
+    dg = _make_datagrabber(datadir)
+    elements = dg.datagrabbers[0].get_elements()
+    save_element_listing(path, dg, elements)
+    assert load_element_listing(path, _make_datagrabber(datadir)) is not None
+    # New session of a listed subject
+    (datadir / "sub-01" / "ses-02").mkdir()
+    assert load_element_listing(path, _make_datagrabber(datadir)) is None
+
+
+@pytest.mark.parametrize(
+    "index, datagrabber",
+    [
+        (True, OasisVBMTestingDataGrabber()),
+        (
+            False,
+            PatternDataGrabber(
+                datadir=Path("."),
+                types=["T1w"],
+                patterns={
+                    "T1w": {
+                        "pattern": "{subject}_T1w.nii.gz",
+                        "space": "native",
+                    },
+                },
+                replacements=["subject"],
+            ),
+        ),
+    ],
+)
+def test_element_listing_unknown_files(
+    tmp_path: Path, index: bool, datagrabber: PatternDataGrabber
+) -> None:
+    """Test element listings are not saved if changes cannot be detected.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+    index : bool
+        The value of ``datagrabber.index``.
+    datagrabber : DataGrabber-like object
+        The DataGrabber.
+
+    """
+    path = tmp_path / "element_listing.json"
+    config.set(key="datagrabber.index", val=index)
+    try:
+        save_element_listing(path, datagrabber, ["sub-01"])
+    finally:
+        config.delete("datagrabber.index")
+    assert not path.exists()
@@ -0,0 +1,388 @@
+"""Provide tests for estimating the resources needed by a run."""
+
+# Authors: Synchon Mandal <s.mandal@fz-juelich.de>
+# License: AGPL
+
+from collections.abc import Iterator
+from pathlib import Path
+
+import nibabel as nib
+import numpy as np
+import pytest
+
+from junifer.api import estimate, queue
+from junifer.api._estimate import (
+    estimate_element,
+    get_resource_requests,
+    sample_elements,
+)
+from junifer.api.functions import _estimate_elements
+from junifer.data import deregister_data, register_data
+from junifer.datagrabber import PatternDataGrabber
+from junifer.utils import config, yaml
+
+
+@pytest.fixture
+def coords() -> Iterator[str]:
+    """Register coordinates of four spheres.
+
+    Yields
+    ------
+    str
+        The name of the coordinates.
+
+    """
+    register_data(
+        kind="coordinates",
+        name="test_estimate_coords",
+        coordinates=np.array([[0, 0, 0], [6, 6, 6], [12, 0, 0], [0, 12, 0]]),
+        voi_names=["a", "b", "c", "d"],
+        space="MNI152NLin6Asym",
+    )
+    yield "test_estimate_coords"
+    deregister_data(kind="coordinates", name="test_estimate_coords")
+
+
+@pytest.fixture
+def datagrabber(tmp_path: Path) -> dict:
+    """Return a DataGrabber with a BOLD image per element as dictionary.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+
+    Returns
+    -------
+    dict
+        The DataGrabber.
+
+    """
+    for i in range(5):
+        nib.save(
+            nib.Nifti1Image(np.ones((8, 9, 7, 20), np.int16), np.eye(4)),
+            tmp_path / f"sub-0{i}_bold.nii.gz",
+        )
+    return {
+        "kind": "PatternDataGrabber",
+        "datadir": str(tmp_path),
+        "types": ["BOLD"],
+        "patterns": {
+            "BOLD": {
+                "pattern": "{subject}_bold.nii.gz",
+                "space": "MNI152NLin6Asym",
+            },
+        },
+        "replacements": ["subject"],
+    }
+
+
+@pytest.mark.parametrize(
+    "n_elements, expected",
+    [
+        (1, [0]),
+        (2, [0, 9]),
+        (3, [0, 4, 9]),
+        (4, [0, 3, 6, 9]),
+        (20, list(range(10))),
+    ],
+)
+def test_sample_elements(n_elements: int, expected: list[int]) -> None:
+    """Test sample_elements.
+
+    Parameters
+    ----------
+    n_elements : int
+        The parametrized number of elements to sample.
+    expected : list of int
+        The parametrized expected elements.
+
+    """
+    assert sample_elements(list(range(10)), n_elements) == expected
+
+
+def test_get_resource_requests() -> None:
+    """Test get_resource_requests."""
+    estimates = [
+        {"memory": 2 * 1024**3, "disk": 100, "output": 0},
+        {"memory": 1024**3, "disk": 1024**2, "output": 0},
+    ]
+    assert get_resource_requests(estimates) == {"mem": "3072M", "disk": "2M"}
+    config.set(key="estimate.margin", val=1)
+    try:
+        assert get_resource_requests(estimates) == {
+            "mem": "2048M",
+            "disk": "1M",
+        }
+    finally:
+        config.delete("estimate.margin")
+
+
+def test_estimate(
+    datagrabber: dict, coords: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test estimating the resources of elements.
+
+    Parameters
+    ----------
+    datagrabber : dict
+        The DataGrabber as dictionary.
+    coords : str
+        The name of the coordinates.
+    monkeypatch : pytest.MonkeyPatch
+        The pytest.MonkeyPatch object.
+
+    """
+    # Memory of the process after building the pipeline
+    monkeypatch.setattr(
+        "junifer.api.functions.get_current_memory", lambda: 1024**2
+    )
+    markers = [
+        {
+            "kind": "FunctionalConnectivitySpheres",
+            "name": "fc",
+            "coords": coords,
+            "radius": 5,
+        },
+        {
+            "kind": "SphereAggregation",
+            "name": "agg",
+            "coords": coords,
+            "on": "BOLD",
+        },
+        {
+            "kind": "ParcelAggregation",
+            "name": "missing",
+            "parcellation": "missing",
+            "on": "BOLD",
+        },
+    ]
+    preprocessors = [
+        {"kind": "TemporalFilter", "low_pass": 0.1, "t_r": 2.0},
+    ]
+    with pytest.warns(RuntimeWarning, match="Cannot estimate the cost"):
+        estimates = _estimate_elements(
+            datagrabber=datagrabber.copy(),
+            markers=[x.copy() for x in markers],
+            preprocessors=[x.copy() for x in preprocessors],
+            elements=["sub-01", "sub-02", "sub-04"],
+            n_elements=2,
+        )
+    assert len(estimates) == 2
+    assert set(estimates) <= {"sub-01", "sub-02", "sub-04"}
+    nbytes = 8 * 9 * 7 * 20 * 8
+    element_estimate = next(iter(estimates.values()))
+    components = element_estimate["components"]
+    assert components["TemporalFilter (BOLD)"]["memory"] == 4 * nbytes
+    # ROI² for the connectivity matrix
+    assert components["fc"] == {
+        "memory": 2 * nbytes + 2 * 4 * 4 * 8,
+        "disk": 0,
+        "output": 4 * 4 * 8,
+    }
+    # Regions x timepoints for the timeseries
+    assert components["agg"]["output"] == 4 * 20 * 8
+    assert components["missing"] is None
+    assert element_estimate["output"] == 4 * 4 * 8 + 4 * 20 * 8
+    assert element_estimate["memory"] == 1024**2 + max(
+        x["memory"] for x in components.values() if x is not None
+    )
+    assert element_estimate["disk"] > 0
+
+    out = estimate(
+        datagrabber=datagrabber,
+        markers=markers[:2],
+        preprocessors=preprocessors,
+        show_components=True,
+    )
+    assert "TemporalFilter (BOLD)" in out
+    assert "Maximum" in out
+    # Configuration is not modified
+    assert datagrabber["kind"] == "PatternDataGrabber"
+    assert all("kind" in x for x in markers + preprocessors)
+
+
+def test_estimate_drop(
+    datagrabber: dict, coords: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test the data of the sampled elements is dropped after estimating.
+
+    Parameters
+    ----------
+    datagrabber : dict
+        The DataGrabber as dictionary.
+    coords : str
+        The name of the coordinates.
+    monkeypatch : pytest.MonkeyPatch
+        The pytest.MonkeyPatch object.
+
+    """
+    dropped = []
+    monkeypatch.setattr(
+        PatternDataGrabber,
+        "drop",
+        lambda self, element: dropped.append(element),
+        raising=False,
+    )
+    estimates = _estimate_elements(
+        datagrabber=datagrabber,
+        markers=[
+            {
+                "kind": "SphereAggregation",
+                "name": "agg",
+                "coords": coords,
+                "on": "BOLD",
+            }
+        ],
+        elements=["sub-01", "sub-02", "sub-04"],
+        n_elements=2,
+    )
+    assert dropped == list(estimates)
+
+
+def test_estimate_element_datalad(datagrabber: dict) -> None:
+    """Test estimating the disk usage of DataLad-based DataGrabbers.
+
+    Parameters
+    ----------
+    datagrabber : dict
+        The DataGrabber as dictionary.
+
+    """
+
+    class _DataladDataGrabber:
+        datalad_id = "id"
+
+    path = Path(datagrabber["datadir"]) / "sub-00_bold.nii.gz"
+    input = {"BOLD": {"path": path, "space": "MNI152NLin6Asym"}}
+    # Input files are fetched
+    assert (
+        estimate_element(_DataladDataGrabber(), input, None, [])["disk"]
+        == path.stat().st_size
+    )
+    assert estimate_element(object(), input, None, [])["disk"] == 0
+
+
+def test_queue_auto_resources(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    datagrabber: dict,
+    coords: str,
+) -> None:
+    """Test queueing with estimated resource requests.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+    monkeypatch : pytest.MonkeyPatch
+        The pytest.MonkeyPatch object.
+    datagrabber : dict
+        The DataGrabber as dictionary.
+    coords : str
+        The name of the coordinates.
+
+    """
+    with monkeypatch.context() as m:
+        m.chdir(tmp_path)
+        queue(
+            config={
+                "workdir": str(tmp_path.resolve()),
+                "datagrabber": datagrabber,
+                "markers": [
+                    {
+                        "kind": "FunctionalConnectivitySpheres",
+                        "name": "fc",
+                        "coords": coords,
+                        "radius": 5,
+                    }
+                ],
+                "storage": {
+                    "kind": "SQLiteFeatureStorage",
+                    "uri": str((tmp_path / "out.sqlite").resolve()),
+                },
+            },
+            kind="HTCondor",
+            jobname="auto_resources",
+            mem="auto",
+        )
+    job_dir = tmp_path / "junifer_jobs" / "auto_resources"
+    submit = (job_dir / "run_auto_resources.submit").read_text()
+    assert "request_memory = 8G" not in submit
+    assert "request_disk = 1G" in submit
+    mem = next(
+        x for x in submit.splitlines() if x.startswith("request_memory")
+    )
+    assert mem.endswith("M")
+    # Configuration is written as given
+    yaml_config = yaml.load(job_dir / "config.yaml")
+    assert yaml_config["datagrabber"]["kind"] == "PatternDataGrabber"
+    assert yaml_config["markers"][0]["kind"] == "FunctionalConnectivitySpheres"
+
+
+def test_queue_auto_resources_partial_selector(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, coords: str
+) -> None:
+    """Test queueing with estimated resources and a partial selector.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+    monkeypatch : pytest.MonkeyPatch
+        The pytest.MonkeyPatch object.
+    coords : str
+        The name of the coordinates.
+
+    """
+    for subject in ["sub-01", "sub-02"]:
+        for session in ["ses-01", "ses-02"]:
+            nib.save(
+                nib.Nifti1Image(np.ones((8, 9, 7, 20), np.int16), np.eye(4)),
+                tmp_path / f"{subject}_{session}_bold.nii.gz",
+            )
+    with monkeypatch.context() as m:
+        m.chdir(tmp_path)
+        queue(
+            config={
+                "workdir": str(tmp_path.resolve()),
+                "datagrabber": {
+                    "kind": "PatternDataGrabber",
+                    "datadir": str(tmp_path),
+                    "types": ["BOLD"],
+                    "patterns": {
+                        "BOLD": {
+                            "pattern": "{subject}_{session}_bold.nii.gz",
+                            "space": "MNI152NLin6Asym",
+                        },
+                    },
+                    "replacements": ["subject", "session"],
+                },
+                "markers": [
+                    {
+                        "kind": "FunctionalConnectivitySpheres",
+                        "name": "fc",
+                        "coords": coords,
+                        "radius": 5,
+                    }
+                ],
+                "storage": {
+                    "kind": "SQLiteFeatureStorage",
+                    "uri": str((tmp_path / "out.sqlite").resolve()),
+                },
+            },
+            kind="HTCondor",
+            jobname="auto_resources_selector",
+            elements=["sub-01"],
+            mem="auto",
+        )
+    submit = (
+        tmp_path
+        / "junifer_jobs"
+        / "auto_resources_selector"
+        / "run_auto_resources_selector.submit"
+    ).read_text()
+    mem = next(
+        x for x in submit.splitlines() if x.startswith("request_memory")
+    )
+    assert mem.endswith("M")
@@ -9,17 +9,29 @@ import logging
 import sys
 from contextlib import AbstractContextManager, nullcontext
 from pathlib import Path
-from typing import Any
+from typing import Any, ClassVar
 
+import nibabel as nib
+import numpy as np
 import pytest
 from nibabel.filebasedimages import ImageFileError
 from ruamel.yaml import YAML
 
 import junifer.testing.registry  # noqa: F401
 from junifer.api import collect, list_elements, parse_yaml, queue, reset, run
+from junifer.api._journal import ElementJournal, read_journal
+from junifer.api.functions import _fit_elements
+from junifer.datagrabber import DataType, PatternDataGrabber
 from junifer.datagrabber.base import BaseDataGrabber
-from junifer.pipeline import PipelineComponentRegistry
+from junifer.markers import BaseMarker
+from junifer.pipeline import (
+    MarkerCollection,
+    PipelineComponentRegistry,
+    WorkDirManager,
+)
+from junifer.storage import SQLiteFeatureStorage, StorageType
 from junifer.typing import Elements
+from junifer.utils import config
 
 
 # Configure YAML class
@@ -627,6 +639,10 @@ def test_queue_without_elements(
                 kind="HTCondor",
             )
             assert "Queue done" in caplog.text
+        # Element listing is written for the jobs
+        assert (
+            tmp_path / "junifer_jobs" / "junifer_job" / "element_listing.json"
+        ).is_file()
 
 
 def test_reset_run(
@@ -1025,3 +1041,165 @@ def test_parse_yaml_queue_venv_relative(tmp_path: Path) -> None:
     fname = tmp_path / "test_parse_yaml_queue_venv_relative.yaml"
     fname.write_text("queue:\n  env:\n    kind: venv\n    name: .venv\n")
     _ = parse_yaml(fname)
+
+
+class _MeanMarker(BaseMarker):
+    """Marker computing the mean of the BOLD data."""
+
+    _MARKER_INOUT_MAPPINGS: ClassVar = {
+        DataType.BOLD: {"mean": StorageType.Vector},
+    }
+
+    def compute(
+        self, input: dict[str, Any], extra_input: dict | None = None
+    ) -> dict:
+        return {
+            "mean": {
+                "data": np.array([[input["data"].get_fdata().mean()]]),
+                "col_names": ["mean"],
+            }
+        }
+
+
+def _make_bold_datagrabber(
+    tmp_path: Path, elements: list[str]
+) -> PatternDataGrabber:
+    """Create a DataGrabber with a BOLD image per element.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+    elements : list of str
+        The subjects.
+
+    Returns
+    -------
+    PatternDataGrabber
+        The DataGrabber.
+
+    """
+    WorkDirManager().workdir = tmp_path / "workdir"
+    for subject in elements:
+        nib.save(
+            nib.Nifti1Image(np.ones((4, 5, 3, 6), np.float32), np.eye(4)),
+            tmp_path / f"{subject}_bold.nii.gz",
+        )
+    return PatternDataGrabber(
+        datadir=tmp_path,
+        types=["BOLD"],
+        patterns={
+            "BOLD": {
+                "pattern": "{subject}_bold.nii.gz",
+                "space": "MNI152NLin6Asym",
+            },
+        },
+        replacements=["subject"],
+    )
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_fit_elements_skip_existing(tmp_path: Path, stream: bool) -> None:
+    """Test fitting elements skipping the ones stored.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+    stream : bool
+        The parametrized flag to overlap the pipeline stages.
+
+    """
+    elements = ["sub-01", "sub-02", "sub-03"]
+    dg = _make_bold_datagrabber(tmp_path, elements)
+    storage = SQLiteFeatureStorage(
+        uri=tmp_path / "out.sqlite", single_output=False
+    )
+    # Store the first marker for the first two elements
+    mc = MarkerCollection(
+        markers=[_MeanMarker(name="first")],  # type: ignore
+        storage=storage,
+    )
+    mc.validate(dg)
+    with dg:
+        _fit_elements(dg, mc, elements[:2])
+
+    mc = MarkerCollection(
+        markers=[
+            _MeanMarker(name="first"),  # type: ignore
+            _MeanMarker(name="second"),  # type: ignore
+        ],
+        storage=storage,
+    )
+    mc.validate(dg)
+    calls = []
+    fit = mc.fit
+
+    def _fit(input: dict, **kwargs: Any) -> None:
+        calls.append((input["BOLD"]["meta"]["element"], kwargs["markers"]))
+        return fit(input, **kwargs)
+
+    mc.fit = _fit  # type: ignore
+    config.set(key="pipeline.skipexisting", val=True)
+    config.set(key="pipeline.stream", val=stream)
+    try:
+        with dg:
+            _fit_elements(dg, mc, elements)
+            assert calls == [
+                ({"subject": "sub-01"}, ["second"]),
+                ({"subject": "sub-02"}, ["second"]),
+                ({"subject": "sub-03"}, ["first", "second"]),
+            ]
+            # All elements are complete now
+            calls.clear()
+            _fit_elements(dg, mc, elements)
+            assert calls == []
+    finally:
+        config.delete("pipeline.skipexisting")
+        config.delete("pipeline.stream")
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_fit_elements_journal(tmp_path: Path, stream: bool) -> None:
+    """Test fitting elements with a journal.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+    stream : bool
+        The parametrized flag to overlap the pipeline stages.
+
+    """
+    elements = ["sub-01", "sub-02"]
+    dg = _make_bold_datagrabber(tmp_path, elements)
+    # Not an image
+    (tmp_path / "sub-03_bold.nii.gz").write_text("foo")
+    mc = MarkerCollection(
+        markers=[_MeanMarker(name="mean")],  # type: ignore
+        storage=SQLiteFeatureStorage(
+            uri=tmp_path / "out.sqlite", single_output=False
+        ),
+    )
+    mc.validate(dg)
+    journal = ElementJournal(tmp_path / "journal")
+    config.set(key="pipeline.skipexisting", val=True)
+    config.set(key="pipeline.stream", val=stream)
+    try:
+        with dg:
+            _fit_elements(dg, mc, elements, journal=journal)
+            with pytest.raises(ImageFileError):
+                _fit_elements(dg, mc, [*elements, "sub-03"], journal=journal)
+    finally:
+        config.delete("pipeline.skipexisting")
+        config.delete("pipeline.stream")
+    records = list(read_journal(tmp_path / "journal"))
+    assert [(x["element"], x["status"]) for x in records] == [
+        ("sub-01", "success"),
+        ("sub-02", "success"),
+        ("sub-01", "skipped"),
+        ("sub-02", "skipped"),
+        ("sub-03", "failed"),
+    ]
+    assert records[-1]["error"] == "ImageFileError"
+    assert all(x["attempts"] == 1 for x in records)
@@ -0,0 +1,233 @@
+"""Provide tests for journaling and retrying elements of a run."""
+
+# Authors: Synchon Mandal <s.mandal@fz-juelich.de>
+# License: AGPL
+
+import json
+import time
+from pathlib import Path
+
+import pytest
+
+from junifer.api._journal import (
+    ElementJournal,
+    RetryPolicy,
+    format_journal_summary,
+    is_transient_error,
+    read_journal,
+    summarize_journal,
+)
+from junifer.utils import config
+
+
+class _Flaky:
+    """Callable failing a number of times before succeeding."""
+
+    def __init__(self, n_failures: int, error: type[Exception]) -> None:
+        self.n_failures = n_failures
+        self.error = error
+        self.n_calls = 0
+
+    def __call__(self, value: int) -> int:
+        self.n_calls += 1
+        if self.n_calls <= self.n_failures:
+            raise self.error("flaky")
+        return value
+
+
+def test_is_transient_error() -> None:
+    """Test is_transient_error."""
+    assert is_transient_error(ConnectionResetError())
+    assert is_transient_error(TimeoutError())
+    assert not is_transient_error(ValueError())
+    # Raised from a transient error
+    try:
+        try:
+            raise ConnectionError("foo")
+        except ConnectionError as e:
+            raise RuntimeError("bar") from e
+    except RuntimeError as e:
+        assert is_transient_error(e)
+    # Configured error classes
+    config.set(key="pipeline.retry.errors", val="ValueError, KeyError")
+    try:
+        assert is_transient_error(ValueError())
+        assert not is_transient_error(TimeoutError())
+    finally:
+        config.delete("pipeline.retry.errors")
+
+
+@pytest.mark.parametrize(
+    "n_failures, error, attempts, raises",
+    [
+        (0, ConnectionError, 1, False),
+        (2, ConnectionError, 3, False),
+        (3, ConnectionError, 3, True),
+        (1, ValueError, 1, True),
+    ],
+)
+def test_retry_policy(
+    n_failures: int, error: type[Exception], attempts: int, raises: bool
+) -> None:
+    """Test RetryPolicy.
+
+    Parameters
+    ----------
+    n_failures : int
+        The parametrized number of failures before success.
+    error : Exception subclass
+        The parametrized error class raised.
+    attempts : int
+        The parametrized expected number of attempts.
+    raises : bool
+        The parametrized flag for the error to be raised.
+
+    """
+    config.set(key="pipeline.retry.count", val=2)
+    config.set(key="pipeline.retry.delay", val=0)
+    try:
+        retry = RetryPolicy()
+        func = _Flaky(n_failures, error)
+        if raises:
+            with pytest.raises(error, match="flaky"):
+                retry.call("test", func, 1)
+        else:
+            assert retry.call("test", func, value=1) == 1
+    finally:
+        config.delete("pipeline.retry.count")
+        config.delete("pipeline.retry.delay")
+    assert retry.attempts == attempts
+    assert func.n_calls == attempts
+
+
+def test_retry_policy_default() -> None:
+    """Test RetryPolicy not retrying by default."""
+    func = _Flaky(1, ConnectionError)
+    with pytest.raises(ConnectionError):
+        RetryPolicy().call("test", func, 1)
+    assert func.n_calls == 1
+
+
+def test_journal(tmp_path: Path) -> None:
+    """Test ElementJournal and its summary.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+
+    """
+    path = tmp_path / "job" / "journal"
+    journal = ElementJournal(path)
+    assert journal.path.parent == path
+    journal.record(("sub-01", "ses-01"), "failed", 0, 10, 2, TimeoutError())
+    journal.record(("sub-01", "ses-01"), "success", 100, 130, 1)
+    journal.record(("sub-02", "ses-01"), "success", 100, 110)
+    journal.record(("sub-03", "ses-01"), "skipped", 200, 200)
+    journal.record(("sub-04", "ses-01"), "failed", 300, 3600, 3, OSError("x"))
+    # Partially written line of a killed job
+    with journal.path.open("a") as f:
+        f.write('{"element": ["sub-05"')
+
+    records = list(read_journal(path))
+    assert records == list(read_journal(journal.path))
+    assert len(records) == 5
+    assert records[0]["element"] == ["sub-01", "ses-01"]
+    assert records[0]["attempts"] == 2
+    assert records[0]["error"] == "TimeoutError"
+    assert records[-1]["message"] == "x"
+    assert records[1]["error"] is None
+
+    summary = summarize_journal(path)
+    assert summary["elements"] == 4
+    assert summary["status"] == {"success": 2, "skipped": 1, "failed": 1}
+    assert summary["attempts"] == 5
+    assert summary["start"] == 0
+    assert summary["end"] == 3600
+    assert summary["throughput"] == pytest.approx(2.0)
+    assert summary["duration"] == {"median": 20, "max": 30}
+    assert summary["errors"] == {"OSError": 1}
+    assert summary["failed"] == {"OSError": [["sub-04", "ses-01"]]}
+
+    out = format_journal_summary(summary)
+    assert "Elements: 4 (5 records)" in out
+    assert "failed: 1" in out
+    assert "OSError: 1" in out
+    assert "sub-04,ses-01" not in out
+    assert "sub-04,ses-01" in format_journal_summary(summary, True)
+
+
+def test_journal_directory(tmp_path: Path) -> None:
+    """Test summarizing the journal files of several jobs.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+
+    """
+    path = tmp_path / "journal"
+    ElementJournal(path).record("sub-01", "failed", 0, 10, error=OSError())
+    # Journal of another job retrying the element, sorted before the first
+    other = path / "a-1.jsonl"
+    records = [
+        {"element": "sub-01", "status": "success", "start": 20, "end": 30},
+        {"element": "sub-02", "status": "success", "start": 0, "end": 5},
+    ]
+    other.write_text("".join(f"{json.dumps(x)}\n" for x in records))
+    # Malformed records
+    with other.open("a") as f:
+        f.write("[1, 2]\n")
+        f.write('{"status": "success", "start": 0, "end": 1}\n')
+        f.write('{"element": "sub-03", "status": "success", "start": 0}\n')
+        f.write(
+            '{"element": "sub-03", "status": "success", "start": "0", '
+            '"end": 1}\n'
+        )
+        f.write("not json\n")
+
+    assert len(list(read_journal(path))) == 3
+    summary = summarize_journal(path)
+    assert summary["elements"] == 2
+    assert summary["attempts"] == 3
+    assert summary["status"] == {"success": 2}
+    assert summary["end"] == 30
+    assert summary["errors"] == {}
+
+
+def test_journal_memory(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test ElementJournal measuring the memory per element.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+    monkeypatch : pytest.MonkeyPatch
+        The pytest.MonkeyPatch object.
+
+    """
+    memory = {"current": 100}
+    monkeypatch.setattr(
+        "junifer.api._journal.get_current_memory", lambda: memory["current"]
+    )
+    monkeypatch.setattr("junifer.api._journal._MEMORY_INTERVAL", 0.01)
+    path = tmp_path / "journal"
+    journal = ElementJournal(path)
+
+    journal.begin("sub-01")
+    memory["current"] = 500
+    time.sleep(0.2)
+    memory["current"] = 200
+    journal.record("sub-01", "success", 0)
+    # Peak of the process before the element is not included
+    journal.begin("sub-02")
+    memory["current"] = 300
+    journal.record("sub-02", "success", 0)
+    # Not measured
+    journal.record("sub-03", "skipped", 0)
+
+    records = list(read_journal(path))
+    assert [x["memory"] for x in records] == [500, 300, None]
+    assert summarize_journal(path)["memory"] == 500
@@ -0,0 +1,177 @@
+"""Provide tests for running the pipeline with overlapped stages."""
+
+# Authors: Synchon Mandal <s.mandal@fz-juelich.de>
+# License: AGPL
+
+import threading
+from pathlib import Path
+from typing import Any, ClassVar
+
+import nibabel as nib
+import numpy as np
+import pytest
+
+from junifer.api._streaming import run_streaming
+from junifer.pipeline import MarkerCollection, WorkDirManager
+from junifer.utils import config
+
+
+class _DataGrabber:
+    """DataGrabber returning a BOLD image per element."""
+
+    def __init__(self, datadir: Path, fail: str | None = None) -> None:
+        self.datadir = datadir
+        self.fail = fail
+        self.released = []
+
+    def __getitem__(self, element: str) -> dict[str, Any]:
+        if element == self.fail:
+            raise ValueError(f"Cannot get {element}")
+        return {
+            "BOLD": {
+                "path": self.datadir / f"{element}.nii",
+                "space": "MNI152NLin6Asym",
+                "meta": {"element": {"subject": element}},
+            }
+        }
+
+    def release(self, element: str) -> None:
+        self.released.append(element)
+
+
+class _SumMarker:
+    """Marker storing the sum of the BOLD data."""
+
+    name = "sum"
+    on: ClassVar[list[str]] = ["BOLD"]
+
+    def fit_transform(self, input: dict[str, Any], storage: Any) -> dict:
+        storage.store(
+            kind="scalar",
+            element=input["BOLD"]["meta"]["element"]["subject"],
+            value=float(input["BOLD"]["data"].get_fdata().sum()),
+        )
+        return {}
+
+
+class _Storage:
+    """Storage recording the stored features and threads."""
+
+    def __init__(self, fail: bool = False) -> None:
+        self.fail = fail
+        self.stored = []
+        self.threads = set()
+
+    def store(self, kind: str, **kwargs: Any) -> None:
+        if self.fail:
+            raise RuntimeError("Cannot store")
+        self.threads.add(threading.current_thread().name)
+        self.stored.append((kind, kwargs["element"], kwargs["value"]))
+
+
+@pytest.fixture
+def datadir(tmp_path: Path) -> Path:
+    """Return a directory with a BOLD image per element.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+
+    Returns
+    -------
+    pathlib.Path
+        The data directory.
+
+    """
+    WorkDirManager().workdir = tmp_path / "workdir"
+    for i in range(5):
+        nib.save(
+            nib.Nifti1Image(np.full((4, 5, 3, 2), i, np.float32), np.eye(4)),
+            tmp_path / f"sub-0{i}.nii",
+        )
+    return tmp_path
+
+
+@pytest.mark.parametrize(
+    "fetch_elements, fetch_size",
+    [
+        (1, None),
+        (3, None),
+        (3, 1e-9),
+    ],
+)
+def test_run_streaming(
+    datadir: Path, fetch_elements: int, fetch_size: float | None
+) -> None:
+    """Test run_streaming.
+
+    Parameters
+    ----------
+    datadir : pathlib.Path
+        The data directory.
+    fetch_elements : int
+        The parametrized number of elements fetched ahead.
+    fetch_size : float or None
+        The parametrized size of files fetched ahead.
+
+    """
+    config.set(key="pipeline.stream.fetch.elements", val=fetch_elements)
+    if fetch_size is not None:
+        config.set(key="pipeline.stream.fetch.size", val=fetch_size)
+    storage = _Storage()
+    dg = _DataGrabber(datadir)
+    mc = MarkerCollection(
+        markers=[_SumMarker()],  # type: ignore
+        storage=storage,  # type: ignore
+    )
+    elements = [f"sub-0{i}" for i in range(5)]
+    try:
+        run_streaming(dg, mc, elements)
+    finally:
+        config.delete("pipeline.stream.fetch.elements")
+        if fetch_size is not None:
+            config.delete("pipeline.stream.fetch.size")
+    # Stored in order in the store thread
+    assert storage.stored == [
+        ("scalar", x, i * 120.0) for i, x in enumerate(elements)
+    ]
+    assert storage.threads == {"junifer-store"}
+    assert dg.released == elements
+
+
+@pytest.mark.parametrize(
+    "fail_fetch, fail_store, match",
+    [
+        ("sub-02", False, "Cannot get sub-02"),
+        (None, True, "Cannot store"),
+    ],
+)
+def test_run_streaming_errors(
+    datadir: Path, fail_fetch: str | None, fail_store: bool, match: str
+) -> None:
+    """Test run_streaming errors.
+
+    Parameters
+    ----------
+    datadir : pathlib.Path
+        The data directory.
+    fail_fetch : str or None
+        The parametrized element failing to be fetched.
+    fail_store : bool
+        The parametrized flag to fail storing.
+    match : str
+        The parametrized error message.
+
+    """
+    storage = _Storage(fail=fail_store)
+    dg = _DataGrabber(datadir, fail=fail_fetch)
+    mc = MarkerCollection(
+        markers=[_SumMarker()],  # type: ignore
+        storage=storage,  # type: ignore
+    )
+    with pytest.raises((ValueError, RuntimeError), match=match):
+        run_streaming(dg, mc, [f"sub-0{i}" for i in range(5)])
+    if fail_fetch is not None:
+        # Elements before are computed and stored
+        assert [x[1] for x in storage.stored] == ["sub-00", "sub-01"]
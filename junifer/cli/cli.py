@@ -32,6 +32,7 @@ __all__ = [
     "ants_docker",
     "cli",
     "collect",
+    "estimate",
     "freesurfer_docker",
     "fsl_docker",
     "list_elements",
@@ -40,6 +41,7 @@ __all__ = [
     "run",
     "selftest",
     "setup",
+    "status",
     "wtf",
 ]
 
@@ -123,6 +125,11 @@ def cli() -> None:  # pragma: no cover
     ),
 )
 @click.option("--element", type=str, multiple=True)
+@click.option(
+    "--journal",
+    type=click.Path(file_okay=False, writable=True, path_type=pathlib.Path),
+    default=None,
+)
 @click.option(
     "-v",
     "--verbose",
@@ -139,6 +146,7 @@ def cli() -> None:  # pragma: no cover
 def run(
     filepath: click.Path,
     element: tuple[str],
+    journal: click.Path | None,
     verbose: str | int,
     verbose_datalad: str | int | None,
 ) -> None:
@@ -152,6 +160,9 @@ def run(
         The filepath to the configuration file.
     element : tuple of str
         The element(s) to operate on.
+    journal : click.Path or None
+        The path to the journal directory to record the status of the
+        elements in. If None, no journal is kept.
     verbose : click.Choice
         The verbosity level: warning, info or debug (default "info").
     verbose_datalad : click.Choice or None
@@ -186,6 +197,8 @@ def run(
         storage=storage,
         preprocessors=preprocessors,
         elements=elements,
+        elements_listing=filepath.parent / "element_listing.json",
+        journal=journal,
     )
 
 
@@ -528,6 +541,103 @@ def list_elements(
         click.secho(listed_elements, fg="blue")
 
 
+@cli.command()
+@click.argument(
+    "filepath",
+    type=click.Path(
+        exists=True, readable=True, dir_okay=False, path_type=pathlib.Path
+    ),
+)
+@click.option("--element", type=str, multiple=True)
+@click.option("--sample", type=click.IntRange(min=1), default=3)
+@click.option("--show-components", is_flag=True)
+@click.option(
+    "-v",
+    "--verbose",
+    type=click.UNPROCESSED,
+    callback=_validate_verbose,
+    default="info",
+)
+@click.option(
+    "--verbose-datalad",
+    type=click.UNPROCESSED,
+    callback=_validate_optional_verbose,
+    default=None,
+)
+def estimate(
+    filepath: click.Path,
+    element: tuple[str],
+    sample: int,
+    show_components: bool,
+    verbose: str | int,
+    verbose_datalad: str | int | None,
+) -> None:
+    """Estimate memory, disk and output size per element.
+
+    \f
+
+    Parameters
+    ----------
+    filepath : click.Path
+        The filepath to the configuration file.
+    element : tuple of str
+        The element(s) to sample from.
+    sample : int
+        The number of elements to estimate.
+    show_components : bool
+        Whether to show the estimates of the preprocessors and markers.
+    verbose : click.Choice
+        The verbosity level: warning, info or debug (default "info").
+    verbose_datalad : click.Choice or None
+        The verbosity level for datalad: warning, info or debug (default None).
+
+    """
+    # Setup logging
+    configure_logging(level=verbose, level_datalad=verbose_datalad)
+    # Parse YAML
+    config = cli_func.parse_yaml(filepath)
+    # Fetch preprocessors
+    preprocessors = config.get("preprocess")
+    # Convert to list if single preprocessor
+    if preprocessors is not None and not isinstance(preprocessors, list):
+        preprocessors = [preprocessors]
+    # Parse elements
+    elements = parse_elements(element, config)
+    # Perform operation
+    estimates = cli_func.estimate(
+        datagrabber=config["datagrabber"],
+        markers=config["markers"],
+        preprocessors=preprocessors,
+        elements=elements,
+        n_elements=sample,
+        show_components=show_components,
+    )
+    click.echo(estimates)
+
+
+@cli.command()
+@click.argument(
+    "jobdir",
+    type=click.Path(exists=True, readable=True, path_type=pathlib.Path),
+)
+@click.option("--show-failed", is_flag=True)
+def status(jobdir: click.Path, show_failed: bool) -> None:
+    """Summarize the status of the elements of a job.
+
+    \f
+
+    Parameters
+    ----------
+    jobdir : click.Path
+        The job directory, the journal directory or the path to a journal
+        file.
+    show_failed : bool
+        Whether to list the failed elements.
+
+    """
+    click.echo(cli_func.status(jobdir, show_failed=show_failed))
+
+
 @cli.group()
 def setup() -> None:  # pragma: no cover
     """Configure external tools."""
@@ -7,17 +7,22 @@
 from collections.abc import Callable
 from pathlib import Path
 
+import nibabel as nib
+import numpy as np
 import pytest
 from click.testing import CliRunner
 from ruamel.yaml import YAML
 
+from junifer.api._journal import ElementJournal
 from junifer.cli.cli import (
     collect,
+    estimate,
     list_elements,
     queue,
     reset,
     run,
     selftest,
+    status,
     wtf,
 )
 from junifer.cli.parser import _parse_elements_file
@@ -380,6 +385,103 @@ def test_list_elements_output_file(
         assert f"{elements[0]}\n{elements[1]}" == f.read()
 
 
+def test_estimate(tmp_path: Path) -> None:
+    """Test estimate command.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+
+    """
+    for subject in ["sub-01", "sub-02"]:
+        nib.save(
+            nib.Nifti1Image(np.ones((4, 5, 3, 10), np.int16), np.eye(4)),
+            tmp_path / f"{subject}_bold.nii.gz",
+        )
+    infile = tmp_path / "in.yaml"
+    yaml.dump(
+        {
+            "workdir": str(tmp_path.resolve()),
+            "datagrabber": {
+                "kind": "PatternDataGrabber",
+                "datadir": str(tmp_path.resolve()),
+                "types": ["BOLD"],
+                "patterns": {
+                    "BOLD": {
+                        "pattern": "{subject}_bold.nii.gz",
+                        "space": "MNI152NLin6Asym",
+                    },
+                },
+                "replacements": ["subject"],
+            },
+            "preprocess": {
+                "kind": "TemporalFilter",
+                "low_pass": 0.1,
+                "t_r": 2.0,
+            },
+            "markers": [
+                {
+                    "kind": "TemporalSNRParcels",
+                    "name": "tsnr",
+                    "parcellation": "Schaefer100x7",
+                },
+            ],
+            "storage": {
+                "kind": "SQLiteFeatureStorage",
+                "uri": str((tmp_path / "out.sqlite").resolve()),
+            },
+        },
+        stream=infile,
+    )
+    result = runner.invoke(
+        estimate,
+        [
+            str(infile),
+            "--element",
+            "sub-02",
+            "--sample",
+            "1",
+            "--show-components",
+        ],
+    )
+    assert result.exit_code == 0
+    assert "sub-02" in result.output
+    assert "sub-01" not in result.output
+    assert "TemporalFilter (BOLD)" in result.output
+
+
+def test_status(tmp_path: Path) -> None:
+    """Test status command.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+
+    """
+    # Missing journal
+    result = runner.invoke(status, [str(tmp_path)])
+    assert result.exit_code != 0
+    journal = ElementJournal(tmp_path / "journal")
+    journal.record("sub-01", "success", 0, 10)
+    journal.record("sub-02", "failed", 0, 20, error=OSError("foo"))
+    # Job directory
+    result = runner.invoke(status, [str(tmp_path)])
+    assert result.exit_code == 0
+    assert "success: 1" in result.output
+    assert "OSError: 1" in result.output
+    assert "sub-02" not in result.output
+    # Journal directory
+    result = runner.invoke(status, [str(tmp_path / "journal")])
+    assert result.exit_code == 0
+    assert "success: 1" in result.output
+    # Journal file
+    result = runner.invoke(status, [str(journal.path), "--show-failed"])
+    assert result.exit_code == 0
+    assert "sub-02" in result.output
+
+
 def test_wtf_short() -> None:
     """Test short version of wtf command."""
     # Invoke wtf command
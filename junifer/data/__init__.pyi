@@ -8,6 +8,7 @@ __all__ = [
     "get_data",
     "list_data",
     "load_data",
+    "prefetch_data",
     "register_data",
     "deregister_data",
     "get_template",
@@ -26,6 +27,7 @@ from ._dispatch import (
     get_data,
     list_data,
     load_data,
+    prefetch_data,
     register_data,
     deregister_data,
 )
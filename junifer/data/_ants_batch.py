@@ -0,0 +1,368 @@
+"""Provide class for batched warping via ANTs."""
+
+# Authors: Synchon Mandal <s.mandal@fz-juelich.de>
+# License: AGPL
+
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import nibabel as nib
+import numpy as np
+import structlog
+
+from ..pipeline import WorkDirManager
+from ..utils import config, run_ext_cmd
+
+
+if TYPE_CHECKING:
+    from nibabel.nifti1 import Nifti1Image
+
+
+__all__ = ["ANTsApplyTransformsBatch"]
+
+_log = structlog.get_logger("junifer")
+logger = _log.bind(pkg="data")
+
+# Warped images by input, reference grid, transform and interpolation
+_WARPED: OrderedDict[str, "Nifti1Image"] = OrderedDict()
+_WARPED_SIZE = 64
+
+
+def _get_job_cpus() -> int | None:
+    """Get the number of CPUs requested by the job running the process.
+
+    Returns
+    -------
+    int or None
+        The number of CPUs requested from Slurm or HTCondor, or None if not
+        running as a job.
+
+    """
+    cpus = os.environ.get("SLURM_CPUS_PER_TASK")
+    if cpus:
+        return int(cpus)
+    # HTCondor provides the job ClassAd as a file
+    job_ad = os.environ.get("_CONDOR_JOB_AD")
+    if job_ad:
+        try:
+            for line in Path(job_ad).read_text().splitlines():
+                key, _, value = line.partition("=")
+                if key.strip().lower() == "requestcpus":
+                    return int(value.strip())
+        except (OSError, ValueError) as e:
+            logger.debug(f"Cannot read requested CPUs from {job_ad}: {e}")
+    return None
+
+
+def _get_n_jobs() -> int:
+    """Get the number of concurrent ANTs processes.
+
+    Returns
+    -------
+    int
+        The value of ``data.warp.njobs`` if set, else the number of CPUs
+        requested by the job or, if not running as a job, the number of
+        CPUs available to the process.
+
+    """
+    n_jobs = config.get("data.warp.njobs")
+    if n_jobs is None:
+        n_jobs = _get_job_cpus()
+    if n_jobs is None:
+        try:
+            n_jobs = len(os.sched_getaffinity(0))
+        except AttributeError:  # pragma: no cover
+            n_jobs = os.cpu_count() or 1
+    return max(int(n_jobs), 1)
+
+
+def _get_img_source(img: "Nifti1Image") -> dict[str, Any]:
+    """Get the source of an image added without one.
+
+    Parameters
+    ----------
+    img : nibabel.nifti1.Nifti1Image
+        The image.
+
+    Returns
+    -------
+    dict
+        The path, modification time and size of the file the image is
+        loaded from or, for images in memory, the MD5 hash of the data.
+
+    """
+    filename = img.get_filename()
+    if filename is not None and Path(filename).exists():
+        stat = Path(filename).stat()
+        return {
+            "path": str(Path(filename).resolve()),
+            "mtime": stat.st_mtime_ns,
+            "size": stat.st_size,
+        }
+    return {
+        "md5": hashlib.md5(
+            np.ascontiguousarray(img.dataobj).tobytes(),
+            usedforsecurity=False,
+        ).hexdigest()
+    }
+
+
+def _is_valid(img: "Nifti1Image") -> bool:
+    """Check that a warped image can still be loaded.
+
+    Parameters
+    ----------
+    img : nibabel.nifti1.Nifti1Image
+        The image.
+
+    Returns
+    -------
+    bool
+        False if the image is backed by a file which has been cleaned up.
+
+    """
+    filename = img.get_filename()
+    return filename is None or Path(filename).exists()
+
+
+class ANTsApplyTransformsBatch:
+    """Class for batched warping via ANTs.
+
+    This class collects warps to be done via ANTs ``antsApplyTransforms`` and
+    runs them together. 3D images with the same grid, reference grid,
+    transform and interpolation are stacked and warped in a single
+    invocation, so that the transform is loaded once for all of them. The
+    invocations run as concurrent processes, bounded by ``n_jobs``.
+
+    Warped images are kept in memory for the element, so that a warp which
+    was done before (for example, by another marker) is not done again.
+
+    Parameters
+    ----------
+    n_jobs : int, optional
+        The maximum number of concurrent ``antsApplyTransforms`` processes.
+        If None, will use ``data.warp.njobs`` config, the number of CPUs
+        requested by the job or the number of CPUs available to the process
+        (default None).
+
+    """
+
+    def __init__(self, n_jobs: int | None = None) -> None:
+        self.n_jobs = n_jobs if n_jobs is not None else _get_n_jobs()
+        self._jobs: list[dict[str, Any]] = []
+
+    def add(
+        self,
+        img: "Nifti1Image",
+        reference_path: Path,
+        xfm_path: Path,
+        interpolation: str,
+        source: dict[str, Any] | None = None,
+    ) -> int:
+        """Add a warp to the batch.
+
+        Parameters
+        ----------
+        img : nibabel.nifti1.Nifti1Image
+            The image to warp.
+        reference_path : pathlib.Path
+            The path to the reference image defining the output grid.
+        xfm_path : pathlib.Path
+            The path to the transform.
+        interpolation : str
+            The interpolation method of ``antsApplyTransforms``.
+        source : dict or None, optional
+            The source of ``img``, e.g., the registry definition of the data
+            it is loaded from, identifying it to re-use earlier warps. If
+            None, the file ``img`` is loaded from or, for images in memory,
+            the hash of the data is used (default None).
+
+        Returns
+        -------
+        int
+            The index of the warped image in the output of :meth:`run`.
+
+        """
+        reference_path = Path(reference_path)
+        xfm_path = Path(xfm_path)
+        ref_header = nib.load(reference_path).header
+        xfm_stat = xfm_path.stat()
+        if source is None:
+            source = _get_img_source(img)
+        hasher = hashlib.md5(usedforsecurity=False)
+        hasher.update(
+            json.dumps(source, sort_keys=True, default=str).encode("utf-8")
+        )
+        hasher.update(np.asarray(img.affine, dtype=np.float64).tobytes())
+        hasher.update(
+            repr(
+                (
+                    img.shape,
+                    ref_header.get_data_shape()[:3],
+                    np.round(ref_header.get_best_affine(), 6).tolist(),
+                    str(xfm_path.resolve()),
+                    xfm_stat.st_mtime_ns,
+                    xfm_stat.st_size,
+                    interpolation,
+                )
+            ).encode("utf-8")
+        )
+        self._jobs.append(
+            {
+                "img": img,
+                "reference_path": reference_path,
+                "xfm_path": xfm_path,
+                "interpolation": interpolation,
+                "key": hasher.hexdigest(),
+            }
+        )
+        return len(self._jobs) - 1
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def run(self) -> list["Nifti1Image"]:
+        """Run the batch.
+
+        Returns
+        -------
+        list of nibabel.nifti1.Nifti1Image
+            The warped images, in the order they were added.
+
+        Raises
+        ------
+        RuntimeError
+            If ``antsApplyTransforms`` fails.
+
+        """
+        # Group pending warps
+        groups: dict[tuple, list[str]] = {}
+        for job in self._jobs:
+            key = job["key"]
+            if key in _WARPED and _is_valid(_WARPED[key]):
+                logger.debug("Using already warped image")
+                continue
+            img = job["img"]
+            if len(img.shape) == 3:
+                group_key = (
+                    str(job["reference_path"].resolve()),
+                    str(job["xfm_path"].resolve()),
+                    job["interpolation"],
+                    img.shape,
+                    np.round(img.affine, 6).tobytes(),
+                )
+            else:
+                # Cannot be stacked
+                group_key = (key,)
+            group = groups.setdefault(group_key, [])
+            if key not in group:
+                group.append(key)
+
+        jobs = {job["key"]: job for job in self._jobs}
+        group_jobs = [[jobs[key] for key in keys] for keys in groups.values()]
+        if group_jobs:
+            logger.info(
+                f"Warping {sum(len(x) for x in group_jobs)} image(s) with "
+                f"{len(group_jobs)} antsApplyTransforms invocation(s)"
+            )
+        # Create element-scoped tempdirs so that warped images are
+        # available later as nibabel stores file path reference for
+        # loading on computation
+        tempdirs = [
+            WorkDirManager().get_element_tempdir(
+                prefix="ants_apply_transforms_batch"
+            )
+            for _ in group_jobs
+        ]
+        n_jobs = min(self.n_jobs, len(group_jobs))
+        if n_jobs > 1:
+            with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+                # Propagate errors
+                results = list(
+                    executor.map(self._run_group, group_jobs, tempdirs)
+                )
+        else:
+            results = [
+                self._run_group(x, y)
+                for x, y in zip(group_jobs, tempdirs, strict=True)
+            ]
+        for keys, imgs in zip(groups.values(), results, strict=True):
+            for key, img in zip(keys, imgs, strict=True):
+                _WARPED[key] = img
+                _WARPED.move_to_end(key)
+
+        out = [_WARPED[job["key"]] for job in self._jobs]
+        while len(_WARPED) > _WARPED_SIZE:
+            _WARPED.popitem(last=False)
+        self._jobs = []
+        return out
+
+    def _run_group(
+        self, jobs: list[dict[str, Any]], element_tempdir: Path
+    ) -> list["Nifti1Image"]:
+        """Warp a group of images via a single invocation.
+
+        Parameters
+        ----------
+        jobs : list of dict
+            The warps sharing reference, transform, interpolation and grid.
+        element_tempdir : pathlib.Path
+            The element-scoped tempdir to use.
+
+        Returns
+        -------
+        list of nibabel.nifti1.Nifti1Image
+            The warped images.
+
+        """
+        if len(jobs) == 1:
+            # Saving points the image to the file, so save a new image
+            # sharing the data to keep the image's source
+            img = jobs[0]["img"]
+            prewarp_img = nib.Nifti1Image(img.dataobj, img.affine, img.header)
+        else:
+            # Stack as time series
+            data = [np.asanyarray(job["img"].dataobj) for job in jobs]
+            prewarp_img = nib.Nifti1Image(
+                np.stack(data, axis=-1).astype(np.result_type(*data)),
+                jobs[0]["img"].affine,
+            )
+        # Save existing image to a tempfile
+        prewarp_path = element_tempdir / "prewarp.nii.gz"
+        nib.save(prewarp_img, prewarp_path)
+        # Create a tempfile for warped output
+        warped_path = element_tempdir / "warped.nii.gz"
+        # Set antsApplyTransforms command
+        apply_transforms_cmd = [
+            "antsApplyTransforms",
+            "-d 3",
+            "-e 3",
+            f"-n {jobs[0]['interpolation']}",
+            f"-i {prewarp_path.resolve()}",
+            f"-r {jobs[0]['reference_path'].resolve()}",
+            f"-t {jobs[0]['xfm_path'].resolve()}",
+            f"-o {warped_path.resolve()}",
+        ]
+        # Call antsApplyTransforms
+        run_ext_cmd(name="antsApplyTransforms", cmd=apply_transforms_cmd)
+
+        # Load nifti
+        warped_img = nib.load(warped_path)
+        if len(jobs) == 1:
+            return [warped_img]
+        # Split time series
+        warped_data = np.asanyarray(warped_img.dataobj)
+        warped_data = warped_data.reshape(*warped_data.shape[:3], len(jobs))
+        return [
+            nib.Nifti1Image(
+                warped_data[..., i].copy(),
+                warped_img.affine,
+                header=warped_img.header,
+            )
+            for i in range(len(jobs))
+        ]
@@ -15,6 +15,7 @@ from typing import (
 from numpy.typing import ArrayLike
 
 from ..utils import raise_error
+from ._ants_batch import ANTsApplyTransformsBatch
 from .coordinates import CoordinatesRegistry
 from .maps import MapsRegistry
 from .masks import MaskRegistry
@@ -31,6 +32,7 @@ __all__ = [
     "get_data",
     "list_data",
     "load_data",
+    "prefetch_data",
     "register_data",
 ]
 
@@ -158,6 +160,43 @@ def get_data(
         )
 
 
+def prefetch_data(requests: list[dict[str, Any]]) -> None:
+    """Warp data of several kinds for their targets together.
+
+    All the warps to native space via ANTs needed by ``requests`` are
+    collected and run as one batch of concurrent ANTs invocations,
+    so that later calls to :func:`.get_data` with the same arguments re-use
+    the warped images instead of invoking ANTs again.
+
+    Parameters
+    ----------
+    requests : list of dict
+        The keyword arguments of :func:`.get_data` for each request, i.e.,
+        ``kind``, ``names``, ``target_data`` and optionally ``extra_input``.
+
+    Raises
+    ------
+    ValueError
+        If ``kind`` is invalid value.
+
+    """
+    batch = ANTsApplyTransformsBatch()
+    for request in requests:
+        try:
+            registry = DataDispatcher()[request["kind"]]
+        except KeyError:
+            raise_error(f"Unknown data kind: {request['kind']}")
+        else:
+            registry().prefetch(
+                request["names"],
+                target_data=request["target_data"],
+                extra_input=request.get("extra_input"),
+                batch=batch,
+            )
+    if len(batch) > 0:
+        batch.run()
+
+
 def list_data(kind: str) -> list[str]:
     """List available data for ``kind``.
 
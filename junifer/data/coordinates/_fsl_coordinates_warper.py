@@ -8,7 +8,7 @@ from typing import Any
 import numpy as np
 from numpy.typing import ArrayLike
 
-from ...pipeline import WorkDirManager
+from ...pipeline import WorkDirManager, ensure_data_path
 from ...utils import run_ext_cmd
 
 
@@ -71,7 +71,7 @@ class FSLCoordinatesWarper:
             "cat",
             f"{pretransform_coordinates_path.resolve()}",
             "| img2imgcoord -mm",
-            f"-src {target_data['path'].resolve()}",
+            f"-src {ensure_data_path(target_data).resolve()}",
             f"-dest {target_data['reference']['path'].resolve()}",
             f"-warp {warp_data['path'].resolve()}",
             f"> {transformed_coords_path.resolve()};",
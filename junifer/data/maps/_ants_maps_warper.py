@@ -9,7 +9,8 @@ from typing import TYPE_CHECKING, Any
 import nibabel as nib
 
 from ...pipeline import WorkDirManager
-from ...utils import raise_error, run_ext_cmd
+from ...utils import raise_error
+from .._ants_batch import ANTsApplyTransformsBatch
 from ..template_spaces import get_template, get_xfm
 
 
@@ -74,18 +75,6 @@ class ANTsMapsWarper:
         # Imported here to avoid circular import
         from ._maps import logger
 
-        # Create element-scoped tempdir so that warped maps is
-        # available later as nibabel stores file path reference for
-        # loading on computation
-        prefix = (
-            f"ants_maps_warper_{maps_name}"
-            f"{'' if not src else f'_from_{src}'}_to_{dst}_"
-            f"{uuid.uuid1()}"
-        )
-        element_tempdir = WorkDirManager().get_element_tempdir(
-            prefix=prefix,
-        )
-
         # Native space warping
         if dst == "native":  # pragma: no cover
             # Warp data check
@@ -98,31 +87,31 @@ class ANTsMapsWarper:
 
             logger.debug("Using ANTs for maps transformation")
 
-            # Save existing maps image to a tempfile
-            prewarp_maps_path = element_tempdir / "prewarp_maps.nii.gz"
-            nib.save(maps_img, prewarp_maps_path)
-
-            # Create a tempfile for warped output
-            warped_maps_path = element_tempdir / "maps_warped.nii.gz"
-            # Set antsApplyTransforms command
-            apply_transforms_cmd = [
-                "antsApplyTransforms",
-                "-d 3",
-                "-e 3",
-                "-n LanczosWindowedSinc",
-                f"-i {prewarp_maps_path.resolve()}",
+            # Warp via a batch of one, re-using an earlier warp if possible
+            batch = ANTsApplyTransformsBatch()
+            batch.add(
+                img=maps_img,
                 # use resampled reference
-                f"-r {target_data['reference']['path'].resolve()}",
-                f"-t {warp_data['path'].resolve()}",
-                f"-o {warped_maps_path.resolve()}",
-            ]
-            # Call antsApplyTransforms
-            run_ext_cmd(name="antsApplyTransforms", cmd=apply_transforms_cmd)
+                reference_path=target_data["reference"]["path"],
+                xfm_path=warp_data["path"],
+                interpolation="LanczosWindowedSinc",
+            )
+            warped_maps_img = batch.run()[0]
 
         # Template space warping
         else:
             logger.debug(f"Using ANTs to warp maps from {src} to {dst}")
 
+            # Create element-scoped tempdir for the template
+            prefix = (
+                f"ants_maps_warper_{maps_name}"
+                f"{'' if not src else f'_from_{src}'}_to_{dst}_"
+                f"{uuid.uuid1()}"
+            )
+            element_tempdir = WorkDirManager().get_element_tempdir(
+                prefix=prefix,
+            )
+
             # Get xfm file
             xfm_file_path = get_xfm(src=src, dst=dst)
             # Get template space image
@@ -135,25 +124,14 @@ class ANTsMapsWarper:
             template_space_img_path = element_tempdir / f"{dst}_T1w.nii.gz"
             nib.save(template_space_img, template_space_img_path)
 
-            # Save existing maps image to a tempfile
-            prewarp_maps_path = element_tempdir / "prewarp_maps.nii.gz"
-            nib.save(maps_img, prewarp_maps_path)
-
-            # Create a tempfile for warped output
-            warped_maps_path = element_tempdir / "maps_warped.nii.gz"
-            # Set antsApplyTransforms command
-            apply_transforms_cmd = [
-                "antsApplyTransforms",
-                "-d 3",
-                "-e 3",
-                "-n LanczosWindowedSinc",
-                f"-i {prewarp_maps_path.resolve()}",
-                f"-r {template_space_img_path.resolve()}",
-                f"-t {xfm_file_path.resolve()}",
-                f"-o {warped_maps_path.resolve()}",
-            ]
-            # Call antsApplyTransforms
-            run_ext_cmd(name="antsApplyTransforms", cmd=apply_transforms_cmd)
-
-        # Load nifti
-        return nib.load(warped_maps_path)
+            # Warp via a batch of one, re-using an earlier warp if possible
+            batch = ANTsApplyTransformsBatch()
+            batch.add(
+                img=maps_img,
+                reference_path=template_space_img_path,
+                xfm_path=xfm_file_path,
+                interpolation="LanczosWindowedSinc",
+            )
+            warped_maps_img = batch.run()[0]
+
+        return warped_maps_img
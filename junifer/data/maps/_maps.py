@@ -13,6 +13,7 @@ import structlog
 from junifer_data import get
 
 from ...utils import raise_error
+from .._ants_batch import ANTsApplyTransformsBatch
 from ..pipeline_data_registry_base import BasePipelineDataRegistry
 from ..utils import (
     JUNIFER_DATA_PARAMS,
@@ -251,6 +252,112 @@ class MapsRegistry(BasePipelineDataRegistry):
 
         return maps_img, maps_labels, maps_fname, space
 
+    def _load_in_std_space(
+        self,
+        name: str,
+        target_std_space: str,
+        target_data: dict[str, Any],
+        resolution: float,
+    ) -> tuple["Nifti1Image", list[str]]:
+        """Load maps and warp them to the target standard space.
+
+        Parameters
+        ----------
+        name : str
+            The name of the maps.
+        target_std_space : str
+            The template space to warp to.
+        target_data : dict
+            The corresponding item of the data object to which the maps
+            will be applied.
+        resolution : float
+            The resolution to load the maps in.
+
+        Returns
+        -------
+        Nifti1Image
+            The maps image.
+        list of str
+            Maps labels.
+
+        """
+        # Load maps
+        logger.debug(f"Loading map(s) {name}")
+        img, labels, _, space = self.load(
+            name=name,
+            resolution=resolution,
+            target_space=target_data["space"],
+        )
+
+        # Convert maps spaces if required;
+        # cannot be "native" due to earlier check
+        if space != target_std_space:
+            logger.debug(
+                f"Warping {name} to {target_std_space} space using ANTs."
+            )
+            raw_img = ANTsMapsWarper().warp(
+                maps_name=name,
+                maps_img=img,
+                src=space,
+                dst=target_std_space,
+                target_data=target_data,
+                warp_data=None,
+            )
+            # Remove extra dimension added by ANTs
+            img = nimg.math_img("np.squeeze(img)", img=raw_img)
+        return img, labels
+
+    def prefetch(
+        self,
+        maps: str,
+        target_data: dict[str, Any],
+        extra_input: dict[str, Any] | None,
+        batch: ANTsApplyTransformsBatch,
+    ) -> None:
+        """Add native space warp via ANTs of maps to ``batch``.
+
+        Nothing is added if ``target_data`` is not in native space or the
+        native space warper is not ANTs.
+
+        Parameters
+        ----------
+        maps : str
+            The name of the maps.
+        target_data : dict
+            The corresponding item of the data object to which the maps
+            will be applied.
+        extra_input : dict or None
+            The other fields in the data object.
+        batch : ANTsApplyTransformsBatch
+            The batch to add to.
+
+        """
+        if target_data["space"] != "native" or extra_input is None:
+            return
+        warper_spec = get_native_warper(
+            target_data=target_data,
+            other_data=extra_input,
+        )
+        if warper_spec["warper"] != "ants":
+            return
+        if "path" not in target_data.get("reference", {}):
+            raise_error("No `path` provided in `reference`")
+        resolution = np.min(target_data["data"].header.get_zooms()[:3])
+        img, _ = self._load_in_std_space(
+            name=maps,
+            target_std_space=warper_spec["src"],
+            target_data=target_data,
+            resolution=resolution,
+        )
+        batch.add(
+            img=img,
+            # use resampled reference
+            reference_path=target_data["reference"]["path"],
+            xfm_path=warper_spec["path"],
+            interpolation="LanczosWindowedSinc",
+            source=self._get_source(maps, warper_spec["src"], resolution),
+        )
+
     def get(
         self,
         maps: str,
@@ -314,31 +421,13 @@ class MapsRegistry(BasePipelineDataRegistry):
         target_img = target_data["data"]
         resolution = np.min(target_img.header.get_zooms()[:3])
 
-        # Load maps
-        logger.debug(f"Loading map(s) {maps}")
-        img, labels, _, space = self.load(
+        img, labels = self._load_in_std_space(
             name=maps,
+            target_std_space=target_std_space,
+            target_data=target_data,
             resolution=resolution,
-            target_space=target_space,
         )
 
-        # Convert maps spaces if required;
-        # cannot be "native" due to earlier check
-        if space != target_std_space:
-            logger.debug(
-                f"Warping {maps} to {target_std_space} space using ANTs."
-            )
-            raw_img = ANTsMapsWarper().warp(
-                maps_name=maps,
-                maps_img=img,
-                src=space,
-                dst=target_std_space,
-                target_data=target_data,
-                warp_data=None,
-            )
-            # Remove extra dimension added by ANTs
-            img = nimg.math_img("np.squeeze(img)", img=raw_img)
-
         if target_space != "native":
             # No warping is going to happen, just resampling, because
             # we are in the correct space
@@ -367,14 +456,21 @@ class MapsRegistry(BasePipelineDataRegistry):
                     warp_data=warper_spec,
                 )
             elif warper_spec["warper"] == "ants":
-                img = ANTsMapsWarper().warp(
-                    maps_name="native",
-                    maps_img=img,
-                    src="",
-                    dst="native",
-                    target_data=target_data,
-                    warp_data=warper_spec,
+                if "path" not in target_data.get("reference", {}):
+                    raise_error("No `path` provided in `reference`")
+                # Warp via a batch of one, re-using a prefetched warp
+                batch = ANTsApplyTransformsBatch()
+                batch.add(
+                    img=img,
+                    # use resampled reference
+                    reference_path=target_data["reference"]["path"],
+                    xfm_path=warper_spec["path"],
+                    interpolation="LanczosWindowedSinc",
+                    source=self._get_source(
+                        maps, target_std_space, resolution
+                    ),
                 )
+                img = batch.run()[0]
 
         return img, labels
 
@@ -10,7 +10,8 @@ import nibabel as nib
 import numpy as np
 
 from ...pipeline import WorkDirManager
-from ...utils import raise_error, run_ext_cmd
+from ...utils import raise_error
+from .._ants_batch import ANTsApplyTransformsBatch
 from ..template_spaces import get_template, get_xfm
 
 
@@ -95,18 +96,6 @@ class ANTsMaskWarper:
         # Imported here to avoid circular import
         from ._masks import logger
 
-        # Create element-scoped tempdir so that warped mask is
-        # available later as nibabel stores file path reference for
-        # loading on computation
-        prefix = (
-            f"ants_mask_warper_{mask_name}"
-            f"{'' if not src else f'_from_{src}'}_to_{dst}_"
-            f"{uuid.uuid1()}"
-        )
-        element_tempdir = WorkDirManager().get_element_tempdir(
-            prefix=prefix,
-        )
-
         # Native space warping
         if dst == "native":
             # Warp data check
@@ -119,31 +108,31 @@ class ANTsMaskWarper:
 
             logger.debug("Using ANTs for mask transformation")
 
-            # Save existing mask image to a tempfile
-            prewarp_mask_path = element_tempdir / "prewarp_mask.nii.gz"
-            nib.save(mask_img, prewarp_mask_path)
-
-            # Create a tempfile for warped output
-            warped_mask_path = element_tempdir / "mask_warped.nii.gz"
-            # Set antsApplyTransforms command
-            apply_transforms_cmd = [
-                "antsApplyTransforms",
-                "-d 3",
-                "-e 3",
-                "-n 'GenericLabel[NearestNeighbor]'",
-                f"-i {prewarp_mask_path.resolve()}",
+            # Warp via a batch of one, re-using an earlier warp if possible
+            batch = ANTsApplyTransformsBatch()
+            batch.add(
+                img=mask_img,
                 # use resampled reference
-                f"-r {target_data['reference']['path'].resolve()}",
-                f"-t {warp_data['path'].resolve()}",
-                f"-o {warped_mask_path.resolve()}",
-            ]
-            # Call antsApplyTransforms
-            run_ext_cmd(name="antsApplyTransforms", cmd=apply_transforms_cmd)
+                reference_path=target_data["reference"]["path"],
+                xfm_path=warp_data["path"],
+                interpolation="'GenericLabel[NearestNeighbor]'",
+            )
+            warped_mask_img = batch.run()[0]
 
         # Template space warping
         else:
             logger.debug(f"Using ANTs to warp mask from {src} to {dst}")
 
+            # Create element-scoped tempdir for the template
+            prefix = (
+                f"ants_mask_warper_{mask_name}"
+                f"{'' if not src else f'_from_{src}'}_to_{dst}_"
+                f"{uuid.uuid1()}"
+            )
+            element_tempdir = WorkDirManager().get_element_tempdir(
+                prefix=prefix,
+            )
+
             # Get xfm file
             xfm_file_path = get_xfm(src=src, dst=dst)
             # Get template space image
@@ -156,25 +145,14 @@ class ANTsMaskWarper:
             template_space_img_path = element_tempdir / f"{dst}_T1w.nii.gz"
             nib.save(template_space_img, template_space_img_path)
 
-            # Save existing mask image to a tempfile
-            prewarp_mask_path = element_tempdir / "prewarp_mask.nii.gz"
-            nib.save(mask_img, prewarp_mask_path)
-
-            # Create a tempfile for warped output
-            warped_mask_path = element_tempdir / "mask_warped.nii.gz"
-            # Set antsApplyTransforms command
-            apply_transforms_cmd = [
-                "antsApplyTransforms",
-                "-d 3",
-                "-e 3",
-                f"-n {_get_interpolation_method(mask_img)}",
-                f"-i {prewarp_mask_path.resolve()}",
-                f"-r {template_space_img_path.resolve()}",
-                f"-t {xfm_file_path.resolve()}",
-                f"-o {warped_mask_path.resolve()}",
-            ]
-            # Call antsApplyTransforms
-            run_ext_cmd(name="antsApplyTransforms", cmd=apply_transforms_cmd)
-
-        # Load nifti
-        return nib.load(warped_mask_path)
+            # Warp via a batch of one, re-using an earlier warp if possible
+            batch = ANTsApplyTransformsBatch()
+            batch.add(
+                img=mask_img,
+                reference_path=template_space_img_path,
+                xfm_path=xfm_file_path,
+                interpolation=_get_interpolation_method(mask_img),
+            )
+            warped_mask_img = batch.run()[0]
+
+        return warped_mask_img
@@ -24,6 +24,7 @@ from nilearn.masking import (
 )
 
 from ...utils import raise_error
+from .._ants_batch import ANTsApplyTransformsBatch
 from ..pipeline_data_registry_base import BasePipelineDataRegistry
 from ..template_spaces import get_template
 from ..utils import (
@@ -429,6 +430,163 @@ class MaskRegistry(BasePipelineDataRegistry):
 
         return mask_img, mask_fname, mask_definition["space"]
 
+    def _warp_to_std_space(
+        self,
+        mask_name: str,
+        mask_img: "Nifti1Image",
+        mask_space: str,
+        target_std_space: str,
+        target_data: dict[str, Any],
+    ) -> "Nifti1Image":
+        """Warp mask to the target standard space if required.
+
+        Parameters
+        ----------
+        mask_name : str
+            The name of the mask.
+        mask_img : nibabel.nifti1.Nifti1Image
+            The mask image.
+        mask_space : str
+            The space of the mask.
+        target_std_space : str
+            The template space to warp to.
+        target_data : dict
+            The corresponding item of the data object to which the mask will be
+            applied.
+
+        Returns
+        -------
+        nibabel.nifti1.Nifti1Image
+            The mask image in the target standard space.
+
+        """
+        # Resample and warp mask to standard space
+        if mask_space != target_std_space:
+            logger.debug(
+                f"Warping {mask_name} to {target_std_space} space using ANTs."
+            )
+            mask_img = ANTsMaskWarper().warp(
+                mask_name=mask_name,
+                mask_img=mask_img,
+                src=mask_space,
+                dst=target_std_space,
+                target_data=target_data,
+                warp_data=None,
+            )
+            # Remove extra dimension added by ANTs
+            mask_img = nimg.math_img("np.squeeze(img)", img=mask_img)
+        return mask_img
+
+    def _add_native_warp(
+        self,
+        batch: ANTsApplyTransformsBatch,
+        mask_img: "Nifti1Image",
+        target_data: dict[str, Any],
+        warp_data: dict[str, Any],
+        source: dict[str, Any],
+    ) -> int:
+        """Add native space warp via ANTs to ``batch``.
+
+        Parameters
+        ----------
+        batch : ANTsApplyTransformsBatch
+            The batch to add to.
+        mask_img : nibabel.nifti1.Nifti1Image
+            The mask image in the target standard space.
+        target_data : dict
+            The corresponding item of the data object to which the mask will be
+            applied.
+        warp_data : dict
+            The warp data item of the data object.
+        source : dict
+            The source of ``mask_img``.
+
+        Returns
+        -------
+        int
+            The index of the warp in ``batch``.
+
+        """
+        if "path" not in target_data.get("reference", {}):
+            raise_error("No `path` provided in `reference`")
+        return batch.add(
+            img=mask_img,
+            # use resampled reference
+            reference_path=target_data["reference"]["path"],
+            xfm_path=warp_data["path"],
+            interpolation="'GenericLabel[NearestNeighbor]'",
+            source=source,
+        )
+
+    def prefetch(
+        self,
+        masks: str | dict | list[dict | str],
+        target_data: dict[str, Any],
+        extra_input: dict[str, Any] | None,
+        batch: ANTsApplyTransformsBatch,
+    ) -> None:
+        """Add native space warps via ANTs of masks to ``batch``.
+
+        Only masks which are not callable and not inherited are added and
+        nothing is added if ``target_data`` is not in native space or the
+        native space warper is not ANTs.
+
+        Parameters
+        ----------
+        masks : str, dict or list of dict or str
+            The name(s) of the mask(s), or the name(s) of callable mask(s) and
+            parameters of the mask(s) as a dictionary.
+        target_data : dict
+            The corresponding item of the data object to which the mask will be
+            applied.
+        extra_input : dict or None
+            The other fields in the data object.
+        batch : ANTsApplyTransformsBatch
+            The batch to add to.
+
+        """
+        if target_data["space"] != "native" or extra_input is None:
+            return
+        if not isinstance(masks, list):
+            masks = [masks]
+        # Only plain mask names can be warped
+        names = [
+            x
+            for x in masks
+            if isinstance(x, str)
+            and x != "inherit"
+            and self._registry.get(x, {}).get("family") != "Callable"
+        ]
+        if not names:
+            return
+        warper_spec = get_native_warper(
+            target_data=target_data,
+            other_data=extra_input,
+        )
+        if warper_spec["warper"] != "ants":
+            return
+        resolution = np.min(target_data["data"].header.get_zooms()[:3])
+        for name in names:
+            mask_object, _, mask_space = self.load(
+                name, path_only=False, resolution=resolution
+            )
+            if callable(mask_object):
+                continue
+            mask_img = self._warp_to_std_space(
+                mask_name=name,
+                mask_img=mask_object,
+                mask_space=mask_space,
+                target_std_space=warper_spec["src"],
+                target_data=target_data,
+            )
+            self._add_native_warp(
+                batch=batch,
+                mask_img=mask_img,
+                target_data=target_data,
+                warp_data=warper_spec,
+                source=self._get_source(name, warper_spec["src"], resolution),
+            )
+
     def get(  # noqa: C901
         self,
         masks: str | dict | list[dict | str],
@@ -567,6 +725,9 @@ class MaskRegistry(BasePipelineDataRegistry):
 
         # Get all the masks
         all_masks = []
+        # Collect native space warps via ANTs to run them together
+        batch = ANTsApplyTransformsBatch()
+        batch_indices = {}
         for t_mask in mask_specs:
             if isinstance(t_mask, dict):
                 mask_name = next(iter(t_mask.keys()))
@@ -641,26 +802,13 @@ class MaskRegistry(BasePipelineDataRegistry):
                         )
 
                     # Set here to simplify things later
-                    mask_img: nib.nifti1.Nifti1Image = mask_object
-
-                    # Resample and warp mask to standard space
-                    if mask_space != target_std_space:
-                        logger.debug(
-                            f"Warping {t_mask} to {target_std_space} space "
-                            "using ANTs."
-                        )
-                        mask_img = ANTsMaskWarper().warp(
-                            mask_name=mask_name,
-                            mask_img=mask_img,
-                            src=mask_space,
-                            dst=target_std_space,
-                            target_data=target_data,
-                            warp_data=warper_spec,
-                        )
-                        # Remove extra dimension added by ANTs
-                        mask_img = nimg.math_img(
-                            "np.squeeze(img)", img=mask_img
-                        )
+                    mask_img = self._warp_to_std_space(
+                        mask_name=mask_name,
+                        mask_img=mask_object,
+                        mask_space=mask_space,
+                        target_std_space=target_std_space,
+                        target_data=target_data,
+                    )
 
                     if target_space != "native":
                         # No warping is going to happen, just resampling,
@@ -680,6 +828,9 @@ class MaskRegistry(BasePipelineDataRegistry):
                             "Warping mask to native space using "
                             f"{warper_spec['warper']}."
                         )
+                        source = self._get_source(
+                            mask_name, target_std_space, resolution
+                        )
                         mask_name = f"{mask_name}_to_native"
                         # extra_input check done earlier and warper_spec exists
                         if warper_spec["warper"] == "fsl":
@@ -690,17 +841,24 @@ class MaskRegistry(BasePipelineDataRegistry):
                                 warp_data=warper_spec,
                             )
                         elif warper_spec["warper"] == "ants":
-                            mask_img = ANTsMaskWarper().warp(
-                                mask_name=mask_name,
-                                mask_img=mask_img,
-                                src="",
-                                dst="native",
-                                target_data=target_data,
-                                warp_data=warper_spec,
+                            batch_indices[len(all_masks)] = (
+                                self._add_native_warp(
+                                    batch=batch,
+                                    mask_img=mask_img,
+                                    target_data=target_data,
+                                    warp_data=warper_spec,
+                                    source=source,
+                                )
                             )
 
             all_masks.append(mask_img)
 
+        # Warp to native space in one go
+        if batch_indices:
+            warped = batch.run()
+            for idx, batch_idx in batch_indices.items():
+                all_masks[idx] = warped[batch_idx]
+
         # Multiple masks, need intersection / union
         if len(all_masks) > 1:
             # Intersect / union of masks
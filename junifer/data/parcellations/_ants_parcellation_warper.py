@@ -9,7 +9,8 @@ from typing import TYPE_CHECKING, Any
 import nibabel as nib
 
 from ...pipeline import WorkDirManager
-from ...utils import raise_error, run_ext_cmd
+from ...utils import raise_error
+from .._ants_batch import ANTsApplyTransformsBatch
 from ..template_spaces import get_template, get_xfm
 
 
@@ -74,18 +75,6 @@ class ANTsParcellationWarper:
         # Imported here to avoid circular import
         from ._parcellations import logger
 
-        # Create element-scoped tempdir so that warped parcellation is
-        # available later as nibabel stores file path reference for
-        # loading on computation
-        prefix = (
-            f"ants_parcellation_warper_{parcellation_name}"
-            f"{'' if not src else f'_from_{src}'}_to_{dst}_"
-            f"{uuid.uuid1()}"
-        )
-        element_tempdir = WorkDirManager().get_element_tempdir(
-            prefix=prefix,
-        )
-
         # Native space warping
         if dst == "native":  # pragma: no cover
             # Warp data check
@@ -98,30 +87,16 @@ class ANTsParcellationWarper:
 
             logger.debug("Using ANTs for parcellation transformation")
 
-            # Save existing parcellation image to a tempfile
-            prewarp_parcellation_path = (
-                element_tempdir / "prewarp_parcellation.nii.gz"
-            )
-            nib.save(parcellation_img, prewarp_parcellation_path)
-
-            # Create a tempfile for warped output
-            warped_parcellation_path = (
-                element_tempdir / "parcellation_warped.nii.gz"
-            )
-            # Set antsApplyTransforms command
-            apply_transforms_cmd = [
-                "antsApplyTransforms",
-                "-d 3",
-                "-e 3",
-                "-n 'GenericLabel[NearestNeighbor]'",
-                f"-i {prewarp_parcellation_path.resolve()}",
+            # Warp via a batch of one, re-using an earlier warp if possible
+            batch = ANTsApplyTransformsBatch()
+            batch.add(
+                img=parcellation_img,
                 # use resampled reference
-                f"-r {target_data['reference']['path'].resolve()}",
-                f"-t {warp_data['path'].resolve()}",
-                f"-o {warped_parcellation_path.resolve()}",
-            ]
-            # Call antsApplyTransforms
-            run_ext_cmd(name="antsApplyTransforms", cmd=apply_transforms_cmd)
+                reference_path=target_data["reference"]["path"],
+                xfm_path=warp_data["path"],
+                interpolation="'GenericLabel[NearestNeighbor]'",
+            )
+            warped_parcellation_img = batch.run()[0]
 
         # Template space warping
         else:
@@ -129,6 +104,16 @@ class ANTsParcellationWarper:
                 f"Using ANTs to warp parcellation from {src} to {dst}"
             )
 
+            # Create element-scoped tempdir for the template
+            prefix = (
+                f"ants_parcellation_warper_{parcellation_name}"
+                f"{'' if not src else f'_from_{src}'}_to_{dst}_"
+                f"{uuid.uuid1()}"
+            )
+            element_tempdir = WorkDirManager().get_element_tempdir(
+                prefix=prefix,
+            )
+
             # Get xfm file
             xfm_file_path = get_xfm(src=src, dst=dst)
             # Get template space image
@@ -141,29 +126,14 @@ class ANTsParcellationWarper:
             template_space_img_path = element_tempdir / f"{dst}_T1w.nii.gz"
             nib.save(template_space_img, template_space_img_path)
 
-            # Save existing parcellation image to a tempfile
-            prewarp_parcellation_path = (
-                element_tempdir / "prewarp_parcellation.nii.gz"
+            # Warp via a batch of one, re-using an earlier warp if possible
+            batch = ANTsApplyTransformsBatch()
+            batch.add(
+                img=parcellation_img,
+                reference_path=template_space_img_path,
+                xfm_path=xfm_file_path,
+                interpolation="'GenericLabel[NearestNeighbor]'",
             )
-            nib.save(parcellation_img, prewarp_parcellation_path)
+            warped_parcellation_img = batch.run()[0]
 
-            # Create a tempfile for warped output
-            warped_parcellation_path = (
-                element_tempdir / "parcellation_warped.nii.gz"
-            )
-            # Set antsApplyTransforms command
-            apply_transforms_cmd = [
-                "antsApplyTransforms",
-                "-d 3",
-                "-e 3",
-                "-n 'GenericLabel[NearestNeighbor]'",
-                f"-i {prewarp_parcellation_path.resolve()}",
-                f"-r {template_space_img_path.resolve()}",
-                f"-t {xfm_file_path.resolve()}",
-                f"-o {warped_parcellation_path.resolve()}",
-            ]
-            # Call antsApplyTransforms
-            run_ext_cmd(name="antsApplyTransforms", cmd=apply_transforms_cmd)
-
-        # Load nifti
-        return nib.load(warped_parcellation_path)
+        return warped_parcellation_img
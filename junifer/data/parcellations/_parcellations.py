@@ -17,6 +17,7 @@ import structlog
 from junifer_data import get
 
 from ...utils import raise_error, warn_with_log
+from .._ants_batch import ANTsApplyTransformsBatch
 from ..pipeline_data_registry_base import BasePipelineDataRegistry
 from ..utils import (
     JUNIFER_DATA_PARAMS,
@@ -469,6 +470,153 @@ class ParcellationRegistry(BasePipelineDataRegistry):
 
         return parcellation_img, parcellation_labels, parcellation_fname, space
 
+    def _load_in_std_space(
+        self,
+        name: str,
+        target_std_space: str,
+        target_data: dict[str, Any],
+        resolution: float,
+    ) -> tuple["Nifti1Image", list[str]]:
+        """Load parcellation and warp it to the target standard space.
+
+        Parameters
+        ----------
+        name : str
+            The name of the parcellation.
+        target_std_space : str
+            The template space to warp to.
+        target_data : dict
+            The corresponding item of the data object to which the parcellation
+            will be applied.
+        resolution : float
+            The resolution to load the parcellation in.
+
+        Returns
+        -------
+        Nifti1Image
+            The parcellation image.
+        list of str
+            Parcellation labels.
+
+        """
+        # Load parcellation
+        logger.debug(f"Loading parcellation {name}")
+        img, labels, _, space = self.load(
+            name=name,
+            resolution=resolution,
+            target_space=target_data["space"],
+        )
+
+        # Convert parcellation spaces if required;
+        # cannot be "native" due to earlier check
+        if space != target_std_space:
+            logger.debug(
+                f"Warping {name} to {target_std_space} space using ANTs."
+            )
+            raw_img = ANTsParcellationWarper().warp(
+                parcellation_name=name,
+                parcellation_img=img,
+                src=space,
+                dst=target_std_space,
+                target_data=target_data,
+                warp_data=None,
+            )
+            # Remove extra dimension added by ANTs
+            img = nimg.math_img("np.squeeze(img)", img=raw_img)
+        return img, labels
+
+    def _add_native_warp(
+        self,
+        batch: ANTsApplyTransformsBatch,
+        img: "Nifti1Image",
+        target_data: dict[str, Any],
+        warp_data: dict[str, Any],
+        source: dict[str, Any],
+    ) -> int:
+        """Add native space warp via ANTs to ``batch``.
+
+        Parameters
+        ----------
+        batch : ANTsApplyTransformsBatch
+            The batch to add to.
+        img : nibabel.nifti1.Nifti1Image
+            The parcellation image in the target standard space.
+        target_data : dict
+            The corresponding item of the data object to which the parcellation
+            will be applied.
+        warp_data : dict
+            The warp data item of the data object.
+        source : dict
+            The source of ``img``.
+
+        Returns
+        -------
+        int
+            The index of the warp in ``batch``.
+
+        """
+        if "path" not in target_data.get("reference", {}):
+            raise_error("No `path` provided in `reference`")
+        return batch.add(
+            img=img,
+            # use resampled reference
+            reference_path=target_data["reference"]["path"],
+            xfm_path=warp_data["path"],
+            interpolation="'GenericLabel[NearestNeighbor]'",
+            source=source,
+        )
+
+    def prefetch(
+        self,
+        parcellations: str | list[str],
+        target_data: dict[str, Any],
+        extra_input: dict[str, Any] | None,
+        batch: ANTsApplyTransformsBatch,
+    ) -> None:
+        """Add native space warps via ANTs of parcellations to ``batch``.
+
+        Nothing is added if ``target_data`` is not in native space or the
+        native space warper is not ANTs.
+
+        Parameters
+        ----------
+        parcellations : str or list of str
+            The name(s) of the parcellation(s).
+        target_data : dict
+            The corresponding item of the data object to which the parcellation
+            will be applied.
+        extra_input : dict or None
+            The other fields in the data object.
+        batch : ANTsApplyTransformsBatch
+            The batch to add to.
+
+        """
+        if target_data["space"] != "native" or extra_input is None:
+            return
+        warper_spec = get_native_warper(
+            target_data=target_data,
+            other_data=extra_input,
+        )
+        if warper_spec["warper"] != "ants":
+            return
+        if not isinstance(parcellations, list):
+            parcellations = [parcellations]
+        resolution = np.min(target_data["data"].header.get_zooms()[:3])
+        for name in parcellations:
+            img, _ = self._load_in_std_space(
+                name=name,
+                target_std_space=warper_spec["src"],
+                target_data=target_data,
+                resolution=resolution,
+            )
+            self._add_native_warp(
+                batch=batch,
+                img=img,
+                target_data=target_data,
+                warp_data=warper_spec,
+                source=self._get_source(name, warper_spec["src"], resolution),
+            )
+
     def get(
         self,
         parcellations: str | list[str],
@@ -539,32 +687,17 @@ class ParcellationRegistry(BasePipelineDataRegistry):
         # Load the parcellations and labels
         all_parcellations = []
         all_labels = []
-        for name in parcellations:
-            # Load parcellation
-            logger.debug(f"Loading parcellation {name}")
-            img, labels, _, space = self.load(
+        # Collect native space warps via ANTs to run them together
+        batch = ANTsApplyTransformsBatch()
+        batch_indices = {}
+        for idx, name in enumerate(parcellations):
+            img, labels = self._load_in_std_space(
                 name=name,
+                target_std_space=target_std_space,
+                target_data=target_data,
                 resolution=resolution,
-                target_space=target_space,
             )
 
-            # Convert parcellation spaces if required;
-            # cannot be "native" due to earlier check
-            if space != target_std_space:
-                logger.debug(
-                    f"Warping {name} to {target_std_space} space using ANTs."
-                )
-                raw_img = ANTsParcellationWarper().warp(
-                    parcellation_name=name,
-                    parcellation_img=img,
-                    src=space,
-                    dst=target_std_space,
-                    target_data=target_data,
-                    warp_data=None,
-                )
-                # Remove extra dimension added by ANTs
-                img = nimg.math_img("np.squeeze(img)", img=raw_img)
-
             if target_space != "native":
                 # No warping is going to happen, just resampling, because
                 # we are in the correct space
@@ -592,19 +725,26 @@ class ParcellationRegistry(BasePipelineDataRegistry):
                         target_data=target_data,
                         warp_data=warper_spec,
                     )
-                elif warper_spec["warper"] == "ants":
-                    img = ANTsParcellationWarper().warp(
-                        parcellation_name="native",
-                        parcellation_img=img,
-                        src="",
-                        dst="native",
+                elif warper_spec["warper"] == "ants":  # pragma: no cover
+                    batch_indices[idx] = self._add_native_warp(
+                        batch=batch,
+                        img=img,
                         target_data=target_data,
                         warp_data=warper_spec,
+                        source=self._get_source(
+                            name, target_std_space, resolution
+                        ),
                     )
 
             all_parcellations.append(img)
             all_labels.append(labels)
 
+        # Warp to native space in one go
+        if batch_indices:  # pragma: no cover
+            warped = batch.run()
+            for idx, batch_idx in batch_indices.items():
+                all_parcellations[idx] = warped[batch_idx]
+
         # Avoid merging if there is only one parcellation
         if len(all_parcellations) == 1:
             resampled_parcellation_img = all_parcellations[0]
@@ -5,12 +5,17 @@
 
 from abc import ABC, abstractmethod
 from collections.abc import Mapping
-from typing import Any
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
 
 from ..utils import raise_error
 from ..utils.singleton import ABCSingleton
 
 
+if TYPE_CHECKING:
+    from ._ants_batch import ANTsApplyTransformsBatch
+
+
 __all__ = ["BasePipelineDataRegistry"]
 
 
@@ -74,3 +79,67 @@ class BasePipelineDataRegistry(ABC, metaclass=ABCSingleton):
             msg="Concrete classes need to implement get().",
             klass=NotImplementedError,
         )
+
+    def _get_source(
+        self, name: str, space: str, resolution: float
+    ) -> dict[str, Any]:
+        """Get the source of registered data loaded for a target.
+
+        It identifies the data for :class:`.ANTsApplyTransformsBatch` without
+        hashing the image.
+
+        Parameters
+        ----------
+        name : str
+            The registered name of the data.
+        space : str
+            The space the data is loaded in.
+        resolution : float
+            The resolution the data is loaded at.
+
+        Returns
+        -------
+        dict
+            The registry definition, with the modification time and size of
+            the file for custom data, the space and the resolution.
+
+        """
+        definition = dict(self._registry.get(name, {}))
+        path = definition.get("path")
+        if path is not None and Path(path).exists():
+            stat = Path(path).stat()
+            definition["mtime"] = stat.st_mtime_ns
+            definition["size"] = stat.st_size
+        return {
+            "registry": self.__class__.__name__,
+            "name": name,
+            "definition": definition,
+            "space": space,
+            "resolution": float(resolution),
+        }
+
+    def prefetch(
+        self,
+        names: Any,
+        target_data: dict[str, Any],
+        extra_input: dict[str, Any] | None,
+        batch: "ANTsApplyTransformsBatch",
+    ) -> None:
+        """Add the warps needed to get tailored data for a target to a batch.
+
+        Override it for data which needs to be warped; by default nothing is
+        added.
+
+        Parameters
+        ----------
+        names : str or dict or list of str / dict
+            The registered name(s) of the data.
+        target_data : dict
+            The corresponding item of the data object to which the data
+            will be applied.
+        extra_input : dict or None
+            The other fields in the data object.
+        batch : ANTsApplyTransformsBatch
+            The batch to add to.
+
+        """
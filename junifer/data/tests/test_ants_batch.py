@@ -0,0 +1,293 @@
+"""Provide tests for batched warping via ANTs."""
+
+# Authors: Synchon Mandal <s.mandal@fz-juelich.de>
+# License: AGPL
+
+from pathlib import Path
+
+import nibabel as nib
+import numpy as np
+import pytest
+from numpy.testing import assert_array_equal
+
+from junifer.data import (
+    MaskRegistry,
+    ParcellationRegistry,
+    _ants_batch,
+    get_data,
+    prefetch_data,
+)
+from junifer.data._ants_batch import ANTsApplyTransformsBatch
+from junifer.pipeline import WorkDirManager
+from junifer.utils import config
+
+
+@pytest.fixture
+def ants_calls(monkeypatch: pytest.MonkeyPatch) -> list[list[str]]:
+    """Replace antsApplyTransforms with an identity warp and record calls.
+
+    Parameters
+    ----------
+    monkeypatch : pytest.MonkeyPatch
+        The monkeypatch fixture.
+
+    Returns
+    -------
+    list of list of str
+        The recorded commands.
+
+    """
+    calls = []
+
+    def _run_ext_cmd(name: str, cmd: list[str]) -> None:
+        calls.append(cmd)
+        args = dict(x.split(" ", 1) for x in cmd[1:])
+        img = nib.load(args["-i"])
+        nib.save(
+            nib.Nifti1Image(np.asanyarray(img.dataobj), img.affine),
+            args["-o"],
+        )
+
+    monkeypatch.setattr(_ants_batch, "run_ext_cmd", _run_ext_cmd)
+    _ants_batch._WARPED.clear()
+    return calls
+
+
+def _make_img(
+    value: int, shape: tuple[int, ...] = (5, 6, 4)
+) -> nib.Nifti1Image:
+    """Create a label image.
+
+    Parameters
+    ----------
+    value : int
+        The label value.
+    shape : tuple of int, optional
+        The shape of the image (default (5, 6, 4)).
+
+    Returns
+    -------
+    nibabel.nifti1.Nifti1Image
+        The image.
+
+    """
+    data = np.zeros(shape, dtype=np.int16)
+    data[1:3, 2:5, 1:3] = value
+    return nib.Nifti1Image(data, np.diag([2.0, 2.0, 2.0, 1.0]))
+
+
+def test_ANTsApplyTransformsBatch(
+    tmp_path: Path, ants_calls: list[list[str]]
+) -> None:
+    """Test ANTsApplyTransformsBatch stacking and re-use.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+    ants_calls : list of list of str
+        The recorded antsApplyTransforms commands.
+
+    """
+    WorkDirManager().workdir = tmp_path
+    ref_path = tmp_path / "reference.nii.gz"
+    nib.save(_make_img(1), ref_path)
+    xfm_path = tmp_path / "xfm.h5"
+    xfm_path.touch()
+
+    imgs = [_make_img(x) for x in (1, 2, 3)]
+    batch = ANTsApplyTransformsBatch(n_jobs=2)
+    for img in imgs:
+        batch.add(img, ref_path, xfm_path, "'GenericLabel[NearestNeighbor]'")
+    # Different interpolation and 4D images are not stacked
+    batch.add(imgs[0], ref_path, xfm_path, "LanczosWindowedSinc")
+    img_4d = nib.Nifti1Image(
+        np.stack([imgs[0].get_fdata()] * 2, axis=-1), imgs[0].affine
+    )
+    batch.add(img_4d, ref_path, xfm_path, "LanczosWindowedSinc")
+    # Same warp is done once
+    batch.add(imgs[1], ref_path, xfm_path, "'GenericLabel[NearestNeighbor]'")
+    assert len(batch) == 6
+
+    warped = batch.run()
+    assert len(ants_calls) == 3
+    assert len(batch) == 0
+    assert len(warped) == 6
+    for img, warped_img in zip(imgs, warped[:3], strict=True):
+        assert_array_equal(warped_img.get_fdata(), img.get_fdata())
+    assert_array_equal(warped[3].get_fdata(), imgs[0].get_fdata())
+    assert warped[4].shape == img_4d.shape
+    assert warped[5] is warped[1]
+
+    # Already warped images are re-used
+    batch.add(imgs[2], ref_path, xfm_path, "'GenericLabel[NearestNeighbor]'")
+    batch.add(img_4d, ref_path, xfm_path, "LanczosWindowedSinc")
+    assert batch.run()[0] is warped[2]
+    assert len(ants_calls) == 3
+
+    # Unless the element directory is cleaned up
+    WorkDirManager().cleanup_elementdir()
+    batch.add(img_4d, ref_path, xfm_path, "LanczosWindowedSinc")
+    batch.run()
+    assert len(ants_calls) == 4
+    WorkDirManager().cleanup_elementdir()
+
+
+def test_ANTsApplyTransformsBatch_source(
+    tmp_path: Path, ants_calls: list[list[str]]
+) -> None:
+    """Test ANTsApplyTransformsBatch re-use by source.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+    ants_calls : list of list of str
+        The recorded antsApplyTransforms commands.
+
+    """
+    WorkDirManager().workdir = tmp_path
+    ref_path = tmp_path / "reference.nii.gz"
+    nib.save(_make_img(1), ref_path)
+    xfm_path = tmp_path / "xfm.h5"
+    xfm_path.touch()
+    interpolation = "'GenericLabel[NearestNeighbor]'"
+
+    # Images of the same source are the same warp
+    batch = ANTsApplyTransformsBatch()
+    batch.add(_make_img(1), ref_path, xfm_path, interpolation, {"name": "a"})
+    batch.add(_make_img(1), ref_path, xfm_path, interpolation, {"name": "a"})
+    batch.add(_make_img(1), ref_path, xfm_path, interpolation, {"name": "b"})
+    warped = batch.run()
+    assert warped[0] is warped[1]
+    assert warped[0] is not warped[2]
+    # Images loaded from a file are identified by the file
+    img_path = tmp_path / "img.nii.gz"
+    nib.save(_make_img(2), img_path)
+    batch.add(nib.load(img_path), ref_path, xfm_path, interpolation)
+    batch.add(nib.load(img_path), ref_path, xfm_path, interpolation)
+    warped = batch.run()
+    assert warped[0] is warped[1]
+    assert len(ants_calls) == 2
+    WorkDirManager().cleanup_elementdir()
+
+
+def test_ANTsApplyTransformsBatch_n_jobs(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test ANTsApplyTransformsBatch default number of processes.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+    monkeypatch : pytest.MonkeyPatch
+        The monkeypatch fixture.
+
+    """
+    monkeypatch.delenv("SLURM_CPUS_PER_TASK", raising=False)
+    job_ad = tmp_path / ".job.ad"
+    job_ad.write_text('Owner = "junifer"\nRequestCpus = 3\n')
+    monkeypatch.setenv("_CONDOR_JOB_AD", str(job_ad))
+    assert ANTsApplyTransformsBatch().n_jobs == 3
+    monkeypatch.setenv("SLURM_CPUS_PER_TASK", "2")
+    assert ANTsApplyTransformsBatch().n_jobs == 2
+    config.set(key="data.warp.njobs", val=5)
+    try:
+        assert ANTsApplyTransformsBatch().n_jobs == 5
+    finally:
+        config.delete("data.warp.njobs")
+
+
+def test_prefetch_data(tmp_path: Path, ants_calls: list[list[str]]) -> None:
+    """Test prefetch_data.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+    ants_calls : list of list of str
+        The recorded antsApplyTransforms commands.
+
+    """
+    WorkDirManager().workdir = tmp_path
+    parcellation_path = tmp_path / "parcellation.nii.gz"
+    nib.save(_make_img(1), parcellation_path)
+    ParcellationRegistry().register(
+        name="prefetch_parcellation",
+        parcellation_path=parcellation_path,
+        parcels_labels=["a"],
+        space="MNI152NLin6Asym",
+        overwrite=True,
+    )
+    mask_path = tmp_path / "mask.nii.gz"
+    nib.save(_make_img(1, shape=(5, 6, 4)), mask_path)
+    MaskRegistry().register(
+        name="prefetch_mask",
+        mask_path=mask_path,
+        space="MNI152NLin6Asym",
+        overwrite=True,
+    )
+    ref_path = tmp_path / "reference.nii.gz"
+    nib.save(_make_img(1), ref_path)
+    xfm_path = tmp_path / "xfm.h5"
+    xfm_path.touch()
+    target_data = {
+        "data": nib.Nifti1Image(
+            np.ones((5, 6, 4, 3)), np.diag([2.0, 2.0, 2.0, 1.0])
+        ),
+        "space": "native",
+        "prewarp_space": "MNI152NLin6Asym",
+        "reference": {"path": ref_path},
+    }
+    extra_input = {
+        "Warp": [
+            {
+                "path": xfm_path,
+                "src": "MNI152NLin6Asym",
+                "dst": "native",
+                "warper": "ants",
+            }
+        ]
+    }
+    prefetch_data(
+        [
+            {
+                "kind": "parcellation",
+                "names": "prefetch_parcellation",
+                "target_data": target_data,
+                "extra_input": extra_input,
+            },
+            {
+                "kind": "mask",
+                "names": ["prefetch_mask", "compute_epi_mask"],
+                "target_data": target_data,
+                "extra_input": extra_input,
+            },
+            {
+                "kind": "coordinates",
+                "names": "DMNBuckner",
+                "target_data": target_data,
+                "extra_input": extra_input,
+            },
+        ]
+    )
+    # Parcellation and mask are stacked
+    assert len(ants_calls) == 1
+    # Registries re-use the warped images
+    parcellation_img, _ = get_data(
+        kind="parcellation",
+        names="prefetch_parcellation",
+        target_data=target_data,
+        extra_input=extra_input,
+    )
+    mask_img = get_data(
+        kind="mask",
+        names="prefetch_mask",
+        target_data=target_data,
+        extra_input=extra_input,
+    )
+    assert len(ants_calls) == 1
+    assert_array_equal(parcellation_img.get_fdata(), _make_img(1).get_fdata())
+    assert_array_equal(mask_img.get_fdata(), _make_img(1).get_fdata())
+    WorkDirManager().cleanup_elementdir()
@@ -0,0 +1,314 @@
+"""Provide class for indexing files of a DataGrabber."""
+
+# Authors: Synchon Mandal <s.mandal@fz-juelich.de>
+# License: AGPL
+
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from fnmatch import fnmatchcase
+from pathlib import Path
+
+from ..utils import config
+from .base import logger
+
+
+__all__ = ["FileIndex", "get_file_index"]
+
+# Kinds of directory entries
+_FILE = 0
+_DIR = 1
+_DIR_LINK = 2
+
+# Version of the cache file format
+_INDEX_VERSION = 1
+
+# Seconds after a modification within which a directory listing is not
+# trusted, due to the timestamp resolution of some filesystems
+_MTIME_SLACK = 2.0
+
+# File indices by root
+_INDICES: dict[str, "FileIndex"] = {}
+
+
+def _has_magic(part: str) -> bool:
+    """Check if a path component has glob wildcards.
+
+    Parameters
+    ----------
+    part : str
+        The path component.
+
+    Returns
+    -------
+    bool
+        Whether ``part`` has wildcards.
+
+    """
+    return any(x in part for x in "*?[")
+
+
+class FileIndex:
+    """Class for indexing files of a DataGrabber.
+
+    The index keeps the listing of every directory visited under ``root``,
+    obtained via a single :func:`os.scandir` call, so that glob patterns are
+    resolved in memory with a dictionary lookup per non-wildcard path
+    component. Each cached listing is checked once per operation (see
+    :meth:`refresh`) against the modification time of its directory and
+    only directories which changed are listed again.
+
+    If ``location`` is provided, the index is persisted to a cache file for
+    ``root`` in it, so that later processes only need to check the
+    modification times instead of listing the directories.
+
+    Parameters
+    ----------
+    root : pathlib.Path
+        The root directory.
+    location : pathlib.Path or None, optional
+        The directory of the cache file. If None, the index is not persisted
+        (default None).
+
+    """
+
+    def __init__(self, root: Path, location: Path | None = None) -> None:
+        self.root = Path(root)
+        self.location = Path(location) if location is not None else None
+        # Listing by relative directory path: [mtime, {name: kind}]
+        self._dirs: dict[str, list] = {}
+        # Relative directory paths checked in the current operation
+        self._checked: set[str] = set()
+        self._modified = False
+        # Guard against concurrent use by DataGrabbers sharing the root
+        self._lock = threading.RLock()
+        self._load()
+
+    @property
+    def cache_path(self) -> Path | None:
+        """Path to the cache file."""
+        if self.location is None:
+            return None
+        key = hashlib.md5(
+            str(self.root.absolute()).encode("utf-8"), usedforsecurity=False
+        ).hexdigest()
+        return self.location / f"file_index_{key}.json"
+
+    def _load(self) -> None:
+        """Load the index from the cache file."""
+        path = self.cache_path
+        if path is None or not path.is_file():
+            return
+        try:
+            with path.open("r") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            logger.debug(f"Invalid file index cache at {path}")
+            return
+        if cache.get("version") != _INDEX_VERSION or cache.get("root") != str(
+            self.root.absolute()
+        ):
+            return
+        self._dirs = cache["dirs"]
+        logger.debug(f"Loaded file index with {len(self._dirs)} directories")
+
+    def refresh(self) -> None:
+        """Start a new operation.
+
+        The cached listings are checked against the modification times of
+        the directories again when used next.
+
+        """
+        with self._lock:
+            self._checked.clear()
+
+    def save(self) -> None:
+        """Save the index to the cache file, if modified."""
+        with self._lock:
+            path = self.cache_path
+            if path is None or not self._modified:
+                return
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write to a temporary file first, so that concurrent readers never
+            # see a partial file
+            tmp_path = path.with_name(f".{path.name}.tmp-{uuid.uuid1()}")
+            try:
+                with tmp_path.open("w") as f:
+                    json.dump(
+                        {
+                            "version": _INDEX_VERSION,
+                            "root": str(self.root.absolute()),
+                            "dirs": self._dirs,
+                        },
+                        f,
+                    )
+                os.replace(tmp_path, path)
+            except OSError as e:
+                logger.debug(f"Cannot save file index cache at {path}: {e}")
+            finally:
+                tmp_path.unlink(missing_ok=True)
+            self._modified = False
+
+    def get_mtimes(self) -> dict[str, int]:
+        """Get the modification times of the indexed directories.
+
+        Returns
+        -------
+        dict
+            The modification times in nanoseconds by directory path relative
+            to the root, -1 for directories modified just before listing.
+
+        """
+        with self._lock:
+            return {k: v[0] for k, v in self._dirs.items()}
+
+    def _listdir(self, rel_dir: str) -> dict[str, int]:
+        """Get the entries of a directory.
+
+        Parameters
+        ----------
+        rel_dir : str
+            The directory path relative to the root, "" for the root.
+
+        Returns
+        -------
+        dict
+            The entry names and kinds; empty if the directory does not exist.
+
+        """
+        if rel_dir in self._checked:
+            return self._dirs.get(rel_dir, [0, {}])[1]
+        self._checked.add(rel_dir)
+        path = self.root / rel_dir if rel_dir else self.root
+        try:
+            mtime = path.stat().st_mtime_ns
+        except OSError:
+            if self._dirs.pop(rel_dir, None) is not None:
+                self._modified = True
+            return {}
+        cached = self._dirs.get(rel_dir)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        entries = {}
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        entries[entry.name] = _DIR
+                    elif entry.is_symlink() and entry.is_dir():
+                        entries[entry.name] = _DIR_LINK
+                    else:
+                        # Files and (possibly broken) symlinks to files
+                        entries[entry.name] = _FILE
+        except OSError:
+            return {}
+        # Drop listings of removed directories
+        if cached is not None:
+            prefix = f"{rel_dir}/" if rel_dir else ""
+            for name, kind in cached[1].items():
+                if kind != _FILE and name not in entries:
+                    child = f"{prefix}{name}"
+                    for key in [
+                        x
+                        for x in self._dirs
+                        if x == child or x.startswith(f"{child}/")
+                    ]:
+                        del self._dirs[key]
+        # Do not trust the listing of recently modified directories
+        if time.time() - mtime / 1e9 < _MTIME_SLACK:
+            mtime = -1
+        self._dirs[rel_dir] = [mtime, entries]
+        self._modified = True
+        return entries
+
+    def glob(self, pattern: str) -> list[str]:
+        """Get the paths matching a glob pattern.
+
+        The pattern is matched like :meth:`pathlib.Path.glob`, with ``**``
+        not following symbolic links to directories.
+
+        Parameters
+        ----------
+        pattern : str
+            The glob pattern relative to the root.
+
+        Returns
+        -------
+        list of str
+            The matching paths relative to the root.
+
+        """
+        parts = [x for x in pattern.split("/") if x not in ["", "."]]
+        if not parts:
+            return []
+        with self._lock:
+            return self._glob("", parts)
+
+    def _glob(self, rel_dir: str, parts: list[str]) -> list[str]:
+        """Match path components in a directory.
+
+        Parameters
+        ----------
+        rel_dir : str
+            The directory path relative to the root, "" for the root.
+        parts : list of str
+            The remaining pattern components.
+
+        Returns
+        -------
+        list of str
+            The matching paths relative to the root.
+
+        """
+        part, rest = parts[0], parts[1:]
+        prefix = f"{rel_dir}/" if rel_dir else ""
+        if part == "**":
+            # Match this directory and all the ones below
+            matches = self._glob(rel_dir, rest) if rest else [rel_dir]
+            for name, kind in self._listdir(rel_dir).items():
+                if kind == _DIR:
+                    matches.extend(self._glob(f"{prefix}{name}", parts))
+            return matches
+        entries = self._listdir(rel_dir)
+        if _has_magic(part):
+            names = [x for x in entries if fnmatchcase(x, part)]
+        else:
+            names = [part] if part in entries else []
+        if not rest:
+            return [f"{prefix}{x}" for x in names]
+        matches = []
+        for name in names:
+            if entries[name] != _FILE:
+                matches.extend(self._glob(f"{prefix}{name}", rest))
+        return matches
+
+
+def get_file_index(root: Path) -> FileIndex:
+    """Get the file index for a root directory.
+
+    The index is shared in the process and persisted in
+    ``datagrabber.index.location`` if set.
+
+    Parameters
+    ----------
+    root : pathlib.Path
+        The root directory.
+
+    Returns
+    -------
+    FileIndex
+        The file index.
+
+    """
+    location = config.get("datagrabber.index.location")
+    key = str(Path(root).absolute())
+    index = _INDICES.get(key)
+    if index is None or index.location != (
+        Path(location) if location is not None else None
+    ):
+        index = FileIndex(root=root, location=location)
+        _INDICES[key] = index
+    return index
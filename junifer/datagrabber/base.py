@@ -99,6 +99,27 @@ class BaseDataGrabber(BaseModel, ABC, UpdateMetaMixin):
     def __getitem__(self, element: Element) -> dict[str, dict]:
         """Enable indexing support.
 
+        Parameters
+        ----------
+        element : `Element`
+            The element to be indexed.
+
+        Returns
+        -------
+        dict
+            Dictionary of paths for each type of data required for the
+            specified element.
+
+        """
+        return self._index(element)
+
+    def _index(self, element: Element) -> dict[str, dict]:
+        """Index an element without fetching its data.
+
+        Subclasses fetching data on indexing do so in ``__getitem__``, so
+        that the paths and metadata of an element can be obtained from this
+        method beforehand.
+
         Parameters
         ----------
         element : `Element`
@@ -171,13 +192,18 @@ class BaseDataGrabber(BaseModel, ABC, UpdateMetaMixin):
         """
         return self.datadir
 
-    def filter(self, selection: Elements) -> Iterator:
+    def filter(
+        self, selection: Elements, elements: list | None = None
+    ) -> Iterator:
         """Filter elements to be grabbed.
 
         Parameters
         ----------
         selection : ``Elements``
             The list of partial or complete element selectors to filter using.
+        elements : list or None, optional
+            The elements to filter. If None, will use :meth:`get_elements`
+            (default None).
 
         Yields
         ------
@@ -214,7 +240,9 @@ class BaseDataGrabber(BaseModel, ABC, UpdateMetaMixin):
                         return True
             return False
 
-        yield from filter(filter_func, self.get_elements())
+        if elements is None:
+            elements = self.get_elements()
+        yield from filter(filter_func, elements)
 
     @abstractmethod
     def get_element_keys(self) -> list[str]:
@@ -6,15 +6,26 @@
 # License: AGPL
 
 import atexit
+import hashlib
+import json
 import os
+import re
+import shutil
+import socket
 import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from enum import Enum
 from pathlib import Path
 from typing import Any, NoReturn
 
 import datalad
 import datalad.api as dl
+import fasteners
 from datalad.support.exceptions import IncompleteResultsError
 from datalad.support.gitrepo import GitRepo
+from datalad.utils import get_dataset_root
 from pydantic import AnyUrl, Field, field_validator
 
 from ..api.decorators import register_datagrabber
@@ -26,6 +37,21 @@ from .base import BaseDataGrabber, logger
 
 __all__ = ["DataladDataGrabber"]
 
+# Size field of git-annex keys, e.g. MD5E-s1234--<hash>.nii.gz
+_ANNEX_KEY_SIZE = re.compile(r"-s(\d+)--")
+
+# Subdataset source candidate of ephemeral clones, tried before the URLs in
+# .gitmodules so that subdatasets are cloned from the shared installation
+_SHARED_SOURCE_CANDIDATE = (
+    "datalad.get.subdataset-source-candidate-000junifershared"
+)
+
+# Message of git-annex when another process is transferring the same key
+_TRANSFER_IN_PROGRESS = "transfer already in progress"
+
+# Seconds to wait before getting a file transferred by another process again
+_TRANSFER_WAIT = 5
+
 
 def _create_datadir() -> Path:
     """Create a temporary directory for datalad dataset."""
@@ -39,6 +65,28 @@ def _create_datadir() -> Path:
     return datadir
 
 
+def _get_annexed_size(path: Path) -> int:
+    """Get the size of an annexed file from its key.
+
+    Parameters
+    ----------
+    path : pathlib.Path
+        The path to the file.
+
+    Returns
+    -------
+    int
+        The size in bytes, 0 if not known.
+
+    """
+    try:
+        target = os.readlink(path)
+    except OSError:
+        return 0
+    match = _ANNEX_KEY_SIZE.search(Path(target).name)
+    return int(match.group(1)) if match is not None else 0
+
+
 def _remove_datadir(datadir: Path) -> None:
     """Remove temporary directory if it exists."""
     if datadir.exists():
@@ -91,6 +139,16 @@ class DataladDataGrabber(BaseDataGrabber):
     and the stem suffix as ``"juniferauto"``, it will be automatically
     deleted after use.
 
+    If ``datadir`` is not specified and ``datagrabber.shared.location``
+    config is set, the dataset is installed once in that directory, guarded
+    by a file lock, and each DataGrabber uses a reckless-ephemeral clone of
+    it. Files are fetched into the shared installation, so that they are
+    re-used by all the DataGrabbers using it. Concurrent transfers are left
+    to the per-key locking of git-annex. Subdatasets are installed in the
+    shared installation and cloned from it into the ephemeral clone. With
+    ``datagrabber.cache.size``, files are dropped from the shared
+    installation unless they are in use by another process.
+
     """
 
     uri: AnyUrl = Field(frozen=True)
@@ -105,6 +163,23 @@ class DataladDataGrabber(BaseDataGrabber):
     _dataset: dl.Dataset | None = None
     _got_files: list[str] = []  # noqa: RUF012
     _was_cloned: bool = False
+    # Dataset state known from an element listing
+    _known_dataset: dict | None = None
+    # Shared installation the dataset is an ephemeral clone of
+    _shared_dataset: dl.Dataset | None = None
+    # Planned order of elements for prefetching
+    _prefetch_order: list = []  # noqa: RUF012
+    _prefetch_positions: dict = {}  # noqa: RUF012
+    # Prefetch futures and sizes by element
+    _prefetch_futures: dict = {}  # noqa: RUF012
+    _prefetch_sizes: dict = {}  # noqa: RUF012
+    _prefetch_paths: dict = {}  # noqa: RUF012
+    # Sizes of downloaded files, least recently used first
+    _fetched: dict = {}  # noqa: RUF012
+    # Paths of indexed elements not released yet
+    _element_paths: dict = {}  # noqa: RUF012
+    _prefetch_executor: ThreadPoolExecutor | None = None
+    _dataset_lock: Any = None
 
     @field_validator("datadir", mode="after")
     @classmethod
@@ -253,6 +328,47 @@ class DataladDataGrabber(BaseDataGrabber):
         datalad.support.exceptions.IncompleteResultsError
             If there is a datalad-related problem while fetching data.
 
+        """
+        to_get = self._get_paths(out)
+        if len(to_get) > 0:
+            logger.debug(f"Getting {len(to_get)} files using datalad:")
+            for fname in to_get:
+                logger.debug(f"\t: {fname}")
+
+            try:
+                dl_out = self._get_files(to_get)
+            except IncompleteResultsError as e:
+                raise_error(f"Failed to get from dataset: {e.failed}")
+            for t_out in dl_out:
+                t_path = Path(t_out["path"])
+                if t_out["status"] == "ok":
+                    logger.debug(f"File {t_path} downloaded")
+                    self._add_fetched(t_path)
+                elif t_out["status"] == "notneeded":
+                    logger.debug(f"File {t_path} was already present")
+                elif not self._was_cloned:
+                    # If the dataset was already installed, check that the
+                    # file was actually downloaded to avoid removing a
+                    # file that was already there.
+                    raise_error(f"File download failed: {t_out}")
+            logger.debug("Get done")
+
+        return out
+
+    @staticmethod
+    def _get_paths(out: dict) -> list[Path]:
+        """Get the paths to fetch for an element.
+
+        Parameters
+        ----------
+        out : dict
+            The dictionary from which path need to be searched.
+
+        Returns
+        -------
+        list of pathlib.Path
+            The paths found.
+
         """
         to_get = []
         for type_val in out.values():
@@ -271,32 +387,607 @@ class DataladDataGrabber(BaseDataGrabber):
                     # Add nested data type path
                     if isinstance(v, dict) and "path" in v:
                         to_get.append(v["path"])
+        return to_get
 
-        if len(to_get) > 0:
-            logger.debug(f"Getting {len(to_get)} files using datalad:")
-            for fname in to_get:
-                logger.debug(f"\t: {fname}")
+    def _add_fetched(self, path: Path) -> None:
+        """Keep track of a downloaded file.
 
-            try:
-                dl_out = self._dataset.get(to_get, result_renderer="disabled")
-            except IncompleteResultsError as e:
-                raise_error(f"Failed to get from dataset: {e.failed}")
-            if not self._was_cloned:
-                # If the dataset was already installed, check that the
-                # file was actually downloaded to avoid removing a
-                # file that was already there.
+        Parameters
+        ----------
+        path : pathlib.Path
+            The path to the file.
+
+        """
+        path = Path(os.path.abspath(path))
+        try:
+            size = path.stat().st_size
+        except OSError:
+            size = 0
+        self._fetched[path] = size
+        if not self._was_cloned and path not in self._got_files:
+            self._got_files.append(path)
+
+    def _get_files(self, paths: list[Path], **kwargs: Any) -> list[dict]:
+        """Get files from the dataset.
+
+        Calls to datalad are serialized, as the prefetching runs in a
+        background thread.
+
+        Parameters
+        ----------
+        paths : list of pathlib.Path
+            The paths to get.
+        **kwargs
+            Extra keyword arguments passed to ``datalad get``.
+
+        Returns
+        -------
+        list of dict
+            The datalad results.
+
+        Raises
+        ------
+        datalad.support.exceptions.IncompleteResultsError
+            If there is a datalad-related problem while fetching data.
+
+        """
+        if self._shared_dataset is not None:
+            return self._get_shared_files(paths, **kwargs)
+        with self._get_lock():
+            return self._dataset.get(
+                paths, result_renderer="disabled", **kwargs
+            )
+
+    def _get_shared_files(
+        self, paths: list[Path], **kwargs: Any
+    ) -> list[dict]:
+        """Get files into the shared installation.
+
+        The subdatasets of the files are installed in the shared
+        installation, guarded by its file lock, and cloned from it into the
+        ephemeral clone. The files are then fetched without the file lock,
+        as git-annex locks every key being transferred. Files transferred by
+        another process at the same time are fetched again once done.
+
+        Parameters
+        ----------
+        paths : list of pathlib.Path
+            The paths in the ephemeral clone to get.
+        **kwargs
+            Extra keyword arguments passed to ``datalad get``.
+
+        Returns
+        -------
+        list of dict
+            The datalad results, for the paths in the ephemeral clone.
+
+        Raises
+        ------
+        datalad.support.exceptions.IncompleteResultsError
+            If there is a datalad-related problem while fetching data.
+
+        """
+        on_failure = kwargs.pop("on_failure", "continue")
+        relpaths = [self._get_relpath(x) for x in paths]
+        shared_path = Path(self._shared_dataset.path)
+        # Pin before getting, so that other processes do not drop the files
+        self._pin_shared_files(paths)
+        with self._get_lock():
+            with fasteners.InterProcessLock(f"{shared_path}.lock"):
+                self._shared_dataset.get(
+                    [shared_path / x for x in relpaths],
+                    get_data=False,
+                    result_renderer="disabled",
+                    on_failure=on_failure,
+                )
+            self._install_subdatasets(relpaths)
+            repodir = Path(os.path.abspath(self._repodir))
+            results = []
+            to_get = relpaths
+            while to_get:
+                dl_out = self._shared_dataset.get(
+                    [shared_path / x for x in to_get],
+                    result_renderer="disabled",
+                    on_failure="ignore",
+                    **kwargs,
+                )
+                to_get = []
                 for t_out in dl_out:
-                    t_path = Path(t_out["path"])
-                    if t_out["status"] == "ok":
-                        logger.debug(f"File {t_path} downloaded")
-                        self._got_files.append(t_path)
-                    elif t_out["status"] == "notneeded":
-                        logger.debug(f"File {t_path} was already present")
+                    relpath = os.path.relpath(t_out["path"], shared_path)
+                    message = str(t_out.get("message"))
+                    if (
+                        t_out.get("status") == "error"
+                        and _TRANSFER_IN_PROGRESS in message
+                    ):
+                        to_get.append(relpath)
                     else:
-                        raise_error(f"File download failed: {t_out}")
-            logger.debug("Get done")
+                        results.append(
+                            {**t_out, "path": str(repodir / relpath)}
+                        )
+                if to_get:
+                    logger.debug(
+                        f"Waiting for {len(to_get)} files transferred by "
+                        "another process"
+                    )
+                    time.sleep(_TRANSFER_WAIT)
+        failed = [
+            x
+            for x in results
+            if x.get("status") in ["error", "impossible"]
+            and x.get("action") == "get"
+        ]
+        if failed and on_failure != "ignore":
+            raise IncompleteResultsError(results=results, failed=failed)
+        return results
 
-        return out
+    def _get_relpath(self, path: Path | str) -> str:
+        """Get the path of a file relative to the dataset.
+
+        Parameters
+        ----------
+        path : pathlib.Path or str
+            The path in the ephemeral clone.
+
+        Returns
+        -------
+        str
+            The path relative to the root of the ephemeral clone, which is
+            the same in the shared installation.
+
+        """
+        return os.path.relpath(
+            os.path.abspath(path), os.path.abspath(self._repodir)
+        )
+
+    def _install_subdatasets(self, relpaths: list[str]) -> None:
+        """Install subdatasets in the ephemeral clone.
+
+        The subdatasets containing the files, installed in the shared
+        installation, are cloned from it with ``reckless="ephemeral"``, top
+        to bottom.
+
+        Parameters
+        ----------
+        relpaths : list of str
+            The paths of the files relative to the dataset.
+
+        """
+        shared_path = Path(self._shared_dataset.path)
+        repodir = Path(os.path.abspath(self._repodir))
+        subdatasets = set()
+        for relpath in relpaths:
+            root = get_dataset_root(shared_path / relpath)
+            while root is not None and Path(root) != shared_path:
+                subdatasets.add(os.path.relpath(root, shared_path))
+                root = get_dataset_root(os.path.dirname(root))
+        # Parents are installed before their subdatasets
+        for subdataset in sorted(subdatasets, key=lambda x: x.count(os.sep)):
+            if dl.Dataset(repodir / subdataset).is_installed():
+                continue
+            parent = Path(get_dataset_root((repodir / subdataset).parent))
+            logger.debug(
+                f"Cloning shared subdataset {subdataset} with "
+                "reckless='ephemeral'"
+            )
+            parent_dataset = dl.Dataset(parent)
+            parent_dataset.config.set(
+                _SHARED_SOURCE_CANDIDATE,
+                f"{shared_path / parent.relative_to(repodir)}/{{path}}",
+                scope="local",
+            )
+            parent_dataset.get(
+                repodir / subdataset,
+                get_data=False,
+                reckless="ephemeral",
+                result_renderer="disabled",
+            )
+
+    def _get_pin_path(self) -> Path:
+        """Get the path of the file listing the files in use.
+
+        Returns
+        -------
+        pathlib.Path
+            The path, unique for the DataGrabber, next to the shared
+            installation.
+
+        """
+        return (
+            Path(f"{self._shared_dataset.path}.pins")
+            / f"{socket.gethostname()}-{os.getpid()}-{id(self)}.json"
+        )
+
+    def _pin_shared_files(self, paths: list[Path] | None = None) -> None:
+        """Record the files in use for other processes.
+
+        The files of the indexed and prefetched elements not released yet
+        and ``paths`` are written to the pin file of the DataGrabber, which
+        other processes read before dropping files from the shared
+        installation.
+
+        Parameters
+        ----------
+        paths : list of pathlib.Path or None, optional
+            Additional paths in the ephemeral clone in use (default None).
+
+        """
+        with self._get_lock():
+            in_use = list(paths or [])
+            for t_paths in [
+                *self._element_paths.values(),
+                *self._prefetch_paths.values(),
+            ]:
+                in_use.extend(t_paths)
+        pin_path = self._get_pin_path()
+        with fasteners.InterProcessLock(f"{self._shared_dataset.path}.lock"):
+            pin_path.parent.mkdir(exist_ok=True)
+            pin_path.write_text(
+                json.dumps(sorted({self._get_relpath(x) for x in in_use}))
+            )
+
+    def _get_pinned_files(self) -> set[str]:
+        """Get the files in use by other processes.
+
+        Should be called with the file lock of the shared installation.
+        Pin files of finished processes on this host are removed.
+
+        Returns
+        -------
+        set of str
+            The paths relative to the dataset.
+
+        """
+        pinned = set()
+        own_path = self._get_pin_path()
+        for pin_path in own_path.parent.glob("*.json"):
+            if pin_path == own_path:
+                continue
+            host, pid, _ = pin_path.stem.rsplit("-", 2)
+            if host == socket.gethostname():
+                try:
+                    os.kill(int(pid), 0)
+                except ProcessLookupError:
+                    pin_path.unlink(missing_ok=True)
+                    continue
+                except (PermissionError, ValueError):
+                    pass
+            try:
+                pinned.update(json.loads(pin_path.read_text()))
+            except (OSError, ValueError):
+                continue
+        return pinned
+
+    def _get_lock(self) -> threading.RLock:
+        """Get the lock serializing calls to datalad.
+
+        Returns
+        -------
+        threading.RLock
+            The lock.
+
+        """
+        if self._dataset_lock is None:
+            self._dataset_lock = threading.RLock()
+        return self._dataset_lock
+
+    @staticmethod
+    def _get_element_key(element: Element) -> tuple:
+        """Get the element as a tuple of values.
+
+        Parameters
+        ----------
+        element : `Element`
+            The element.
+
+        Returns
+        -------
+        tuple
+            The element values.
+
+        """
+        return (
+            (element,)
+            if not isinstance(element, tuple)
+            else tuple(i.value if isinstance(i, Enum) else i for i in element)
+        )
+
+    def prefetch(self, elements: list[Element]) -> None:
+        """Set the order in which elements will be indexed.
+
+        While an element is being processed, the files of the next
+        ``datagrabber.prefetch.lookahead`` elements in ``elements`` are
+        fetched in the background via a single ``datalad get`` call with
+        ``datagrabber.prefetch.njobs`` parallel jobs. The total size of the
+        files prefetched for elements not yet indexed is bounded by
+        ``datagrabber.prefetch.size`` in gigabytes, if set.
+
+        Errors while prefetching are logged and the files are fetched again
+        when the element is indexed, so that they are raised as usual.
+
+        Parameters
+        ----------
+        elements : list of `Element`
+            The elements in the order they will be indexed.
+
+        """
+        self._prefetch_order = [self._get_element_key(x) for x in elements]
+        self._prefetch_positions = {
+            x: i for i, x in enumerate(self._prefetch_order)
+        }
+        self._prefetch_futures = {}
+        self._prefetch_sizes = {}
+        if self._dataset is not None:
+            self._schedule_prefetch(0)
+
+    def _schedule_prefetch(self, start: int) -> None:
+        """Schedule prefetching of the elements after an element.
+
+        Parameters
+        ----------
+        start : int
+            The position in the planned order of the first element to
+            consider.
+
+        """
+        lookahead = int(config.get("datagrabber.prefetch.lookahead", 0))
+        if lookahead <= 0 or self._dataset is None:
+            return
+        budget = config.get("datagrabber.prefetch.size")
+        budget = int(float(budget) * 1e9) if budget is not None else None
+        pending = sum(self._prefetch_sizes.values())
+        batch = []
+        to_get = []
+        for element in self._prefetch_order[start : start + lookahead]:
+            if element in self._prefetch_futures:
+                continue
+            paths = self._get_element_paths(element)
+            if paths is None:
+                continue
+            size = sum(
+                _get_annexed_size(x) for x in paths if not Path(x).exists()
+            )
+            # Always allow one element if nothing is pending
+            if (
+                budget is not None
+                and pending + size > budget
+                and (pending > 0 or batch)
+            ):
+                break
+            pending += size
+            batch.append((element, size, paths))
+            to_get.extend(paths)
+        if not batch:
+            return
+        if self._prefetch_executor is None:
+            self._prefetch_executor = ThreadPoolExecutor(max_workers=1)
+        logger.debug(
+            f"Prefetching {len(to_get)} files for {len(batch)} element(s)"
+        )
+        future = self._prefetch_executor.submit(self._prefetch_files, to_get)
+        for element, size, paths in batch:
+            self._prefetch_futures[element] = future
+            self._prefetch_sizes[element] = size
+            self._prefetch_paths[element] = paths
+
+    def _get_element_paths(self, element: tuple) -> list[Path] | None:
+        """Get the paths of an element without fetching.
+
+        Parameters
+        ----------
+        element : tuple
+            The element values.
+
+        Returns
+        -------
+        list of pathlib.Path or None
+            The absolute paths, or None if the element cannot be resolved.
+
+        """
+        named_element = dict(
+            zip(self.get_element_keys(), element, strict=False)
+        )
+        try:
+            out = self.get_item(**named_element)
+        except Exception as e:  # noqa: BLE001
+            # Raised again when the element is indexed
+            logger.debug(f"Cannot get paths of element {element}: {e}")
+            return None
+        return [Path(os.path.abspath(x)) for x in self._get_paths(out)]
+
+    def _prefetch_files(self, paths: list[Path]) -> None:
+        """Get files in the background.
+
+        Parameters
+        ----------
+        paths : list of pathlib.Path
+            The paths to get.
+
+        """
+        jobs = config.get("datagrabber.prefetch.njobs", "auto")
+        if str(jobs).isdigit():
+            jobs = int(jobs)
+        try:
+            dl_out = self._get_files(paths, jobs=jobs, on_failure="ignore")
+        except Exception as e:  # noqa: BLE001
+            logger.debug(f"Prefetching failed: {e}")
+            return
+        with self._get_lock():
+            for t_out in dl_out:
+                if t_out.get("status") == "ok":
+                    self._add_fetched(t_out["path"])
+                elif t_out.get("status") != "notneeded":
+                    logger.debug(f"Prefetching failed: {t_out}")
+
+    def _stop_prefetch(self) -> None:
+        """Stop prefetching and wait for running downloads."""
+        if self._prefetch_executor is not None:
+            self._prefetch_executor.shutdown(wait=True, cancel_futures=True)
+            self._prefetch_executor = None
+        self._prefetch_order = []
+        self._prefetch_positions = {}
+        self._prefetch_futures = {}
+        self._prefetch_sizes = {}
+        self._prefetch_paths = {}
+
+    def release(self, element: Element) -> None:
+        """Mark an element as processed.
+
+        If ``datagrabber.cache.size`` is set, downloaded files are dropped
+        in a single ``datalad drop`` call, least recently used first, until
+        the files kept fit in it (in gigabytes). Files of elements indexed
+        but not released yet, of prefetched elements and of the next planned
+        elements (see :meth:`prefetch`) are pinned and never dropped.
+
+        Parameters
+        ----------
+        element : `Element`
+            The element.
+
+        """
+        key = self._get_element_key(element)
+        paths = self._element_paths.pop(key, [])
+        if self._shared_dataset is not None:
+            self._pin_shared_files()
+        size = config.get("datagrabber.cache.size")
+        if size is None or self._dataset is None:
+            return
+        max_size = int(float(size) * 1e9)
+        with self._get_lock():
+            # Mark as recently used
+            for path in paths:
+                if path in self._fetched:
+                    self._fetched[path] = self._fetched.pop(path)
+            total = sum(self._fetched.values())
+            if total <= max_size:
+                return
+            pinned = {
+                x for t_paths in self._element_paths.values() for x in t_paths
+            }
+            pinned.update(
+                x for t_paths in self._prefetch_paths.values() for x in t_paths
+            )
+            position = self._prefetch_positions.get(key)
+            if position is not None:
+                lookahead = int(
+                    config.get("datagrabber.prefetch.lookahead", 0)
+                )
+                for t_element in self._prefetch_order[
+                    position + 1 : position + 1 + max(lookahead, 1)
+                ]:
+                    pinned.update(self._get_element_paths(t_element) or [])
+            to_drop = []
+            for path, t_size in self._fetched.items():
+                if total <= max_size:
+                    break
+                if path not in pinned:
+                    to_drop.append(path)
+                    total -= t_size
+            if to_drop:
+                self._drop_files(to_drop)
+
+    def drop(self, element: Element) -> None:
+        """Drop the files downloaded for an element.
+
+        Unlike :meth:`release`, the files are dropped regardless of
+        ``datagrabber.cache.size``, except the files of other elements
+        indexed but not released yet or prefetched.
+
+        Parameters
+        ----------
+        element : `Element`
+            The element.
+
+        """
+        key = self._get_element_key(element)
+        paths = self._element_paths.pop(key, [])
+        if self._shared_dataset is not None:
+            self._pin_shared_files()
+        if self._dataset is None:
+            return
+        with self._get_lock():
+            pinned = {
+                x for t_paths in self._element_paths.values() for x in t_paths
+            }
+            pinned.update(
+                x for t_paths in self._prefetch_paths.values() for x in t_paths
+            )
+            to_drop = [
+                x for x in paths if x in self._fetched and x not in pinned
+            ]
+            if to_drop:
+                self._drop_files(to_drop)
+
+    def _drop_files(self, paths: list[Path]) -> None:
+        """Drop downloaded files.
+
+        Parameters
+        ----------
+        paths : list of pathlib.Path
+            The paths to drop.
+
+        """
+        logger.info(f"Dropping {len(paths)} files that were downloaded")
+        with self._get_lock():
+            if self._shared_dataset is not None:
+                dl_out = self._drop_shared_files(paths)
+            else:
+                dl_out = self._dataset.drop(
+                    paths, result_renderer="disabled", on_failure="ignore"
+                )
+            for t_out in dl_out:
+                if t_out.get("action") != "drop":
+                    continue
+                t_path = Path(t_out["path"])
+                if t_out["status"] in ["ok", "notneeded"]:
+                    self._fetched.pop(t_path, None)
+                    if t_path in self._got_files:
+                        self._got_files.remove(t_path)
+                else:
+                    warn_with_log(f"Failed to drop file: {t_out}")
+
+    def _drop_shared_files(self, paths: list[Path]) -> list[dict]:
+        """Drop files from the shared installation.
+
+        Files in use by other processes are kept. The file lock of the
+        shared installation is held, so that other processes cannot start
+        using the files while they are dropped.
+
+        Parameters
+        ----------
+        paths : list of pathlib.Path
+            The paths in the ephemeral clone to drop.
+
+        Returns
+        -------
+        list of dict
+            The datalad results, for the paths in the ephemeral clone.
+
+        """
+        shared_path = Path(self._shared_dataset.path)
+        with fasteners.InterProcessLock(f"{shared_path}.lock"):
+            pinned = self._get_pinned_files()
+            relpaths = [self._get_relpath(x) for x in paths]
+            to_drop = [x for x in relpaths if x not in pinned]
+            if len(to_drop) < len(relpaths):
+                logger.debug(
+                    f"Keeping {len(relpaths) - len(to_drop)} files in use by "
+                    "other processes"
+                )
+            if not to_drop:
+                return []
+            dl_out = self._shared_dataset.drop(
+                [shared_path / x for x in to_drop],
+                result_renderer="disabled",
+                on_failure="ignore",
+            )
+        repodir = Path(os.path.abspath(self._repodir))
+        return [
+            {
+                **x,
+                "path": str(repodir / os.path.relpath(x["path"], shared_path)),
+            }
+            for x in dl_out
+        ]
 
     def install(self) -> None:
         """Installs the datalad dataset.
@@ -314,7 +1005,15 @@ class DataladDataGrabber(BaseDataGrabber):
             logger.debug("Dataset already installed")
             self._dataset = dl.Dataset(self._repodir)
             # Check if dataset is already installed with a different ID
-            remote_id, is_dirty = self._get_dataset_id_remote()
+            known = self._known_dataset
+            if known is not None and known.get("id") == self._dataset.id:
+                logger.debug(
+                    "Dataset ID matches the element listing, skipping "
+                    "remote check"
+                )
+                remote_id, is_dirty = known["id"], bool(known.get("dirty"))
+            else:
+                remote_id, is_dirty = self._get_dataset_id_remote()
             if remote_id != self._dataset.id:
                 raise_error(
                     "Dataset already installed but with a different "
@@ -331,13 +1030,22 @@ class DataladDataGrabber(BaseDataGrabber):
                 logger.debug(f"Dataset (id: {self._dataset.id}) is clean")
 
         else:
-            logger.debug(f"Installing dataset {self.uri} to {self._repodir}")
-            try:
-                self._dataset = dl.clone(
-                    self.uri, self._repodir, result_renderer="disabled"
+            shared_location = config.get("datagrabber.shared.location")
+            is_autodir = self.datadir.stem.startswith(
+                "datalad"
+            ) and self.datadir.stem.endswith("juniferauto")
+            if shared_location is not None and is_autodir:
+                self._install_shared(Path(shared_location))
+            else:
+                logger.debug(
+                    f"Installing dataset {self.uri} to {self._repodir}"
                 )
-            except IncompleteResultsError as e:
-                raise_error(f"Failed to clone dataset: {e.failed}")
+                try:
+                    self._dataset = dl.clone(
+                        self.uri, self._repodir, result_renderer="disabled"
+                    )
+                except IncompleteResultsError as e:
+                    raise_error(f"Failed to clone dataset: {e.failed}")
             logger.debug("Dataset installed")
         self._was_cloned = not is_installed
         # Dataset should be set already
@@ -346,22 +1054,77 @@ class DataladDataGrabber(BaseDataGrabber):
         )
         self.datalad_id = self._dataset.id
 
+    def _install_shared(self, location: Path) -> None:
+        """Install the dataset as an ephemeral clone of a shared one.
+
+        Parameters
+        ----------
+        location : pathlib.Path
+            The directory of the shared installations.
+
+        Raises
+        ------
+        datalad.support.exceptions.IncompleteResultsError
+            If there is a datalad-related problem while cloning dataset.
+
+        """
+        key = hashlib.md5(
+            str(self.uri).encode("utf-8"), usedforsecurity=False
+        ).hexdigest()
+        shared_path = location / key
+        location.mkdir(parents=True, exist_ok=True)
+        with fasteners.InterProcessLock(location / f"{key}.lock"):
+            if dl.Dataset(shared_path).is_installed():
+                logger.debug(f"Using shared dataset at {shared_path}")
+            else:
+                logger.info(
+                    f"Installing shared dataset {self.uri} to {shared_path}"
+                )
+                try:
+                    dl.clone(self.uri, shared_path, result_renderer="disabled")
+                except IncompleteResultsError as e:
+                    raise_error(f"Failed to clone dataset: {e.failed}")
+        self._shared_dataset = dl.Dataset(shared_path)
+        logger.debug(
+            f"Cloning shared dataset {shared_path} to {self._repodir} "
+            "with reckless='ephemeral'"
+        )
+        try:
+            self._dataset = dl.clone(
+                str(shared_path),
+                self._repodir,
+                reckless="ephemeral",
+                result_renderer="disabled",
+            )
+        except IncompleteResultsError as e:
+            raise_error(f"Failed to clone dataset: {e.failed}")
+
     def cleanup(self) -> None:
         """Cleanup the datalad dataset."""
-        if self._was_cloned:
+        self._stop_prefetch()
+        if self._shared_dataset is not None:
+            # Do not follow the annex of the shared installation
+            logger.debug("Removing ephemeral clone")
+            shutil.rmtree(self._repodir, ignore_errors=True)
+            self._get_pin_path().unlink(missing_ok=True)
+            self._shared_dataset = None
+        elif self._was_cloned:
             logger.debug("Removing dataset with reckless='kill'")
             self._dataset.remove(reckless="kill", result_renderer="disabled")
         else:
             logger.debug("Dropping files that were downloaded")
-            for f in self._got_files:
-                logger.debug(f"Dropping {f}")
-                self._dataset.drop(f, result_renderer="disabled")
+            if self._got_files:
+                self._dataset.drop(self._got_files, result_renderer="disabled")
+        self._fetched = {}
+        self._element_paths = {}
 
     def __getitem__(self, element: Element) -> dict:
         """Implement single element indexing in the Datalad database.
 
         It will first obtain the paths from the parent class and then
-        ``datalad get`` each of the files.
+        ``datalad get`` each of the files. If the element was planned via
+        :meth:`prefetch`, the files fetched in the background are awaited
+        and prefetching of the next elements is scheduled.
 
         Parameters
         ----------
@@ -378,13 +1141,30 @@ class DataladDataGrabber(BaseDataGrabber):
             specified element.
 
         """
+        key = self._get_element_key(element)
+        # Elements can be indexed from multiple threads
+        with self._get_lock():
+            future: Future | None = self._prefetch_futures.pop(key, None)
+            self._prefetch_sizes.pop(key, None)
+            self._prefetch_paths.pop(key, None)
+        if future is not None:
+            logger.debug(f"Waiting for prefetching of element {key}")
+            future.result()
         out = super().__getitem__(element)
         out = self._dataset_get(out)
+        with self._get_lock():
+            self._element_paths[key] = [
+                Path(os.path.abspath(x)) for x in self._get_paths(out)
+            ]
+            if key in self._prefetch_positions:
+                self._schedule_prefetch(self._prefetch_positions[key] + 1)
         return out
 
     def __enter__(self) -> "DataladDataGrabber":
         """Implement context entry."""
         self.install()
+        if self._prefetch_order:
+            self._schedule_prefetch(0)
         return self
 
     def __exit__(self, exc_type, exc_value, exc_traceback) -> None:
@@ -5,14 +5,16 @@
 #          Synchon Mandal <s.mandal@fz-juelich.de>
 # License: AGPL
 
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Annotated
+from typing import Annotated, Any
 
 from pydantic import BeforeValidator, ConfigDict
 
 from ..api.decorators import register_datagrabber
 from ..typing import DataGrabberLike, Element
-from ..utils import deep_update, ensure_list, raise_error
+from ..utils import config, deep_update, ensure_list, raise_error
 from .base import BaseDataGrabber, DataType
 from .pattern import PatternDataGrabber
 from .pattern_datalad import PatternDataladDataGrabber
@@ -26,7 +28,9 @@ class MultipleDataGrabber(BaseDataGrabber):
     """Concrete implementation for multi sourced data fetching.
 
     Implements a DataGrabber which can be used to fetch data from multiple
-    DataGrabbers.
+    DataGrabbers. The DataGrabbers are indexed and listed concurrently in
+    threads, bounded by ``datagrabber.multiple.njobs`` config if set, and
+    their outputs are merged in the order of ``datagrabbers``.
 
     Parameters
     ----------
@@ -94,6 +98,31 @@ class MultipleDataGrabber(BaseDataGrabber):
                     klass=RuntimeError,
                 )
 
+    def _map(self, func: Callable[[DataGrabberLike], Any]) -> list:
+        """Call a function on each DataGrabber concurrently.
+
+        Parameters
+        ----------
+        func : callable
+            The function taking a DataGrabber.
+
+        Returns
+        -------
+        list
+            The results, in the order of ``datagrabbers``.
+
+        """
+        n_jobs = config.get("datagrabber.multiple.njobs")
+        n_jobs = min(
+            int(n_jobs) if n_jobs is not None else len(self.datagrabbers),
+            len(self.datagrabbers),
+        )
+        if n_jobs <= 1:
+            return [func(dg) for dg in self.datagrabbers]
+        with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+            # Propagate errors
+            return list(executor.map(func, self.datagrabbers))
+
     def __getitem__(self, element: Element) -> dict:
         """Implement indexing.
 
@@ -112,11 +141,42 @@ class MultipleDataGrabber(BaseDataGrabber):
             specified element.
 
         """
+        return self._merge(self._map(lambda dg: dg[element]))
+
+    def _index(self, element: Element) -> dict:
+        """Index an element without fetching its data.
+
+        Parameters
+        ----------
+        element : `Element`
+            The element to be indexed.
+
+        Returns
+        -------
+        dict
+            Dictionary of paths for each type of data required for the
+            specified element.
+
+        """
+        return self._merge(self._map(lambda dg: dg._index(element)))
+
+    def _merge(self, all_out: list[dict]) -> dict:
+        """Merge the outputs of the DataGrabbers for an element.
+
+        Parameters
+        ----------
+        all_out : list of dict
+            The output of each DataGrabber, in order.
+
+        Returns
+        -------
+        dict
+            The merged output, with the metadata of all the DataGrabbers.
 
+        """
         out = {}
         metas = []
-        for dg in self.datagrabbers:
-            t_out = dg[element]
+        for dg, t_out in zip(self.datagrabbers, all_out, strict=True):
             deep_update(out, t_out)
             # Now get the meta for this datagrabber
             t_meta = {}
@@ -134,6 +194,54 @@ class MultipleDataGrabber(BaseDataGrabber):
                 t_kind["meta"]["datagrabber"]["datagrabbers"] = metas
         return out
 
+    def prefetch(self, elements: list[Element]) -> None:
+        """Set the order in which elements will be indexed.
+
+        The order is passed to the DataGrabbers that prefetch data, such as
+        the DataLad-based ones.
+
+        Parameters
+        ----------
+        elements : list of `Element`
+            The elements in the order they will be indexed.
+
+        """
+        self._map(
+            lambda dg: (
+                dg.prefetch(elements) if hasattr(dg, "prefetch") else None
+            )
+        )
+
+    def release(self, element: Element) -> None:
+        """Mark an element as processed.
+
+        The element is released in the DataGrabbers that drop data, such as
+        the DataLad-based ones.
+
+        Parameters
+        ----------
+        element : `Element`
+            The element.
+
+        """
+        self._map(
+            lambda dg: dg.release(element) if hasattr(dg, "release") else None
+        )
+
+    def drop(self, element: Element) -> None:
+        """Drop the data downloaded for an element.
+
+        The element is dropped in the DataGrabbers that download data, such
+        as the DataLad-based ones.
+
+        Parameters
+        ----------
+        element : `Element`
+            The element.
+
+        """
+        self._map(lambda dg: dg.drop(element) if hasattr(dg, "drop") else None)
+
     def __enter__(self) -> "MultipleDataGrabber":
         """Implement context entry."""
         for dg in self.datagrabbers:
@@ -183,7 +291,7 @@ class MultipleDataGrabber(BaseDataGrabber):
             related DataGrabbers.
 
         """
-        all_elements = [dg.get_elements() for dg in self.datagrabbers]
+        all_elements = self._map(lambda dg: dg.get_elements())
         elements = set(all_elements[0])
         for s in all_elements[1:]:
             elements.intersection_update(s)
@@ -16,7 +16,8 @@ from pydantic import Field
 
 from ..api.decorators import register_datagrabber
 from ..typing import DataGrabberPatterns, Elements
-from ..utils import raise_error
+from ..utils import config, raise_error
+from ._file_index import get_file_index
 from .base import BaseDataGrabber, logger
 from .pattern_validation_mixin import PatternValidationMixin
 
@@ -106,6 +107,30 @@ class PatternDataGrabber(BaseDataGrabber, PatternValidationMixin):
         """Skip file check existence."""
         return False
 
+    def _glob(self, pattern: str) -> list[Path]:
+        """Get the paths in ``fulldir`` matching a glob pattern.
+
+        Unless ``datagrabber.index`` is set to False, the paths are resolved
+        via the file index of ``fulldir`` instead of globbing the filesystem.
+
+        Parameters
+        ----------
+        pattern : str
+            The glob pattern relative to ``fulldir``.
+
+        Returns
+        -------
+        list of pathlib.Path
+            The matching paths.
+
+        """
+        if not config.get("datagrabber.index", True):
+            return list(self.fulldir.glob(pattern))
+        return [
+            self.fulldir / x
+            for x in get_file_index(self.fulldir).glob(pattern)
+        ]
+
     def _replace_patterns_regex(
         self, pattern: str
     ) -> tuple[str, str, list[str]]:
@@ -217,7 +242,7 @@ class PatternDataGrabber(BaseDataGrabber, PatternValidationMixin):
         resolved_pattern = self._replace_patterns_glob(element, pattern)
         # Resolve path for wildcard
         if "*" in resolved_pattern:
-            t_matches = list(self.fulldir.absolute().glob(resolved_pattern))
+            t_matches = [x.absolute() for x in self._glob(resolved_pattern)]
             # Multiple matches
             if len(t_matches) > 1:
                 raise_error(
@@ -278,6 +303,8 @@ class PatternDataGrabber(BaseDataGrabber, PatternValidationMixin):
             specified element.
 
         """
+        # Check the file index for changes once for the element
+        get_file_index(self.fulldir).refresh()
         out = {}
         for t_type in self.types:
             # Data type dictionary
@@ -369,6 +396,9 @@ class PatternDataGrabber(BaseDataGrabber, PatternValidationMixin):
 
         """
         elements = None
+        # Check the file index for changes once for all patterns
+        index = get_file_index(self.fulldir)
+        index.refresh()
 
         # Iterate by number of replacements. At least one pattern must have
         # all of them.
@@ -407,7 +437,7 @@ class PatternDataGrabber(BaseDataGrabber, PatternValidationMixin):
                     glob_pattern,
                     t_replacements,
                 ) = self._replace_patterns_regex(pattern)
-                for fname in self.fulldir.glob(glob_pattern):
+                for fname in self._glob(glob_pattern):
                     suffix = fname.relative_to(self.fulldir).as_posix()
                     m = re.match(re_pattern, suffix)
                     if m is not None:
@@ -443,4 +473,6 @@ class PatternDataGrabber(BaseDataGrabber, PatternValidationMixin):
                         elements = new_elements
         if elements is None:
             elements = set()
+        # Persist the file index for later runs
+        index.save()
         return list(elements)
@@ -475,3 +475,289 @@ def test_DataladDataGrabber_previously_cloned_and_get_dirty(
     assert elem1_bold.is_file() is False
     assert elem1_t1w.is_symlink() is False
     assert elem1_t1w.is_file() is True
+
+
+@pytest.mark.parametrize(
+    "size, n_prefetched",
+    [
+        (None, 2),
+        (1e-9, 1),
+    ],
+)
+def test_DataladDataGrabber_prefetch(
+    tmp_path: Path,
+    concrete_datagrabber: type,
+    size: float | None,
+    n_prefetched: int,
+) -> None:
+    """Test DataladDataGrabber prefetching.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+    concrete_datagrabber : DataladDataGrabber
+        A concrete datalad-based DataGrabber class to use.
+    size : float or None
+        The parametrized prefetching size.
+    n_prefetched : int
+        The parametrized number of elements prefetched after the first one.
+
+    """
+    datadir = tmp_path / "newclone"
+    uri = _testing_dataset["example_bids"]["uri"]
+    config.set(key="datagrabber.prefetch.lookahead", val=2)
+    if size is not None:
+        config.set(key="datagrabber.prefetch.size", val=size)
+    try:
+        with concrete_datagrabber(datadir=datadir, uri=uri) as dg:
+            elements = ["sub-01", "sub-02", "sub-03", "sub-04"]
+            dg.prefetch(elements)
+            # Elements are scheduled on entry or when planned
+            assert len(dg._prefetch_futures) == n_prefetched
+            elem1 = dg["sub-01"]
+            assert elem1["BOLD"]["path"].is_file() is True
+            assert elem1["T1w"]["path"].is_file() is True
+            # Next elements are fetched in the background
+            assert len(dg._prefetch_futures) == n_prefetched
+            for future in dg._prefetch_futures.values():
+                future.result()
+            for subject in elements[1 : 1 + n_prefetched]:
+                assert (
+                    datadir
+                    / f"example_bids/{subject}/anat/{subject}_T1w.nii.gz"
+                ).is_file() is True
+            # Not planned elements are fetched as usual
+            elem9 = dg["sub-09"]
+            assert elem9["BOLD"]["path"].is_file() is True
+            # Planned elements are still fetched if prefetching failed
+            for subject in elements[1:]:
+                out = dg[subject]
+                assert out["BOLD"]["path"].is_file() is True
+            assert len(dg._prefetch_futures) == 0
+        assert dg._prefetch_executor is None
+    finally:
+        config.delete("datagrabber.prefetch.lookahead")
+        if size is not None:
+            config.delete("datagrabber.prefetch.size")
+
+
+def test_DataladDataGrabber_release(
+    tmp_path: Path, concrete_datagrabber: type
+) -> None:
+    """Test DataladDataGrabber dropping files of released elements.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+    concrete_datagrabber : DataladDataGrabber
+        A concrete datalad-based DataGrabber class to use.
+
+    """
+    # Dataset cloned outside of datagrabber with some files present
+    datadir = tmp_path / "cloned_clean"
+    uri = _testing_dataset["example_bids"]["uri"]
+    dl.clone(uri, datadir, result_renderer="disabled")
+    elem1_t1w = datadir / "example_bids/sub-01/anat/sub-01_T1w.nii.gz"
+    dl.get(elem1_t1w, dataset=datadir, result_renderer="disabled")
+
+    config.set(key="datagrabber.cache.size", val=0)
+    try:
+        with concrete_datagrabber(datadir=datadir, uri=uri) as dg:
+            dg.prefetch(["sub-01", "sub-02", "sub-03"])
+            elem1 = dg["sub-01"]
+            elem2 = dg["sub-02"]
+            assert len(dg._got_files) == 3
+            # Files of elements not released are kept
+            dg.release("sub-01")
+            assert elem1["BOLD"]["path"].is_file() is False
+            assert elem1["BOLD"]["path"].is_symlink() is True
+            # Files present before are kept
+            assert elem1["T1w"]["path"].is_file() is True
+            assert elem2["BOLD"]["path"].is_file() is True
+            assert elem2["T1w"]["path"].is_file() is True
+            assert len(dg._got_files) == 2
+            dg.release("sub-02")
+            assert elem2["BOLD"]["path"].is_file() is False
+            assert elem2["T1w"]["path"].is_file() is False
+            assert len(dg._got_files) == 0
+    finally:
+        config.delete("datagrabber.cache.size")
+    assert elem1_t1w.is_file() is True
+
+
+def test_DataladDataGrabber_drop(tmp_path: Path) -> None:
+    """Test DataladDataGrabber dropping files of an element.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+
+    """
+    origin = dl.create(tmp_path / "origin", result_renderer="disabled")
+    for subject in ["sub-01", "sub-02"]:
+        (tmp_path / "origin" / subject).mkdir()
+        for type_ in ["T1w", "bold"]:
+            (
+                tmp_path / f"origin/{subject}/{subject}_{type_}.nii.gz"
+            ).write_text(f"{subject} {type_}")
+    origin.save(result_renderer="disabled")
+
+    class MyDataGrabber(DataladDataGrabber):
+        types: list[DataType] = [DataType.T1w, DataType.BOLD]  # noqa: RUF012
+
+        def get_item(self, subject):
+            return {
+                "T1w": {
+                    "path": self.fulldir / f"{subject}/{subject}_T1w.nii.gz"
+                },
+                "BOLD": {
+                    "path": self.fulldir / f"{subject}/{subject}_bold.nii.gz"
+                },
+            }
+
+        def get_elements(self):
+            return ["sub-01", "sub-02"]
+
+        def get_element_keys(self):
+            return ["subject"]
+
+    # Dataset cloned outside of datagrabber with some files present
+    datadir = tmp_path / "cloned"
+    dl.clone(str(tmp_path / "origin"), datadir, result_renderer="disabled")
+    elem1_t1w = datadir / "sub-01/sub-01_T1w.nii.gz"
+    dl.get(elem1_t1w, dataset=datadir, result_renderer="disabled")
+    with MyDataGrabber(
+        datadir=datadir, uri=f"file://{tmp_path / 'origin'}"
+    ) as dg:
+        elem1 = dg["sub-01"]
+        elem2 = dg["sub-02"]
+        dg.drop("sub-01")
+        assert elem1["BOLD"]["path"].is_file() is False
+        # Files present before are kept
+        assert elem1["T1w"]["path"].is_file() is True
+        # Files of other elements are kept
+        assert elem2["BOLD"]["path"].is_file() is True
+        assert elem2["T1w"]["path"].is_file() is True
+        dg.drop("sub-02")
+        assert elem2["BOLD"]["path"].is_file() is False
+        assert elem2["T1w"]["path"].is_file() is False
+        assert len(dg._got_files) == 0
+
+
+def test_DataladDataGrabber_shared(
+    tmp_path: Path, concrete_datagrabber: type
+) -> None:
+    """Test DataladDataGrabber with a shared installation.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+    concrete_datagrabber : DataladDataGrabber
+        A concrete datalad-based DataGrabber class to use.
+
+    """
+    uri = _testing_dataset["example_bids"]["uri"]
+    location = tmp_path / "shared"
+    config.set(key="datagrabber.shared.location", val=str(location))
+    try:
+        with concrete_datagrabber(uri=uri) as dg:
+            assert dg._was_cloned is True
+            shared_path = Path(dg._shared_dataset.path)
+            assert shared_path.parent == location
+            repodir = dg._repodir
+            elem1 = dg["sub-01"]
+            assert elem1["BOLD"]["path"].is_file() is True
+            # Files are fetched into the shared installation
+            shared_bold = (
+                shared_path
+                / "example_bids/sub-01/func/sub-01_task-rest_bold.nii.gz"
+            )
+            assert shared_bold.is_file() is True
+            assert len(dg._got_files) == 0
+        # Ephemeral clone is removed, shared installation and files are kept
+        assert repodir.exists() is False
+        assert shared_bold.is_file() is True
+
+        # Shared installation is re-used
+        with concrete_datagrabber(uri=uri) as dg:
+            assert Path(dg._shared_dataset.path) == shared_path
+            bold_path = dg.fulldir / "sub-01/func/sub-01_task-rest_bold.nii.gz"
+            # Content is available without fetching
+            assert bold_path.is_file() is True
+            assert dg["sub-01"]["BOLD"]["path"] == bold_path
+    finally:
+        config.delete("datagrabber.shared.location")
+
+
+def test_DataladDataGrabber_shared_subdatasets(tmp_path: Path) -> None:
+    """Test DataladDataGrabber with a shared installation and subdatasets.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+
+    """
+    # Dataset with the files of every subject in a nested subdataset
+    origin = dl.create(tmp_path / "origin", result_renderer="disabled")
+    for subject in ["sub-01", "sub-02"]:
+        subdataset = origin.create(subject, result_renderer="disabled")
+        subdataset.create("func", result_renderer="disabled")
+        (tmp_path / f"origin/{subject}/func/{subject}_bold.nii.gz").write_text(
+            subject
+        )
+    origin.save(recursive=True, result_renderer="disabled")
+
+    class MyDataGrabber(DataladDataGrabber):
+        types: list[DataType] = [DataType.BOLD]  # noqa: RUF012
+
+        def get_item(self, subject):
+            return {
+                "BOLD": {
+                    "path": self.fulldir
+                    / f"{subject}/func/{subject}_bold.nii.gz"
+                }
+            }
+
+        def get_elements(self):
+            return ["sub-01", "sub-02"]
+
+        def get_element_keys(self):
+            return ["subject"]
+
+    location = tmp_path / "shared"
+    config.set(key="datagrabber.shared.location", val=str(location))
+    config.set(key="datagrabber.cache.size", val=0)
+    try:
+        with MyDataGrabber(uri=f"file://{tmp_path / 'origin'}") as dg:
+            shared_path = Path(dg._shared_dataset.path)
+            elem1 = dg["sub-01"]
+            # Subdatasets are cloned from the shared installation
+            assert elem1["BOLD"]["path"].read_text() == "sub-01"
+            shared_bold1 = shared_path / "sub-01/func/sub-01_bold.nii.gz"
+            assert shared_bold1.is_file() is True
+            assert (dg._repodir / "sub-01/func/.git/annex").resolve() == (
+                shared_path / "sub-01/func/.git/annex"
+            )
+            # Files in use by another process are not dropped
+            pins = Path(f"{shared_path}.pins")
+            (pins / "otherhost-1-1.json").write_text(
+                '["sub-02/func/sub-02_bold.nii.gz"]'
+            )
+            elem2 = dg["sub-02"]
+            assert elem2["BOLD"]["path"].read_text() == "sub-02"
+            dg.release("sub-01")
+            assert shared_bold1.is_file() is False
+            dg.release("sub-02")
+            assert (
+                shared_path / "sub-02/func/sub-02_bold.nii.gz"
+            ).is_file() is True
+        assert dg._repodir.exists() is False
+        assert sorted(x.name for x in pins.iterdir()) == ["otherhost-1-1.json"]
+    finally:
+        config.delete("datagrabber.shared.location")
+        config.delete("datagrabber.cache.size")
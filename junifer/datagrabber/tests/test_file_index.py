@@ -0,0 +1,201 @@
+"""Provide tests for file index."""
+
+# Authors: Synchon Mandal <s.mandal@fz-juelich.de>
+# License: AGPL
+
+import os
+from pathlib import Path
+
+import pytest
+
+from junifer.datagrabber import PatternDataGrabber
+from junifer.datagrabber._file_index import FileIndex
+from junifer.utils import config
+
+
+@pytest.fixture
+def tree(tmp_path: Path) -> Path:
+    """Create a BIDS-like directory tree.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+
+    Returns
+    -------
+    pathlib.Path
+        The root of the tree.
+
+    """
+    root = tmp_path / "data"
+    for subject in ["sub-01", "sub-02", "sub-03"]:
+        for session in ["ses-1", "ses-2"]:
+            func = root / subject / session / "func"
+            func.mkdir(parents=True)
+            (func / f"{subject}_{session}_task-rest_bold.nii.gz").touch()
+            (func / f"{subject}_{session}_task-rest_confounds.tsv").touch()
+    # Broken symlink like a datalad annexed file not fetched yet
+    (
+        root / "sub-03" / "ses-2" / "func" / "sub-03_ses-2_mask.nii.gz"
+    ).symlink_to(root / "missing")
+    # Symlinked directory
+    (root / "sub-04").symlink_to(root / "sub-01")
+    return root
+
+
+def _set_mtime(path: Path, mtime: float) -> None:
+    """Set the modification time of ``path``.
+
+    Parameters
+    ----------
+    path : pathlib.Path
+        The path.
+    mtime : float
+        The modification time.
+
+    """
+    os.utime(path, (mtime, mtime))
+
+
+@pytest.mark.parametrize(
+    "pattern",
+    [
+        "sub-*/ses-*/func/*_bold.nii.gz",
+        "sub-01/ses-1/func/sub-01_ses-1_task-rest_bold.nii.gz",
+        "sub-0[12]/*/func/*.tsv",
+        "sub-?/ses-1/func/*",
+        "sub-03/ses-2/func/*mask.nii.gz",
+        "sub-0[!1]/ses-*",
+        "**/*_bold.nii.gz",
+        "sub-05/ses-1/func/*",
+        "*",
+    ],
+)
+def test_FileIndex_glob(tree: Path, pattern: str) -> None:
+    """Test FileIndex glob against pathlib.
+
+    Parameters
+    ----------
+    tree : pathlib.Path
+        The root of the directory tree.
+    pattern : str
+        The parametrized glob pattern.
+
+    """
+    index = FileIndex(root=tree)
+    assert sorted(index.glob(pattern)) == sorted(
+        x.relative_to(tree).as_posix() for x in tree.glob(pattern)
+    )
+
+
+def test_FileIndex_refresh(tree: Path, tmp_path: Path) -> None:
+    """Test FileIndex persistence and refresh.
+
+    Parameters
+    ----------
+    tree : pathlib.Path
+        The root of the directory tree.
+    tmp_path : pathlib.Path
+        The path to the test directory.
+
+    """
+    # Make directories look old enough to be trusted
+    for path in [tree, *tree.rglob("*")]:
+        if path.is_dir() and not path.is_symlink():
+            _set_mtime(path, 1e9)
+    pattern = "sub-*/ses-*/func/*_bold.nii.gz"
+    index = FileIndex(root=tree, location=tmp_path / "index")
+    assert len(index.glob(pattern)) == 8
+    index.save()
+    assert index.cache_path is not None
+    assert index.cache_path.is_file()
+
+    # Listings are loaded from the cache file
+    loaded = FileIndex(root=tree, location=tmp_path / "index")
+    assert loaded._dirs == index._dirs
+    assert len(loaded.glob(pattern)) == 8
+
+    # Only changed directories are listed again
+    func = tree / "sub-01" / "ses-1" / "func"
+    (func / "sub-01_ses-1_task-other_bold.nii.gz").touch()
+    _set_mtime(func, 1.5e9)
+    # Not seen in the same operation
+    assert len(loaded.glob(pattern)) == 8
+    loaded.refresh()
+    # Also seen via the symlinked directory
+    assert len(loaded.glob(pattern)) == 10
+    assert loaded._dirs["sub-01/ses-1/func"][0] == int(1.5e9) * 10**9
+    assert (
+        loaded._dirs["sub-02/ses-1/func"] == index._dirs["sub-02/ses-1/func"]
+    )
+
+    # Removed directories are dropped
+    for path in func.iterdir():
+        path.unlink()
+    func.rmdir()
+    loaded.refresh()
+    assert len(loaded.glob(pattern)) == 6
+    assert "sub-01/ses-1/func" not in loaded._dirs
+
+
+@pytest.mark.parametrize("use_index", [True, False])
+def test_PatternDataGrabber_file_index(
+    tree: Path, tmp_path: Path, use_index: bool
+) -> None:
+    """Test PatternDataGrabber with file index.
+
+    Parameters
+    ----------
+    tree : pathlib.Path
+        The root of the directory tree.
+    tmp_path : pathlib.Path
+        The path to the test directory.
+    use_index : bool
+        The parametrized flag for using the file index.
+
+    """
+    config.set(key="datagrabber.index", val=use_index)
+    config.set(key="datagrabber.index.location", val=tmp_path / "index")
+    dg = PatternDataGrabber(
+        datadir=tree,
+        types=["BOLD"],
+        patterns={
+            "BOLD": {
+                "pattern": (
+                    "{subject}/{session}/func/"
+                    "{subject}_{session}_task-rest_bold.nii.gz"
+                ),
+                "space": "MNI152NLin6Asym",
+                "confounds": {
+                    "pattern": (
+                        "{subject}/{session}/func/"
+                        "{subject}_{session}_*_confounds.tsv"
+                    ),
+                    "format": "adhoc",
+                },
+            },
+        },
+        replacements=["subject", "session"],
+    )
+    with dg:
+        elements = dg.get_elements()
+        # Symlinked directory has mismatching file names
+        assert len(elements) == 6
+        out = dg[("sub-02", "ses-1")]
+    assert (
+        out["BOLD"]["path"]
+        == (
+            tree
+            / "sub-02"
+            / "ses-1"
+            / "func"
+            / "sub-02_ses-1_task-rest_bold.nii.gz"
+        ).absolute()
+    )
+    assert out["BOLD"]["confounds"]["path"].name == (
+        "sub-02_ses-1_task-rest_confounds.tsv"
+    )
+    assert (tmp_path / "index").exists() == use_index
+    config.delete("datagrabber.index")
+    config.delete("datagrabber.index.location")
@@ -8,7 +8,12 @@ from pathlib import Path
 import pytest
 from pydantic import AnyUrl
 
-from junifer.datagrabber import MultipleDataGrabber, PatternDataladDataGrabber
+from junifer.datagrabber import (
+    MultipleDataGrabber,
+    PatternDataGrabber,
+    PatternDataladDataGrabber,
+)
+from junifer.utils import config
 
 
 _testing_dataset = {
@@ -327,3 +332,110 @@ def test_MultipleDataGrabber_partial_pattern() -> None:
         assert len(meta["datagrabbers"]) == 2
         assert meta["datagrabbers"][0]["class"] == "PatternDataladDataGrabber"
         assert meta["datagrabbers"][1]["class"] == "PatternDataladDataGrabber"
+
+
+def test_MultipleDataGrabber_concurrent(tmp_path: Path) -> None:
+    """Test MultipleDataGrabber concurrent and serial outputs are same.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+
+    """
+    for subject in ["sub-01", "sub-02", "sub-03"]:
+        (tmp_path / subject / "anat").mkdir(parents=True)
+        (tmp_path / subject / "anat" / f"{subject}_T1w.nii.gz").touch()
+        (tmp_path / subject / "func").mkdir()
+        if subject != "sub-03":
+            (tmp_path / subject / "func" / f"{subject}_bold.nii.gz").touch()
+    dg1 = PatternDataGrabber(
+        datadir=tmp_path,
+        types=["T1w"],
+        patterns={
+            "T1w": {
+                "pattern": "{subject}/anat/{subject}_T1w.nii.gz",
+                "space": "native",
+            },
+        },
+        replacements=["subject"],
+    )
+    dg2 = PatternDataGrabber(
+        datadir=tmp_path,
+        types=["BOLD"],
+        patterns={
+            "BOLD": {
+                "pattern": "{subject}/func/{subject}_bold.nii.gz",
+                "space": "MNI152NLin6Asym",
+            },
+        },
+        replacements=["subject"],
+    )
+    dg = MultipleDataGrabber(datagrabbers=[dg1, dg2])
+    with dg:
+        elements = dg.get_elements()
+        out = dg["sub-01"]
+    config.set(key="datagrabber.multiple.njobs", val=1)
+    try:
+        with dg:
+            serial_elements = dg.get_elements()
+            serial_out = dg["sub-01"]
+    finally:
+        config.delete("datagrabber.multiple.njobs")
+    assert set(elements) == {"sub-01", "sub-02"}
+    assert set(elements) == set(serial_elements)
+    assert list(out.keys()) == ["T1w", "BOLD"]
+    assert out == serial_out
+    assert len(out["T1w"]["meta"]["datagrabber"]["datagrabbers"]) == 2
+
+
+def test_MultipleDataGrabber_prefetch_release(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test MultipleDataGrabber forwards prefetch and release.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+    monkeypatch : pytest.MonkeyPatch
+        The pytest.MonkeyPatch object.
+
+    """
+    calls = []
+    monkeypatch.setattr(
+        PatternDataladDataGrabber,
+        "prefetch",
+        lambda self, elements: calls.append(("prefetch", elements)),
+    )
+    monkeypatch.setattr(
+        PatternDataladDataGrabber,
+        "release",
+        lambda self, element: calls.append(("release", element)),
+    )
+    dg1 = PatternDataladDataGrabber(
+        uri=AnyUrl(_testing_dataset["example_bids"]["uri"]),
+        types=["T1w"],
+        patterns={
+            "T1w": {
+                "pattern": "{subject}/anat/{subject}_T1w.nii.gz",
+                "space": "native",
+            },
+        },
+        replacements=["subject"],
+    )
+    dg2 = PatternDataGrabber(
+        datadir=tmp_path,
+        types=["BOLD"],
+        patterns={
+            "BOLD": {
+                "pattern": "{subject}/func/{subject}_bold.nii.gz",
+                "space": "MNI152NLin6Asym",
+            },
+        },
+        replacements=["subject"],
+    )
+    dg = MultipleDataGrabber(datagrabbers=[dg1, dg2])
+    dg.prefetch(["sub-01", "sub-02"])
+    dg.release("sub-01")
+    assert calls == [("prefetch", ["sub-01", "sub-02"]), ("release", "sub-01")]
@@ -29,9 +29,10 @@ _extensions = {
     ".tsv": "TSV",
 }
 
-# Map each type to a function and arguments
+# Map each type to a function and arguments; NIfTI images are read lazily
+# on first access and uncompressed ones are memory-mapped
 _readers = {}
-_readers["NIFTI"] = {"func": nib.load, "params": None}
+_readers["NIFTI"] = {"func": nib.load, "params": {"mmap": True}}
 _readers["CSV"] = {"func": pd.read_csv, "params": None}
 _readers["TSV"] = {"func": pd.read_csv, "params": {"sep": "\t"}}
 
@@ -63,6 +64,7 @@ class DefaultDataReader(BaseModel, PipelineStepMixin, UpdateMetaMixin):
         self,
         input: dict[str, dict],
         params: dict | None = None,
+        types: list[str] | None = None,
     ) -> dict:
         """Fit and transform.
 
@@ -72,6 +74,10 @@ class DefaultDataReader(BaseModel, PipelineStepMixin, UpdateMetaMixin):
             The Junifer Data object.
         params : dict, optional
             Extra parameters for data types (default None).
+        types : list of str, optional
+            The data types to read. Other data types are passed through
+            without the "data" key. If None, all data types are read
+            (default None).
 
         Returns
         -------
@@ -103,6 +109,13 @@ class DefaultDataReader(BaseModel, PipelineStepMixin, UpdateMetaMixin):
                 )
                 continue
 
+            # Skip data type not required by the pipeline
+            if types is not None and type_key not in types:
+                logger.info(f"Skipping {type_key} as it is not required")
+                out[type_key]["path"] = Path(type_val["path"])
+                self.update_meta(out[type_key], "datareader")
+                continue
+
             # Iterate to check for nested "types" like mask;
             # need to copy to avoid runtime error for changing dict size
             for k, v in type_val.copy().items():
@@ -184,7 +197,7 @@ def _read_data(
             reader_params = _readers[ftype]["params"]
             # Update reader function params
             if reader_params is not None:
-                read_params.update(reader_params)
+                read_params = {**read_params, **reader_params}
             logger.debug(f"Calling {reader_func!s} with {read_params}")
             # Read data
             fread = reader_func(path, **read_params)
@@ -7,6 +7,7 @@
 from pathlib import Path
 
 import nibabel as nib
+import numpy as np
 import pandas as pd
 import pytest
 from nibabel import testing as nib_testing
@@ -168,3 +169,35 @@ def test_DefaultDataReader_csv(tmp_path: Path) -> None:
     read_df = output["csv"]["data"][["col1", "col2"]]
     # Check if dataframes are equal
     assert_frame_equal(df, read_df)
+
+
+def test_DefaultDataReader_types(tmp_path: Path) -> None:
+    """Test DefaultDataReader reading only some data types.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+
+    """
+    nib.save(
+        nib.Nifti1Image(np.ones((3, 4, 5), dtype=np.float32), np.eye(4)),
+        tmp_path / "bold.nii",
+    )
+    pd.DataFrame({"col1": [1, 2]}).to_csv(tmp_path / "confounds.tsv", sep="\t")
+
+    reader = DefaultDataReader()
+    input = {
+        "BOLD": {
+            "path": tmp_path / "bold.nii",
+            "confounds": {"path": tmp_path / "confounds.tsv"},
+        },
+        "T1w": {"path": str(tmp_path / "bold.nii")},
+    }
+    output = reader.fit_transform(input, types=["BOLD"])
+    # Uncompressed images are memory-mapped
+    assert isinstance(np.asanyarray(output["BOLD"]["data"].dataobj), np.memmap)
+    assert isinstance(output["BOLD"]["confounds"]["data"], pd.DataFrame)
+    assert "data" not in output["T1w"]
+    assert output["T1w"]["path"] == tmp_path / "bold.nii"
+    assert "datareader" in output["T1w"]["meta"]
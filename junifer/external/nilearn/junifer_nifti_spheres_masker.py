@@ -3,10 +3,13 @@
 # Authors: Synchon Mandal <s.mandal@fz-juelich.de>
 # License: AGPL
 
+import hashlib
+from collections import OrderedDict
 from collections.abc import Callable
 from typing import TYPE_CHECKING, Union
 
 import numpy as np
+from nibabel.affines import apply_affine
 from nilearn import image, masking
 from nilearn._utils.class_inspect import get_params
 from nilearn._utils.niimg import img_data_dtype
@@ -17,8 +20,10 @@ from nilearn._utils.niimg_conversions import (
 )
 from nilearn.maskers import NiftiSpheresMasker
 from nilearn.maskers.base_masker import _filter_and_extract
-from sklearn import neighbors
+from scipy import sparse
+from scipy.spatial import cKDTree
 
+from ...stats import count
 from ...utils import raise_error, warn_with_log
 
 
@@ -66,6 +71,151 @@ __all__ = ["JuniferNiftiSpheresMasker"]
 # DAMAGE.
 
 
+# Cache of sphere adjacency matrices, keyed by seeds, radius, affine, shape
+# and mask hash; bounded to avoid unbounded memory growth
+_SPHERES_ADJACENCY_CACHE: OrderedDict[tuple, sparse.csr_matrix] = OrderedDict()
+_SPHERES_ADJACENCY_CACHE_SIZE = 32
+
+
+def _compute_spheres_adjacency(
+    seeds: np.ndarray,
+    mask: np.ndarray,
+    affine: np.ndarray,
+    radius: float | None,
+) -> sparse.csr_matrix:
+    """Compute the sphere membership of in-mask voxels.
+
+    Parameters
+    ----------
+    seeds : numpy.ndarray
+        The seed coordinates in world space.
+        shape: (number of seeds, 3)
+    mask : numpy.ndarray
+        The boolean mask of the voxels to consider.
+    affine : numpy.ndarray
+        The affine of the mask.
+    radius : float or None
+        Indicates, in millimeters, the radius for the sphere around the seed.
+        If None, only the voxel nearest to the seed is used.
+
+    Returns
+    -------
+    scipy.sparse.csr_matrix
+        Contains the boolean indices for each sphere.
+        shape: (number of seeds, number of voxels)
+
+    """
+    n_seeds = seeds.shape[0]
+    # Compute world coordinates of all in-mask voxels
+    mask_ijk = np.argwhere(mask)
+    n_voxels = mask_ijk.shape[0]
+    mask_coords = apply_affine(affine, mask_ijk)
+    # Map voxel index to column index
+    column_map = np.full(mask.shape, -1, dtype=np.int64)
+    column_map[tuple(mask_ijk.T)] = np.arange(n_voxels)
+
+    rows = []
+    cols = []
+    # Voxels inside the spheres
+    tree = cKDTree(mask_coords) if n_voxels > 0 else None
+    if tree is not None:
+        neighbours = tree.query_ball_point(
+            seeds, r=0.0 if radius is None else radius
+        )
+        for i, seed_neighbours in enumerate(neighbours):
+            rows.extend([i] * len(seed_neighbours))
+            cols.extend(seed_neighbours)
+
+    # For each seed, get the nearest voxel
+    nearests = np.round(apply_affine(np.linalg.inv(affine), seeds)).astype(int)
+    in_bounds = np.all(
+        (nearests >= 0) & (nearests < np.asarray(mask.shape)), axis=1
+    )
+    for i in np.flatnonzero(in_bounds):
+        col = column_map[tuple(nearests[i])]
+        if col >= 0:
+            rows.append(i)
+            cols.append(col)
+
+    # Include the voxel containing the seed itself if not masked; this
+    # compares truncated world coordinates, as done by nilearn
+    if tree is not None:
+        truncated_coords = mask_coords.astype(int)
+        # Candidates with equal truncated coordinates are at most 2 mm away
+        # along each axis
+        candidates = tree.query_ball_point(seeds, r=2 * np.sqrt(3))
+        for i, seed_candidates in enumerate(candidates):
+            if len(seed_candidates) == 0:
+                continue
+            seed_candidates = np.sort(seed_candidates)
+            matches = np.all(
+                truncated_coords[seed_candidates] == seeds[i].astype(int),
+                axis=1,
+            )
+            if np.any(matches):
+                rows.append(i)
+                cols.append(seed_candidates[np.argmax(matches)])
+
+    A = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=bool), (rows, cols)),
+        shape=(n_seeds, n_voxels),
+    )
+    # Remove duplicate entries and keep column order within rows
+    A.sum_duplicates()
+    A.sort_indices()
+    return A
+
+
+def _get_spheres_adjacency(
+    seeds: np.ndarray,
+    mask: np.ndarray,
+    affine: np.ndarray,
+    radius: float | None,
+) -> sparse.csr_matrix:
+    """Get the (cached) sphere membership of in-mask voxels.
+
+    Parameters
+    ----------
+    seeds : numpy.ndarray
+        The seed coordinates in world space.
+        shape: (number of seeds, 3)
+    mask : numpy.ndarray
+        The boolean mask of the voxels to consider.
+    affine : numpy.ndarray
+        The affine of the mask.
+    radius : float or None
+        Indicates, in millimeters, the radius for the sphere around the seed.
+        If None, only the voxel nearest to the seed is used.
+
+    Returns
+    -------
+    scipy.sparse.csr_matrix
+        Contains the boolean indices for each sphere.
+        shape: (number of seeds, number of voxels)
+
+    """
+    key = (
+        seeds.tobytes(),
+        seeds.shape,
+        radius,
+        np.asarray(affine, dtype=np.float64).tobytes(),
+        mask.shape,
+        hashlib.md5(
+            np.packbits(mask).tobytes(), usedforsecurity=False
+        ).hexdigest(),
+    )
+    if key in _SPHERES_ADJACENCY_CACHE:
+        _SPHERES_ADJACENCY_CACHE.move_to_end(key)
+        return _SPHERES_ADJACENCY_CACHE[key]
+    A = _compute_spheres_adjacency(
+        seeds=seeds, mask=mask, affine=affine, radius=radius
+    )
+    _SPHERES_ADJACENCY_CACHE[key] = A
+    if len(_SPHERES_ADJACENCY_CACHE) > _SPHERES_ADJACENCY_CACHE_SIZE:
+        _SPHERES_ADJACENCY_CACHE.popitem(last=False)
+    return A
+
+
 def _apply_mask_and_get_affinity(
     seeds, niimg, radius, allow_overlap, mask_img=None
 ):
@@ -73,7 +223,8 @@ def _apply_mask_and_get_affinity(
 
     Utility function to get only the rows which are occupied by sphere at
     given seed locations and the provided radius. Rows are in target_affine and
-    target_shape space.
+    target_shape space. The affinity matrix is computed via a KD-tree radius
+    query and cached per seeds, radius, affine, shape and mask.
 
     Parameters
     ----------
@@ -99,7 +250,7 @@ def _apply_mask_and_get_affinity(
     X : 2D numpy.ndarray
         Signal for each brain voxel in the (masked) niimgs.
         shape: (number of scans, number of voxels)
-    A : scipy.sparse.lil_matrix
+    A : scipy.sparse.csr_matrix
         Contains the boolean indices for each sphere.
         shape: (number of seeds, number of voxels)
 
@@ -115,13 +266,11 @@ def _apply_mask_and_get_affinity(
         If the provided images contain NaN, they will be converted to zeroes.
 
     """
-    seeds = list(seeds)
+    seeds = np.asarray(list(seeds), dtype=np.float64).reshape(-1, 3)
 
-    # Compute world coordinates of all in-mask voxels.
+    # Get mask of voxels to consider
     if niimg is None:
         mask, affine = masking.load_mask_img(mask_img)
-        # Get coordinate for all voxels inside of mask
-        mask_coords = np.asarray(np.nonzero(mask)).T.tolist()
         X = None
 
     elif mask_img is not None:
@@ -134,7 +283,6 @@ def _apply_mask_and_get_affinity(
             interpolation="nearest",
         )
         mask, _ = masking.load_mask_img(mask_img)
-        mask_coords = list(zip(*np.where(mask != 0), strict=False))
 
         X = masking.apply_mask_fmri(niimg, mask_img)
 
@@ -149,47 +297,17 @@ def _apply_mask_and_get_affinity(
         else:
             X = safe_get_data(niimg).reshape([-1, niimg.shape[3]]).T
 
-        mask_coords = list(np.ndindex(niimg.shape[:3]))
+        mask = np.ones(niimg.shape[:3], dtype=bool)
 
     else:
         raise_error("Either a niimg or a mask_img must be provided.")
 
-    # For each seed, get coordinates of nearest voxel
-    nearests = []
-    for sx, sy, sz in seeds:
-        nearest = np.round(
-            image.resampling.coord_transform(sx, sy, sz, np.linalg.inv(affine))
-        )
-        nearest = nearest.astype(int)
-        nearest = (nearest[0], nearest[1], nearest[2])
-        try:
-            nearests.append(mask_coords.index(nearest))
-        except ValueError:
-            nearests.append(None)
-
-    mask_coords = np.asarray(list(zip(*mask_coords, strict=False)))
-    mask_coords = image.resampling.coord_transform(
-        mask_coords[0], mask_coords[1], mask_coords[2], affine
+    A = _get_spheres_adjacency(
+        seeds=seeds,
+        mask=np.asarray(mask, dtype=bool),
+        affine=affine,
+        radius=radius,
     )
-    mask_coords = np.asarray(mask_coords).T
-
-    clf = neighbors.NearestNeighbors(radius=radius)
-    A = clf.fit(mask_coords).radius_neighbors_graph(seeds)
-    A = A.tolil()
-    for i, nearest in enumerate(nearests):
-        if nearest is None:
-            continue
-
-        A[i, nearest] = True
-
-    # Include the voxel containing the seed itself if not masked
-    mask_coords = mask_coords.astype(int).tolist()
-    for i, seed in enumerate(seeds):
-        try:
-            A[i, mask_coords.index(list(map(int, seed)))] = True
-        except ValueError:
-            # seed is not in the mask
-            pass
 
     if (not allow_overlap) and np.any(A.sum(axis=0) >= 2):
         raise_error("Overlap detected between spheres")
@@ -225,8 +343,8 @@ def _iter_signals_from_spheres(
     X, A = _apply_mask_and_get_affinity(
         seeds, niimg, radius, allow_overlap, mask_img=mask_img
     )
-    for row in A.rows:
-        yield X[:, row]
+    for start, stop in zip(A.indptr[:-1], A.indptr[1:], strict=True):
+        yield X[:, A.indices[start:stop]]
 
 
 class _JuniferExtractionFunctor:
@@ -303,6 +421,27 @@ class _JuniferExtractionFunctor:
         signals = np.empty(
             (imgs.shape[3], n_seeds), dtype=img_data_dtype(imgs)
         )
+        # Linear aggregations are computed with a single sparse product
+        if self.agg_func in (np.mean, count):
+            X, A = _apply_mask_and_get_affinity(
+                seeds=self.seeds_,
+                niimg=imgs,
+                radius=self.radius,
+                allow_overlap=self.allow_overlap,
+                mask_img=self.mask_img,
+            )
+            n_voxels = np.asarray(A.sum(axis=1)).ravel()
+            if self.agg_func is count:
+                signals[:] = n_voxels
+            else:
+                if np.any(n_voxels == 0):
+                    warn_with_log(
+                        "Mean of empty slice.", category=RuntimeWarning
+                    )
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    signals[:] = (A.astype(X.dtype) @ X.T).T / n_voxels
+            return signals, None
+
         for i, sphere in enumerate(
             _iter_signals_from_spheres(
                 seeds=self.seeds_,
@@ -14,6 +14,11 @@ from nilearn.maskers import NiftiSpheresMasker
 from numpy.testing import assert_array_equal
 
 from junifer.external.nilearn import JuniferNiftiSpheresMasker
+from junifer.external.nilearn.junifer_nifti_spheres_masker import (
+    _SPHERES_ADJACENCY_CACHE,
+    _apply_mask_and_get_affinity,
+)
+from junifer.stats import count
 
 
 # New BSD License
@@ -405,3 +410,65 @@ def test_junifer_and_nilearn_mean_agg_are_equal(
     # Checks
     assert junifer_output.shape == nilearn_output.shape
     np.testing.assert_almost_equal(junifer_output, nilearn_output)
+
+
+def test_spheres_adjacency_cache() -> None:
+    """Test sphere adjacency is cached."""
+    affine = np.eye(4)
+    input_img, mask_img = data_gen.generate_random_img(
+        shape=(10, 11, 12, 5),
+        affine=affine,
+    )
+    seeds = [(1, 1, 1), (4, 4, 4)]
+    _SPHERES_ADJACENCY_CACHE.clear()
+    _, A = _apply_mask_and_get_affinity(
+        seeds, input_img, 2.0, False, mask_img=mask_img
+    )
+    assert len(_SPHERES_ADJACENCY_CACHE) == 1
+    # Same seeds, radius and mask should hit the cache
+    _, A_cached = _apply_mask_and_get_affinity(
+        seeds, input_img, 2.0, False, mask_img=mask_img
+    )
+    assert A_cached is A
+    assert len(_SPHERES_ADJACENCY_CACHE) == 1
+    # Different radius should not hit the cache
+    _, A_other = _apply_mask_and_get_affinity(
+        seeds, input_img, 3.0, True, mask_img=mask_img
+    )
+    assert A_other is not A
+    assert len(_SPHERES_ADJACENCY_CACHE) == 2
+    assert A_other.nnz > A.nnz
+
+
+@pytest.mark.parametrize("agg_func", [np.mean, count])
+def test_linear_agg_equals_iterative_agg(agg_func) -> None:
+    """Test sparse product aggregation equals iterative aggregation.
+
+    Parameters
+    ----------
+    agg_func : callable
+        The parametrized aggregation function.
+
+    """
+    affine = np.eye(4)
+    input_img, mask_img = data_gen.generate_random_img(
+        shape=(10, 11, 12, 5),
+        affine=affine,
+    )
+    seeds = [(1, 1, 1), (4, 4, 4), (10, 10, 10), (50, 50, 50)]
+    masker_kwargs = {
+        "seeds": seeds,
+        "radius": 3.0,
+        "allow_overlap": True,
+        "mask_img": mask_img,
+    }
+    # Sparse product
+    linear_output = JuniferNiftiSpheresMasker(
+        agg_func=agg_func, **masker_kwargs
+    ).fit_transform(input_img)
+    # Wrap to force iterative aggregation
+    iterative_output = JuniferNiftiSpheresMasker(
+        agg_func=lambda x, axis: agg_func(x, axis=axis), **masker_kwargs
+    ).fit_transform(input_img)
+    assert linear_output.shape == iterative_output.shape
+    np.testing.assert_almost_equal(linear_output, iterative_output)
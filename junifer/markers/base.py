@@ -12,7 +12,7 @@ import structlog
 from pydantic import BaseModel, BeforeValidator, ConfigDict
 
 from ..datagrabber import DataType
-from ..pipeline import PipelineStepMixin, UpdateMetaMixin
+from ..pipeline import PipelineStepMixin, UpdateMetaMixin, get_data_nbytes
 from ..storage import StorageType
 from ..typing import MarkerInOutMappings, StorageLike
 from ..utils import ensure_list_or_none, raise_error
@@ -24,6 +24,37 @@ _log = structlog.get_logger("junifer")
 logger = _log.bind(pkg="markers", step="marker")
 
 
+def _get_feature_nbytes(
+    storage_type: StorageType, n_rois: int | None, n_timepoints: int
+) -> int:
+    """Get the size of a float64 feature.
+
+    Parameters
+    ----------
+    storage_type : :enum:`.StorageType`
+        The storage type of the feature.
+    n_rois : int or None
+        The number of regions.
+    n_timepoints : int
+        The number of timepoints.
+
+    Returns
+    -------
+    int
+        The size in bytes or 0 if not known.
+
+    """
+    if n_rois is None:
+        return 0
+    if storage_type == StorageType.Vector:
+        return n_rois * 8
+    if storage_type == StorageType.Timeseries:
+        return n_rois * n_timepoints * 8
+    if storage_type == StorageType.Matrix:
+        return n_rois * n_rois * 8
+    return 0
+
+
 class BaseMarker(BaseModel, ABC, PipelineStepMixin, UpdateMetaMixin):
     """Abstract base class for marker.
 
@@ -55,6 +86,10 @@ class BaseMarker(BaseModel, ABC, PipelineStepMixin, UpdateMetaMixin):
 
     _MARKER_INOUT_MAPPINGS: ClassVar[MarkerInOutMappings]
 
+    # Pipeline data used by the marker, as attribute name to data kind;
+    # merged with the ones of the base classes
+    _PIPELINE_DATA: ClassVar[dict[str, str]] = {}
+
     model_config = ConfigDict(extra="forbid", use_enum_values=True)
 
     on: Annotated[
@@ -219,6 +254,135 @@ class BaseMarker(BaseModel, ABC, PipelineStepMixin, UpdateMetaMixin):
         logger.debug(f"Storing {s_type} in {storage}")
         storage.store(kind=s_type, **output)
 
+    def _get_feature_meta(self, t_meta: dict, feature: str) -> dict:
+        """Get the metadata of a feature.
+
+        Parameters
+        ----------
+        t_meta : dict
+            The metadata of the input data type, with the ``"type"`` key.
+        feature : str
+            The feature name.
+
+        Returns
+        -------
+        dict
+            The metadata of the feature.
+
+        """
+        # Make deep copy of metadata for the feature
+        f_data = {"meta": deepcopy(t_meta)}
+        # Update metadata for the feature
+        self.update_meta(f_data, "marker")
+        # Update marker feature's metadata name
+        f_data["meta"]["marker"]["name"] += f"_{feature}"
+        return f_data["meta"]
+
+    def get_feature_metas(self, input: dict[str, dict]) -> list[dict]:
+        """Get the metadata of the features without computing them.
+
+        Parameters
+        ----------
+        input : dict
+            The Junifer Data object, which does not need to have data.
+
+        Returns
+        -------
+        list of dict
+            The metadata of each feature the marker computes for ``input``.
+
+        """
+        metas = []
+        for t in self.on:
+            if t in input.keys():
+                t_meta = input[t]["meta"].copy()
+                t_meta["type"] = t.value
+                for f_name in self._MARKER_INOUT_MAPPINGS[t]:
+                    metas.append(self._get_feature_meta(t_meta, f_name))
+        return metas
+
+    def get_pipeline_data(self) -> list[tuple[str, Any]]:
+        """Get the pipeline data the marker uses.
+
+        Returns
+        -------
+        list of tuple
+            The data kind (see :func:`.get_data`) and the name(s) of the
+            data for every attribute in ``_PIPELINE_DATA`` of the marker
+            and its base classes which is set.
+
+        """
+        pipeline_data = {}
+        for klass in reversed(type(self).__mro__):
+            pipeline_data.update(vars(klass).get("_PIPELINE_DATA", {}))
+        return [
+            (kind, getattr(self, attr))
+            for attr, kind in pipeline_data.items()
+            if getattr(self, attr, None)
+        ]
+
+    def _estimate_n_rois(self, input: dict[str, Any]) -> int | None:
+        """Estimate the number of regions the marker computes features for.
+
+        Subclasses can override to make :meth:`estimate_cost` account for
+        the size of the features.
+
+        Parameters
+        ----------
+        input : dict
+            A single input from the Junifer Data object as returned by
+            :func:`.read_data_headers`.
+
+        Returns
+        -------
+        int or None
+            The number of regions or None if not known.
+
+        """
+        return None
+
+    def estimate_cost(self, input: dict[str, dict]) -> dict[str, int]:
+        """Estimate the resources needed to compute the marker.
+
+        The features are assumed to be float64 with one value per region for
+        vectors, per region and timepoint for timeseries and per pair of
+        regions for matrices, using :meth:`_estimate_n_rois`. The data is
+        assumed to be loaded as float64 and the features computed into a
+        copy. Subclasses can override to provide a better estimate.
+
+        Parameters
+        ----------
+        input : dict
+            The Junifer Data object as returned by :func:`.read_data_headers`.
+
+        Returns
+        -------
+        dict
+            The estimated ``"memory"``, temporary ``"disk"`` and ``"output"``
+            size in bytes.
+
+        """
+        memory = output = 0
+        for t in self.on:
+            if t in input.keys():
+                t_input = input[t]
+                n_rois = self._estimate_n_rois(t_input)
+                shape = t_input.get("shape") or []
+                n_timepoints = shape[3] if len(shape) > 3 else 1
+                t_output = sum(
+                    _get_feature_nbytes(
+                        self.storage_type(t, f_name), n_rois, n_timepoints
+                    )
+                    for f_name in self._MARKER_INOUT_MAPPINGS[t]
+                )
+                # Data types are computed one after the other
+                memory = max(
+                    memory,
+                    2 * get_data_nbytes(t_input, "float64") + 2 * t_output,
+                )
+                output += t_output
+        return {"memory": memory, "disk": 0, "output": output}
+
     def _fit_transform(
         self,
         input: dict[str, dict],
@@ -264,15 +428,13 @@ class BaseMarker(BaseModel, ABC, PipelineStepMixin, UpdateMetaMixin):
                     out[t] = {}
                 # Store individual features
                 for f_name, f_data in t_out.items():
-                    # Make deep copy of the feature data for manipulation
-                    f_data_copy = deepcopy(f_data)
-                    # Make deep copy of metadata and add to feature data
-                    f_data_copy["meta"] = deepcopy(t_meta)
-                    # Update metadata for the feature,
-                    # feature data is not manipulated, only meta
-                    self.update_meta(f_data_copy, "marker")
-                    # Update marker feature's metadata name
-                    f_data_copy["meta"]["marker"]["name"] += f"_{f_name}"
+                    # Make shallow copy of the feature data for manipulation;
+                    # only the metadata is manipulated, so there is no need
+                    # to copy the (possibly large or memory-mapped) data
+                    f_data_copy = f_data.copy()
+                    f_data_copy["meta"] = self._get_feature_meta(
+                        t_meta, f_name
+                    )
 
                     if storage is not None:
                         logger.info(f"Storing in {storage}")
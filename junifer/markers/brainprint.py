@@ -3,7 +3,10 @@
 # Authors: Synchon Mandal <s.mandal@fz-juelich.de>
 # License: AGPL
 
+import os
+import tempfile
 import uuid
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import (
     Any,
@@ -19,18 +22,205 @@ from ..datagrabber import DataType
 from ..external.BrainPrint.brainprint.brainprint import (
     compute_asymmetry,
     compute_brainprint,
+    compute_surface_brainprint,
 )
 from ..external.BrainPrint.brainprint.surfaces import surf_to_vtk
 from ..pipeline import ExtDep, WorkDirManager
 from ..storage import StorageType
 from ..typing import Dependencies, ExternalDependencies, MarkerInOutMappings
-from ..utils import run_ext_cmd
+from ..utils import file_hash, run_ext_cmd, warn_with_log
 from .base import BaseMarker, logger
 
 
 __all__ = ["BrainPrint"]
 
 
+# Define aseg labels
+
+# combined and individual aseg labels:
+# - Left  Striatum: left  Caudate + Putamen + Accumbens
+# - Right Striatum: right Caudate + Putamen + Accumbens
+# - CorpusCallosum: 5 subregions combined
+# - Cerebellum: brainstem + (left+right) cerebellum WM and GM
+# - Ventricles: (left+right) lat.vent + inf.lat.vent + choroidplexus +
+#               3rdVent + CSF
+# - Lateral-Ventricle: lat.vent + inf.lat.vent + choroidplexus
+# - 3rd-Ventricle: 3rd-Ventricle + CSF
+
+_ASEG_LABELS = {
+    "CorpusCallosum": ["251", "252", "253", "254", "255"],
+    "Cerebellum": ["7", "8", "16", "46", "47"],
+    "Ventricles": ["4", "5", "14", "24", "31", "43", "44", "63"],
+    "3rd-Ventricle": ["14", "24"],
+    "4th-Ventricle": ["15"],
+    "Brain-Stem": ["16"],
+    "Left-Striatum": ["11", "12", "26"],
+    "Left-Lateral-Ventricle": ["4", "5", "31"],
+    "Left-Cerebellum-White-Matter": ["7"],
+    "Left-Cerebellum-Cortex": ["8"],
+    "Left-Thalamus-Proper": ["10"],
+    "Left-Caudate": ["11"],
+    "Left-Putamen": ["12"],
+    "Left-Pallidum": ["13"],
+    "Left-Hippocampus": ["17"],
+    "Left-Amygdala": ["18"],
+    "Left-Accumbens-area": ["26"],
+    "Left-VentralDC": ["28"],
+    "Right-Striatum": ["50", "51", "58"],
+    "Right-Lateral-Ventricle": ["43", "44", "63"],
+    "Right-Cerebellum-White-Matter": ["46"],
+    "Right-Cerebellum-Cortex": ["47"],
+    "Right-Thalamus-Proper": ["49"],
+    "Right-Caudate": ["50"],
+    "Right-Putamen": ["51"],
+    "Right-Pallidum": ["52"],
+    "Right-Hippocampus": ["53"],
+    "Right-Amygdala": ["54"],
+    "Right-Accumbens-area": ["58"],
+    "Right-VentralDC": ["60"],
+}
+
+
+def _create_aseg_surface(
+    aseg_path: Path,
+    norm_path: Path,
+    indices: list[str],
+    tempdir: Path,
+    surface_path: Path,
+) -> Path:  # pragma: no cover
+    """Generate a surface from the aseg and label files.
+
+    This is a module-level function so that it can be run in a worker
+    process.
+
+    Parameters
+    ----------
+    aseg_path : pathlib.Path
+        The FreeSurfer aseg path.
+    norm_path : pathlib.Path
+        The FreeSurfer norm path.
+    indices : list of str
+        List of label indices to include in the surface generation.
+    tempdir : pathlib.Path
+        The directory to write the intermediate files to.
+    surface_path : pathlib.Path
+        The path to write the surface in VTK format to.
+
+    Returns
+    -------
+    pathlib.Path
+        Path to the generated surface in VTK format.
+
+    """
+    tempfile_prefix = f"aseg.{uuid.uuid4()}"
+
+    # Set mri_binarize command
+    mri_binarize_output_path = tempdir / f"{tempfile_prefix}.mgz"
+    mri_binarize_cmd = [
+        "mri_binarize",
+        f"--i {aseg_path.resolve()}",
+        f"--match {' '.join(indices)}",
+        f"--o {mri_binarize_output_path.resolve()}",
+    ]
+    # Call mri_binarize command
+    run_ext_cmd(name="mri_binarize", cmd=mri_binarize_cmd)
+
+    label_value = "1"
+    # Fix label (pretess)
+    # Set mri_pretess command
+    mri_pretess_cmd = [
+        "mri_pretess",
+        f"{mri_binarize_output_path.resolve()}",
+        f"{label_value}",
+        f"{norm_path.resolve()}",
+        f"{mri_binarize_output_path.resolve()}",
+    ]
+    # Call mri_pretess command
+    run_ext_cmd(name="mri_pretess", cmd=mri_pretess_cmd)
+
+    # Run marching cube to extract surface
+    # Set mri_mc command
+    mri_mc_output_path = tempdir / f"{tempfile_prefix}.surf"
+    mri_mc_cmd = [
+        "mri_mc",
+        f"{mri_binarize_output_path.resolve()}",
+        f"{label_value}",
+        f"{mri_mc_output_path.resolve()}",
+    ]
+    # Run mri_mc command
+    run_ext_cmd(name="mri_mc", cmd=mri_mc_cmd)
+
+    # Convert to vtk; write to a temporary name first and then move, so
+    # that a shared cache never exposes partially written surfaces
+    partial_surface_path = tempdir / f"{tempfile_prefix}.vtk"
+    mris_convert_cmd = [
+        "mris_convert",
+        f"{mri_mc_output_path.resolve()}",
+        f"{partial_surface_path.resolve()}",
+    ]
+    # Run mris_convert command
+    run_ext_cmd(name="mris_convert", cmd=mris_convert_cmd)
+    os.replace(partial_surface_path, surface_path)
+
+    return surface_path
+
+
+def _compute_surface_eigenvalues(
+    surface_path: Path,
+    num: int,
+    norm: str,
+    reweight: bool,
+    keep_eigenvectors: bool,
+    use_cholmod: bool,
+) -> tuple[Any, np.ndarray | None]:  # pragma: no cover
+    """Solve the Laplace-Beltrami eigenproblem for a surface.
+
+    This mirrors the per-surface handling of
+    ``brainprint.brainprint.compute_brainprint`` and is a module-level
+    function so that it can be run in a worker process.
+
+    Parameters
+    ----------
+    surface_path : pathlib.Path
+        The path to the surface in VTK format.
+    num : int
+        Number of eigenvalues to compute.
+    norm : str
+        Eigenvalues normalization method.
+    reweight : bool
+        Whether to reweight eigenvalues or not.
+    keep_eigenvectors : bool
+        Whether to also return eigenvectors or not.
+    use_cholmod : bool
+        Whether to use the Cholesky decomposition or not.
+
+    Returns
+    -------
+    eigenvalues : numpy.ndarray or list of str
+        The area, volume and eigenvalues of the surface, or a list of
+        "NaN" if the computation failed.
+    eigenvectors : numpy.ndarray or None
+        The eigenvectors if ``keep_eigenvectors=True`` and the computation
+        succeeded, else None.
+
+    """
+    try:
+        return compute_surface_brainprint(
+            surface_path,
+            num=num,
+            norm=norm,
+            reweight=reweight,
+            return_eigenvectors=keep_eigenvectors,
+            use_cholmod=use_cholmod,
+        )
+    except Exception as e:  # noqa: BLE001
+        warn_with_log(
+            f"BrainPrint analysis raised the following exception for "
+            f"{surface_path}:\n{e}.\nSetting eigenvalues to NaN."
+        )
+        return ["NaN"] * (num + 2), None
+
+
 @register_marker
 class BrainPrint(BaseMarker):
     """Class for BrainPrint.
@@ -61,6 +251,15 @@ class BrainPrint(BaseMarker):
         execution speed. Requires the ``scikit-sparse`` library. If it cannot
         be found, an error will be thrown. If False, will use slower LU
         decomposition (default False).
+    n_jobs : positive int, optional
+        Number of worker processes to use for generating the aseg surfaces
+        and solving the eigenproblems. If 1, everything is run in the
+        current process (default 1).
+    surface_cache_dir : pathlib.Path or None, optional
+        Path to a directory to cache the generated aseg surfaces in. The
+        surfaces are keyed by the hashes of the aseg and norm files, so that
+        recomputing with different ``num`` or ``norm`` skips the FreeSurfer
+        steps. If None, surfaces are not cached (default None).
     name : str or None, optional
         The name of the marker.
         If None, will use the class name (default None).
@@ -98,86 +297,12 @@ class BrainPrint(BaseMarker):
     asymmetry: bool = False
     asymmetry_distance: str = "euc"
     use_cholmod: bool = False
+    n_jobs: PositiveInt = 1
+    surface_cache_dir: Path | None = None
 
     _tempdir = Path()
     _element_tempdir = Path()
 
-    def _create_aseg_surface(
-        self,
-        aseg_path: Path,
-        norm_path: Path,
-        indices: list,
-    ) -> Path:  # pragma: no cover
-        """Generate a surface from the aseg and label files.
-
-        Parameters
-        ----------
-        aseg_path : pathlib.Path
-            The FreeSurfer aseg path.
-        norm_path : pathlib.Path
-            The FreeSurfer norm path.
-        indices : list
-            List of label indices to include in the surface generation.
-
-        Returns
-        -------
-        pathlib.Path
-            Path to the generated surface in VTK format.
-
-        """
-        tempfile_prefix = f"aseg.{uuid.uuid4()}"
-
-        # Set mri_binarize command
-        mri_binarize_output_path = self._tempdir / f"{tempfile_prefix}.mgz"
-        mri_binarize_cmd = [
-            "mri_binarize",
-            f"--i {aseg_path.resolve()}",
-            f"--match {' '.join(indices)}",
-            f"--o {mri_binarize_output_path.resolve()}",
-        ]
-        # Call mri_binarize command
-        run_ext_cmd(name="mri_binarize", cmd=mri_binarize_cmd)
-
-        label_value = "1"
-        # Fix label (pretess)
-        # Set mri_pretess command
-        mri_pretess_cmd = [
-            "mri_pretess",
-            f"{mri_binarize_output_path.resolve()}",
-            f"{label_value}",
-            f"{norm_path.resolve()}",
-            f"{mri_binarize_output_path.resolve()}",
-        ]
-        # Call mri_pretess command
-        run_ext_cmd(name="mri_pretess", cmd=mri_pretess_cmd)
-
-        # Run marching cube to extract surface
-        # Set mri_mc command
-        mri_mc_output_path = self._tempdir / f"{tempfile_prefix}.surf"
-        mri_mc_cmd = [
-            "mri_mc",
-            f"{mri_binarize_output_path.resolve()}",
-            f"{label_value}",
-            f"{mri_mc_output_path.resolve()}",
-        ]
-        # Run mri_mc command
-        run_ext_cmd(name="mri_mc", cmd=mri_mc_cmd)
-
-        # Convert to vtk
-        # Set mris_convert command
-        surface_path = (
-            self._element_tempdir / f"aseg.final.{'_'.join(indices)}.vtk"
-        )
-        mris_convert_cmd = [
-            "mris_convert",
-            f"{mri_mc_output_path.resolve()}",
-            f"{surface_path.resolve()}",
-        ]
-        # Run mris_convert command
-        run_ext_cmd(name="mris_convert", cmd=mris_convert_cmd)
-
-        return surface_path
-
     def _create_aseg_surfaces(
         self,
         aseg_path: Path,
@@ -198,58 +323,55 @@ class BrainPrint(BaseMarker):
             Dictionary of label names mapped to corresponding surface paths.
 
         """
-        # Define aseg labels
-
-        # combined and individual aseg labels:
-        # - Left  Striatum: left  Caudate + Putamen + Accumbens
-        # - Right Striatum: right Caudate + Putamen + Accumbens
-        # - CorpusCallosum: 5 subregions combined
-        # - Cerebellum: brainstem + (left+right) cerebellum WM and GM
-        # - Ventricles: (left+right) lat.vent + inf.lat.vent + choroidplexus +
-        #               3rdVent + CSF
-        # - Lateral-Ventricle: lat.vent + inf.lat.vent + choroidplexus
-        # - 3rd-Ventricle: 3rd-Ventricle + CSF
-
-        aseg_labels = {
-            "CorpusCallosum": ["251", "252", "253", "254", "255"],
-            "Cerebellum": ["7", "8", "16", "46", "47"],
-            "Ventricles": ["4", "5", "14", "24", "31", "43", "44", "63"],
-            "3rd-Ventricle": ["14", "24"],
-            "4th-Ventricle": ["15"],
-            "Brain-Stem": ["16"],
-            "Left-Striatum": ["11", "12", "26"],
-            "Left-Lateral-Ventricle": ["4", "5", "31"],
-            "Left-Cerebellum-White-Matter": ["7"],
-            "Left-Cerebellum-Cortex": ["8"],
-            "Left-Thalamus-Proper": ["10"],
-            "Left-Caudate": ["11"],
-            "Left-Putamen": ["12"],
-            "Left-Pallidum": ["13"],
-            "Left-Hippocampus": ["17"],
-            "Left-Amygdala": ["18"],
-            "Left-Accumbens-area": ["26"],
-            "Left-VentralDC": ["28"],
-            "Right-Striatum": ["50", "51", "58"],
-            "Right-Lateral-Ventricle": ["43", "44", "63"],
-            "Right-Cerebellum-White-Matter": ["46"],
-            "Right-Cerebellum-Cortex": ["47"],
-            "Right-Thalamus-Proper": ["49"],
-            "Right-Caudate": ["50"],
-            "Right-Putamen": ["51"],
-            "Right-Pallidum": ["52"],
-            "Right-Hippocampus": ["53"],
-            "Right-Amygdala": ["54"],
-            "Right-Accumbens-area": ["58"],
-            "Right-VentralDC": ["60"],
-        }
-        return {
-            label: self._create_aseg_surface(
-                aseg_path=aseg_path,
-                norm_path=norm_path,
-                indices=indices,
+        # Set output directory
+        if self.surface_cache_dir is not None:
+            surface_dir = (
+                self.surface_cache_dir
+                / f"{file_hash(aseg_path)}_{file_hash(norm_path)}"
             )
-            for label, indices in aseg_labels.items()
+            surface_dir.mkdir(parents=True, exist_ok=True)
+        else:
+            surface_dir = self._element_tempdir
+        surfaces = {
+            label: surface_dir / f"aseg.final.{'_'.join(indices)}.vtk"
+            for label, indices in _ASEG_LABELS.items()
         }
+        # Only create surfaces which are not already available
+        to_create = [
+            label for label, path in surfaces.items() if not path.exists()
+        ]
+        if len(to_create) < len(surfaces):
+            logger.info(
+                f"Using {len(surfaces) - len(to_create)} cached aseg "
+                f"surfaces from {surface_dir}"
+            )
+        # Use separate intermediate directory per label so that
+        # workers do not share state
+        jobs = [
+            {
+                "aseg_path": aseg_path,
+                "norm_path": norm_path,
+                "indices": _ASEG_LABELS[label],
+                "tempdir": Path(
+                    tempfile.mkdtemp(dir=self._tempdir, prefix=label)
+                ),
+                "surface_path": surfaces[label],
+            }
+            for label in to_create
+        ]
+        if self.n_jobs > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=self.n_jobs) as executor:
+                futures = [
+                    executor.submit(_create_aseg_surface, **job)
+                    for job in jobs
+                ]
+                # Propagate errors from workers
+                for future in futures:
+                    future.result()
+        else:
+            for job in jobs:
+                _create_aseg_surface(**job)
+        return surfaces
 
     def _create_cortical_surfaces(
         self,
@@ -398,14 +520,34 @@ class BrainPrint(BaseMarker):
             )
             surfaces.update(cortical_surfaces)
         # Compute brainprint
-        eigenvalues, _ = compute_brainprint(
-            surfaces=surfaces,
-            keep_eigenvectors=self.keep_eigenvectors,
-            num=self.num,
-            norm=self.norm,
-            reweight=self.reweight,
-            use_cholmod=self.use_cholmod,
-        )
+        if self.n_jobs > 1:
+            with ProcessPoolExecutor(max_workers=self.n_jobs) as executor:
+                futures = {
+                    label: executor.submit(
+                        _compute_surface_eigenvalues,
+                        surface_path=path,
+                        num=self.num,
+                        norm=self.norm,
+                        reweight=self.reweight,
+                        keep_eigenvectors=self.keep_eigenvectors,
+                        use_cholmod=self.use_cholmod,
+                    )
+                    for label, path in surfaces.items()
+                }
+                # Keep surface order for deterministic output
+                eigenvalues = {
+                    label: future.result()[0]
+                    for label, future in futures.items()
+                }
+        else:
+            eigenvalues, _ = compute_brainprint(
+                surfaces=surfaces,
+                keep_eigenvectors=self.keep_eigenvectors,
+                num=self.num,
+                norm=self.norm,
+                reweight=self.reweight,
+                use_cholmod=self.use_cholmod,
+            )
         # Calculate distances (if required)
         distances = None
         if self.asymmetry:
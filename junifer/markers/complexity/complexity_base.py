@@ -56,6 +56,11 @@ class ComplexityBase(BaseMarker):
 
     _DEPENDENCIES: ClassVar[Dependencies] = {"nilearn", "neurokit2"}
 
+    _PIPELINE_DATA: ClassVar[dict[str, str]] = {
+        "parcellation": "parcellation",
+        "masks": "mask",
+    }
+
     _MARKER_INOUT_MAPPINGS: ClassVar[MarkerInOutMappings] = {
         DataType.BOLD: {
             "complexity": StorageType.Vector,
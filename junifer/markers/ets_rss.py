@@ -52,6 +52,11 @@ class RSSETSMarker(BaseMarker):
 
     _DEPENDENCIES: ClassVar[Dependencies] = {"nilearn"}
 
+    _PIPELINE_DATA: ClassVar[dict[str, str]] = {
+        "parcellation": "parcellation",
+        "masks": "mask",
+    }
+
     _MARKER_INOUT_MAPPINGS: ClassVar[MarkerInOutMappings] = {
         DataType.BOLD: {
             "rss_ets": StorageType.Timeseries,
@@ -18,6 +18,7 @@ from typing import (
 from pydantic import BeforeValidator, PositiveFloat
 
 from ...datagrabber import DataType
+from ...pipeline import ensure_data_path
 from ...storage import StorageType
 from ...typing import ConditionalDependencies, MarkerInOutMappings
 from ...utils import ensure_list_or_none
@@ -94,6 +95,8 @@ class ALFFBase(BaseMarker):
         },
     ]
 
+    _PIPELINE_DATA: ClassVar[dict[str, str]] = {"masks": "mask"}
+
     _MARKER_INOUT_MAPPINGS: ClassVar[MarkerInOutMappings] = {
         DataType.BOLD: {
             "alff": StorageType.Vector,
@@ -146,7 +149,7 @@ class ALFFBase(BaseMarker):
             estimator = JuniferALFF()
         # Compute ALFF + fALFF
         alff, falff, alff_path, falff_path = estimator.compute(  # type: ignore
-            input_path=input_data["path"],
+            input_path=ensure_data_path(input_data),
             highpass=self.highpass,
             lowpass=self.lowpass,
             tr=self.tr,
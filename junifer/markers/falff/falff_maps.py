@@ -3,7 +3,7 @@
 # Authors: Synchon Mandal <s.mandal@fz-juelich.de>
 # License: AGPL
 
-from typing import Any
+from typing import Any, ClassVar
 
 from ...api.decorators import register_marker
 from ...datagrabber import DataType
@@ -54,6 +54,8 @@ class ALFFMaps(ALFFBase):
 
     """
 
+    _PIPELINE_DATA: ClassVar[dict[str, str]] = {"maps": "maps"}
+
     maps: str
 
     def compute(
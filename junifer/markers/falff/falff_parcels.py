@@ -6,7 +6,7 @@
 #          Synchon Mandal <s.mandal@fz-juelich.de>
 # License: AGPL
 
-from typing import Annotated, Any
+from typing import Annotated, Any, ClassVar
 
 from pydantic import BeforeValidator
 
@@ -66,6 +66,10 @@ class ALFFParcels(ALFFBase):
 
     """
 
+    _PIPELINE_DATA: ClassVar[dict[str, str]] = {
+        "parcellation": "parcellation",
+    }
+
     parcellation: Annotated[str | list[str], BeforeValidator(ensure_list)]
 
     def compute(
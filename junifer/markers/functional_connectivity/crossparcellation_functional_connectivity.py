@@ -55,6 +55,12 @@ class CrossParcellationFC(BaseMarker):
 
     _DEPENDENCIES: ClassVar[Dependencies] = {"nilearn"}
 
+    _PIPELINE_DATA: ClassVar[dict[str, str]] = {
+        "parcellation_one": "parcellation",
+        "parcellation_two": "parcellation",
+        "masks": "mask",
+    }
+
     _MARKER_INOUT_MAPPINGS: ClassVar[MarkerInOutMappings] = {
         DataType.BOLD: {
             "functional_connectivity": StorageType.Matrix,
@@ -0,0 +1,225 @@
+"""Provide abstract base class for edge-centric functional connectivity."""
+
+# Authors: Synchon Mandal <s.mandal@fz-juelich.de>
+# License: AGPL
+
+from abc import abstractmethod
+from typing import Any, Literal
+
+import numpy as np
+from pydantic import PositiveInt
+
+from ...pipeline import WorkDirManager
+from ...storage import MatrixKind
+from ...utils import raise_error
+from ..base import logger
+from ..utils import _edge_names, _ets, _ets_corr_blockwise
+from .functional_connectivity_base import FunctionalConnectivityBase
+
+
+__all__ = ["EdgeCentricFCBase"]
+
+
+class EdgeCentricFCBase(FunctionalConnectivityBase):
+    """Abstract base class for edge-centric functional connectivity markers.
+
+    Parameters
+    ----------
+    agg_method : str, optional
+        The aggregation function to use.
+        See :func:`.get_aggfunc_by_name` for options
+        (default "mean").
+    agg_method_params : dict or None, optional
+        The parameters to pass to the aggregation function.
+        See :func:`.get_aggfunc_by_name` for options (default None).
+    conn_method : str, optional
+        The connectivity measure to use.
+        See :class:`.JuniferConnectivityMeasure` for more information
+        (default "correlation").
+    conn_method_params : dict or None, optional
+        The parameters to pass to :class:`.JuniferConnectivityMeasure`.
+        If None, ``{"empirical": True}`` will be used, which would mean
+        :class:`sklearn.covariance.EmpiricalCovariance` is used to compute
+        covariance. If usage of :class:`sklearn.covariance.LedoitWolf` is
+        desired, ``{"empirical": False}`` should be passed
+        (default None).
+    block_size : positive int or None, optional
+        The number of edges per block to use for computing the
+        edge x edge connectivity blockwise. This bounds the memory needed
+        besides the output. Only supported for
+        ``conn_method="correlation"`` with ``{"empirical": True}``.
+        If None, the edge-wise time series are computed in full and
+        passed to :class:`.JuniferConnectivityMeasure` (default None).
+    lower_triangle_only : bool, optional
+        Whether to compute only the lower triangle of the connectivity
+        matrix, leaving the upper triangle filled with zeros. As the
+        matrix is stored as lower triangle, this halves the computation
+        without changing the stored output. Only used if ``block_size`` is
+        not None (default False).
+    dtype : {"float64", "float32", "float16"}, optional
+        The data type of the connectivity matrix (default "float64").
+    memmap : bool, optional
+        Whether to write the connectivity matrix to a memory-mapped file in
+        the element-scoped temporary directory instead of keeping it in
+        memory. Only used if ``block_size`` is not None (default False).
+    masks : str, dict, list of them or None, optional
+        The specification of the masks to apply to regions before extracting
+        signals. Check :ref:`Using Masks <using_masks>` for more details.
+        If None, will not apply any mask (default None).
+    name : str or None, optional
+        The name of the marker.
+        If None, will use the class name (default None).
+
+    """
+
+    block_size: PositiveInt | None = None
+    lower_triangle_only: bool = False
+    dtype: Literal["float64", "float32", "float16"] = "float64"
+    memmap: bool = False
+
+    def validate_marker_params(self) -> None:
+        """Run extra logical validation for marker."""
+        super().validate_marker_params()
+        if self.block_size is not None:
+            if (
+                self.conn_method != "correlation"
+                or not (self.conn_method_params["empirical"])
+            ):
+                raise_error(
+                    "Blockwise computation (`block_size`) is only supported "
+                    "for `conn_method='correlation'` with "
+                    "`conn_method_params={'empirical': True}`."
+                )
+
+    @abstractmethod
+    def aggregate_rois(
+        self,
+        input: dict[str, Any],
+        extra_input: dict[str, Any] | None = None,
+    ) -> dict[str, Any]:
+        """Perform ROI aggregation."""
+        raise_error(
+            msg="Concrete classes need to implement aggregate_rois().",
+            klass=NotImplementedError,
+        )
+
+    def aggregate(
+        self, input: dict[str, Any], extra_input: dict | None = None
+    ) -> dict:
+        """Perform ROI aggregation and ETS computation.
+
+        Parameters
+        ----------
+        input : dict
+            A single input from the pipeline data object in which to compute
+            the marker.
+        extra_input : dict, optional
+            The other fields in the pipeline data object. Useful for accessing
+            other data kind that needs to be used in the computation. For
+            example, the functional connectivity markers can make use of the
+            confounds if available (default None).
+
+        Returns
+        -------
+        dict
+            The computed result as dictionary. This will be either returned
+            to the user or stored in the storage by calling the store method
+            with this as a parameter. The dictionary has the following keys:
+
+            * ``aggregation`` : dictionary with the following keys:
+
+                - ``data`` : ETS values as ``numpy.ndarray``
+                - ``col_names`` : edge labels as list of str
+
+        """
+        # Perform aggregation
+        aggregation = self.aggregate_rois(input, extra_input=extra_input)
+        # Compute edgewise timeseries
+        ets, edge_names = _ets(
+            bold_ts=aggregation["aggregation"]["data"],
+            roi_names=aggregation["aggregation"]["col_names"],
+        )
+
+        return {
+            "aggregation": {
+                "data": ets,
+                "col_names": edge_names,
+            },
+        }
+
+    def compute(
+        self,
+        input: dict[str, Any],
+        extra_input: dict | None = None,
+    ) -> dict:
+        """Compute.
+
+        Parameters
+        ----------
+        input : dict
+            A single input from the pipeline data object in which to compute
+            the marker.
+        extra_input : dict, optional
+            The other fields in the pipeline data object. Useful for accessing
+            other data kind that needs to be used in the computation. For
+            example, the functional connectivity markers can make use of the
+            confounds if available (default None).
+
+        Returns
+        -------
+        dict
+            The computed result as dictionary. This will be either returned
+            to the user or stored in the storage by calling the store method
+            with this as a parameter. The dictionary has the following keys:
+
+            * ``functional_connectivity`` : dictionary with the following keys:
+
+              - ``data`` : functional connectivity matrix as ``numpy.ndarray``
+              - ``row_names`` : edge labels as list of str
+              - ``col_names`` : edge labels as list of str
+              - ``matrix_kind`` : :enum:`.MatrixKind`
+
+        """
+        if self.block_size is None:
+            out = super().compute(input, extra_input=extra_input)
+            fc = out["functional_connectivity"]
+            fc["data"] = fc["data"].astype(self.dtype, copy=False)
+            return out
+
+        # Perform ROI aggregation
+        aggregation = self.aggregate_rois(input, extra_input=extra_input)
+        # Get edge labels
+        edge_names = _edge_names(aggregation["aggregation"]["col_names"])
+        n_edges = len(edge_names)
+        # Set up output
+        out = None
+        if self.memmap:
+            tempdir = WorkDirManager().get_element_tempdir(
+                prefix="edge_fc_blockwise"
+            )
+            logger.debug(f"Memory-mapping edge FC output in {tempdir}")
+            out = np.memmap(
+                tempdir / f"{self.name}.dat",
+                dtype=self.dtype,
+                mode="w+",
+                shape=(n_edges, n_edges),
+            )
+        logger.debug(
+            f"Computing edge FC for {n_edges} edges blockwise with "
+            f"block size {self.block_size}"
+        )
+        data = _ets_corr_blockwise(
+            bold_ts=aggregation["aggregation"]["data"],
+            block_size=self.block_size,
+            lower_triangle_only=self.lower_triangle_only,
+            dtype=self.dtype,
+            out=out,
+        )
+        return {
+            "functional_connectivity": {
+                "data": data,
+                "row_names": edge_names,
+                "col_names": edge_names,
+                "matrix_kind": MatrixKind.LowerTriangle,
+            },
+        }
@@ -3,20 +3,19 @@
 # Authors: Synchon Mandal <s.mandal@fz-juelich.de>
 # License: AGPL
 
-from typing import Any
+from typing import Any, ClassVar
 
 from ...api.decorators import register_marker
 from ...datagrabber import DataType
 from ..maps_aggregation import MapsAggregation
-from ..utils import _ets
-from .functional_connectivity_base import FunctionalConnectivityBase
+from .edge_functional_connectivity_base import EdgeCentricFCBase
 
 
 __all__ = ["EdgeCentricFCMaps"]
 
 
 @register_marker
-class EdgeCentricFCMaps(FunctionalConnectivityBase):
+class EdgeCentricFCMaps(EdgeCentricFCBase):
     """Class for edge-centric FC using maps.
 
     Parameters
@@ -35,6 +34,23 @@ class EdgeCentricFCMaps(FunctionalConnectivityBase):
         covariance. If usage of :class:`sklearn.covariance.LedoitWolf` is
         desired, ``{"empirical": False}`` should be passed
         (default None).
+    block_size : positive int or None, optional
+        The number of edges per block to use for computing the
+        edge x edge connectivity blockwise. This bounds the memory needed
+        besides the output. Only supported for
+        ``conn_method="correlation"`` with ``{"empirical": True}``.
+        If None, the edge-wise time series are computed in full and
+        passed to :class:`.JuniferConnectivityMeasure` (default None).
+    lower_triangle_only : bool, optional
+        Whether to compute only the lower triangle of the connectivity
+        matrix, leaving the upper triangle filled with zeros. Only used if
+        ``block_size`` is not None (default False).
+    dtype : {"float64", "float32", "float16"}, optional
+        The data type of the connectivity matrix (default "float64").
+    memmap : bool, optional
+        Whether to write the connectivity matrix to a memory-mapped file in
+        the element-scoped temporary directory instead of keeping it in
+        memory. Only used if ``block_size`` is not None (default False).
     masks : str, dict, list of them or None, optional
         The specification of the masks to apply to regions before extracting
         signals. Check :ref:`Using Masks <using_masks>` for more details.
@@ -51,12 +67,14 @@ class EdgeCentricFCMaps(FunctionalConnectivityBase):
 
     """
 
+    _PIPELINE_DATA: ClassVar[dict[str, str]] = {"maps": "maps"}
+
     maps: str
 
-    def aggregate(
+    def aggregate_rois(
         self, input: dict[str, Any], extra_input: dict | None = None
     ) -> dict:
-        """Perform maps aggregation and ETS computation.
+        """Perform maps aggregation.
 
         Parameters
         ----------
@@ -82,21 +100,8 @@ class EdgeCentricFCMaps(FunctionalConnectivityBase):
                 - ``col_names`` : ROI labels as list of str
 
         """
-        # Perform aggregation
-        aggregation = MapsAggregation(
+        return MapsAggregation(
             maps=self.maps,
             masks=self.masks,
             on=DataType.BOLD,
         ).compute(input, extra_input=extra_input)
-        # Compute edgewise timeseries
-        ets, edge_names = _ets(
-            bold_ts=aggregation["aggregation"]["data"],
-            roi_names=aggregation["aggregation"]["col_names"],
-        )
-
-        return {
-            "aggregation": {
-                "data": ets,
-                "col_names": edge_names,
-            },
-        }
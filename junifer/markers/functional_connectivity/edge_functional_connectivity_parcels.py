@@ -4,7 +4,7 @@
 #          Synchon Mandal <s.mandal@fz-juelich.de>
 # License: AGPL
 
-from typing import Annotated, Any
+from typing import Annotated, Any, ClassVar
 
 from pydantic import BeforeValidator
 
@@ -12,15 +12,14 @@ from ...api.decorators import register_marker
 from ...datagrabber import DataType
 from ...utils import ensure_list
 from ..parcel_aggregation import ParcelAggregation
-from ..utils import _ets
-from .functional_connectivity_base import FunctionalConnectivityBase
+from .edge_functional_connectivity_base import EdgeCentricFCBase
 
 
 __all__ = ["EdgeCentricFCParcels"]
 
 
 @register_marker
-class EdgeCentricFCParcels(FunctionalConnectivityBase):
+class EdgeCentricFCParcels(EdgeCentricFCBase):
     """Class for edge-centric FC using parcellations.
 
     Parameters
@@ -46,6 +45,23 @@ class EdgeCentricFCParcels(FunctionalConnectivityBase):
         covariance. If usage of :class:`sklearn.covariance.LedoitWolf` is
         desired, ``{"empirical": False}`` should be passed
         (default None).
+    block_size : positive int or None, optional
+        The number of edges per block to use for computing the
+        edge x edge connectivity blockwise. This bounds the memory needed
+        besides the output. Only supported for
+        ``conn_method="correlation"`` with ``{"empirical": True}``.
+        If None, the edge-wise time series are computed in full and
+        passed to :class:`.JuniferConnectivityMeasure` (default None).
+    lower_triangle_only : bool, optional
+        Whether to compute only the lower triangle of the connectivity
+        matrix, leaving the upper triangle filled with zeros. Only used if
+        ``block_size`` is not None (default False).
+    dtype : {"float64", "float32", "float16"}, optional
+        The data type of the connectivity matrix (default "float64").
+    memmap : bool, optional
+        Whether to write the connectivity matrix to a memory-mapped file in
+        the element-scoped temporary directory instead of keeping it in
+        memory. Only used if ``block_size`` is not None (default False).
     masks : str, dict, list of them or None, optional
         The specification of the masks to apply to regions before extracting
         signals. Check :ref:`Using Masks <using_masks>` for more details.
@@ -62,12 +78,36 @@ class EdgeCentricFCParcels(FunctionalConnectivityBase):
 
     """
 
+    _PIPELINE_DATA: ClassVar[dict[str, str]] = {
+        "parcellation": "parcellation",
+    }
+
     parcellation: Annotated[str | list[str], BeforeValidator(ensure_list)]
 
-    def aggregate(
+    def _estimate_n_rois(self, input: dict[str, Any]) -> int | None:
+        """Estimate the number of edges between parcels.
+
+        Parameters
+        ----------
+        input : dict
+            A single input from the Junifer Data object as returned by
+            :func:`.read_data_headers`.
+
+        Returns
+        -------
+        int or None
+            The number of edges between parcels.
+
+        """
+        n_rois = ParcelAggregation(
+            parcellation=self.parcellation, on=DataType.BOLD
+        )._estimate_n_rois(input)
+        return n_rois * (n_rois - 1) // 2 if n_rois is not None else None
+
+    def aggregate_rois(
         self, input: dict[str, Any], extra_input: dict | None = None
     ) -> dict:
-        """Perform parcel aggregation and ETS computation.
+        """Perform parcel aggregation.
 
         Parameters
         ----------
@@ -93,23 +133,10 @@ class EdgeCentricFCParcels(FunctionalConnectivityBase):
                 - ``col_names`` : ROI labels as list of str
 
         """
-        # Perform aggregation
-        aggregation = ParcelAggregation(
+        return ParcelAggregation(
             parcellation=self.parcellation,
             method=self.agg_method,
             method_params=self.agg_method_params,
             masks=self.masks,
             on=DataType.BOLD,
         ).compute(input, extra_input=extra_input)
-        # Compute edgewise timeseries
-        ets, edge_names = _ets(
-            bold_ts=aggregation["aggregation"]["data"],
-            roi_names=aggregation["aggregation"]["col_names"],
-        )
-
-        return {
-            "aggregation": {
-                "data": ets,
-                "col_names": edge_names,
-            },
-        }
@@ -4,22 +4,21 @@
 #          Synchon Mandal <s.mandal@fz-juelich.de>
 # License: AGPL
 
-from typing import Any, Literal
+from typing import Any, ClassVar, Literal
 
 from pydantic import PositiveFloat
 
 from ...api.decorators import register_marker
 from ...datagrabber import DataType
 from ..sphere_aggregation import SphereAggregation
-from ..utils import _ets
-from .functional_connectivity_base import FunctionalConnectivityBase
+from .edge_functional_connectivity_base import EdgeCentricFCBase
 
 
 __all__ = ["EdgeCentricFCSpheres"]
 
 
 @register_marker
-class EdgeCentricFCSpheres(FunctionalConnectivityBase):
+class EdgeCentricFCSpheres(EdgeCentricFCBase):
     """Class for edge-centric FC using coordinates (spheres).
 
     Parameters
@@ -53,6 +52,23 @@ class EdgeCentricFCSpheres(FunctionalConnectivityBase):
         covariance. If usage of :class:`sklearn.covariance.LedoitWolf` is
         desired, ``{"empirical": False}`` should be passed
         (default None).
+    block_size : positive int or None, optional
+        The number of edges per block to use for computing the
+        edge x edge connectivity blockwise. This bounds the memory needed
+        besides the output. Only supported for
+        ``conn_method="correlation"`` with ``{"empirical": True}``.
+        If None, the edge-wise time series are computed in full and
+        passed to :class:`.JuniferConnectivityMeasure` (default None).
+    lower_triangle_only : bool, optional
+        Whether to compute only the lower triangle of the connectivity
+        matrix, leaving the upper triangle filled with zeros. Only used if
+        ``block_size`` is not None (default False).
+    dtype : {"float64", "float32", "float16"}, optional
+        The data type of the connectivity matrix (default "float64").
+    memmap : bool, optional
+        Whether to write the connectivity matrix to a memory-mapped file in
+        the element-scoped temporary directory instead of keeping it in
+        memory. Only used if ``block_size`` is not None (default False).
     masks : str, dict, list of them or None, optional
         The specification of the masks to apply to regions before extracting
         signals. Check :ref:`Using Masks <using_masks>` for more details.
@@ -69,14 +85,36 @@ class EdgeCentricFCSpheres(FunctionalConnectivityBase):
 
     """
 
+    _PIPELINE_DATA: ClassVar[dict[str, str]] = {"coords": "coordinates"}
+
     coords: str
     radius: Literal[0] | PositiveFloat | None = None
     allow_overlap: bool = False
 
-    def aggregate(
+    def _estimate_n_rois(self, input: dict[str, Any]) -> int | None:
+        """Estimate the number of edges between spheres.
+
+        Parameters
+        ----------
+        input : dict
+            A single input from the Junifer Data object as returned by
+            :func:`.read_data_headers`.
+
+        Returns
+        -------
+        int or None
+            The number of edges between spheres.
+
+        """
+        n_rois = SphereAggregation(
+            coords=self.coords, on=DataType.BOLD
+        )._estimate_n_rois(input)
+        return n_rois * (n_rois - 1) // 2 if n_rois is not None else None
+
+    def aggregate_rois(
         self, input: dict[str, Any], extra_input: dict | None = None
     ) -> dict:
-        """Perform sphere aggregation and ETS computation.
+        """Perform sphere aggregation.
 
         Parameters
         ----------
@@ -102,8 +140,7 @@ class EdgeCentricFCSpheres(FunctionalConnectivityBase):
                 - ``col_names`` : ROI labels as list of str
 
         """
-        # Perform aggregation
-        aggregation = SphereAggregation(
+        return SphereAggregation(
             coords=self.coords,
             radius=self.radius,
             allow_overlap=self.allow_overlap,
@@ -112,12 +149,3 @@ class EdgeCentricFCSpheres(FunctionalConnectivityBase):
             masks=self.masks,
             on=DataType.BOLD,
         ).compute(input, extra_input=extra_input)
-        # Compute edgewise timeseries
-        ets, edge_names = _ets(
-            bold_ts=aggregation["aggregation"]["data"],
-            roi_names=aggregation["aggregation"]["col_names"],
-        )
-
-        return {
-            "aggregation": {"data": ets, "col_names": edge_names},
-        }
@@ -55,6 +55,8 @@ class FunctionalConnectivityBase(BaseMarker):
 
     _DEPENDENCIES: ClassVar[Dependencies] = {"nilearn", "scikit-learn"}
 
+    _PIPELINE_DATA: ClassVar[dict[str, str]] = {"masks": "mask"}
+
     _MARKER_INOUT_MAPPINGS: ClassVar[MarkerInOutMappings] = {
         DataType.BOLD: {
             "functional_connectivity": StorageType.Matrix,
@@ -3,7 +3,7 @@
 # Authors: Synchon Mandal <s.mandal@fz-juelich.de>
 # License: AGPL
 
-from typing import Any
+from typing import Any, ClassVar
 
 from ...api.decorators import register_marker
 from ...datagrabber import DataType
@@ -44,6 +44,8 @@ class FunctionalConnectivityMaps(FunctionalConnectivityBase):
 
     """
 
+    _PIPELINE_DATA: ClassVar[dict[str, str]] = {"maps": "maps"}
+
     maps: str
 
     def aggregate(
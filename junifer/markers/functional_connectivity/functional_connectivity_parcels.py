@@ -5,7 +5,7 @@
 #          Synchon Mandal <s.mandal@fz-juelich.de>
 # License: AGPL
 
-from typing import Annotated, Any
+from typing import Annotated, Any, ClassVar
 
 from pydantic import BeforeValidator
 
@@ -56,8 +56,31 @@ class FunctionalConnectivityParcels(FunctionalConnectivityBase):
 
     """
 
+    _PIPELINE_DATA: ClassVar[dict[str, str]] = {
+        "parcellation": "parcellation",
+    }
+
     parcellation: Annotated[str | list[str], BeforeValidator(ensure_list)]
 
+    def _estimate_n_rois(self, input: dict[str, Any]) -> int | None:
+        """Estimate the number of parcels.
+
+        Parameters
+        ----------
+        input : dict
+            A single input from the Junifer Data object as returned by
+            :func:`.read_data_headers`.
+
+        Returns
+        -------
+        int or None
+            The number of parcels.
+
+        """
+        return ParcelAggregation(
+            parcellation=self.parcellation, on=DataType.BOLD
+        )._estimate_n_rois(input)
+
     def aggregate(
         self, input: dict[str, Any], extra_input: dict | None = None
     ) -> dict:
@@ -5,7 +5,7 @@
 #          Synchon Mandal <s.mandal@fz-juelich.de>
 # License: AGPL
 
-from typing import Any, Literal
+from typing import Any, ClassVar, Literal
 
 from pydantic import PositiveFloat
 
@@ -63,10 +63,31 @@ class FunctionalConnectivitySpheres(FunctionalConnectivityBase):
 
     """
 
+    _PIPELINE_DATA: ClassVar[dict[str, str]] = {"coords": "coordinates"}
+
     coords: str
     radius: Literal[0] | PositiveFloat | None = None
     allow_overlap: bool = False
 
+    def _estimate_n_rois(self, input: dict[str, Any]) -> int | None:
+        """Estimate the number of spheres.
+
+        Parameters
+        ----------
+        input : dict
+            A single input from the Junifer Data object as returned by
+            :func:`.read_data_headers`.
+
+        Returns
+        -------
+        int or None
+            The number of spheres.
+
+        """
+        return SphereAggregation(
+            coords=self.coords, on=DataType.BOLD
+        )._estimate_n_rois(input)
+
     def aggregate(
         self, input: dict[str, Any], extra_input: dict | None = None
     ) -> dict:
@@ -6,7 +6,9 @@
 
 from pathlib import Path
 
+import numpy as np
 import pytest
+from numpy.testing import assert_array_almost_equal
 
 from junifer.datagrabber import DataType
 from junifer.datareader import DefaultDataReader
@@ -73,3 +75,63 @@ def test_EdgeCentricFCParcels(
             x["name"] == "BOLD_EdgeCentricFCParcels_functional_connectivity"
             for x in features.values()
         )
+
+
+@pytest.mark.parametrize(
+    "lower_triangle_only, memmap",
+    [
+        (False, False),
+        (True, False),
+        (False, True),
+    ],
+)
+def test_EdgeCentricFCParcels_blockwise(
+    lower_triangle_only: bool, memmap: bool
+) -> None:
+    """Test EdgeCentricFCParcels blockwise computation.
+
+    Parameters
+    ----------
+    lower_triangle_only : bool
+        The parametrized flag for computing only the lower triangle.
+    memmap : bool
+        The parametrized flag for memory-mapping the output.
+
+    """
+    with PartlyCloudyTestingDataGrabber() as dg:
+        # Get element data
+        element_data = DefaultDataReader().fit_transform(dg["sub-01"])
+        # Compute full edge FC
+        full_fc = EdgeCentricFCParcels(
+            parcellation="TianxS1x3TxMNInonlinear2009cAsym",
+        ).compute(element_data["BOLD"])["functional_connectivity"]
+        # Compute blockwise edge FC
+        block_fc = EdgeCentricFCParcels(
+            parcellation="TianxS1x3TxMNInonlinear2009cAsym",
+            block_size=13,
+            lower_triangle_only=lower_triangle_only,
+            dtype="float32",
+            memmap=memmap,
+        ).compute(element_data["BOLD"])["functional_connectivity"]
+
+        assert block_fc["data"].dtype == np.float32
+        assert block_fc["row_names"] == full_fc["row_names"]
+        assert block_fc["col_names"] == full_fc["col_names"]
+        idx = np.tril_indices_from(full_fc["data"])
+        assert_array_almost_equal(
+            block_fc["data"][idx], full_fc["data"][idx], decimal=5
+        )
+        if not lower_triangle_only:
+            assert_array_almost_equal(
+                block_fc["data"], full_fc["data"], decimal=5
+            )
+
+
+def test_EdgeCentricFCParcels_blockwise_error() -> None:
+    """Test EdgeCentricFCParcels blockwise computation errors."""
+    with pytest.raises(ValueError, match="only supported"):
+        EdgeCentricFCParcels(
+            parcellation="TianxS1x3TxMNInonlinear2009cAsym",
+            conn_method_params={"empirical": False},
+            block_size=10,
+        )
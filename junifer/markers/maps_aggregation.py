@@ -3,23 +3,260 @@
 # Authors: Synchon Mandal <s.mandal@fz-juelich.de>
 # License: AGPL
 
-from typing import Annotated, Any, ClassVar, Literal
+import hashlib
+import json
+import os
+import tempfile
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING, Annotated, Any, ClassVar, Literal
 
-from nilearn.maskers import NiftiMapsMasker
+import numpy as np
+from nilearn import image as nimg
+from nilearn._utils.niimg_conversions import check_same_fov, safe_get_data
 from pydantic import BeforeValidator
+from scipy import linalg
 
 from ..api.decorators import register_marker
-from ..data import get_data
+from ..data import MapsRegistry, get_data
 from ..datagrabber import DataType
 from ..stats import get_aggfunc_by_name
 from ..storage import StorageType
 from ..typing import Dependencies, MarkerInOutMappings
-from ..utils import ensure_list_or_none, raise_error, warn_with_log
+from ..utils import config, ensure_list_or_none, raise_error, warn_with_log
 from .base import BaseMarker, logger
 
 
+if TYPE_CHECKING:
+    from nibabel.nifti1 import Nifti1Image
+
+
 __all__ = ["MapsAggregation"]
 
+
+# In-process cache of maps projections, keyed by maps definition, space,
+# target grid and mask hash; bounded to avoid unbounded memory growth
+_MAPS_PROJECTION_CACHE: OrderedDict[str, dict[str, Any]] = OrderedDict()
+_MAPS_PROJECTION_CACHE_SIZE = 8
+
+
+def _maps_projection_key(
+    maps: str,
+    space: str,
+    target_img: "Nifti1Image",
+    mask_img: "Nifti1Image | None",
+) -> str:
+    """Compute the cache key of a maps projection.
+
+    Parameters
+    ----------
+    maps : str
+        The name of the map(s).
+    space : str
+        The space of the target image.
+    target_img : nibabel.nifti1.Nifti1Image
+        The target image.
+    mask_img : nibabel.nifti1.Nifti1Image or None
+        The mask image, if any.
+
+    Returns
+    -------
+    str
+        The MD5 hash of the key.
+
+    """
+    # Custom user maps can be re-registered, so the file state is part of
+    # the key
+    definition = MapsRegistry().data.get(maps, {})
+    if definition.get("family") == "CustomUserMaps":
+        stat = Path(definition["path"]).stat()
+        maps_key: str | list = [
+            str(definition["path"]),
+            stat.st_mtime_ns,
+            stat.st_size,
+            list(definition["labels"]),
+        ]
+    else:
+        maps_key = maps
+    key = {
+        "maps": maps_key,
+        "space": space,
+        "affine": np.asarray(target_img.affine).round(6).tolist(),
+        "shape": list(target_img.shape[:3]),
+        "mask": None,
+    }
+    if mask_img is not None:
+        mask_data = np.asarray(safe_get_data(mask_img, ensure_finite=True))
+        key["mask"] = {
+            "affine": np.asarray(mask_img.affine).round(6).tolist(),
+            "shape": list(mask_data.shape),
+            "md5": hashlib.md5(
+                np.packbits(mask_data != 0).tobytes(), usedforsecurity=False
+            ).hexdigest(),
+        }
+    return hashlib.md5(
+        json.dumps(key, sort_keys=True).encode("utf-8"),
+        usedforsecurity=False,
+    ).hexdigest()
+
+
+def _compute_maps_projection(
+    maps_img: "Nifti1Image",
+    labels: list[str],
+    target_img: "Nifti1Image",
+    mask_img: "Nifti1Image | None" = None,
+) -> dict[str, Any]:
+    """Compute the projection of data onto maps.
+
+    This mirrors :class:`nilearn.maskers.NiftiMapsMasker` with
+    ``resampling_target="data"``, but instead of solving the least-squares
+    problem for every image, the pseudo-inverse of the masked maps matrix
+    is computed once.
+
+    Parameters
+    ----------
+    maps_img : nibabel.nifti1.Nifti1Image
+        The map(s) image.
+    labels : list of str
+        The map(s) labels.
+    target_img : nibabel.nifti1.Nifti1Image
+        The target image defining the grid.
+    mask_img : nibabel.nifti1.Nifti1Image or None, optional
+        The mask image (default None).
+
+    Returns
+    -------
+    dict
+        The projection with the following keys:
+
+        * ``voxels`` : flat indices of the voxels to extract
+        * ``projection`` : the pseudo-inverse of the masked maps matrix
+        * ``labels`` : the map(s) labels
+
+    """
+    target_shape = target_img.shape[:3]
+    # Resample maps and mask to target image, if required
+    if not check_same_fov(target_img, maps_img):
+        maps_img = nimg.resample_img(
+            maps_img,
+            interpolation="continuous",
+            target_shape=target_shape,
+            target_affine=target_img.affine,
+        )
+    maps_data = safe_get_data(maps_img, ensure_finite=True)
+    if maps_data.ndim == 3:
+        maps_data = maps_data[..., np.newaxis]
+    if mask_img is not None:
+        if not check_same_fov(target_img, mask_img):
+            mask_img = nimg.resample_img(
+                mask_img,
+                interpolation="nearest",
+                target_shape=target_shape,
+                target_affine=target_img.affine,
+            )
+        mask = safe_get_data(mask_img, ensure_finite=True).astype(bool)
+        # Trim maps to mask and keep voxels where any map is positive
+        maps_data = maps_data * mask[..., np.newaxis]
+        maps_mask = np.any(maps_data > 0, axis=-1)
+    else:
+        maps_mask = np.ones(target_shape, dtype=bool)
+    voxels = np.flatnonzero(maps_mask)
+    projection = linalg.pinv(maps_data[maps_mask, :])
+    return {
+        "voxels": voxels,
+        "projection": projection,
+        "labels": list(labels),
+    }
+
+
+def _apply_maps_projection(
+    projection: dict[str, Any], img: "Nifti1Image"
+) -> np.ndarray:
+    """Extract map(s) signals from an image using a projection.
+
+    Parameters
+    ----------
+    projection : dict
+        The projection as returned by :func:`_compute_maps_projection`.
+    img : nibabel.nifti1.Nifti1Image
+        The 3D or 4D image to extract signals from.
+
+    Returns
+    -------
+    numpy.ndarray
+        The extracted signals.
+        shape: (number of scans, number of maps)
+
+    """
+    data = safe_get_data(img, ensure_finite=True)
+    n_scans = 1 if data.ndim == 3 else data.shape[3]
+    data = data.reshape(-1, n_scans)[projection["voxels"]]
+    return (projection["projection"] @ data).T
+
+
+def _get_maps_projection_from_disk(key: str) -> dict[str, Any] | None:
+    """Load a maps projection from the on-disk cache, if available.
+
+    Parameters
+    ----------
+    key : str
+        The cache key.
+
+    Returns
+    -------
+    dict or None
+        The projection if found, else None.
+
+    """
+    location = config.get("markers.maps.cache.location")
+    if location is None:
+        return None
+    path = Path(location) / f"maps_projection_{key}.npz"
+    if not path.exists():
+        return None
+    logger.debug(f"Loading maps projection from {path}")
+    with np.load(path, allow_pickle=False) as npz:
+        return {
+            "voxels": npz["voxels"],
+            "projection": npz["projection"],
+            "labels": npz["labels"].tolist(),
+        }
+
+
+def _save_maps_projection_to_disk(
+    key: str, projection: dict[str, Any]
+) -> None:
+    """Save a maps projection to the on-disk cache, if configured.
+
+    Parameters
+    ----------
+    key : str
+        The cache key.
+    projection : dict
+        The projection as returned by :func:`_compute_maps_projection`.
+
+    """
+    location = config.get("markers.maps.cache.location")
+    if location is None:
+        return
+    location = Path(location)
+    location.mkdir(parents=True, exist_ok=True)
+    path = location / f"maps_projection_{key}.npz"
+    logger.debug(f"Saving maps projection to {path}")
+    # Write to temporary file first so that concurrent readers never see
+    # partially written files
+    with tempfile.NamedTemporaryFile(
+        dir=location, suffix=".npz", delete=False
+    ) as f:
+        np.savez(
+            f,
+            voxels=projection["voxels"],
+            projection=projection["projection"],
+            labels=np.asarray(projection["labels"], dtype=str),
+        )
+    os.replace(f.name, path)
+
+
 _on = Literal[
     DataType.T1w,
     DataType.T2w,
@@ -73,6 +310,11 @@ class MapsAggregation(BaseMarker):
 
     _DEPENDENCIES: ClassVar[Dependencies] = {"nilearn", "numpy"}
 
+    _PIPELINE_DATA: ClassVar[dict[str, str]] = {
+        "maps": "maps",
+        "masks": "mask",
+    }
+
     _MARKER_INOUT_MAPPINGS: ClassVar[MarkerInOutMappings] = {
         DataType.T1w: {
             "aggregation": StorageType.Vector,
@@ -165,14 +407,6 @@ class MapsAggregation(BaseMarker):
         t_input_img = input["data"]
         logger.debug("Maps aggregation")
 
-        # Get maps tailored to target image
-        maps_img, labels = get_data(
-            kind="maps",
-            names=self.maps,
-            target_data=input,
-            extra_input=extra_input,
-        )
-
         # Load mask
         mask_img = None
         if self.masks is not None:
@@ -185,15 +419,50 @@ class MapsAggregation(BaseMarker):
                 extra_input=extra_input,
             )
 
-        # Initialize masker
-        logger.debug("Masking")
-        masker = NiftiMapsMasker(
-            maps_img=maps_img,
-            mask_img=mask_img,
-            target_affine=t_input_img.affine,
-        )
+        # Get cached projection; maps are only shared across elements
+        # if they are not warped to native space
+        key = None
+        projection = None
+        if input["space"] != "native":
+            key = _maps_projection_key(
+                maps=self.maps,
+                space=input["space"],
+                target_img=t_input_img,
+                mask_img=mask_img,
+            )
+            projection = _MAPS_PROJECTION_CACHE.get(key)
+            if projection is None:
+                projection = _get_maps_projection_from_disk(key)
+            else:
+                logger.debug("Using cached maps projection")
+                _MAPS_PROJECTION_CACHE.move_to_end(key)
+
+        if projection is None:
+            # Get maps tailored to target image
+            maps_img, labels = get_data(
+                kind="maps",
+                names=self.maps,
+                target_data=input,
+                extra_input=extra_input,
+            )
+            logger.debug("Computing maps projection")
+            projection = _compute_maps_projection(
+                maps_img=maps_img,
+                labels=labels,
+                target_img=t_input_img,
+                mask_img=mask_img,
+            )
+            if key is not None:
+                _save_maps_projection_to_disk(key, projection)
+        if key is not None:
+            _MAPS_PROJECTION_CACHE[key] = projection
+            if len(_MAPS_PROJECTION_CACHE) > _MAPS_PROJECTION_CACHE_SIZE:
+                _MAPS_PROJECTION_CACHE.popitem(last=False)
+
         # Mask the input data and extract data
-        data = masker.fit_transform(t_input_img)
+        logger.debug("Masking")
+        data = _apply_maps_projection(projection, t_input_img)
+        labels = projection["labels"]
 
         # Apply time dimension aggregation if required
         if self.time_method is not None:
@@ -4,15 +4,20 @@
 #          Synchon Mandal <s.mandal@fz-juelich.de>
 # License: AGPL
 
-from typing import Annotated, Any, ClassVar, Literal
+import hashlib
+import json
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING, Annotated, Any, ClassVar, Literal
+from weakref import WeakKeyDictionary
 
 import numpy as np
-from nilearn.image import math_img
-from nilearn.maskers import NiftiMasker
+from nilearn import image as nimg
+from nilearn._utils.niimg_conversions import check_same_fov
 from pydantic import BeforeValidator
 
 from ..api.decorators import register_marker
-from ..data import get_data
+from ..data import ParcellationRegistry, get_data
 from ..datagrabber import DataType
 from ..stats import get_aggfunc_by_name
 from ..storage import StorageType
@@ -26,8 +31,244 @@ from ..utils import (
 from .base import BaseMarker, logger
 
 
+if TYPE_CHECKING:
+    from nibabel.nifti1 import Nifti1Image
+
+
 __all__ = ["ParcelAggregation"]
 
+
+# In-process cache of parcel indices, keyed by parcellation name(s), space,
+# target grid and mask hash; bounded to avoid unbounded memory growth
+_PARCEL_INDICES_CACHE: OrderedDict[str, dict[str, Any]] = OrderedDict()
+_PARCEL_INDICES_CACHE_SIZE = 32
+
+# Extraction state shared by all markers working on the same image object,
+# i.e., the voxel matrix and the already computed parcel signals; entries
+# are dropped together with the image
+_PARCEL_EXTRACTION_CACHE: "WeakKeyDictionary[Nifti1Image, dict[str, Any]]" = (
+    WeakKeyDictionary()
+)
+
+
+def _parcel_indices_key(
+    parcellation: list[str],
+    space: str,
+    target_img: "Nifti1Image",
+    mask_img: "Nifti1Image | None",
+) -> str:
+    """Compute the cache key of parcel indices.
+
+    Parameters
+    ----------
+    parcellation : list of str
+        The name(s) of the parcellation(s).
+    space : str
+        The space of the target image.
+    target_img : nibabel.nifti1.Nifti1Image
+        The target image.
+    mask_img : nibabel.nifti1.Nifti1Image or None
+        The mask image, if any.
+
+    Returns
+    -------
+    str
+        The MD5 hash of the key.
+
+    """
+    # Custom user parcellations can be re-registered, so the file state is
+    # part of the key
+    definitions = []
+    for name in parcellation:
+        definition = ParcellationRegistry().data.get(name, {})
+        if definition.get("family") == "CustomUserParcellation":
+            stat = Path(definition["path"]).stat()
+            definitions.append(
+                [
+                    str(definition["path"]),
+                    stat.st_mtime_ns,
+                    stat.st_size,
+                    list(definition["labels"]),
+                ]
+            )
+        else:
+            definitions.append(name)
+    key = {
+        "parcellation": definitions,
+        "space": space,
+        "affine": np.asarray(target_img.affine).round(6).tolist(),
+        "shape": list(target_img.shape[:3]),
+        "mask": None,
+    }
+    if mask_img is not None:
+        mask_data = np.asarray(nimg.get_data(mask_img))
+        key["mask"] = {
+            "affine": np.asarray(mask_img.affine).round(6).tolist(),
+            "shape": list(mask_data.shape),
+            "md5": hashlib.md5(
+                np.packbits(mask_data != 0).tobytes(), usedforsecurity=False
+            ).hexdigest(),
+        }
+    return hashlib.md5(
+        json.dumps(key, sort_keys=True).encode("utf-8"),
+        usedforsecurity=False,
+    ).hexdigest()
+
+
+def _compute_parcel_indices(
+    parcellation_img: "Nifti1Image",
+    labels: dict[int, str],
+    target_img: "Nifti1Image",
+    mask_img: "Nifti1Image | None" = None,
+) -> dict[str, Any]:
+    """Compute the voxel indices of each parcel.
+
+    This mirrors masking with :class:`nilearn.maskers.NiftiMasker` using the
+    binarized parcellation (and mask), but instead of masking the data for
+    every parcellation, the flat voxel indices of each parcel are computed
+    once and used to pick the parcel voxels from the shared voxel matrix.
+
+    Parameters
+    ----------
+    parcellation_img : nibabel.nifti1.Nifti1Image
+        The parcellation image.
+    labels : dict
+        The parcellation labels as ``{value: name}``.
+    target_img : nibabel.nifti1.Nifti1Image
+        The target image defining the grid.
+    mask_img : nibabel.nifti1.Nifti1Image or None, optional
+        The mask image (default None).
+
+    Returns
+    -------
+    dict
+        The parcel indices with the following keys:
+
+        * ``indices`` : list of C-ordered flat voxel indices, per parcel
+        * ``labels`` : the parcel labels
+
+    """
+    target_shape = target_img.shape[:3]
+    # Resample parcellation and mask to target image, if required
+    if not check_same_fov(target_img, parcellation_img):
+        parcellation_img = nimg.resample_img(
+            parcellation_img,
+            interpolation="nearest",
+            target_shape=target_shape,
+            target_affine=target_img.affine,
+        )
+    parcellation_data = np.squeeze(nimg.get_data(parcellation_img))
+    parcellation_bin = parcellation_data != 0
+    if mask_img is not None:
+        if not check_same_fov(target_img, mask_img):
+            mask_img = nimg.resample_img(
+                mask_img,
+                interpolation="nearest",
+                target_shape=target_shape,
+                target_affine=target_img.affine,
+            )
+        parcellation_bin &= np.squeeze(nimg.get_data(mask_img)) != 0
+    voxels = np.flatnonzero(parcellation_bin)
+    values = parcellation_data.ravel()[voxels].astype(int)
+    # Group the voxels by parcel, keeping the voxel order within parcels
+    order = np.argsort(values, kind="stable")
+    sorted_values = values[order]
+    label_values = np.fromiter(labels.keys(), dtype=int, count=len(labels))
+    starts = np.searchsorted(sorted_values, label_values, side="left")
+    stops = np.searchsorted(sorted_values, label_values, side="right")
+    return {
+        "indices": [
+            voxels[order[start:stop]]
+            for start, stop in zip(starts, stops, strict=True)
+        ],
+        "labels": list(labels.values()),
+    }
+
+
+def _get_parcel_extraction(img: "Nifti1Image") -> dict[str, Any]:
+    """Get the extraction state shared by markers for an image.
+
+    The image data is read once and exposed as voxel matrix, without copying
+    if the data is contiguous.
+
+    Parameters
+    ----------
+    img : nibabel.nifti1.Nifti1Image
+        The 3D or 4D image to extract signals from.
+
+    Returns
+    -------
+    dict
+        The extraction state with the following keys:
+
+        * ``matrix`` : the voxel matrix of shape (number of voxels,
+          number of scans)
+        * ``order`` : the flat index order of the voxel matrix
+        * ``shape`` : the spatial shape of the image
+        * ``signals`` : dict of the already computed parcel signals
+
+    """
+    extraction = _PARCEL_EXTRACTION_CACHE.get(img)
+    if extraction is None:
+        data = nimg.get_data(img)
+        if data.ndim == 3:
+            data = data[..., np.newaxis]
+        # Reshape in memory order to get a view instead of a copy
+        order = (
+            "F"
+            if data.flags.f_contiguous and not data.flags.c_contiguous
+            else "C"
+        )
+        extraction = {
+            "matrix": data.reshape(-1, data.shape[3], order=order),
+            "order": order,
+            "shape": data.shape[:3],
+            "signals": {},
+        }
+        _PARCEL_EXTRACTION_CACHE[img] = extraction
+    return extraction
+
+
+def _extract_parcel_signals(
+    extraction: dict[str, Any],
+    parcel_indices: dict[str, Any],
+    agg_func: Any,
+) -> np.ndarray:
+    """Extract parcel signals from the shared voxel matrix.
+
+    Parameters
+    ----------
+    extraction : dict
+        The extraction state as returned by :func:`_get_parcel_extraction`.
+    parcel_indices : dict
+        The parcel indices as returned by :func:`_compute_parcel_indices`.
+    agg_func : callable
+        The aggregation function to apply on the parcel voxels.
+
+    Returns
+    -------
+    numpy.ndarray
+        The extracted signals.
+        shape: (number of scans, number of parcels)
+
+    """
+    matrix = extraction["matrix"]
+    out_values = []
+    for t_indices in parcel_indices["indices"]:
+        if extraction["order"] == "F":
+            t_indices = np.ravel_multi_index(
+                np.unravel_index(t_indices, extraction["shape"]),
+                extraction["shape"],
+                order="F",
+            )
+        t_data = matrix[t_indices]
+        # Non-float data is cast to float32 as done by nilearn maskers
+        if t_data.dtype.kind != "f":
+            t_data = t_data.astype(np.float32)
+        out_values.append(agg_func(t_data.T, axis=-1))
+    return np.array(out_values).T
+
+
 _on = Literal[
     DataType.T1w,
     DataType.T2w,
@@ -88,6 +329,11 @@ class ParcelAggregation(BaseMarker):
 
     _DEPENDENCIES: ClassVar[Dependencies] = {"nilearn", "numpy"}
 
+    _PIPELINE_DATA: ClassVar[dict[str, str]] = {
+        "parcellation": "parcellation",
+        "masks": "mask",
+    }
+
     _MARKER_INOUT_MAPPINGS: ClassVar[MarkerInOutMappings] = {
         DataType.T1w: {
             "aggregation": StorageType.Vector,
@@ -145,6 +391,31 @@ class ParcelAggregation(BaseMarker):
                 "Please remove `time_method_params` parameter."
             )
 
+    def _estimate_n_rois(self, input: dict[str, Any]) -> int | None:
+        """Estimate the number of parcels.
+
+        Parameters
+        ----------
+        input : dict
+            A single input from the Junifer Data object as returned by
+            :func:`.read_data_headers`.
+
+        Returns
+        -------
+        int or None
+            The number of parcels.
+
+        """
+        # Labels are loaded without the image
+        return sum(
+            len(
+                ParcellationRegistry().load(
+                    name=name, target_space=input["space"], path_only=True
+                )[1]
+            )
+            for name in self.parcellation
+        )
+
     def compute(
         self, input: dict[str, Any], extra_input: dict | None = None
     ) -> dict:
@@ -186,20 +457,8 @@ class ParcelAggregation(BaseMarker):
             name=self.method, func_params=self.method_params
         )
 
-        # Get parcellation tailored to target image
-        parcellation_img, labels = get_data(
-            kind="parcellation",
-            names=self.parcellation,
-            target_data=input,
-            extra_input=extra_input,
-        )
-
-        # Get binarized parcellation image for masking
-        parcellation_bin = math_img(
-            "np.squeeze(img) != 0", img=parcellation_img
-        )
-
         # Load mask
+        mask_img = None
         if self.masks is not None:
             logger.debug(f"Masking with {self.masks}")
             # Get tailored mask
@@ -209,35 +468,64 @@ class ParcelAggregation(BaseMarker):
                 target_data=input,
                 extra_input=extra_input,
             )
-            # Get "logical and" version of parcellation and mask
-            parcellation_bin = math_img(
-                "np.logical_and(img, np.squeeze(mask))",
-                img=parcellation_bin,
-                mask=mask_img,
-            )
 
-        # Initialize masker
-        logger.debug("Masking")
-        masker = NiftiMasker(
-            parcellation_bin, target_affine=t_input_img.affine
+        key = _parcel_indices_key(
+            parcellation=self.parcellation,
+            space=input["space"],
+            target_img=t_input_img,
+            mask_img=mask_img,
+        )
+        # Parcels computed by other markers on the same image are reused
+        extraction = _get_parcel_extraction(t_input_img)
+        signals_key = json.dumps(
+            [key, self.method, self.method_params],
+            sort_keys=True,
+            default=str,
         )
-        # Mask the input data and the parcellation
-        data = masker.fit_transform(t_input_img)
-        parcellation_values = np.squeeze(
-            masker.transform(parcellation_img)
-        ).astype(int)
-
-        # Get the values for each parcel and apply agg function
-        logger.debug("Computing ROI means")
-        out_values = []
-        # Iterate over the parcels (existing)
-        for t_v in labels.keys():
-            t_values = agg_func(data[:, parcellation_values == t_v], axis=-1)
-            out_values.append(t_values)
-            # Update the labels just in case a parcel has no voxels
-            # in it
-
-        out_values = np.array(out_values).T
+        signals = extraction["signals"].get(signals_key)
+        if signals is not None:
+            logger.debug("Using already extracted parcel signals")
+            out_values, col_names = signals
+        else:
+            # Get cached parcel indices; parcellations are only shared
+            # across elements if they are not warped to native space
+            parcel_indices = None
+            if input["space"] != "native":
+                parcel_indices = _PARCEL_INDICES_CACHE.get(key)
+                if parcel_indices is not None:
+                    logger.debug("Using cached parcel indices")
+                    _PARCEL_INDICES_CACHE.move_to_end(key)
+            if parcel_indices is None:
+                # Get parcellation tailored to target image
+                parcellation_img, labels = get_data(
+                    kind="parcellation",
+                    names=self.parcellation,
+                    target_data=input,
+                    extra_input=extra_input,
+                )
+                logger.debug("Computing parcel indices")
+                parcel_indices = _compute_parcel_indices(
+                    parcellation_img=parcellation_img,
+                    labels=labels,
+                    target_img=t_input_img,
+                    mask_img=mask_img,
+                )
+                if input["space"] != "native":
+                    _PARCEL_INDICES_CACHE[key] = parcel_indices
+                    if len(_PARCEL_INDICES_CACHE) > _PARCEL_INDICES_CACHE_SIZE:
+                        _PARCEL_INDICES_CACHE.popitem(last=False)
+
+            # Get the values for each parcel and apply agg function
+            logger.debug("Computing ROI means")
+            out_values = _extract_parcel_signals(
+                extraction=extraction,
+                parcel_indices=parcel_indices,
+                agg_func=agg_func,
+            )
+            col_names = parcel_indices["labels"]
+            extraction["signals"][signals_key] = (out_values, col_names)
+        # Copy to not modify the shared signals
+        out_values = out_values.copy()
 
         # Apply time dimension aggregation if required
         if self.time_method is not None:
@@ -256,6 +544,6 @@ class ParcelAggregation(BaseMarker):
         return {
             "aggregation": {
                 "data": out_values,
-                "col_names": list(labels.values()),
+                "col_names": list(col_names),
             },
         }
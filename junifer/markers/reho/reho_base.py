@@ -15,6 +15,7 @@ from typing import (
 from pydantic import BeforeValidator
 
 from ...datagrabber import DataType
+from ...pipeline import ensure_data_path
 from ...storage import StorageType
 from ...typing import ConditionalDependencies, MarkerInOutMappings
 from ...utils import ensure_list_or_none
@@ -118,6 +119,8 @@ class ReHoBase(BaseMarker):
         },
     ]
 
+    _PIPELINE_DATA: ClassVar[dict[str, str]] = {"masks": "mask"}
+
     _MARKER_INOUT_MAPPINGS: ClassVar[MarkerInOutMappings] = {
         DataType.BOLD: {
             "reho": StorageType.Vector,
@@ -180,7 +183,7 @@ class ReHoBase(BaseMarker):
             estimator = JuniferReHo()
         # Compute reho
         reho_map, reho_map_path = estimator.compute(  # type: ignore
-            input_path=input_data["path"],
+            input_path=ensure_data_path(input_data),
             **reho_params,
         )
 
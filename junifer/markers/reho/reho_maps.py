@@ -3,7 +3,7 @@
 # Authors: Synchon Mandal <s.mandal@fz-juelich.de>
 # License: AGPL
 
-from typing import Any
+from typing import Any, ClassVar
 
 import numpy as np
 
@@ -79,6 +79,8 @@ class ReHoMaps(ReHoBase):
 
     """
 
+    _PIPELINE_DATA: ClassVar[dict[str, str]] = {"maps": "maps"}
+
     maps: str
 
     def compute(
@@ -3,7 +3,7 @@
 # Authors: Synchon Mandal <s.mandal@fz-juelich.de>
 # License: AGPL
 
-from typing import Annotated, Any
+from typing import Annotated, Any, ClassVar
 
 import numpy as np
 from pydantic import BeforeValidator
@@ -88,6 +88,10 @@ class ReHoParcels(ReHoBase):
 
     """
 
+    _PIPELINE_DATA: ClassVar[dict[str, str]] = {
+        "parcellation": "parcellation",
+    }
+
     parcellation: Annotated[str | list[str], BeforeValidator(ensure_list)]
 
     def compute(
@@ -3,7 +3,7 @@
 # Authors: Synchon Mandal <s.mandal@fz-juelich.de>
 # License: AGPL
 
-from typing import Any, Literal
+from typing import Any, ClassVar, Literal
 
 import numpy as np
 from pydantic import PositiveFloat
@@ -95,6 +95,8 @@ class ReHoSpheres(ReHoBase):
 
     """
 
+    _PIPELINE_DATA: ClassVar[dict[str, str]] = {"coords": "coordinates"}
+
     coords: str
     radius: Literal[0] | PositiveFloat | None = None
     allow_overlap: bool = False
@@ -9,7 +9,7 @@ from typing import Annotated, Any, ClassVar, Literal
 from pydantic import BeforeValidator, PositiveFloat
 
 from ..api.decorators import register_marker
-from ..data import get_data
+from ..data import CoordinatesRegistry, get_data
 from ..datagrabber import DataType
 from ..external.nilearn import JuniferNiftiSpheresMasker
 from ..stats import get_aggfunc_by_name
@@ -89,6 +89,11 @@ class SphereAggregation(BaseMarker):
 
     _DEPENDENCIES: ClassVar[Dependencies] = {"nilearn", "numpy"}
 
+    _PIPELINE_DATA: ClassVar[dict[str, str]] = {
+        "coords": "coordinates",
+        "masks": "mask",
+    }
+
     _MARKER_INOUT_MAPPINGS: ClassVar[MarkerInOutMappings] = {
         DataType.T1w: {
             "aggregation": StorageType.Vector,
@@ -148,6 +153,23 @@ class SphereAggregation(BaseMarker):
                 "Please remove `time_method_params` parameter."
             )
 
+    def _estimate_n_rois(self, input: dict[str, Any]) -> int | None:
+        """Estimate the number of spheres.
+
+        Parameters
+        ----------
+        input : dict
+            A single input from the Junifer Data object as returned by
+            :func:`.read_data_headers`.
+
+        Returns
+        -------
+        int or None
+            The number of spheres.
+
+        """
+        return len(CoordinatesRegistry().load(name=self.coords)[1])
+
     def compute(
         self,
         input: dict[str, Any],
@@ -44,6 +44,8 @@ class TemporalSNRBase(BaseMarker):
 
     _DEPENDENCIES: ClassVar[Dependencies] = {"nilearn"}
 
+    _PIPELINE_DATA: ClassVar[dict[str, str]] = {"masks": "mask"}
+
     _MARKER_INOUT_MAPPINGS: ClassVar[MarkerInOutMappings] = {
         DataType.BOLD: {
             "tsnr": StorageType.Vector,
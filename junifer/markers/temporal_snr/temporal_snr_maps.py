@@ -3,7 +3,7 @@
 # Authors: Synchon Mandal <s.mandal@fz-juelich.de>
 # License: AGPL
 
-from typing import Any
+from typing import Any, ClassVar
 
 from ...api.decorators import register_marker
 from ...datagrabber import DataType
@@ -33,6 +33,8 @@ class TemporalSNRMaps(TemporalSNRBase):
 
     """
 
+    _PIPELINE_DATA: ClassVar[dict[str, str]] = {"maps": "maps"}
+
     maps: str
 
     def aggregate(
@@ -4,7 +4,7 @@
 #          Synchon Mandal <s.mandal@fz-juelich.de>
 # License: AGPL
 
-from typing import Annotated, Any
+from typing import Annotated, Any, ClassVar
 
 from pydantic import BeforeValidator
 
@@ -44,6 +44,10 @@ class TemporalSNRParcels(TemporalSNRBase):
 
     """
 
+    _PIPELINE_DATA: ClassVar[dict[str, str]] = {
+        "parcellation": "parcellation",
+    }
+
     parcellation: Annotated[str | list[str], BeforeValidator(ensure_list)]
 
     def aggregate(
@@ -4,7 +4,7 @@
 #          Synchon Mandal <s.mandal@fz-juelich.de>
 # License: AGPL
 
-from typing import Any, Literal
+from typing import Any, ClassVar, Literal
 
 from pydantic import PositiveFloat
 
@@ -51,6 +51,8 @@ class TemporalSNRSpheres(TemporalSNRBase):
 
     """
 
+    _PIPELINE_DATA: ClassVar[dict[str, str]] = {"coords": "coordinates"}
+
     coords: str
     radius: Literal[0] | PositiveFloat | None = None
     allow_overlap: bool = False
@@ -4,8 +4,10 @@
 # License: AGPL
 
 import socket
+from pathlib import Path
 
 import pytest
+from numpy.testing import assert_array_almost_equal
 
 from junifer.datagrabber import DataladAOMICID1000, DataType
 from junifer.datareader import DefaultDataReader
@@ -57,3 +59,51 @@ def test_compute() -> None:
         feature_map = BrainPrint().fit_transform(element_data)
         # Assert the output keys
         assert {"eigenvalues", "areas", "volumes"} == set(feature_map.keys())
+
+
+@pytest.mark.skipif(
+    _check_freesurfer() is False, reason="requires FreeSurfer to be in PATH"
+)
+@pytest.mark.skipif(
+    socket.gethostname() != "juseless",
+    reason="only for juseless",
+)
+def test_compute_parallel_cached(tmp_path: Path) -> None:
+    """Test BrainPrint compute() in parallel with surface cache.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+
+    """
+    with DataladAOMICID1000(types=[DataType.FreeSurfer]) as dg:
+        # Fetch element
+        element = dg["sub-0001"]
+        # Fetch element data
+        element_data = DefaultDataReader().fit_transform(element)
+        # Compute marker serially
+        serial = BrainPrint(skip_cortex=True).compute(
+            element_data["FreeSurfer"]
+        )
+        # Compute marker in parallel and populate cache
+        parallel = BrainPrint(
+            skip_cortex=True, n_jobs=4, surface_cache_dir=tmp_path
+        ).compute(element_data["FreeSurfer"])
+        assert len(list(tmp_path.glob("*/*.vtk"))) == 30
+        # Compute marker from cache with different parameters
+        cached = BrainPrint(
+            skip_cortex=True, n_jobs=4, num=10, surface_cache_dir=tmp_path
+        ).compute(element_data["FreeSurfer"])
+        for feature in ("eigenvalues", "areas", "volumes"):
+            assert (
+                serial[feature]["col_names"]
+                == (parallel[feature]["col_names"])
+            )
+            assert_array_almost_equal(
+                serial[feature]["data"], parallel[feature]["data"]
+            )
+        assert cached["eigenvalues"]["data"].shape[0] == 10
+        assert_array_almost_equal(
+            serial["areas"]["data"], cached["areas"]["data"]
+        )
@@ -6,6 +6,8 @@
 from copy import deepcopy
 from pathlib import Path
 
+import nibabel as nib
+import numpy as np
 import pytest
 from nilearn.maskers import NiftiMapsMasker
 from numpy.testing import assert_array_almost_equal, assert_array_equal
@@ -15,7 +17,15 @@ from junifer.data.masks import compute_brain_mask
 from junifer.datagrabber import DataType, PatternDataladDataGrabber
 from junifer.datareader import DefaultDataReader
 from junifer.markers import MapsAggregation
+from junifer.markers.maps_aggregation import (
+    _apply_maps_projection,
+    _compute_maps_projection,
+    _get_maps_projection_from_disk,
+    _maps_projection_key,
+    _save_maps_projection_to_disk,
+)
 from junifer.storage import HDF5FeatureStorage, StorageType
+from junifer.utils import config
 
 
 @pytest.mark.parametrize(
@@ -428,3 +438,147 @@ def test_MapsAggregation_warning(
                 ..., 0:1
             ]
             marker.fit_transform(element_data)
+
+
+@pytest.mark.parametrize("use_mask", [True, False])
+@pytest.mark.parametrize("n_scans", [None, 10])
+def test_maps_projection_equals_nilearn(
+    use_mask: bool, n_scans: int | None
+) -> None:
+    """Test maps projection against NiftiMapsMasker.
+
+    Parameters
+    ----------
+    use_mask : bool
+        The parametrized flag for using a mask.
+    n_scans : int or None
+        The parametrized number of scans; None for 3D input.
+
+    """
+    rng = np.random.default_rng(42)
+    maps_affine = np.diag([3.0, 3.0, 3.0, 1.0])
+    maps_img = nib.Nifti1Image(
+        np.clip(rng.standard_normal((10, 11, 9, 5)), 0, None),
+        maps_affine,
+    )
+    data_shape = (14, 15, 13) if n_scans is None else (14, 15, 13, n_scans)
+    data_img = nib.Nifti1Image(
+        rng.standard_normal(data_shape), np.diag([2.0, 2.0, 2.0, 1.0])
+    )
+    mask_img = None
+    if use_mask:
+        mask_img = nib.Nifti1Image(
+            (rng.random((10, 11, 9)) > 0.3).astype(np.int8), maps_affine
+        )
+    expected = NiftiMapsMasker(
+        maps_img=maps_img,
+        mask_img=mask_img,
+        target_affine=data_img.affine,
+    ).fit_transform(data_img)
+    projection = _compute_maps_projection(
+        maps_img=maps_img,
+        labels=[f"map_{i}" for i in range(5)],
+        target_img=data_img,
+        mask_img=mask_img,
+    )
+    data = _apply_maps_projection(projection, data_img)
+    assert data.shape == expected.shape
+    assert_array_almost_equal(data, expected)
+
+
+def test_maps_projection_cache(tmp_path: Path) -> None:
+    """Test maps projection cache.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+
+    """
+    rng = np.random.default_rng(42)
+    affine = np.diag([3.0, 3.0, 3.0, 1.0])
+    maps_img = nib.Nifti1Image(
+        np.clip(rng.standard_normal((10, 11, 9, 5)), 0, None), affine
+    )
+    data_img = nib.Nifti1Image(rng.standard_normal((10, 11, 9, 4)), affine)
+    other_img = nib.Nifti1Image(
+        rng.standard_normal((10, 11, 9, 4)), affine * 2
+    )
+    key = _maps_projection_key(
+        maps="maps", space="MNI", target_img=data_img, mask_img=None
+    )
+    # Same grid gives same key
+    assert key == _maps_projection_key(
+        maps="maps",
+        space="MNI",
+        target_img=nib.Nifti1Image(
+            rng.standard_normal((10, 11, 9, 4)), affine
+        ),
+        mask_img=None,
+    )
+    # Different grid, space or mask gives different key
+    assert key != _maps_projection_key(
+        maps="maps", space="MNI", target_img=other_img, mask_img=None
+    )
+    assert key != _maps_projection_key(
+        maps="maps", space="other", target_img=data_img, mask_img=None
+    )
+    assert key != _maps_projection_key(
+        maps="maps",
+        space="MNI",
+        target_img=data_img,
+        mask_img=nib.Nifti1Image(np.ones((10, 11, 9), dtype=np.int8), affine),
+    )
+    # Re-registering custom maps gives different key
+    maps_path = tmp_path / "maps.nii.gz"
+    nib.save(maps_img, maps_path)
+    labels = [f"map_{i}" for i in range(5)]
+    MapsRegistry().register(
+        name="test_projection_cache",
+        maps_path=maps_path,
+        maps_labels=labels,
+        space="MNI",
+    )
+    try:
+        custom_key = _maps_projection_key(
+            maps="test_projection_cache",
+            space="MNI",
+            target_img=data_img,
+            mask_img=None,
+        )
+        MapsRegistry().register(
+            name="test_projection_cache",
+            maps_path=maps_path,
+            maps_labels=labels[::-1],
+            space="MNI",
+            overwrite=True,
+        )
+        assert custom_key != _maps_projection_key(
+            maps="test_projection_cache",
+            space="MNI",
+            target_img=data_img,
+            mask_img=None,
+        )
+    finally:
+        MapsRegistry().deregister("test_projection_cache")
+    # Check on-disk persistence
+    projection = _compute_maps_projection(
+        maps_img=maps_img,
+        labels=[f"map_{i}" for i in range(5)],
+        target_img=data_img,
+    )
+    _save_maps_projection_to_disk(key, projection)
+    assert _get_maps_projection_from_disk(key) is None
+    config.set(key="markers.maps.cache.location", val=str(tmp_path))
+    try:
+        _save_maps_projection_to_disk(key, projection)
+        loaded = _get_maps_projection_from_disk(key)
+    finally:
+        config.delete("markers.maps.cache.location")
+    assert loaded is not None
+    assert loaded["labels"] == projection["labels"]
+    assert_array_equal(loaded["voxels"], projection["voxels"])
+    assert_array_almost_equal(
+        _apply_maps_projection(loaded, data_img),
+        _apply_maps_projection(projection, data_img),
+    )
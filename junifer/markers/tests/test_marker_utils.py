@@ -6,10 +6,13 @@
 #          Synchon Mandal <s.mandal@fz-juelich.de>
 # License: AGPL
 
+from pathlib import Path
+
 import numpy as np
 import pytest
+from numpy.testing import assert_array_almost_equal
 
-from junifer.markers.utils import _ets
+from junifer.markers.utils import _ets, _ets_corr_blockwise
 
 
 def test_ets() -> None:
@@ -48,3 +51,74 @@ def test_ets_incorrect_label_list() -> None:
         ValueError, match="List of roi names does not correspond"
     ):
         _ets(bold_ts, roi_labels)
+
+
+@pytest.mark.parametrize(
+    "block_size, dtype",
+    [(1, "float64"), (7, "float64"), (100, "float64"), (4, "float32")],
+)
+def test_ets_corr_blockwise(block_size: int, dtype: str) -> None:
+    """Test blockwise edge-wise time series correlation.
+
+    Parameters
+    ----------
+    block_size : int
+        The parametrized block size.
+    dtype : str
+        The parametrized output data type.
+
+    """
+    rng = np.random.default_rng(42)
+    bold_ts = rng.standard_normal((50, 6))
+    edge_ts, _ = _ets(bold_ts)
+    expected = np.corrcoef(edge_ts.T)
+
+    corr = _ets_corr_blockwise(bold_ts, block_size=block_size, dtype=dtype)
+    assert corr.dtype == np.dtype(dtype)
+    assert corr.shape == expected.shape
+    assert_array_almost_equal(corr, expected, decimal=5)
+
+    # Only lower triangle
+    corr_lower = _ets_corr_blockwise(
+        bold_ts, block_size=block_size, dtype=dtype, lower_triangle_only=True
+    )
+    lower_idx = np.tril_indices_from(expected)
+    assert_array_almost_equal(
+        corr_lower[lower_idx], expected[lower_idx], decimal=5
+    )
+
+
+def test_ets_corr_blockwise_memmap(tmp_path: Path) -> None:
+    """Test blockwise edge-wise time series correlation to memmap.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+
+    """
+    rng = np.random.default_rng(42)
+    bold_ts = rng.standard_normal((30, 5))
+    edge_ts, _ = _ets(bold_ts)
+    n_edges = edge_ts.shape[1]
+    out = np.memmap(
+        tmp_path / "corr.dat",
+        dtype="float32",
+        mode="w+",
+        shape=(n_edges, n_edges),
+    )
+    corr = _ets_corr_blockwise(bold_ts, block_size=3, out=out)
+    assert corr is out
+    assert_array_almost_equal(
+        np.memmap(
+            tmp_path / "corr.dat", dtype="float32", shape=(n_edges, n_edges)
+        ),
+        np.corrcoef(edge_ts.T),
+        decimal=5,
+    )
+
+    # Wrong shape
+    with pytest.raises(ValueError, match="Expected output of shape"):
+        _ets_corr_blockwise(
+            bold_ts, block_size=3, out=np.zeros((2, 2), dtype="float32")
+        )
@@ -7,7 +7,12 @@
 import pytest
 
 from junifer.datagrabber import DataType
-from junifer.markers import BaseMarker
+from junifer.markers import (
+    BaseMarker,
+    CrossParcellationFC,
+    FunctionalConnectivityParcels,
+    SphereAggregation,
+)
 from junifer.storage import StorageType
 
 
@@ -105,3 +110,66 @@ def test_base_marker_subclassing() -> None:
     # Check output
     assert "BOLD" in output
     assert "T2" not in output
+
+
+def test_base_marker_estimate_cost() -> None:
+    """Test estimating the cost of a marker."""
+
+    class MyBaseMarker(BaseMarker):
+        _MARKER_INOUT_MAPPINGS = {  # noqa: RUF012
+            DataType.BOLD: {
+                "vector": StorageType.Vector,
+                "timeseries": StorageType.Timeseries,
+                "matrix": StorageType.Matrix,
+            },
+            DataType.T1w: {
+                "scalar_table": StorageType.ScalarTable,
+            },
+        }
+
+        n_rois: int | None = None
+
+        def _estimate_n_rois(self, input):
+            return self.n_rois
+
+        def compute(self, input, extra_input):
+            return {}
+
+    input = {
+        "BOLD": {"shape": [4, 5, 3, 10], "dtype": "int16", "size": 100},
+        "T1w": {"shape": [4, 5, 3], "dtype": "float32", "size": 100},
+    }
+    # Features of unknown size
+    assert MyBaseMarker().estimate_cost(input) == {
+        "memory": 2 * 600 * 8,
+        "disk": 0,
+        "output": 0,
+    }
+    # Vector, timeseries and matrix of 7 regions
+    output = (7 + 7 * 10 + 7 * 7) * 8
+    assert MyBaseMarker(n_rois=7).estimate_cost(input) == {
+        "memory": 2 * 600 * 8 + 2 * output,
+        "disk": 0,
+        "output": output,
+    }
+
+
+def test_base_marker_get_pipeline_data() -> None:
+    """Test getting the pipeline data of a marker."""
+    # Declared by the marker and its base class
+    assert FunctionalConnectivityParcels(
+        parcellation="Schaefer100x7", masks="compute_brain_mask"
+    ).get_pipeline_data() == [
+        ("mask", ["compute_brain_mask"]),
+        ("parcellation", ["Schaefer100x7"]),
+    ]
+    # Unset attributes are skipped
+    assert SphereAggregation(
+        coords="DMNBuckner", method="mean"
+    ).get_pipeline_data() == [("coordinates", "DMNBuckner")]
+    assert CrossParcellationFC(
+        parcellation_one="Schaefer100x7", parcellation_two="Schaefer200x7"
+    ).get_pipeline_data() == [
+        ("parcellation", "Schaefer100x7"),
+        ("parcellation", "Schaefer200x7"),
+    ]
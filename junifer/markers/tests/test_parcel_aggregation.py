@@ -19,7 +19,14 @@ from scipy.stats import trim_mean
 from junifer.data import MaskRegistry, ParcellationRegistry
 from junifer.datagrabber import DataType
 from junifer.datareader import DefaultDataReader
-from junifer.markers.parcel_aggregation import ParcelAggregation
+from junifer.markers.parcel_aggregation import (
+    _PARCEL_INDICES_CACHE,
+    ParcelAggregation,
+    _compute_parcel_indices,
+    _extract_parcel_signals,
+    _get_parcel_extraction,
+)
+from junifer.stats import get_aggfunc_by_name
 from junifer.storage import SQLiteFeatureStorage, StorageType, Upsert
 from junifer.testing.datagrabbers import PartlyCloudyTestingDataGrabber
 
@@ -806,3 +813,160 @@ def test_ParcelAggregation_warning() -> None:
                 ..., 0:1
             ]
             marker.fit_transform(element_data)
+
+
+@pytest.mark.parametrize(
+    "dtype, order",
+    [
+        (np.float64, "C"),
+        (np.float32, "F"),
+        (np.int16, "F"),
+    ],
+)
+@pytest.mark.parametrize("use_mask", [True, False])
+@pytest.mark.parametrize("n_scans", [None, 5])
+def test_parcel_indices_equals_nilearn(
+    dtype: type, order: str, use_mask: bool, n_scans: int | None
+) -> None:
+    """Test parcel extraction using indices against NiftiMasker.
+
+    Parameters
+    ----------
+    dtype : type
+        The parametrized data type of the image.
+    order : str
+        The parametrized memory order of the image.
+    use_mask : bool
+        The parametrized flag for using a mask.
+    n_scans : int or None
+        The parametrized number of scans; None for 3D input.
+
+    """
+    rng = np.random.default_rng(42)
+    affine = np.diag([2.0, 2.0, 2.0, 1.0])
+    shape = (10, 11, 9)
+    parcellation_img = nib.Nifti1Image(
+        rng.integers(0, 6, shape).astype(np.float32), affine
+    )
+    # Parcel 6 has no voxels
+    labels = {i: f"parcel_{i}" for i in range(1, 7)}
+    data_shape = shape if n_scans is None else (*shape, n_scans)
+    data_img = nib.Nifti1Image(
+        np.asarray(
+            rng.standard_normal(data_shape) * 100, dtype=dtype, order=order
+        ),
+        affine,
+    )
+    parcellation_bin = math_img("np.squeeze(img) != 0", img=parcellation_img)
+    mask_img = None
+    if use_mask:
+        mask_img = nib.Nifti1Image(
+            (rng.random(shape) > 0.3).astype(np.int8), affine
+        )
+        parcellation_bin = math_img(
+            "np.logical_and(img, np.squeeze(mask))",
+            img=parcellation_bin,
+            mask=mask_img,
+        )
+    masker = NiftiMasker(parcellation_bin, target_affine=affine)
+    data = masker.fit_transform(data_img)
+    parcellation_values = np.squeeze(
+        masker.transform(parcellation_img)
+    ).astype(int)
+    agg_func = get_aggfunc_by_name(name="std", func_params=None)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        expected = np.array(
+            [
+                agg_func(data[:, parcellation_values == t_v], axis=-1)
+                for t_v in labels
+            ]
+        ).T
+        parcel_indices = _compute_parcel_indices(
+            parcellation_img=parcellation_img,
+            labels=labels,
+            target_img=data_img,
+            mask_img=mask_img,
+        )
+        extraction = _get_parcel_extraction(data_img)
+        out = _extract_parcel_signals(
+            extraction=extraction,
+            parcel_indices=parcel_indices,
+            agg_func=agg_func,
+        )
+    # Voxel matrix is a view of the image data
+    assert np.shares_memory(extraction["matrix"], data_img.dataobj)
+    assert parcel_indices["labels"] == list(labels.values())
+    assert out.dtype == expected.dtype
+    assert out.shape == expected.shape
+    assert_array_almost_equal(out, expected, decimal=4)
+
+
+def test_ParcelAggregation_shared_extraction(tmp_path: Path) -> None:
+    """Test ParcelAggregation sharing extraction across markers.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+
+    """
+    rng = np.random.default_rng(42)
+    affine = np.diag([2.0, 2.0, 2.0, 1.0])
+    shape = (10, 11, 9)
+    for i, n_parcels in enumerate([4, 8]):
+        parcellation_path = tmp_path / f"parcellation{i}.nii.gz"
+        nib.save(
+            nib.Nifti1Image(
+                rng.integers(0, n_parcels + 1, shape).astype(np.int16),
+                affine,
+            ),
+            parcellation_path,
+        )
+        ParcellationRegistry().register(
+            name=f"shared_parcellation{i}",
+            parcellation_path=parcellation_path,
+            parcels_labels=[f"parcel_{j}" for j in range(n_parcels)],
+            space="MNI152NLin2009cAsym",
+            overwrite=True,
+        )
+    input = {
+        "data": nib.Nifti1Image(rng.standard_normal((*shape, 6)), affine),
+        "space": "MNI152NLin2009cAsym",
+    }
+    markers = [
+        ParcelAggregation(
+            parcellation=f"shared_parcellation{i}",
+            method="mean",
+            on=DataType.BOLD,
+        )
+        for i in range(2)
+    ]
+    out = [marker.compute(input)["aggregation"] for marker in markers]
+    assert out[0]["data"].shape == (6, 4)
+    assert out[1]["data"].shape == (6, 8)
+    # Each parcellation is extracted once for the image
+    extraction = _get_parcel_extraction(input["data"])
+    assert len(extraction["signals"]) == 2
+    # Modifying the output does not modify the shared signals
+    out[0]["data"][:] = 0
+    again = markers[0].compute(input)["aggregation"]
+    assert not np.all(again["data"] == 0)
+    assert again["col_names"] == out[0]["col_names"]
+    # Re-registering a parcellation invalidates its indices
+    n_cached = len(_PARCEL_INDICES_CACHE)
+    parcellation_path = tmp_path / "parcellation2.nii.gz"
+    nib.save(
+        nib.Nifti1Image(rng.integers(0, 3, shape).astype(np.int16), affine),
+        parcellation_path,
+    )
+    ParcellationRegistry().register(
+        name="shared_parcellation0",
+        parcellation_path=parcellation_path,
+        parcels_labels=["parcel_0", "parcel_1"],
+        space="MNI152NLin2009cAsym",
+        overwrite=True,
+    )
+    out = markers[0].compute(input)["aggregation"]
+    assert out["data"].shape == (6, 2)
+    assert len(_PARCEL_INDICES_CACHE) == n_cached + 1
@@ -71,12 +71,118 @@ def _ets(
                 "List of roi names does not correspond "
                 "to the number of ROIs in the timeseries!"
             )
-        _roi_names = np.array(roi_names)
-        edge_names = [
-            "~".join([x, y])
-            for x, y in zip(_roi_names[u], _roi_names[v], strict=False)
-        ]
-        return ets, edge_names
+        return ets, _edge_names(roi_names)
+
+
+def _edge_names(roi_names: list[str]) -> list[str]:
+    """Get the edge labels for the edge-wise time series.
+
+    Parameters
+    ----------
+    roi_names : List[str]
+        List containing the names of the ROIs.
+
+    Returns
+    -------
+    List[str]
+        List of edge names in the order of the columns of the edge-wise
+        time series.
+
+    """
+    # indices of unique edges (lower triangle)
+    u, v = np.tril_indices(len(roi_names), k=-1)
+    _roi_names = np.array(roi_names)
+    return [
+        "~".join([x, y])
+        for x, y in zip(_roi_names[u], _roi_names[v], strict=False)
+    ]
+
+
+def _ets_corr_blockwise(
+    bold_ts: np.ndarray,
+    block_size: int,
+    lower_triangle_only: bool = False,
+    dtype: str = "float64",
+    out: np.ndarray | None = None,
+) -> np.ndarray:
+    """Compute the edge-wise time series correlation matrix blockwise.
+
+    The edge-wise time series (see :func:`_ets`) are never materialized as a
+    whole. Instead, blocks of ``block_size`` edges are computed on the fly
+    from ``bold_ts``, standardized and correlated tile by tile, so that the
+    peak memory besides the output is bounded by ``block_size``.
+
+    Parameters
+    ----------
+    bold_ts : np.ndarray
+        BOLD time series (time x ROIs).
+    block_size : int
+        The number of edges per block.
+    lower_triangle_only : bool, optional
+        If True, only the tiles on and below the diagonal are computed and
+        the upper triangle of the output is left untouched (default False).
+    dtype : str, optional
+        The data type of the output (default "float64").
+    out : np.ndarray or None, optional
+        The array to write the output to, for example a
+        :class:`numpy.memmap`. It should have the shape
+        ``(n_edges, n_edges)``. If None, a new array is allocated
+        (default None).
+
+    Returns
+    -------
+    np.ndarray
+        The Pearson correlation matrix of the edge-wise time series
+        (edges x edges).
+
+    Raises
+    ------
+    ValueError
+        If ``out`` has the wrong shape.
+
+    """
+    # Compute the z-score for each brain region's timeseries
+    timeseries = zscore(bold_ts)
+    # Get the number of ROIs
+    _, n_roi = timeseries.shape
+    # indices of unique edges (lower triangle)
+    u, v = np.tril_indices(n_roi, k=-1)
+    n_edges = len(u)
+    if out is None:
+        out = np.zeros((n_edges, n_edges), dtype=dtype)
+    elif out.shape != (n_edges, n_edges):
+        raise_error(
+            f"Expected output of shape {(n_edges, n_edges)}, got {out.shape}."
+        )
+
+    def _standardized_block(start: int, stop: int) -> np.ndarray:
+        """Compute unit-norm, centered ETS for edges in [start, stop)."""
+        block = timeseries[:, u[start:stop]] * timeseries[:, v[start:stop]]
+        block -= block.mean(axis=0)
+        # Zero variance edges lead to NaN, same as in cov_to_corr
+        with np.errstate(divide="ignore", invalid="ignore"):
+            block /= np.linalg.norm(block, axis=0)
+        return block
+
+    for row_start in range(0, n_edges, block_size):
+        row_stop = min(row_start + block_size, n_edges)
+        row_block = _standardized_block(row_start, row_stop)
+        for col_start in range(0, row_start + 1, block_size):
+            col_stop = min(col_start + block_size, n_edges)
+            col_block = (
+                row_block
+                if col_start == row_start
+                else _standardized_block(col_start, col_stop)
+            )
+            tile = row_block.T @ col_block
+            out[row_start:row_stop, col_start:col_stop] = tile
+            if not lower_triangle_only and col_start != row_start:
+                out[col_start:col_stop, row_start:row_stop] = tile.T
+    # Set the diagonal as done by cov_to_corr
+    np.fill_diagonal(out, 1.0)
+    if isinstance(out, np.memmap):
+        out.flush()
+    return out
 
 
 def _correlate_dataframes(
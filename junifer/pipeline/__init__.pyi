@@ -9,6 +9,10 @@ __all__ = [
     "PipelineStepMixin",
     "UpdateMetaMixin",
     "WorkDirManager",
+    "ensure_data_path",
+    "get_data_nbytes",
+    "persist_data_img",
+    "read_data_headers",
 ]
 
 from ._data_object_dumper import (
@@ -21,5 +25,11 @@ from .marker_collection import MarkerCollection
 from .pipeline_component_registry import PipelineComponentRegistry
 from .pipeline_step_mixin import PipelineStepMixin
 from .update_meta_mixin import UpdateMetaMixin
-from .utils import ExtDep
+from .utils import (
+    ExtDep,
+    ensure_data_path,
+    get_data_nbytes,
+    persist_data_img,
+    read_data_headers,
+)
 from .workdir_manager import WorkDirManager
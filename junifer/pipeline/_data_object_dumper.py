@@ -3,6 +3,10 @@
 # Authors: Synchon Mandal <s.mandal@fz-juelich.de>
 # License: AGPL
 
+import json
+import os
+import shutil
+import uuid
 from abc import ABC, abstractmethod
 from collections.abc import Iterator, MutableMapping
 from copy import deepcopy
@@ -10,9 +14,11 @@ from pathlib import Path
 from typing import Any
 
 import nibabel
+import numpy as np
 import pandas
 
-from ..utils import raise_error, yaml
+from ..utils import logger, raise_error, yaml
+from .workdir_manager import WorkDirManager
 
 
 __all__ = [
@@ -218,8 +224,73 @@ class AssetLoaderDispatcher(MutableMapping):
         pass
 
 
+# Version of the checkpoint format
+_CHECKPOINT_VERSION = 1
+
+
+def _encode_value(obj: Any) -> Any:
+    """Encode a data object value to be JSON serializable.
+
+    Parameters
+    ----------
+    obj : Any
+        The value to encode.
+
+    Returns
+    -------
+    Any
+        The encoded value.
+
+    """
+    if isinstance(obj, dict):
+        return {str(k): _encode_value(v) for k, v in obj.items()}
+    if isinstance(obj, list | tuple):
+        return [_encode_value(x) for x in obj]
+    if isinstance(obj, set | frozenset):
+        return {"__set__": [_encode_value(x) for x in sorted(obj, key=str)]}
+    if isinstance(obj, Path):
+        return {"__path__": str(obj)}
+    if isinstance(obj, np.generic):
+        return obj.item()
+    return obj
+
+
+def _decode_value(obj: Any) -> Any:
+    """Decode a data object value encoded by :func:`_encode_value`.
+
+    Parameters
+    ----------
+    obj : Any
+        The value to decode.
+
+    Returns
+    -------
+    Any
+        The decoded value.
+
+    """
+    if isinstance(obj, dict):
+        if len(obj) == 1 and "__set__" in obj:
+            return {_decode_value(x) for x in obj["__set__"]}
+        if len(obj) == 1 and "__path__" in obj:
+            return Path(obj["__path__"])
+        return {k: _decode_value(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_decode_value(x) for x in obj]
+    return obj
+
+
 class DataObjectDumper:
-    """Class for pipeline data object dumping."""
+    """Class for pipeline data object dumping.
+
+    Besides the human-readable dump via :meth:`dump`, the data object can be
+    saved as a checkpoint via :meth:`checkpoint`. A checkpoint stores the
+    images and confounds as uncompressed NumPy arrays which are
+    memory-mapped by :meth:`load_checkpoint`, next to a JSON manifest
+    holding the rest of the data object and the hash of the configuration
+    which produced it.
+
+    """
 
     _instance = None
 
@@ -345,3 +416,312 @@ class DataObjectDumper:
                         data[k][kk]["data"] = loader.load(pp)
 
         return data
+
+    def checkpoint(
+        self,
+        data: dict,
+        path: Path,
+        step: str,
+        config_hash: str,
+        overwrite: bool = True,
+    ) -> Path:
+        """Save data object as a checkpoint at path.
+
+        The checkpoint is written to a temporary directory which replaces
+        the one of a previous checkpoint for ``step`` once complete, so
+        that an interrupted write never leaves a checkpoint which seems
+        valid.
+
+        Parameters
+        ----------
+        data : dict
+            The data object state to save.
+        path : pathlib.Path
+            The path to save the checkpoint to.
+        step : str
+            The step name. Also sets the checkpoint directory.
+        config_hash : str
+            The hash of the configuration which produced ``data``.
+        overwrite : bool, optional
+            Whether to replace an existing checkpoint for ``step``. If False,
+            the existing checkpoint, for example, written concurrently by
+            another process, is kept (default True).
+
+        Returns
+        -------
+        pathlib.Path
+            The path to the checkpoint directory.
+
+        Raises
+        ------
+        TypeError
+            If ``data`` has a value which cannot be saved.
+
+        """
+        checkpoint_dir = path / step
+        if not overwrite and checkpoint_dir.exists():
+            logger.debug(f"Keeping existing checkpoint at {checkpoint_dir}")
+            return checkpoint_dir
+        tmp_dir = path / f".{step}.tmp-{uuid.uuid1()}"
+        tmp_dir.mkdir(parents=True)
+        try:
+            files: dict[str, int] = {}
+            manifest = {
+                "version": _CHECKPOINT_VERSION,
+                "step": step,
+                "hash": config_hash,
+                "data": self._save_arrays(data, tmp_dir, "", files),
+                "files": files,
+            }
+            with (tmp_dir / "manifest.json").open("w") as f:
+                json.dump(manifest, f)
+            if overwrite and checkpoint_dir.exists():
+                shutil.rmtree(checkpoint_dir)
+            try:
+                os.replace(tmp_dir, checkpoint_dir)
+            except OSError:
+                # Another process wrote the checkpoint in the meantime
+                if overwrite or not checkpoint_dir.exists():
+                    raise
+        finally:
+            if tmp_dir.exists():
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+        logger.debug(f"Saved checkpoint at {checkpoint_dir}")
+        return checkpoint_dir
+
+    def _save_arrays(
+        self, obj: Any, path: Path, name: str, files: dict[str, int]
+    ) -> Any:
+        """Save images and dataframes of data object as arrays.
+
+        Parameters
+        ----------
+        obj : Any
+            The data object or a value of it.
+        path : pathlib.Path
+            The checkpoint directory.
+        name : str
+            The name of ``obj`` in the data object.
+        files : dict
+            The saved files and their sizes; updated in-place.
+
+        Returns
+        -------
+        Any
+            The encoded value with references to the saved arrays.
+
+        Raises
+        ------
+        TypeError
+            If ``obj`` has a ``data`` value which cannot be saved.
+
+        """
+        if isinstance(obj, list):
+            return [
+                self._save_arrays(x, path, f"{name}_{idx}", files)
+                for idx, x in enumerate(obj)
+            ]
+        if not isinstance(obj, dict):
+            return _encode_value(obj)
+        out = {}
+        for k, v in obj.items():
+            if k == "meta":
+                out[k] = _encode_value(v)
+            elif k == "data" and v is not None:
+                out[k] = self._save_data(v, path, name, files)
+            else:
+                out[k] = self._save_arrays(
+                    v, path, f"{name}_{k}" if name else k, files
+                )
+        return out
+
+    def _save_data(
+        self, data: Any, path: Path, name: str, files: dict[str, int]
+    ) -> dict:
+        """Save an image or dataframe as array.
+
+        Parameters
+        ----------
+        data : nibabel.nifti1.Nifti1Image or pandas.DataFrame
+            The data to save.
+        path : pathlib.Path
+            The checkpoint directory.
+        name : str
+            The file name to use without extension.
+        files : dict
+            The saved files and their sizes; updated in-place.
+
+        Returns
+        -------
+        dict
+            The reference to the saved array.
+
+        Raises
+        ------
+        TypeError
+            If ``data`` cannot be saved.
+
+        """
+        if type(data) is nibabel.Nifti1Image:
+            np.save(path / f"{name}.npy", np.asanyarray(data.dataobj))
+            (path / f"{name}.hdr").write_bytes(data.header.binaryblock)
+            files[f"{name}.npy"] = (path / f"{name}.npy").stat().st_size
+            files[f"{name}.hdr"] = (path / f"{name}.hdr").stat().st_size
+            return {
+                "__nifti__": name,
+                "affine": np.asarray(data.affine).tolist(),
+            }
+        if isinstance(data, pandas.DataFrame):
+            dtypes = set(data.dtypes)
+            if len(dtypes) == 1 and pandas.api.types.is_numeric_dtype(
+                dtypes.pop()
+            ):
+                np.save(path / f"{name}.npy", data.to_numpy())
+                files[f"{name}.npy"] = (path / f"{name}.npy").stat().st_size
+                return {
+                    "__dataframe__": name,
+                    "columns": _encode_value(data.columns.tolist()),
+                    "index": _encode_value(data.index.tolist()),
+                }
+            # Mixed or non-numeric dtypes cannot be stored as a single array
+            data.to_pickle(path / f"{name}.pkl", compression=None)
+            files[f"{name}.pkl"] = (path / f"{name}.pkl").stat().st_size
+            return {"__pickle__": name}
+        raise_error(
+            msg=f"Cannot save data of type {type(data)} as checkpoint",
+            klass=TypeError,
+        )
+
+    def load_checkpoint(
+        self,
+        path: Path,
+        config_hash: str | None = None,
+        mmap: bool = True,
+    ) -> dict | None:
+        """Load data object from checkpoint at path.
+
+        Parameters
+        ----------
+        path : pathlib.Path
+            The path to the checkpoint directory.
+        config_hash : str or None, optional
+            The hash of the configuration to match. If None, the hash is not
+            checked (default None).
+        mmap : bool, optional
+            Whether to memory-map the arrays copy-on-write instead of reading
+            them (default True).
+
+        Returns
+        -------
+        dict or None
+            The restored data object or None if no valid checkpoint is found
+            at ``path``, i.e., it is missing, incomplete, of another format
+            version or does not match ``config_hash``.
+
+        """
+        manifest_path = path / "manifest.json"
+        if not manifest_path.is_file():
+            return None
+        try:
+            with manifest_path.open("r") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            logger.debug(f"Invalid checkpoint manifest at {manifest_path}")
+            return None
+        if manifest.get("version") != _CHECKPOINT_VERSION:
+            logger.debug(f"Checkpoint at {path} has another format version")
+            return None
+        if config_hash is not None and manifest.get("hash") != config_hash:
+            logger.debug(f"Checkpoint at {path} does not match configuration")
+            return None
+        for name, size in manifest["files"].items():
+            file_path = path / name
+            if not file_path.is_file() or file_path.stat().st_size != size:
+                logger.debug(f"Checkpoint at {path} is incomplete")
+                return None
+        return self._load_arrays(
+            manifest["data"], path, mmap_mode="c" if mmap else None
+        )
+
+    def _load_arrays(self, obj: Any, path: Path, mmap_mode: str | None) -> Any:
+        """Load images and dataframes of data object from arrays.
+
+        Parameters
+        ----------
+        obj : Any
+            The encoded data object or a value of it.
+        path : pathlib.Path
+            The checkpoint directory.
+        mmap_mode : str or None
+            The memory-map mode for :func:`numpy.load`.
+
+        Returns
+        -------
+        Any
+            The decoded value.
+
+        """
+        if isinstance(obj, list):
+            return [self._load_arrays(x, path, mmap_mode) for x in obj]
+        if not isinstance(obj, dict):
+            return obj
+        if len(obj) == 1 and ("__set__" in obj or "__path__" in obj):
+            return _decode_value(obj)
+        out = {}
+        for k, v in obj.items():
+            if k == "meta":
+                out[k] = _decode_value(v)
+            elif k == "data" and isinstance(v, dict):
+                out[k] = self._load_data(v, path, mmap_mode)
+            else:
+                out[k] = self._load_arrays(v, path, mmap_mode)
+        # Data written lazily or to cleaned up directories needs to be
+        # written again on demand
+        if (
+            isinstance(out.get("path"), Path)
+            and out.get("data") is not None
+            and not out["path"].exists()
+        ):
+            tempdir = WorkDirManager().get_element_tempdir(prefix="checkpoint")
+            out["path"] = tempdir / out["path"].name.removesuffix(".gz")
+        return out
+
+    def _load_data(
+        self, ref: dict, path: Path, mmap_mode: str | None
+    ) -> nibabel.Nifti1Image | pandas.DataFrame:
+        """Load an image or dataframe from array.
+
+        Parameters
+        ----------
+        ref : dict
+            The reference to the saved array.
+        path : pathlib.Path
+            The checkpoint directory.
+        mmap_mode : str or None
+            The memory-map mode for :func:`numpy.load`.
+
+        Returns
+        -------
+        nibabel.nifti1.Nifti1Image or pandas.DataFrame
+            The loaded data.
+
+        """
+        if "__nifti__" in ref:
+            name = ref["__nifti__"]
+            header = nibabel.Nifti1Header(
+                binaryblock=(path / f"{name}.hdr").read_bytes()
+            )
+            return nibabel.Nifti1Image(
+                np.load(path / f"{name}.npy", mmap_mode=mmap_mode),
+                np.array(ref["affine"]),
+                header=header,
+            )
+        if "__dataframe__" in ref:
+            return pandas.DataFrame(
+                np.load(path / f"{ref['__dataframe__']}.npy"),
+                columns=_decode_value(ref["columns"]),
+                index=_decode_value(ref["index"]),
+            )
+        return pandas.read_pickle(
+            path / f"{ref['__pickle__']}.pkl", compression=None
+        )
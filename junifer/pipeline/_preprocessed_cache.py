@@ -0,0 +1,203 @@
+"""Provide class for caching preprocessed data across runs."""
+
+# Authors: Synchon Mandal <s.mandal@fz-juelich.de>
+# License: AGPL
+
+import hashlib
+import json
+import os
+import shutil
+from collections import OrderedDict
+from pathlib import Path
+
+import fasteners
+import structlog
+
+from .._version import __version__
+from ..utils import file_hash
+from ._data_object_dumper import DataObjectDumper, _encode_value
+
+
+__all__ = ["PreprocessedDataCache"]
+
+_log = structlog.get_logger("junifer")
+logger = _log.bind(pkg="pipeline")
+
+# Content hashes of input files by path, size and modification time
+_FILE_HASHES: OrderedDict[tuple, str] = OrderedDict()
+_FILE_HASHES_SIZE = 256
+
+
+def _input_file_hash(path: Path) -> str:
+    """Get the content hash of an input file.
+
+    Parameters
+    ----------
+    path : pathlib.Path
+        The path to the file.
+
+    Returns
+    -------
+    str
+        The MD5 hash of the content of ``path``.
+
+    """
+    stat = path.stat()
+    key = (str(path.resolve()), stat.st_size, stat.st_mtime_ns)
+    if key not in _FILE_HASHES:
+        logger.debug(f"Hashing input file {path}")
+        _FILE_HASHES[key] = file_hash(path)
+        while len(_FILE_HASHES) > _FILE_HASHES_SIZE:
+            _FILE_HASHES.popitem(last=False)
+    _FILE_HASHES.move_to_end(key)
+    return _FILE_HASHES[key]
+
+
+class PreprocessedDataCache:
+    """Class for caching preprocessed data across runs.
+
+    The preprocessed data objects are stored as checkpoints of
+    :class:`.DataObjectDumper` in a directory per cache key under
+    ``location``, so that runs with different configurations but the same
+    preprocessing on the same data can re-use them. Entries are written to a
+    temporary directory and moved in place once complete, so that concurrent
+    writers of the same entry do not interfere. If the cache grows beyond
+    ``size``, the least recently used entries are evicted.
+
+    Parameters
+    ----------
+    location : pathlib.Path
+        The path to the cache directory.
+    size : float or None, optional
+        The maximum size of the cache in gigabytes. If None, entries are not
+        evicted (default None).
+
+    """
+
+    def __init__(self, location: Path, size: float | None = None) -> None:
+        self.location = Path(location)
+        self.size = size
+
+    @staticmethod
+    def get_key(
+        element: dict, input_paths: list[Path], steps: list[dict]
+    ) -> str:
+        """Get the cache key.
+
+        Parameters
+        ----------
+        element : dict
+            The element of the data object.
+        input_paths : list of pathlib.Path
+            The paths of the input of the data object. Files are hashed by
+            content and directories by path.
+        steps : list of dict
+            The class names and parameters of the pipeline steps producing
+            the data object, in order.
+
+        Returns
+        -------
+        str
+            The cache key.
+
+        """
+        inputs = [
+            _input_file_hash(x) if x.is_file() else str(x) for x in input_paths
+        ]
+        return hashlib.md5(
+            json.dumps(
+                _encode_value(
+                    {
+                        "version": __version__,
+                        "element": element,
+                        "inputs": inputs,
+                        "steps": steps,
+                    }
+                ),
+                sort_keys=True,
+                default=str,
+            ).encode("utf-8"),
+            usedforsecurity=False,
+        ).hexdigest()
+
+    def load(self, key: str) -> dict | None:
+        """Load a preprocessed data object.
+
+        Parameters
+        ----------
+        key : str
+            The cache key.
+
+        Returns
+        -------
+        dict or None
+            The data object, with images memory-mapped, or None if not found.
+
+        """
+        entry = self.location / key
+        try:
+            data = DataObjectDumper().load_checkpoint(entry, config_hash=key)
+            if data is not None:
+                # Mark as recently used
+                os.utime(entry / "manifest.json")
+        except (OSError, ValueError, KeyError) as e:
+            # Evicted concurrently or corrupt
+            logger.debug(f"Cannot load cache entry {entry}: {e}")
+            return None
+        if data is None:
+            logger.debug(f"Cache miss for {key}")
+        else:
+            logger.info(f"Using cached preprocessed data at {entry}")
+        return data
+
+    def save(self, data: dict, key: str) -> None:
+        """Save a preprocessed data object and evict old entries.
+
+        Parameters
+        ----------
+        data : dict
+            The data object.
+        key : str
+            The cache key.
+
+        Raises
+        ------
+        TypeError
+            If ``data`` has a value which cannot be saved.
+
+        """
+        DataObjectDumper().checkpoint(
+            data=data,
+            path=self.location,
+            step=key,
+            config_hash=key,
+            overwrite=False,
+        )
+        self.evict()
+
+    def evict(self) -> None:
+        """Evict the least recently used entries beyond the cache size."""
+        if self.size is None:
+            return
+        max_size = int(self.size * 1e9)
+        self.location.mkdir(parents=True, exist_ok=True)
+        with fasteners.InterProcessLock(self.location / ".lock"):
+            entries = []
+            for entry in self.location.iterdir():
+                # Skip lock and entries being written
+                if entry.name.startswith(".") or not entry.is_dir():
+                    continue
+                manifest = entry / "manifest.json"
+                try:
+                    last_used = manifest.stat().st_mtime
+                    size = sum(x.stat().st_size for x in entry.iterdir())
+                except OSError:
+                    continue
+                entries.append((last_used, size, entry))
+            total = sum(x[1] for x in entries)
+            for _, size, entry in sorted(entries, key=lambda x: x[0]):
+                if total <= max_size:
+                    break
+                logger.info(f"Evicting cache entry {entry}")
+                shutil.rmtree(entry, ignore_errors=True)
+                total -= size
@@ -4,15 +4,27 @@
 #          Synchon Mandal <s.mandal@fz-juelich.de>
 # License: AGPL
 
+import hashlib
+import json
 from collections import Counter
+from copy import deepcopy
 from pathlib import Path
+from typing import Any
 
 import structlog
 
+from .._version import __version__
+from ..data import prefetch_data
 from ..datareader import DefaultDataReader
 from ..pipeline import DataObjectDumper, PipelineStepMixin, WorkDirManager
+from ..preprocess import (
+    fused_clean_fit_transform,
+    group_fusable_preprocessors,
+)
 from ..typing import DataGrabberLike, MarkerLike, PreprocessorLike, StorageLike
-from ..utils import config, raise_error
+from ..utils import config, raise_error, warn_with_log
+from ._data_object_dumper import _encode_value
+from ._preprocessed_cache import PreprocessedDataCache, _input_file_hash
 
 
 __all__ = ["MarkerCollection"]
@@ -21,6 +33,80 @@ _log = structlog.get_logger("junifer")
 logger = _log.bind(pkg="pipeline")
 
 
+def _strip_input(obj: Any) -> Any:
+    """Strip data and metadata from the input of a pipeline.
+
+    Parameters
+    ----------
+    obj : Any
+        The input or a value of it.
+
+    Returns
+    -------
+    Any
+        The value without the ``data`` and ``meta`` keys, which are added by
+        the pipeline steps.
+
+    """
+    if isinstance(obj, dict):
+        return {
+            k: _strip_input(v)
+            for k, v in obj.items()
+            if k not in ["data", "meta"]
+        }
+    if isinstance(obj, list):
+        return [_strip_input(x) for x in obj]
+    return obj
+
+
+def _get_element(input: dict[str, dict]) -> dict | None:
+    """Get the element from the input of a pipeline.
+
+    Parameters
+    ----------
+    input : dict
+        The input of the pipeline.
+
+    Returns
+    -------
+    dict or None
+        The element or None if not found in the metadata.
+
+    """
+    for val in input.values():
+        for entry in val if isinstance(val, list) else [val]:
+            if isinstance(entry, dict) and "element" in entry.get("meta", {}):
+                return entry["meta"]["element"]
+    return None
+
+
+def _get_input_paths(obj: Any) -> list[Path]:
+    """Get the paths from the input of a pipeline.
+
+    Parameters
+    ----------
+    obj : Any
+        The input or a value of it.
+
+    Returns
+    -------
+    list of pathlib.Path
+        The paths, in order of appearance.
+
+    """
+    paths = []
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            if k == "path" and isinstance(v, str | Path):
+                paths.append(Path(v))
+            else:
+                paths.extend(_get_input_paths(v))
+    elif isinstance(obj, list):
+        for x in obj:
+            paths.extend(_get_input_paths(x))
+    return paths
+
+
 class MarkerCollection:
     """Class for marker collection.
 
@@ -63,8 +149,16 @@ class MarkerCollection:
         self._datareader = datareader
         self._preprocessors = preprocessors
         self._storage = storage
+        # Data types required by the pipeline; set on validation
+        self._required_types = None
 
-    def fit(self, input: dict[str, dict]) -> dict | None:
+    def fit(
+        self,
+        input: dict[str, dict],
+        read_data: dict[str, dict] | None = None,
+        storage: StorageLike | None = None,
+        markers: list[str] | None = None,
+    ) -> dict | None:
         """Fit the pipeline.
 
         Parameters
@@ -72,6 +166,15 @@ class MarkerCollection:
         input : dict
             The input data to fit the pipeline on. Should be the output of
             indexing the Data Grabber with one element.
+        read_data : dict or None, optional
+            The data already read from ``input`` via the data reader. If
+            None, the data is read when needed (default None).
+        storage : storage-like or None, optional
+            The storage to use instead of the one of the pipeline
+            (default None).
+        markers : list of str or None, optional
+            The names of the markers to compute. If None, all the markers are
+            computed (default None).
 
         Returns
         -------
@@ -80,25 +183,111 @@ class MarkerCollection:
             the values are the computer marker values. If the pipeline has a
             storage configured, then the output will be None.
 
+        Notes
+        -----
+        If ``preprocessing.cache.location`` is set, the preprocessed data is
+        cached by element, content of the input files and configuration of
+        the data reader and preprocessors, and re-used by later runs.
+
+        If ``preprocessing.checkpoint.location`` is set, the preprocessed data
+        is saved as a checkpoint after the last (or with
+        ``preprocessing.checkpoint.granularity="full"``, after every)
+        preprocessing step and the pipeline resumes from the latest checkpoint
+        of the element whose configuration matches.
+
         """
         logger.info("Fitting pipeline")
 
-        # Fetch actual data using datareader
-        data = self._datareader.fit_transform(input)
-        # Conditional data dump
+        # Use cached preprocessed data of an earlier run if possible
+        data = None
+        start = 0
+        cache = None
+        cache_key = None
         if (
-            config.get("preprocessing.dump.location") is not None
-            and config.get("preprocessing.dump.granularity") == "full"
+            config.get("preprocessing.cache.location") is not None
+            and self._preprocessors
         ):
-            DataObjectDumper().dump(
-                data=data,
-                path=Path(config.get("preprocessing.dump.location")),
-                step=f"0_datareader_{self._datareader.__class__.__name__}",
+            cache = PreprocessedDataCache(
+                location=Path(config.get("preprocessing.cache.location")),
+                size=config.get("preprocessing.cache.size"),
+            )
+            cache_key = self._get_cache_key(input)
+            if cache_key is not None:
+                data = cache.load(cache_key)
+                if data is not None:
+                    start = len(self._preprocessors)
+
+        # Resume from checkpoint of the preprocessed data if possible
+        checkpoint_dir = None
+        checkpoint_hashes = []
+        if (
+            data is None
+            and config.get("preprocessing.checkpoint.location") is not None
+            and self._preprocessors
+        ):
+            checkpoint_dir, checkpoint_hashes = self._get_checkpoint_info(
+                input
+            )
+            if checkpoint_dir is not None:
+                data, start = self._load_checkpoint(
+                    checkpoint_dir, checkpoint_hashes
+                )
+
+        if data is None:
+            # Fetch actual data using datareader
+            data = (
+                read_data if read_data is not None else self._read_data(input)
             )
+            # Conditional data dump
+            if (
+                config.get("preprocessing.dump.location") is not None
+                and config.get("preprocessing.dump.granularity") == "full"
+            ):
+                DataObjectDumper().dump(
+                    data=data,
+                    path=Path(config.get("preprocessing.dump.location")),
+                    step=(
+                        f"0_datareader_{self._datareader.__class__.__name__}"
+                    ),
+                )
+        else:
+            # Read data types skipped when the restored data was saved
+            missing = {
+                k: v
+                for k, v in data.items()
+                if isinstance(v, dict) and "path" in v and "data" not in v
+            }
+            if missing:
+                data.update(self._read_data(missing))
 
         # Apply preprocessing steps
         if self._preprocessors is not None:
-            for idx, preprocessor in enumerate(self._preprocessors):
+            # Fuse consecutive cleaning steps unless disabled or every
+            # step's output needs to be dumped
+            if config.get("preprocessing.fuse", True) and not (
+                config.get("preprocessing.dump.location") is not None
+                and config.get("preprocessing.dump.granularity") == "full"
+            ):
+                groups = group_fusable_preprocessors(
+                    self._preprocessors[start:]
+                )
+            else:
+                groups = [[x] for x in self._preprocessors[start:]]
+            idx = start
+            for group in groups:
+                if len(group) > 1:
+                    logger.info(
+                        "Preprocessing data with fused "
+                        f"{[x.__class__.__name__ for x in group]}"
+                    )
+                    # Mutate data after every iteration
+                    data = fused_clean_fit_transform(group, data)
+                    idx += len(group)
+                    self._save_checkpoint(
+                        data, checkpoint_dir, checkpoint_hashes, idx
+                    )
+                    continue
+                preprocessor = group[0]
                 logger.info(
                     "Preprocessing data with "
                     f"{preprocessor.__class__.__name__}"
@@ -118,6 +307,17 @@ class MarkerCollection:
                             f"{preprocessor.__class__.__name__}"
                         ),
                     )
+                idx += 1
+                self._save_checkpoint(
+                    data, checkpoint_dir, checkpoint_hashes, idx
+                )
+
+            # Cache preprocessed data for later runs
+            if cache_key is not None and start < len(self._preprocessors):
+                try:
+                    cache.save(data, cache_key)
+                except (OSError, TypeError) as e:
+                    warn_with_log(f"Cannot cache preprocessed data: {e}")
 
             # Conditional data dump
             if (
@@ -133,19 +333,421 @@ class MarkerCollection:
                     ),
                 )
 
+        # Warp data needed by the markers together
+        if config.get("data.warp.prefetch", True):
+            self._prefetch_data(data)
+
         # Compute markers
+        return self._fit_markers(
+            data, storage if storage is not None else self._storage, markers
+        )
+
+    def _fit_markers(
+        self,
+        data: dict[str, dict],
+        storage: StorageLike | None,
+        markers: list[str] | None = None,
+    ) -> dict | None:
+        """Compute the markers.
+
+        Parameters
+        ----------
+        data : dict
+            The preprocessed Junifer Data object.
+        storage : storage-like or None
+            The storage to use.
+        markers : list of str or None, optional
+            The names of the markers to compute. If None, all the markers are
+            computed (default None).
+
+        Returns
+        -------
+        dict or None
+            The marker values by marker name, or None if ``storage`` is
+            provided.
+
+        """
         out = {}
         for marker in self._markers:
+            if markers is not None and marker.name not in markers:
+                logger.info(f"Skipping marker {marker.name}")
+                continue
             logger.info(f"Fitting marker {marker.name}")
-            m_value = marker.fit_transform(data, storage=self._storage)
-            if self._storage is None:
+            m_value = marker.fit_transform(data, storage=storage)
+            if storage is None:
                 out[marker.name] = m_value
         logger.info("Marker collection fitting done")
 
         # Cleanup element directory
         WorkDirManager().cleanup_elementdir()
 
-        return None if self._storage else out
+        return None if storage else out
+
+    def get_missing_markers(self, input: dict[str, dict]) -> list[str]:
+        """Get the markers whose features are not stored for an element.
+
+        The metadata of the features is built as when fitting, by updating
+        the metadata of ``input`` for the data reader, preprocessors and
+        markers without reading or processing any data, and the MD5 hashes
+        of the metadata are checked against the features stored for the
+        element.
+
+        Parameters
+        ----------
+        input : dict
+            The input data to fit the pipeline on. Should be the output of
+            indexing the Data Grabber with one element, but the data does not
+            need to be fetched.
+
+        Returns
+        -------
+        list of str
+            The names of the markers to compute. If the expected features of
+            a marker cannot be determined, the marker is included.
+
+        """
+        # Imported here to avoid circular import
+        from ..storage.utils import process_meta
+
+        names = [x.name for x in self._markers]
+        if self._storage is None or not isinstance(
+            self._datareader, DefaultDataReader
+        ):
+            return names
+        element = _get_element(input)
+        if element is None:
+            logger.debug("Element not found in input, not checking storage")
+            return names
+        try:
+            stored = self._storage.list_element_features(element)
+        except NotImplementedError:
+            logger.debug(f"Cannot list features of element in {self._storage}")
+            return names
+        if not stored:
+            return names
+        # Update the metadata as the data reader does, without reading
+        data = self._datareader.fit_transform(deepcopy(input), types=[])
+        for preprocessor in self._preprocessors or []:
+            for type_ in preprocessor.on:
+                if type_ in data.keys():
+                    preprocessor.update_meta(data[type_], "preprocess")
+        missing = []
+        for marker in self._markers:
+            if not hasattr(marker, "get_feature_metas"):
+                missing.append(marker.name)
+                continue
+            md5s = {process_meta(x)[0] for x in marker.get_feature_metas(data)}
+            if not md5s.issubset(stored):
+                missing.append(marker.name)
+        return missing
+
+    def _get_checkpoint_info(
+        self, input: dict[str, dict]
+    ) -> tuple[Path | None, list[str]]:
+        """Get the checkpoint directory and hashes for an element.
+
+        The hash of a step covers the junifer version, the element, its
+        input paths and the content of the input files, the data reader and
+        the parameters of the preprocessors up to and including the step, so
+        that a checkpoint is only used if everything it depends on is
+        unchanged.
+
+        Parameters
+        ----------
+        input : dict
+            The input data to fit the pipeline on.
+
+        Returns
+        -------
+        pathlib.Path or None
+            The checkpoint directory for the element or None if the element
+            cannot be determined from ``input``.
+        list of str
+            The configuration hash after each preprocessing step.
+
+        """
+        element = _get_element(input)
+        if element is None:
+            logger.debug("Element not found in input, not checkpointing")
+            return None, []
+        checkpoint_dir = Path(
+            config.get("preprocessing.checkpoint.location")
+        ) / "_".join(["element", *[str(x) for x in element.values()]])
+        stripped_input = _strip_input(input)
+        hasher = hashlib.md5(usedforsecurity=False)
+        hasher.update(
+            json.dumps(
+                _encode_value(
+                    {
+                        "version": __version__,
+                        "element": element,
+                        "input": stripped_input,
+                        # Files are hashed by content (cached by size and
+                        # modification time) so that a changed input at the
+                        # same path does not reuse a stale checkpoint
+                        "input_files": [
+                            _input_file_hash(x)
+                            for x in _get_input_paths(stripped_input)
+                            if x.is_file()
+                        ],
+                        "datareader": {
+                            "class": self._datareader.__class__.__name__,
+                            **(
+                                self._datareader.model_dump(mode="json")
+                                if hasattr(self._datareader, "model_dump")
+                                else {}
+                            ),
+                        },
+                    }
+                ),
+                sort_keys=True,
+                default=str,
+            ).encode("utf-8")
+        )
+        hashes = []
+        for preprocessor in self._preprocessors:
+            hasher.update(
+                json.dumps(
+                    {
+                        "class": preprocessor.__class__.__name__,
+                        **preprocessor.model_dump(mode="json"),
+                    },
+                    sort_keys=True,
+                    default=str,
+                ).encode("utf-8")
+            )
+            hashes.append(hasher.copy().hexdigest())
+        return checkpoint_dir, hashes
+
+    def _read_data(self, input: dict[str, dict]) -> dict[str, dict]:
+        """Read data using the data reader.
+
+        If the pipeline is validated and the data reader is the default
+        one, data types not required by the pipeline are not read.
+
+        Parameters
+        ----------
+        input : dict
+            The input data to read.
+
+        Returns
+        -------
+        dict
+            The Junifer Data object.
+
+        """
+        if self._required_types is not None and isinstance(
+            self._datareader, DefaultDataReader
+        ):
+            return self._datareader.fit_transform(
+                input, types=self._required_types
+            )
+        return self._datareader.fit_transform(input)
+
+    def _get_required_types(self) -> list[str]:
+        """Get the data types required by the pipeline.
+
+        These are the data types the preprocessors and markers work on, the
+        ones the preprocessors require otherwise and the ones masks are
+        computed from.
+
+        Returns
+        -------
+        list of str
+            The data types.
+
+        """
+        types = set()
+        steps = [*(self._preprocessors or []), *self._markers]
+        for step in steps:
+            for attr in ["on", "required_data_types"]:
+                for type_ in getattr(step, attr, None) or []:
+                    types.add(getattr(type_, "value", type_))
+            # Masks computed from the subject's VBM data
+            for mask in getattr(step, "masks", None) or []:
+                if not isinstance(mask, dict):
+                    continue
+                for params in mask.values():
+                    if (
+                        isinstance(params, dict)
+                        and params.get("source") == "subject"
+                    ):
+                        types.add(
+                            f"VBM_{params.get('mask_type', 'brain').upper()}"
+                        )
+        return sorted(types)
+
+    def _get_cache_key(self, input: dict[str, dict]) -> str | None:
+        """Get the key of the preprocessed data cache for an element.
+
+        Parameters
+        ----------
+        input : dict
+            The input data to fit the pipeline on.
+
+        Returns
+        -------
+        str or None
+            The cache key or None if the element cannot be determined from
+            ``input``.
+
+        """
+        element = _get_element(input)
+        if element is None:
+            logger.debug("Element not found in input, not caching")
+            return None
+        steps = [
+            {
+                "class": x.__class__.__name__,
+                **(
+                    x.model_dump(mode="json")
+                    if hasattr(x, "model_dump")
+                    else {}
+                ),
+            }
+            for x in [self._datareader, *self._preprocessors]
+        ]
+        return PreprocessedDataCache.get_key(
+            element=element,
+            input_paths=_get_input_paths(_strip_input(input)),
+            steps=steps,
+        )
+
+    def _get_checkpoint_step(self, idx: int) -> str:
+        """Get the checkpoint step name after ``idx`` preprocessors.
+
+        Parameters
+        ----------
+        idx : int
+            The number of applied preprocessors.
+
+        Returns
+        -------
+        str
+            The step name.
+
+        """
+        return (
+            f"{idx}_preprocessor_"
+            f"{self._preprocessors[idx - 1].__class__.__name__}"
+        )
+
+    def _load_checkpoint(
+        self, checkpoint_dir: Path, hashes: list[str]
+    ) -> tuple[dict | None, int]:
+        """Load the latest valid checkpoint of the preprocessed data.
+
+        Parameters
+        ----------
+        checkpoint_dir : pathlib.Path
+            The checkpoint directory for the element.
+        hashes : list of str
+            The configuration hash after each preprocessing step.
+
+        Returns
+        -------
+        dict or None
+            The restored data object or None if no valid checkpoint is found.
+        int
+            The number of preprocessors already applied to the data object.
+
+        """
+        for idx in range(len(hashes), 0, -1):
+            path = checkpoint_dir / self._get_checkpoint_step(idx)
+            try:
+                data = DataObjectDumper().load_checkpoint(
+                    path, config_hash=hashes[idx - 1]
+                )
+            except (OSError, ValueError, KeyError) as e:
+                warn_with_log(f"Cannot load checkpoint at {path}: {e}")
+                continue
+            if data is not None:
+                logger.info(
+                    f"Resuming from checkpoint after {idx} preprocessing "
+                    f"step(s) at {path}"
+                )
+                return data, idx
+        return None, 0
+
+    def _save_checkpoint(
+        self,
+        data: dict,
+        checkpoint_dir: Path | None,
+        hashes: list[str],
+        idx: int,
+    ) -> None:
+        """Save a checkpoint of the preprocessed data if configured.
+
+        Parameters
+        ----------
+        data : dict
+            The Junifer Data object.
+        checkpoint_dir : pathlib.Path or None
+            The checkpoint directory for the element or None if not
+            checkpointing.
+        hashes : list of str
+            The configuration hash after each preprocessing step.
+        idx : int
+            The number of applied preprocessors.
+
+        """
+        if checkpoint_dir is None:
+            return
+        if config.get(
+            "preprocessing.checkpoint.granularity", "final"
+        ) != "full" and idx != len(hashes):
+            return
+        try:
+            DataObjectDumper().checkpoint(
+                data=data,
+                path=checkpoint_dir,
+                step=self._get_checkpoint_step(idx),
+                config_hash=hashes[idx - 1],
+            )
+        except (OSError, TypeError) as e:
+            # The checkpoint is only an optimization for later runs
+            warn_with_log(f"Cannot save checkpoint: {e}")
+
+    def _prefetch_data(self, data: dict[str, dict]) -> None:
+        """Warp the pipeline data of the markers together.
+
+        The pipeline data is declared by the markers, see
+        :meth:`.BaseMarker.get_pipeline_data`.
+
+        Only data types in native space are considered, as the warps to
+        native space are the ones to be done per element.
+
+        Parameters
+        ----------
+        data : dict
+            The Junifer Data object.
+
+        """
+        requests = []
+        for marker in self._markers:
+            for type_ in marker.on or []:
+                if type_ not in data or not isinstance(data[type_], dict):
+                    continue
+                if data[type_].get("space") != "native":
+                    continue
+                extra_input = {k: v for k, v in data.items() if k != type_}
+                for kind, names in marker.get_pipeline_data():
+                    requests.append(
+                        {
+                            "kind": kind,
+                            "names": names,
+                            "target_data": data[type_],
+                            "extra_input": extra_input,
+                        }
+                    )
+        if not requests:
+            return
+        logger.info(f"Prefetching {len(requests)} data request(s)")
+        try:
+            prefetch_data(requests)
+        except (RuntimeError, ValueError) as e:
+            # Markers will do the warps and raise on their own
+            warn_with_log(f"Prefetching warps failed: {e}")
 
     def validate(self, datagrabber: DataGrabberLike) -> None:
         """Validate the pipeline.
@@ -153,7 +755,8 @@ class MarkerCollection:
         Without doing any computation, check if the marker collection can
         be fitted without problems i.e., the data required for each marker is
         present and streamed down the steps. Also, if a storage is configured,
-        check that the storage can handle the markers' output.
+        check that the storage can handle the markers' output. Data types not
+        required by any step are not read when fitting afterwards.
 
         Parameters
         ----------
@@ -184,6 +787,9 @@ class MarkerCollection:
                 t_data = list(set(old_t_data) | set(new_t_data))
                 logger.info(f"Preprocessor output type: {t_data}")
 
+        self._required_types = self._get_required_types()
+        logger.info(f"Data types required: {self._required_types}")
+
         for marker in self._markers:
             logger.info(f"Validating Marker: {marker.name}")
             # Validate marker
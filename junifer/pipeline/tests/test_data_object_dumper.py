@@ -7,7 +7,10 @@ import pickle
 from pathlib import Path
 
 import nibabel
+import numpy as np
+import pandas as pd
 import pytest
+from numpy.testing import assert_array_equal
 
 from junifer.markers import FunctionalConnectivitySpheres
 from junifer.pipeline import (
@@ -16,6 +19,7 @@ from junifer.pipeline import (
     BaseDataDumpAsset,
     DataObjectDumper,
     MarkerCollection,
+    WorkDirManager,
 )
 from junifer.preprocess import fMRIPrepConfoundRemover
 from junifer.testing.datagrabbers import PartlyCloudyTestingDataGrabber
@@ -222,3 +226,115 @@ def test_data_object_dumper_with_warp(tmp_path: Path) -> None:
     )
     dump_load = DataObjectDumper().load(tmp_path / "warp_test" / "data.yaml")
     assert "Warp" in dump_load
+
+
+def test_data_object_dumper_checkpoint(tmp_path: Path) -> None:
+    """Test data object dumper checkpoint.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+
+    """
+    WorkDirManager().workdir = tmp_path / "workdir"
+    bold_img = nibabel.Nifti1Image(
+        np.arange(120, dtype=np.float32).reshape(2, 3, 4, 5),
+        np.diag([2.0, 2.0, 2.0, 1.0]),
+    )
+    bold_path = tmp_path / "bold.nii.gz"
+    nibabel.save(bold_img, bold_path)
+    confounds = pd.DataFrame(
+        {"a": np.arange(5.0), "b": np.arange(5.0)}, index=list("vwxyz")
+    )
+    data = {
+        "BOLD": {
+            "path": bold_path,
+            "data": bold_img,
+            "space": "MNI152NLin6Asym",
+            "confounds": {
+                "path": tmp_path / "confounds.tsv",
+                "data": confounds,
+                "format": "fmriprep",
+            },
+            "mask": {"path": tmp_path / "mask.nii.gz"},
+            "meta": {
+                "element": {"subject": "sub-01"},
+                "dependencies": {"nilearn", "numpy"},
+            },
+        },
+        "Warp": [
+            {
+                "path": tmp_path / "xfm.h5",
+                "src": "MNI152NLin6Asym",
+                "dst": "native",
+                "warper": "ants",
+            },
+        ],
+    }
+    checkpoint_dir = DataObjectDumper().checkpoint(
+        data=data, path=tmp_path / "checkpoint", step="1_test", config_hash="a"
+    )
+    assert checkpoint_dir == tmp_path / "checkpoint" / "1_test"
+
+    loaded = DataObjectDumper().load_checkpoint(checkpoint_dir, "a")
+    assert loaded is not None
+    loaded_img = loaded["BOLD"]["data"]
+    assert isinstance(np.asanyarray(loaded_img.dataobj), np.memmap)
+    assert_array_equal(loaded_img.get_fdata(), bold_img.get_fdata())
+    assert_array_equal(loaded_img.affine, bold_img.affine)
+    assert loaded["BOLD"]["path"] == bold_path
+    pd.testing.assert_frame_equal(
+        loaded["BOLD"]["confounds"]["data"], confounds
+    )
+    # Confounds file was never written, so it needs to be written on demand
+    assert loaded["BOLD"]["confounds"]["path"].name == "confounds.tsv"
+    assert loaded["BOLD"]["confounds"]["path"].parent != tmp_path
+    assert loaded["BOLD"]["mask"] == {"path": tmp_path / "mask.nii.gz"}
+    assert loaded["BOLD"]["meta"] == data["BOLD"]["meta"]
+    assert loaded["Warp"] == data["Warp"]
+
+    # Copy-on-write arrays
+    np.asanyarray(loaded_img.dataobj)[0, 0, 0, 0] = -1
+    loaded = DataObjectDumper().load_checkpoint(checkpoint_dir, mmap=False)
+    assert loaded is not None
+    assert loaded["BOLD"]["data"].get_fdata()[0, 0, 0, 0] == 0
+
+    # Mismatching configuration
+    assert DataObjectDumper().load_checkpoint(checkpoint_dir, "b") is None
+    # Missing checkpoint
+    assert (
+        DataObjectDumper().load_checkpoint(tmp_path / "checkpoint" / "2_test")
+        is None
+    )
+    # Incomplete checkpoint
+    with (checkpoint_dir / "BOLD.npy").open("r+b") as f:
+        f.truncate(100)
+    assert DataObjectDumper().load_checkpoint(checkpoint_dir, "a") is None
+
+    # Mixed dtypes
+    mixed = pd.DataFrame({"a": np.arange(3.0), "b": ["x", "y", "z"]})
+    checkpoint_dir = DataObjectDumper().checkpoint(
+        data={"BOLD": {"path": bold_path, "data": mixed}},
+        path=tmp_path / "checkpoint",
+        step="2_test",
+        config_hash="a",
+    )
+    loaded = DataObjectDumper().load_checkpoint(checkpoint_dir, "a")
+    assert loaded is not None
+    pd.testing.assert_frame_equal(loaded["BOLD"]["data"], mixed)
+
+    # Unsupported data
+    with pytest.raises(TypeError, match="Cannot save data"):
+        DataObjectDumper().checkpoint(
+            data={"BOLD": {"path": bold_path, "data": np.ones(3)}},
+            path=tmp_path / "checkpoint",
+            step="1_test",
+            config_hash="a",
+        )
+    # Failed checkpoint leaves existing one untouched
+    assert sorted(x.name for x in (tmp_path / "checkpoint").iterdir()) == [
+        "1_test",
+        "2_test",
+    ]
+    WorkDirManager().cleanup_elementdir()
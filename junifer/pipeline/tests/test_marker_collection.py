@@ -5,21 +5,37 @@
 # License: AGPL
 
 from pathlib import Path
+from typing import Any, ClassVar
 
+import nibabel as nib
+import numpy as np
 import pytest
 from numpy.testing import assert_array_equal
+from pydantic import BaseModel
 
+from junifer.datagrabber import DataType, PatternDataGrabber
 from junifer.datareader.default import DefaultDataReader
 from junifer.markers import (
+    BaseMarker,
     FunctionalConnectivityParcels,
     ParcelAggregation,
+    TemporalSNRSpheres,
 )
-from junifer.pipeline import MarkerCollection, PipelineStepMixin
-from junifer.preprocess import fMRIPrepConfoundRemover
-from junifer.storage import SQLiteFeatureStorage
+from junifer.pipeline import (
+    MarkerCollection,
+    PipelineStepMixin,
+    WorkDirManager,
+)
+from junifer.preprocess import (
+    Smoothing,
+    SpaceWarper,
+    fMRIPrepConfoundRemover,
+)
+from junifer.storage import SQLiteFeatureStorage, StorageType
 from junifer.testing.datagrabbers import (
     PartlyCloudyTestingDataGrabber,
 )
+from junifer.utils import config
 
 
 def test_marker_collection_incorrect_markers() -> None:
@@ -219,3 +235,379 @@ def test_marker_collection_storage(tmp_path: Path) -> None:
     t_data = out[fname]["BOLD"]["aggregation"]["data"]  # type: ignore
     cols = out[fname]["BOLD"]["aggregation"]["col_names"]  # type: ignore
     assert_array_equal(t_feature[cols].values, t_data)  # type: ignore
+
+
+class _AddPreprocessor(BaseModel):
+    """Preprocessor adding a value to the BOLD data and counting calls."""
+
+    calls: ClassVar[list[float]] = []
+    value: float
+
+    def fit_transform(self, input: dict[str, Any]) -> dict[str, Any]:
+        self.calls.append(self.value)
+        img = input["BOLD"]["data"]
+        input["BOLD"]["data"] = nib.Nifti1Image(
+            img.get_fdata() + self.value, img.affine
+        )
+        return input
+
+
+class _SumMarker:
+    """Marker summing the BOLD data."""
+
+    name = "sum"
+    on: ClassVar[list[str]] = ["BOLD"]
+
+    def fit_transform(self, input: dict[str, Any], storage: Any) -> float:
+        return float(input["BOLD"]["data"].get_fdata().sum())
+
+
+class _ReadTypesMarker:
+    """Marker listing the data types with data."""
+
+    name = "read_types"
+    on: ClassVar[list[str]] = ["T1w"]
+
+    def fit_transform(self, input: dict[str, Any], storage: Any) -> list[str]:
+        return sorted(k for k, v in input.items() if "data" in v)
+
+
+@pytest.mark.parametrize("granularity", ["full", "final"])
+def test_marker_collection_checkpoint(
+    tmp_path: Path, granularity: str
+) -> None:
+    """Test MarkerCollection resuming from checkpoints.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+    granularity : str
+        The parametrized checkpoint granularity.
+
+    """
+    WorkDirManager().workdir = tmp_path / "workdir"
+    bold_path = tmp_path / "bold.nii.gz"
+    nib.save(
+        nib.Nifti1Image(np.ones((4, 5, 3, 6), dtype=np.float32), np.eye(4)),
+        bold_path,
+    )
+    input = {
+        "BOLD": {
+            "path": bold_path,
+            "space": "MNI152NLin6Asym",
+            "meta": {"element": {"subject": "sub-01"}},
+        }
+    }
+    config.set(
+        key="preprocessing.checkpoint.location", val=tmp_path / "checkpoint"
+    )
+    config.set(key="preprocessing.checkpoint.granularity", val=granularity)
+    _AddPreprocessor.calls.clear()
+
+    mc = MarkerCollection(
+        markers=[_SumMarker()],  # type: ignore
+        preprocessors=[
+            _AddPreprocessor(value=1.0),  # type: ignore
+            _AddPreprocessor(value=2.0),  # type: ignore
+        ],
+    )
+    out = mc.fit(input)
+    assert out == {"sum": 4 * 360.0}
+    assert _AddPreprocessor.calls == [1.0, 2.0]
+    checkpoint_dir = tmp_path / "checkpoint" / "element_sub-01"
+    expected_steps = ["2_preprocessor__AddPreprocessor"]
+    if granularity == "full":
+        expected_steps.insert(0, "1_preprocessor__AddPreprocessor")
+    assert sorted(x.name for x in checkpoint_dir.iterdir()) == expected_steps
+
+    # Same configuration resumes after preprocessing
+    assert mc.fit(input) == out
+    assert _AddPreprocessor.calls == [1.0, 2.0]
+
+    # Changed configuration resumes from the matching steps
+    mc = MarkerCollection(
+        markers=[_SumMarker()],  # type: ignore
+        preprocessors=[
+            _AddPreprocessor(value=1.0),  # type: ignore
+            _AddPreprocessor(value=3.0),  # type: ignore
+        ],
+    )
+    assert mc.fit(input) == {"sum": 5 * 360.0}
+    if granularity == "full":
+        assert _AddPreprocessor.calls == [1.0, 2.0, 3.0]
+    else:
+        assert _AddPreprocessor.calls == [1.0, 2.0, 1.0, 3.0]
+
+    # Changed input file at the same path does not resume
+    _AddPreprocessor.calls.clear()
+    nib.save(
+        nib.Nifti1Image(np.full((4, 5, 3, 6), 2, dtype=np.float32), np.eye(4)),
+        bold_path,
+    )
+    assert mc.fit(input) == {"sum": 6 * 360.0}
+    assert _AddPreprocessor.calls == [1.0, 3.0]
+
+    config.delete("preprocessing.checkpoint.location")
+    config.delete("preprocessing.checkpoint.granularity")
+
+
+def test_marker_collection_cache(tmp_path: Path) -> None:
+    """Test MarkerCollection with preprocessed data cache.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+
+    """
+    WorkDirManager().workdir = tmp_path / "workdir"
+    inputs = []
+    for name in ["a", "b"]:
+        (tmp_path / name).mkdir()
+        bold_path = tmp_path / name / "bold.nii.gz"
+        nib.save(
+            nib.Nifti1Image(
+                np.ones((4, 5, 3, 6), dtype=np.float32), np.eye(4)
+            ),
+            bold_path,
+        )
+        inputs.append(
+            {
+                "BOLD": {
+                    "path": bold_path,
+                    "space": "MNI152NLin6Asym",
+                    "meta": {"element": {"subject": "sub-01"}},
+                }
+            }
+        )
+    config.set(key="preprocessing.cache.location", val=tmp_path / "cache")
+    _AddPreprocessor.calls.clear()
+
+    mc = MarkerCollection(
+        markers=[_SumMarker()],  # type: ignore
+        preprocessors=[_AddPreprocessor(value=1.0)],  # type: ignore
+    )
+    assert mc.fit(inputs[0]) == {"sum": 2 * 360.0}
+    assert _AddPreprocessor.calls == [1.0]
+    # Same input content at another location re-uses the cached data
+    assert mc.fit(inputs[1]) == {"sum": 2 * 360.0}
+    assert _AddPreprocessor.calls == [1.0]
+    # Different preprocessing
+    mc = MarkerCollection(
+        markers=[_SumMarker()],  # type: ignore
+        preprocessors=[_AddPreprocessor(value=2.0)],  # type: ignore
+    )
+    assert mc.fit(inputs[0]) == {"sum": 3 * 360.0}
+    assert _AddPreprocessor.calls == [1.0, 2.0]
+    assert len(list((tmp_path / "cache").iterdir())) == 2
+
+    config.delete("preprocessing.cache.location")
+
+
+def test_marker_collection_required_types(tmp_path: Path) -> None:
+    """Test MarkerCollection reading only required data types.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+
+    """
+    mc = MarkerCollection(
+        markers=[
+            ParcelAggregation(
+                parcellation="Schaefer100x7",
+                method="mean",
+                on="BOLD",
+                masks=[
+                    {
+                        "compute_brain_mask": {
+                            "source": "subject",
+                            "mask_type": "gm",
+                        }
+                    }
+                ],
+                name="parcel",
+            ),
+            TemporalSNRSpheres(coords="DMNBuckner", radius=5.0, name="tsnr"),
+        ],
+        preprocessors=[
+            SpaceWarper(using="ants", reference="T1w", on="BOLD"),
+        ],
+    )
+    assert mc._get_required_types() == ["BOLD", "T1w", "VBM_GM", "Warp"]
+
+    # Data types skipped when checkpointing are read after resuming
+    WorkDirManager().workdir = tmp_path / "workdir"
+    bold_path = tmp_path / "bold.nii"
+    nib.save(
+        nib.Nifti1Image(np.ones((4, 5, 3, 6), dtype=np.float32), np.eye(4)),
+        bold_path,
+    )
+    input = {
+        "BOLD": {
+            "path": bold_path,
+            "space": "MNI152NLin6Asym",
+            "meta": {"element": {"subject": "sub-01"}},
+        },
+        "T1w": {"path": bold_path, "space": "MNI152NLin6Asym"},
+    }
+    config.set(
+        key="preprocessing.checkpoint.location", val=tmp_path / "checkpoint"
+    )
+    mc = MarkerCollection(
+        markers=[_SumMarker()],  # type: ignore
+        preprocessors=[_AddPreprocessor(value=1.0)],  # type: ignore
+    )
+    mc._required_types = ["BOLD"]
+    mc.fit(input)
+    mc = MarkerCollection(
+        markers=[_SumMarker(), _ReadTypesMarker()],  # type: ignore
+        preprocessors=[_AddPreprocessor(value=1.0)],  # type: ignore
+    )
+    mc._required_types = ["BOLD", "T1w"]
+    assert mc.fit(input) == {
+        "sum": 2 * 360.0,
+        "read_types": ["BOLD", "T1w"],
+    }
+    config.delete("preprocessing.checkpoint.location")
+
+
+class _MeanMarker(BaseMarker):
+    """Marker computing the mean of the BOLD data."""
+
+    _MARKER_INOUT_MAPPINGS: ClassVar = {
+        DataType.BOLD: {"mean": StorageType.Vector},
+    }
+
+    def compute(
+        self, input: dict[str, Any], extra_input: dict | None = None
+    ) -> dict:
+        return {
+            "mean": {
+                "data": np.array([[input["data"].get_fdata().mean()]]),
+                "col_names": ["mean"],
+            }
+        }
+
+
+def test_marker_collection_missing_markers(tmp_path: Path) -> None:
+    """Test MarkerCollection getting the markers missing in the storage.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+
+    """
+    WorkDirManager().workdir = tmp_path / "workdir"
+    for subject in ["sub-01", "sub-02"]:
+        nib.save(
+            nib.Nifti1Image(
+                np.ones((4, 5, 3, 6), dtype=np.float32), np.eye(4)
+            ),
+            tmp_path / f"{subject}_bold.nii.gz",
+        )
+    dg = PatternDataGrabber(
+        datadir=tmp_path,
+        types=["BOLD"],
+        patterns={
+            "BOLD": {
+                "pattern": "{subject}_bold.nii.gz",
+                "space": "MNI152NLin6Asym",
+            },
+        },
+        replacements=["subject"],
+    )
+    storage = SQLiteFeatureStorage(
+        uri=tmp_path / "out.sqlite", single_output=False
+    )
+    preprocessors = [
+        Smoothing(using="nilearn", on="BOLD", smoothing_params={"fwhm": 2.0})
+    ]
+    mc = MarkerCollection(
+        markers=[_MeanMarker(name="first")],  # type: ignore
+        preprocessors=preprocessors,  # type: ignore
+        storage=storage,
+    )
+    mc.validate(dg)
+    with dg:
+        mc.fit(dg["sub-01"])
+
+    mc = MarkerCollection(
+        markers=[
+            _MeanMarker(name="first"),  # type: ignore
+            _MeanMarker(name="second"),  # type: ignore
+        ],
+        preprocessors=preprocessors,  # type: ignore
+        storage=storage,
+    )
+    mc.validate(dg)
+    with dg:
+        # Features of the first marker are stored for sub-01 only
+        assert mc.get_missing_markers(dg._index("sub-01")) == ["second"]
+        assert mc.get_missing_markers(dg._index("sub-02")) == [
+            "first",
+            "second",
+        ]
+        mc.fit(dg["sub-01"], markers=["second"])
+        assert mc.get_missing_markers(dg._index("sub-01")) == []
+
+    # Changed preprocessing yields different features
+    mc = MarkerCollection(
+        markers=[_MeanMarker(name="first")],  # type: ignore
+        preprocessors=[
+            Smoothing(
+                using="nilearn", on="BOLD", smoothing_params={"fwhm": 3.0}
+            )
+        ],
+        storage=storage,
+    )
+    mc.validate(dg)
+    with dg:
+        assert mc.get_missing_markers(dg._index("sub-01")) == ["first"]
+
+
+def test_marker_collection_prefetch(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test MarkerCollection prefetching the pipeline data of markers.
+
+    Parameters
+    ----------
+    monkeypatch : pytest.MonkeyPatch
+        The pytest.MonkeyPatch object.
+
+    """
+    requests = []
+
+    def _prefetch_data(t_requests: list[dict]) -> None:
+        requests.extend(t_requests)
+        raise RuntimeError("no warp")
+
+    monkeypatch.setattr(
+        "junifer.pipeline.marker_collection.prefetch_data", _prefetch_data
+    )
+    mc = MarkerCollection(
+        markers=[
+            ParcelAggregation(
+                parcellation="Schaefer100x7",
+                masks="compute_brain_mask",
+                method="mean",
+                on="BOLD",
+                name="native",
+            ),
+            TemporalSNRSpheres(coords="DMNBuckner", radius=5, name="snr"),
+        ]
+    )
+    data = {
+        "BOLD": {"space": "native"},
+        "T1w": {"space": "MNI152NLin6Asym"},
+    }
+    with pytest.warns(RuntimeWarning, match="Prefetching warps failed"):
+        mc._prefetch_data(data)
+    assert [(x["kind"], x["names"]) for x in requests] == [
+        ("parcellation", ["Schaefer100x7"]),
+        ("mask", ["compute_brain_mask"]),
+        ("coordinates", "DMNBuckner"),
+    ]
+    assert all(x["target_data"] is data["BOLD"] for x in requests)
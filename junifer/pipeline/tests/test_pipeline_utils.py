@@ -0,0 +1,126 @@
+"""Provide tests for pipeline utilities."""
+
+# Authors: Synchon Mandal <s.mandal@fz-juelich.de>
+# License: AGPL
+
+from pathlib import Path
+
+import nibabel as nib
+import numpy as np
+import pandas as pd
+import pytest
+from numpy.testing import assert_array_equal
+from pandas.testing import assert_frame_equal
+
+from junifer.pipeline import (
+    WorkDirManager,
+    ensure_data_path,
+    get_data_nbytes,
+    persist_data_img,
+    read_data_headers,
+)
+from junifer.utils import config
+
+
+@pytest.mark.parametrize(
+    "lazy, use_location",
+    [
+        (False, False),
+        (True, False),
+        (True, True),
+    ],
+)
+def test_persist_data_img(
+    tmp_path: Path, lazy: bool, use_location: bool
+) -> None:
+    """Test persisting data image with and without lazy persistence.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+    lazy : bool
+        The parametrized flag for lazy persistence.
+    use_location : bool
+        The parametrized flag for using a lazy persistence location.
+
+    """
+    WorkDirManager().workdir = tmp_path / "workdir"
+    img = nib.Nifti1Image(
+        np.arange(24, dtype=np.float32).reshape(2, 3, 4), np.eye(4)
+    )
+    config.set(key="preprocessing.lazy", val=lazy)
+    if use_location:
+        config.set(key="preprocessing.lazy.location", val=str(tmp_path))
+    try:
+        path = persist_data_img(img, tmp_path / "data.nii.gz")
+    finally:
+        config.delete("preprocessing.lazy")
+        if use_location:
+            config.delete("preprocessing.lazy.location")
+    if not lazy:
+        assert path == tmp_path / "data.nii.gz"
+        assert path.exists()
+    else:
+        # Deferred write as uncompressed NIfTI
+        assert path.name == "data.nii"
+        assert not path.exists()
+        if use_location:
+            assert path.parent.parent == tmp_path
+    # Write on demand
+    assert ensure_data_path({"path": path, "data": img}) == path
+    assert path.exists()
+    assert_array_equal(nib.load(path).get_fdata(), img.get_fdata())
+    WorkDirManager().cleanup_elementdir()
+
+
+def test_ensure_data_path_dataframe(tmp_path: Path) -> None:
+    """Test writing deferred confounds on demand.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+
+    """
+    df = pd.DataFrame({"a": [1.0, 2.0], "b": [3.0, 4.0]})
+    path = tmp_path / "confounds.tsv"
+    assert ensure_data_path({"path": path, "data": df}) == path
+    assert_frame_equal(pd.read_csv(path, sep="\t"), df)
+
+
+def test_read_data_headers(tmp_path: Path) -> None:
+    """Test reading the headers of data.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+
+    """
+    path = tmp_path / "bold.nii.gz"
+    nib.save(
+        nib.Nifti1Image(np.zeros((4, 5, 3, 10), np.int16), np.eye(4)), path
+    )
+    (tmp_path / "confounds.tsv").write_text("a\n1\n")
+    input = {
+        "BOLD": {"path": path, "space": "MNI152NLin6Asym"},
+        "BOLD_confounds": {"path": tmp_path / "confounds.tsv"},
+        "T1w": {"path": tmp_path / "missing.nii.gz"},
+        "meta": {"element": "sub-01"},
+    }
+    headers = read_data_headers(input)
+    assert headers["BOLD"]["shape"] == [4, 5, 3, 10]
+    assert headers["BOLD"]["dtype"] == "int16"
+    assert headers["BOLD"]["size"] == path.stat().st_size
+    assert headers["BOLD"]["space"] == "MNI152NLin6Asym"
+    assert headers["BOLD_confounds"]["shape"] is None
+    assert headers["BOLD_confounds"]["size"] == 4
+    assert headers["T1w"]["size"] == 0
+    assert headers["meta"] == input["meta"]
+    # Input is not modified
+    assert "shape" not in input["BOLD"]
+
+    assert get_data_nbytes(headers["BOLD"]) == 600 * 2
+    assert get_data_nbytes(headers["BOLD"], "float64") == 600 * 8
+    assert get_data_nbytes(headers["BOLD_confounds"]) == 0
@@ -0,0 +1,138 @@
+"""Provide tests for preprocessed data cache."""
+
+# Authors: Synchon Mandal <s.mandal@fz-juelich.de>
+# License: AGPL
+
+import os
+from pathlib import Path
+
+import nibabel as nib
+import numpy as np
+import pytest
+from numpy.testing import assert_array_equal
+
+from junifer.pipeline import WorkDirManager
+from junifer.pipeline._preprocessed_cache import PreprocessedDataCache
+
+
+def _make_data(path: Path, value: float) -> dict:
+    """Create a data object.
+
+    Parameters
+    ----------
+    path : pathlib.Path
+        The path of the BOLD data.
+    value : float
+        The value of the BOLD data.
+
+    Returns
+    -------
+    dict
+        The data object.
+
+    """
+    return {
+        "BOLD": {
+            "path": path,
+            "data": nib.Nifti1Image(
+                np.full((10, 10, 10, 10), value, dtype=np.float32), np.eye(4)
+            ),
+            "meta": {"element": {"subject": "sub-01"}},
+        }
+    }
+
+
+def test_PreprocessedDataCache_key(tmp_path: Path) -> None:
+    """Test PreprocessedDataCache key.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+
+    """
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    (tmp_path / "a" / "bold.nii").write_bytes(b"bold")
+    (tmp_path / "b" / "bold.nii").write_bytes(b"bold")
+    element = {"subject": "sub-01"}
+    steps = [{"class": "Smoothing", "fwhm": 2}]
+    key = PreprocessedDataCache.get_key(
+        element, [tmp_path / "a" / "bold.nii"], steps
+    )
+    # Same content at another location
+    assert key == PreprocessedDataCache.get_key(
+        element, [tmp_path / "b" / "bold.nii"], steps
+    )
+    # Different element
+    assert key != PreprocessedDataCache.get_key(
+        {"subject": "sub-02"}, [tmp_path / "a" / "bold.nii"], steps
+    )
+    # Different steps
+    assert key != PreprocessedDataCache.get_key(
+        element,
+        [tmp_path / "a" / "bold.nii"],
+        [{"class": "Smoothing", "fwhm": 3}],
+    )
+    # Different content
+    (tmp_path / "b" / "bold.nii").write_bytes(b"BOLD")
+    assert key != PreprocessedDataCache.get_key(
+        element, [tmp_path / "b" / "bold.nii"], steps
+    )
+
+
+def test_PreprocessedDataCache(tmp_path: Path) -> None:
+    """Test PreprocessedDataCache saving, loading and eviction.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+
+    """
+    WorkDirManager().workdir = tmp_path / "workdir"
+    bold_path = tmp_path / "bold.nii"
+    cache = PreprocessedDataCache(location=tmp_path / "cache", size=0.0001)
+    assert cache.load("a") is None
+
+    cache.save(_make_data(bold_path, 1.0), "a")
+    loaded = cache.load("a")
+    assert loaded is not None
+    assert_array_equal(loaded["BOLD"]["data"].get_fdata(), 1.0)
+
+    # Existing entries are kept
+    cache.save(_make_data(bold_path, 2.0), "a")
+    loaded = cache.load("a")
+    assert loaded is not None
+    assert_array_equal(loaded["BOLD"]["data"].get_fdata(), 1.0)
+
+    # Least recently used entries are evicted, with each ~40 kB in size
+    cache.save(_make_data(bold_path, 2.0), "b")
+    os.utime(tmp_path / "cache" / "b" / "manifest.json", (0, 0))
+    assert cache.load("a") is not None
+    cache.save(_make_data(bold_path, 3.0), "c")
+    assert sorted(
+        x.name for x in (tmp_path / "cache").iterdir() if x.is_dir()
+    ) == ["a", "c"]
+    assert cache.load("b") is None
+
+    # Unbounded
+    cache = PreprocessedDataCache(location=tmp_path / "cache")
+    cache.save(_make_data(bold_path, 2.0), "b")
+    assert cache.load("b") is not None
+    WorkDirManager().cleanup_elementdir()
+
+
+def test_PreprocessedDataCache_error(tmp_path: Path) -> None:
+    """Test PreprocessedDataCache errors.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+
+    """
+    cache = PreprocessedDataCache(location=tmp_path / "cache")
+    with pytest.raises(TypeError, match="Cannot save"):
+        cache.save({"BOLD": {"path": tmp_path, "data": np.ones(3)}}, "a")
+    assert cache.load("a") is None
@@ -145,3 +145,24 @@ def test_workdir_manager_no_cleanup(tmp_path: Path) -> None:
     assert workdir_mgr.elementdir is None
     # But the temporary directory should still exist
     assert tempdir.exists()
+
+
+def test_workdir_manager_element_tempdir_outside(tmp_path: Path) -> None:
+    """Test WorkDirManager cleans element tempdirs outside elementdir.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+
+    """
+    workdir_mgr = WorkDirManager()
+    workdir_mgr.workdir = tmp_path / "workdir"
+    element_tempdir = workdir_mgr.get_element_tempdir(
+        prefix="outside", dir=tmp_path / "tmpfs"
+    )
+    assert element_tempdir.is_dir()
+    assert element_tempdir.parent == tmp_path / "tmpfs"
+    workdir_mgr.cleanup_elementdir()
+    # Should remove temporary directory
+    assert not element_tempdir.exists()
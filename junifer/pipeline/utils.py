@@ -6,14 +6,30 @@
 
 import subprocess
 from enum import Enum
-from typing import Any
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
 
+import nibabel as nib
+import numpy as np
+import pandas as pd
 from pydantic import validate_call
 
-from ..utils import raise_error, warn_with_log
+from ..utils import config, logger, raise_error, warn_with_log
+from .workdir_manager import WorkDirManager
 
 
-__all__ = ["ExtDep", "check_ext_dependencies"]
+if TYPE_CHECKING:
+    from nibabel.nifti1 import Nifti1Image
+
+
+__all__ = [
+    "ExtDep",
+    "check_ext_dependencies",
+    "ensure_data_path",
+    "get_data_nbytes",
+    "persist_data_img",
+    "read_data_headers",
+]
 
 
 class ExtDep(str, Enum):
@@ -318,3 +334,135 @@ def _check_freesurfer(commands: list[str] | None = None) -> bool:
                 f"{commands_found_results}"
             )
     return fs_found
+
+
+def persist_data_img(
+    img: "Nifti1Image", path: Path, lazy: bool | None = None
+) -> Path:
+    """Persist an image produced by a pipeline step.
+
+    If lazy persistence is enabled, the image is not written and only the
+    path to write it to on demand via :func:`ensure_data_path` is returned.
+    The path then points to an uncompressed NIfTI file, either next to
+    ``path`` or in an element-scoped temporary directory under
+    ``preprocessing.lazy.location`` if set.
+
+    Parameters
+    ----------
+    img : nibabel.nifti1.Nifti1Image
+        The image to persist.
+    path : pathlib.Path
+        The path to save the image to.
+    lazy : bool or None, optional
+        Whether to defer writing. If None, ``preprocessing.lazy`` is used
+        (default None).
+
+    Returns
+    -------
+    pathlib.Path
+        The path of the image.
+
+    """
+    if lazy is None:
+        lazy = config.get("preprocessing.lazy", False)
+    if not lazy:
+        nib.save(img, path)
+        return path
+    # Write uncompressed as the file is only needed by external tools
+    name = path.name.removesuffix(".gz")
+    location = config.get("preprocessing.lazy.location")
+    if location is not None:
+        tempdir = WorkDirManager().get_element_tempdir(
+            prefix="lazy_data", dir=location
+        )
+        lazy_path = tempdir / name
+    else:
+        lazy_path = path.with_name(name)
+    logger.debug(f"Deferring write of data to {lazy_path}")
+    return lazy_path
+
+
+def ensure_data_path(data: dict[str, Any]) -> Path:
+    """Ensure the path of data exists.
+
+    If the file was not written due to lazy persistence, the in-memory image
+    or confounds ``pandas.DataFrame`` (as TSV) is written to the path.
+
+    Parameters
+    ----------
+    data : dict
+        The data type dictionary with ``path`` and ``data`` keys.
+
+    Returns
+    -------
+    pathlib.Path
+        The path of the data.
+
+    """
+    path = Path(data["path"])
+    if not path.exists() and data.get("data") is not None:
+        logger.debug(f"Writing deferred data to {path}")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if isinstance(data["data"], pd.DataFrame):
+            data["data"].to_csv(path, sep="\t", index=False)
+        else:
+            nib.save(data["data"], path)
+    return path
+
+
+def read_data_headers(input: dict[str, dict]) -> dict[str, dict]:
+    """Read the headers of the data of a Junifer Data object.
+
+    Only the NIfTI headers are read, the data is not loaded.
+
+    Parameters
+    ----------
+    input : dict
+        The Junifer Data object as returned by a DataGrabber.
+
+    Returns
+    -------
+    dict
+        The Junifer Data object with the ``shape`` and ``dtype`` of the NIfTI
+        data (None for other files) and the ``size`` of the file in bytes
+        (0 if not found) for every data type with a ``path``.
+
+    """
+    out = {}
+    for type_, data in input.items():
+        if not isinstance(data, dict) or "path" not in data:
+            out[type_] = data
+            continue
+        path = Path(data["path"])
+        header = {**data, "shape": None, "dtype": None, "size": 0}
+        if path.is_file():
+            header["size"] = path.stat().st_size
+            if path.name.endswith((".nii", ".nii.gz")):
+                img_header = nib.load(path).header
+                header["shape"] = list(img_header.get_data_shape())
+                header["dtype"] = str(img_header.get_data_dtype())
+        out[type_] = header
+    return out
+
+
+def get_data_nbytes(header: dict[str, Any], dtype: str | None = None) -> int:
+    """Get the size of data in memory from its header.
+
+    Parameters
+    ----------
+    header : dict
+        The data type dictionary as returned by :func:`read_data_headers`.
+    dtype : str or None, optional
+        The data type the data is loaded as. If None, the data type of the
+        file is used (default None).
+
+    Returns
+    -------
+    int
+        The size in bytes or 0 if the shape is not known.
+
+    """
+    if header.get("shape") is None:
+        return 0
+    itemsize = np.dtype(dtype or header["dtype"]).itemsize
+    return int(np.prod(header["shape"], dtype=np.int64)) * itemsize
@@ -54,6 +54,8 @@ class WorkDirManager(metaclass=Singleton):
         """Initialize the class."""
         self._workdir = Path(workdir) if isinstance(workdir, str) else workdir
         self._elementdir = None
+        # Element-scoped directories created outside the element directory
+        self._element_extdirs = []
         self._root_tempdir = None
         self._cleanup_dirs = cleanup
         self._set_default_workdir()
@@ -129,7 +131,10 @@ class WorkDirManager(metaclass=Singleton):
         return self._elementdir  # type: ignore
 
     def get_element_tempdir(
-        self, prefix: str | None = None, suffix: str | None = None
+        self,
+        prefix: str | None = None,
+        suffix: str | None = None,
+        dir: str | Path | None = None,
     ) -> Path:
         """Get an element-scoped temporary directory.
 
@@ -144,6 +149,11 @@ class WorkDirManager(metaclass=Singleton):
         suffix : str, optional
             The temporary directory suffix. If None, no suffix is added
             (default None).
+        dir : str or pathlib.Path, optional
+            The directory to create the temporary directory in, instead of
+            the element directory, for example, a tmpfs mount. It is cleaned
+            up together with the element directory. If None, the element
+            directory is used (default None).
 
         Returns
         -------
@@ -151,6 +161,17 @@ class WorkDirManager(metaclass=Singleton):
             The path to the temporary directory.
 
         """
+        if dir is not None:
+            Path(dir).mkdir(parents=True, exist_ok=True)
+            tempdir = Path(
+                tempfile.mkdtemp(dir=dir, prefix=prefix, suffix=suffix)
+            )
+            logger.debug(
+                "Creating element temporary directory at "
+                f"{tempdir.resolve()!s}"
+            )
+            self._element_extdirs.append(tempdir)
+            return tempdir
         # Create element directory if not created already
         if self._elementdir is None:
             logger.debug(
@@ -193,7 +214,14 @@ class WorkDirManager(metaclass=Singleton):
         """
         if self._cleanup_dirs is False:
             self._elementdir = None
+            self._element_extdirs = []
             return
+        for extdir in self._element_extdirs:
+            logger.debug(
+                f"Deleting element temporary directory at {extdir.resolve()!s}"
+            )
+            shutil.rmtree(extdir, ignore_errors=True)
+        self._element_extdirs = []
         if self._elementdir is not None:
             logger.debug(
                 f"Deleting element directory at {self._elementdir.resolve()!s}"
@@ -1,5 +1,8 @@
 __all__ = [
     "BasePreprocessor",
+    "CleanImgMixin",
+    "fused_clean_fit_transform",
+    "group_fusable_preprocessors",
     "fMRIPrepConfoundRemover",
     "Confounds",
     "Strategy",
@@ -13,6 +16,11 @@ __all__ = [
 ]
 
 from .base import BasePreprocessor, logger
+from ._fused_clean import (
+    CleanImgMixin,
+    fused_clean_fit_transform,
+    group_fusable_preprocessors,
+)
 from .confounds import fMRIPrepConfoundRemover, Confounds, Strategy
 from .warping import SpaceWarper, SpaceWarpingImpl
 from .smoothing import Smoothing, SmoothingImpl
@@ -0,0 +1,363 @@
+"""Provide masked, chunked cleaning of BOLD data."""
+
+# Authors: Synchon Mandal <s.mandal@fz-juelich.de>
+# License: AGPL
+
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+from nilearn import image as nimg
+from nilearn._utils.niimg_conversions import check_niimg_4d
+from nilearn.signal import (
+    _check_filter_parameters,
+    _handle_scrubbed_volumes,
+    _sanitize_sample_mask,
+    butterworth,
+    sanitize_confounds,
+    standardize_signal,
+)
+from scipy import linalg
+
+from ..utils import raise_error
+from .base import logger
+
+
+if TYPE_CHECKING:
+    from nibabel.nifti1 import Nifti1Image
+
+
+__all__ = ["clean_img_blockwise", "clean_signals_blockwise"]
+
+
+def _prepare_clean_blockwise(
+    n_scans: int,
+    detrend: bool,
+    confounds: np.ndarray | None,
+    low_pass: float | None,
+    high_pass: float | None,
+    t_r: float,
+    sample_mask: np.ndarray | None,
+) -> dict[str, Any]:
+    """Prepare the voxel-independent parts of cleaning.
+
+    The confounds are censored / interpolated, detrended, filtered and
+    standardized exactly like :func:`nilearn.signal.clean` does, and their
+    orthonormal basis is computed once via a pivoted QR decomposition.
+
+    Parameters
+    ----------
+    n_scans : int
+        The number of scans of the signals.
+    detrend : bool
+        Whether to detrend.
+    confounds : numpy.ndarray or None
+        The confounds.
+    low_pass : float or None
+        Low cutoff frequency, in Hertz.
+    high_pass : float or None
+        High cutoff frequency, in Hertz.
+    t_r : float
+        Repetition time, in second.
+    sample_mask : numpy.ndarray or None
+        The indices or boolean mask of the volumes to keep.
+
+    Returns
+    -------
+    dict
+        The state for :func:`_clean_block` with the following keys:
+
+        * ``filter_type`` : the filter type or False
+        * ``sample_mask`` : the sanitized sample mask or None
+        * ``basis`` : the orthonormal confound basis or None
+
+    """
+    filter_type = _check_filter_parameters(
+        "butterworth", low_pass, high_pass, t_r
+    )
+    if sample_mask is not None:
+        sample_mask = _sanitize_sample_mask(n_scans, 1, None, sample_mask)
+    basis = None
+    if confounds is not None:
+        confounds = sanitize_confounds(n_scans, 1, confounds)
+        confounds, _, _ = _handle_scrubbed_volumes(
+            confounds,
+            None,
+            None if sample_mask is None else sample_mask.copy(),
+            filter_type,
+            t_r,
+            True,
+        )
+        if detrend:
+            confounds = standardize_signal(
+                confounds, standardize=False, detrend=True
+            )
+        if filter_type == "butterworth":
+            confounds = butterworth(
+                confounds,
+                sampling_rate=1.0 / t_r,
+                low_pass=low_pass,
+                high_pass=high_pass,
+            )
+            if sample_mask is not None:
+                confounds = confounds[sample_mask, :]
+        confounds = standardize_signal(
+            confounds, standardize=True, detrend=False
+        )
+        # Computed once and re-used for every voxel block
+        q, r, _ = linalg.qr(confounds, mode="economic", pivoting=True)
+        basis = q[:, np.abs(np.diag(r)) > np.finfo(np.float64).eps * 100.0]
+    return {
+        "filter_type": filter_type,
+        "sample_mask": sample_mask,
+        "basis": basis,
+    }
+
+
+def _clean_block(
+    signals: np.ndarray,
+    state: dict[str, Any],
+    detrend: bool,
+    standardize: bool | str,
+    low_pass: float | None,
+    high_pass: float | None,
+    t_r: float,
+) -> np.ndarray:
+    """Clean a block of voxel time series.
+
+    This mirrors :func:`nilearn.signal.clean` for a single run but uses the
+    pre-computed confound basis.
+
+    Parameters
+    ----------
+    signals : numpy.ndarray
+        The signals of shape (timepoints, voxels) to clean. This is
+        modified in-place.
+    state : dict
+        The state as returned by :func:`_prepare_clean_blockwise`.
+    detrend : bool
+        Whether to detrend.
+    standardize : bool or str
+        The standardization strategy.
+    low_pass : float or None
+        Low cutoff frequency, in Hertz.
+    high_pass : float or None
+        High cutoff frequency, in Hertz.
+    t_r : float
+        Repetition time, in second.
+
+    Returns
+    -------
+    numpy.ndarray
+        The cleaned signals.
+
+    """
+    filter_type = state["filter_type"]
+    sample_mask = state["sample_mask"]
+    signals, _, _ = _handle_scrubbed_volumes(
+        signals,
+        None,
+        None if sample_mask is None else sample_mask.copy(),
+        filter_type,
+        t_r,
+        True,
+    )
+    mean_signals = signals.mean(axis=0)
+    if detrend:
+        signals = standardize_signal(
+            signals, standardize=False, detrend=detrend
+        )
+    if filter_type == "butterworth":
+        signals = butterworth(
+            signals,
+            sampling_rate=1.0 / t_r,
+            low_pass=low_pass,
+            high_pass=high_pass,
+        )
+        if sample_mask is not None:
+            signals = signals[sample_mask, :]
+    if state["basis"] is not None:
+        basis = state["basis"].astype(signals.dtype, copy=False)
+        signals -= basis @ (basis.T @ signals)
+    if (detrend and standardize == "psc") or (filter_type == "butterworth"):
+        signals = signals + mean_signals
+    return standardize_signal(signals, standardize=standardize, detrend=False)
+
+
+def clean_signals_blockwise(
+    signals: np.ndarray,
+    block_size: int,
+    detrend: bool = True,
+    standardize: bool | str = True,
+    confounds: np.ndarray | None = None,
+    low_pass: float | None = None,
+    high_pass: float | None = None,
+    t_r: float = 2.5,
+    sample_mask: np.ndarray | None = None,
+) -> np.ndarray:
+    """Clean signals block by block.
+
+    This produces the same result as :func:`nilearn.signal.clean` but
+    processes ``block_size`` voxels at a time, bounding the temporary memory.
+
+    Parameters
+    ----------
+    signals : numpy.ndarray
+        The signals of shape (timepoints, voxels) to clean.
+    block_size : int
+        The number of voxels per block.
+    detrend : bool, optional
+        Whether to detrend (default True).
+    standardize : bool or str, optional
+        The standardization strategy (default True).
+    confounds : numpy.ndarray or None, optional
+        The confounds (default None).
+    low_pass : float or None, optional
+        Low cutoff frequency, in Hertz (default None).
+    high_pass : float or None, optional
+        High cutoff frequency, in Hertz (default None).
+    t_r : float, optional
+        Repetition time, in second (default 2.5).
+    sample_mask : numpy.ndarray or None, optional
+        The indices or boolean mask of the volumes to keep (default None).
+
+    Returns
+    -------
+    numpy.ndarray
+        The cleaned signals.
+
+    """
+    n_scans, n_voxels = signals.shape
+    state = _prepare_clean_blockwise(
+        n_scans, detrend, confounds, low_pass, high_pass, t_r, sample_mask
+    )
+    n_out = n_scans if sample_mask is None else len(state["sample_mask"])
+    dtype = signals.dtype if signals.dtype.kind == "f" else np.float32
+    out = np.empty((n_out, n_voxels), dtype=dtype)
+    for start in range(0, n_voxels, block_size):
+        stop = min(start + block_size, n_voxels)
+        out[:, start:stop] = _clean_block(
+            np.array(signals[:, start:stop], dtype=dtype),
+            state,
+            detrend,
+            standardize,
+            low_pass,
+            high_pass,
+            t_r,
+        )
+    return out
+
+
+def clean_img_blockwise(
+    imgs: "Nifti1Image",
+    mask_img: "Nifti1Image | None",
+    block_size: int,
+    dtype: str | None = None,
+    detrend: bool = True,
+    standardize: bool | str = True,
+    confounds: np.ndarray | None = None,
+    low_pass: float | None = None,
+    high_pass: float | None = None,
+    t_r: float = 2.5,
+    sample_mask: np.ndarray | None = None,
+) -> "Nifti1Image":
+    """Clean an image restricted to the mask voxels, block by block.
+
+    This produces the same result as :func:`nilearn.image.clean_img` but
+    only gathers the voxels in ``mask_img`` (or, if None, the voxels which
+    are not constantly zero) ``block_size`` at a time, so that the memory
+    needed besides the input and the output is bounded.
+
+    Parameters
+    ----------
+    imgs : nibabel.nifti1.Nifti1Image
+        The 4D image to clean.
+    mask_img : nibabel.nifti1.Nifti1Image or None
+        The mask image. If None, all the voxels which are not constantly
+        zero are cleaned.
+    block_size : int
+        The number of voxels per block.
+    dtype : {"float64", "float32"} or None, optional
+        The data type to clean in and of the output. If None, the data type
+        of ``imgs`` is used if it is floating point, else float32
+        (default None).
+    detrend : bool, optional
+        Whether to detrend (default True).
+    standardize : bool or str, optional
+        The standardization strategy (default True).
+    confounds : numpy.ndarray or None, optional
+        The confounds (default None).
+    low_pass : float or None, optional
+        Low cutoff frequency, in Hertz (default None).
+    high_pass : float or None, optional
+        High cutoff frequency, in Hertz (default None).
+    t_r : float, optional
+        Repetition time, in second (default 2.5).
+    sample_mask : numpy.ndarray or None, optional
+        The indices or boolean mask of the volumes to keep (default None).
+
+    Returns
+    -------
+    nibabel.nifti1.Nifti1Image
+        The cleaned image.
+
+    Raises
+    ------
+    ValueError
+        If ``mask_img`` does not match ``imgs``.
+
+    """
+    imgs_ = check_niimg_4d(imgs)
+    # Memory-mapped if possible
+    data = np.asanyarray(imgs_.dataobj)
+    if dtype is None:
+        dtype = data.dtype if data.dtype.kind == "f" else np.float32
+    # Get voxels to clean
+    if mask_img is not None:
+        if mask_img.shape != imgs_.shape[:3] or not np.allclose(
+            mask_img.affine, imgs_.affine
+        ):
+            raise_error(
+                "Mask shape and affine need to match the image: "
+                f"{mask_img.shape} vs. {imgs_.shape[:3]}"
+            )
+        voxel_mask = np.asanyarray(mask_img.dataobj) != 0
+    else:
+        # Constantly zero voxels stay zero after cleaning
+        voxel_mask = np.zeros(imgs_.shape[:3], dtype=bool)
+        for i in range(imgs_.shape[0]):
+            voxel_mask[i] = np.any(data[i] != 0, axis=-1)
+    voxels = np.nonzero(voxel_mask)
+    n_voxels = len(voxels[0])
+
+    n_scans = imgs_.shape[3]
+    state = _prepare_clean_blockwise(
+        n_scans, detrend, confounds, low_pass, high_pass, t_r, sample_mask
+    )
+    n_out = n_scans if sample_mask is None else len(state["sample_mask"])
+    logger.debug(
+        f"Cleaning {n_voxels} voxels in blocks of {block_size} as {dtype}"
+    )
+    out = np.zeros((*imgs_.shape[:3], n_out), dtype=dtype)
+    for start in range(0, n_voxels, block_size):
+        block_voxels = tuple(x[start : start + block_size] for x in voxels)
+        signals = np.asarray(data[block_voxels], dtype=dtype).T
+        if mask_img is not None:
+            # Same as nilearn.masking.apply_mask
+            signals[~np.isfinite(signals)] = 0
+        out[block_voxels] = _clean_block(
+            signals,
+            state,
+            detrend,
+            standardize,
+            low_pass,
+            high_pass,
+            t_r,
+        ).T
+
+    # Put results back into Niimg-like object
+    if mask_img is not None:
+        cleaned_img = nimg.new_img_like(mask_img, out, mask_img.affine)
+    else:
+        cleaned_img = nimg.new_img_like(imgs_, out, copy_header=True)
+    cleaned_img.set_data_dtype(out.dtype)
+    return cleaned_img
@@ -0,0 +1,550 @@
+"""Provide fused cleaning for clean_img-based preprocessors."""
+
+# Authors: Synchon Mandal <s.mandal@fz-juelich.de>
+# License: AGPL
+
+from abc import abstractmethod
+from itertools import pairwise
+from typing import TYPE_CHECKING, Any, ClassVar
+
+import numpy as np
+from nilearn import image as nimg
+from nilearn import masking, signal
+from nilearn._utils.niimg_conversions import check_niimg_4d
+
+from ..data import get_data
+from ..pipeline import get_data_nbytes, persist_data_img
+from ..typing import PreprocessorLike
+from ..utils import config, raise_error
+from ._chunked_clean import clean_img_blockwise, clean_signals_blockwise
+from .base import logger
+
+
+if TYPE_CHECKING:
+    from nibabel.nifti1 import Nifti1Image
+
+
+__all__ = [
+    "CleanImgMixin",
+    "fused_clean_fit_transform",
+    "group_fusable_preprocessors",
+]
+
+
+class CleanImgMixin:
+    """Mixin class for preprocessors based on :func:`nilearn.image.clean_img`.
+
+    Concrete classes implement :meth:`_prepare_clean` to validate the input,
+    set up the element-specific temporary directory and mask, and return the
+    parameters for :func:`nilearn.signal.clean`. This allows consecutive
+    preprocessors to be run as one fused cleaning pass on the masked voxel
+    matrix via :func:`fused_clean_fit_transform`.
+
+    If the concrete class has a ``block_size`` which is not None, cleaning is
+    restricted to the mask voxels and done blockwise via
+    :func:`.clean_img_blockwise`, in the data type given by ``dtype``.
+
+    Concrete classes use :meth:`preprocess` of this class, as preprocessors
+    overriding it are not fused.
+
+    """
+
+    _CLEAN_OUTPUT_NAME: ClassVar[str]
+
+    @abstractmethod
+    def _prepare_clean(
+        self,
+        input: dict[str, Any],
+        extra_input: dict[str, Any] | None = None,
+    ) -> dict[str, Any]:
+        """Prepare cleaning.
+
+        Parameters
+        ----------
+        input : dict
+            A single input from the Junifer Data object to preprocess.
+        extra_input : dict, optional
+            The other fields in the Junifer Data object.
+
+        Returns
+        -------
+        dict
+            The cleaning specification with the following keys:
+
+            * ``clean_kwargs`` : keyword arguments for
+              :func:`nilearn.signal.clean`, including ``t_r``
+            * ``mask_img`` : the mask image or None
+            * ``element_tempdir`` : the element-specific temporary directory
+
+        """
+        raise_error(
+            msg="Concrete classes need to implement _prepare_clean().",
+            klass=NotImplementedError,
+        )
+
+    def preprocess(
+        self,
+        input: dict[str, Any],
+        extra_input: dict[str, Any] | None = None,
+    ) -> dict[str, Any]:
+        """Preprocess.
+
+        Parameters
+        ----------
+        input : dict
+            A single input from the Junifer Data object to preprocess.
+        extra_input : dict, optional
+            The other fields in the Junifer Data object.
+
+        Returns
+        -------
+        dict
+            The computed result as dictionary. If `self.masks` is not None,
+            then the target data computed mask is updated for further steps.
+
+        """
+        return self._clean(input, extra_input)
+
+    def estimate_cost(
+        self,
+        input: dict[str, Any],
+        extra_input: dict[str, Any] | None = None,
+    ) -> dict[str, int]:
+        """Estimate the resources needed to clean.
+
+        :func:`nilearn.image.clean_img` holds the image as float64, the
+        masked signals, the cleaned signals and the output image, that is,
+        four times voxels x timepoints x 8 bytes. Blockwise cleaning holds
+        the input in its data type, the output in ``dtype`` and the blocks
+        of signals. The output file is assumed to compress like the input.
+
+        Parameters
+        ----------
+        input : dict
+            A single input from the Junifer Data object as returned by
+            :func:`.read_data_headers`.
+        extra_input : dict, optional
+            The other fields in the Junifer Data object (default None).
+
+        Returns
+        -------
+        dict
+            The estimated ``"memory"``, temporary ``"disk"`` and ``"output"``
+            size in bytes.
+
+        """
+        nbytes = get_data_nbytes(input)
+        if not nbytes:
+            return {"memory": 0, "disk": 0, "output": 0}
+        block_size = getattr(self, "block_size", None)
+        if block_size is None:
+            out_dtype = "float64"
+            memory = 4 * get_data_nbytes(input, out_dtype)
+        else:
+            out_dtype = getattr(self, "dtype", None) or (
+                input["dtype"]
+                if np.dtype(input["dtype"]).kind == "f"
+                else "float32"
+            )
+            n_timepoints = input["shape"][3] if len(input["shape"]) > 3 else 1
+            memory = (
+                nbytes
+                + get_data_nbytes(input, out_dtype)
+                + 3 * block_size * n_timepoints * 8
+            )
+        disk = 0
+        if not config.get("preprocessing.lazy", False):
+            # Scale the input file size by the output data type size
+            disk = int(
+                input["size"] * get_data_nbytes(input, out_dtype) / nbytes
+            )
+        return {"memory": memory, "disk": disk, "output": 0}
+
+    def _set_clean_mask(
+        self,
+        input: dict[str, Any],
+        extra_input: dict[str, Any] | None,
+        element_tempdir: Any,
+    ) -> "Nifti1Image | None":
+        """Get the mask and link it to the target data.
+
+        Parameters
+        ----------
+        input : dict
+            A single input from the Junifer Data object to preprocess.
+        extra_input : dict, optional
+            The other fields in the Junifer Data object.
+        element_tempdir : pathlib.Path
+            The element-specific temporary directory.
+
+        Returns
+        -------
+        nibabel.nifti1.Nifti1Image or None
+            The mask image if ``masks`` is set, else None.
+
+        """
+        if self.masks is None:  # type: ignore
+            return None
+        # Generate mask
+        logger.debug(f"Masking with {self.masks}")  # type: ignore
+        mask_img = get_data(
+            kind="mask",
+            names=self.masks,  # type: ignore
+            target_data=input,
+            extra_input=extra_input,
+        )
+        # Save generated mask for use later
+        generated_mask_img_path = persist_data_img(
+            mask_img, element_tempdir / "generated_mask.nii.gz"
+        )
+
+        # Save BOLD mask and link it to the BOLD data type dict;
+        # this allows to use "inherit" down the pipeline
+        logger.debug("Setting `BOLD.mask`")
+        input.update(
+            {
+                "mask": {
+                    # Update path to sync with "data"
+                    "path": generated_mask_img_path,
+                    # Update data
+                    "data": mask_img,
+                    # Should be in the same space as target data
+                    "space": input["space"],
+                }
+            }
+        )
+        return mask_img
+
+    def _clean(
+        self,
+        input: dict[str, Any],
+        extra_input: dict[str, Any] | None = None,
+    ) -> dict[str, Any]:
+        """Clean the image.
+
+        Parameters
+        ----------
+        input : dict
+            A single input from the Junifer Data object to preprocess.
+        extra_input : dict, optional
+            The other fields in the Junifer Data object.
+
+        Returns
+        -------
+        dict
+            The ``input`` dictionary with updated values.
+
+        """
+        spec = self._prepare_clean(input, extra_input)
+        block_size = getattr(self, "block_size", None)
+        if block_size is not None:
+            cleaned_img = clean_img_blockwise(
+                imgs=input["data"],
+                mask_img=spec["mask_img"],
+                block_size=block_size,
+                dtype=getattr(self, "dtype", None),
+                **spec["clean_kwargs"],
+            )
+            return self._finalize_clean(input, cleaned_img, spec)
+        clean_kwargs = spec["clean_kwargs"].copy()
+        # Sample mask needs to be passed via the clean__ prefix
+        sample_mask = clean_kwargs.pop("sample_mask", None)
+        if sample_mask is not None:
+            clean_kwargs["clean__sample_mask"] = sample_mask
+        cleaned_img = nimg.clean_img(
+            imgs=input["data"],
+            mask_img=spec["mask_img"],
+            **clean_kwargs,
+        )
+        return self._finalize_clean(input, cleaned_img, spec)
+
+    def _finalize_clean(
+        self,
+        input: dict[str, Any],
+        cleaned_img: "Nifti1Image",
+        spec: dict[str, Any],
+    ) -> dict[str, Any]:
+        """Finalize cleaning by updating the target data.
+
+        Parameters
+        ----------
+        input : dict
+            A single input from the Junifer Data object to preprocess.
+        cleaned_img : nibabel.nifti1.Nifti1Image
+            The cleaned image.
+        spec : dict
+            The cleaning specification as returned by
+            :meth:`_prepare_clean`.
+
+        Returns
+        -------
+        dict
+            The ``input`` dictionary with updated values.
+
+        """
+        # Fix t_r as nilearn messes it up
+        cleaned_img.header["pixdim"][4] = spec["clean_kwargs"]["t_r"]
+        # Save cleaned data
+        cleaned_img_path = persist_data_img(
+            cleaned_img, spec["element_tempdir"] / self._CLEAN_OUTPUT_NAME
+        )
+
+        logger.debug("Updating `BOLD`")
+        input.update(
+            {
+                # Update path to sync with "data"
+                "path": cleaned_img_path,
+                # Update data
+                "data": cleaned_img,
+            }
+        )
+        return input
+
+
+def _is_fusable(preprocessor: PreprocessorLike) -> bool:
+    """Check if a preprocessor can be fused.
+
+    Parameters
+    ----------
+    preprocessor : preprocessor-like
+        The preprocessor.
+
+    Returns
+    -------
+    bool
+        Whether ``preprocessor`` is a :class:`.CleanImgMixin` which cleans
+        via :meth:`.CleanImgMixin.preprocess`.
+
+    """
+    return (
+        isinstance(preprocessor, CleanImgMixin)
+        and type(preprocessor).preprocess is CleanImgMixin.preprocess
+    )
+
+
+def _can_fuse(first: PreprocessorLike, second: PreprocessorLike) -> bool:
+    """Check if two consecutive preprocessors can be fused.
+
+    The second preprocessor must use the same masks as the first one or
+    inherit them, as masks from another source are not applied to the
+    output of the first preprocessor when fused.
+
+    Parameters
+    ----------
+    first : preprocessor-like
+        The first preprocessor.
+    second : preprocessor-like
+        The second preprocessor.
+
+    Returns
+    -------
+    bool
+        Whether the preprocessors can be fused.
+
+    """
+    if not (_is_fusable(first) and _is_fusable(second)):
+        return False
+    masks = getattr(second, "masks", None)
+    return first.on == second.on and (  # type: ignore
+        masks in ["inherit", ["inherit"]]
+        or masks == getattr(first, "masks", None)
+    )
+
+
+def group_fusable_preprocessors(
+    preprocessors: list[PreprocessorLike],
+) -> list[list[PreprocessorLike]]:
+    """Group consecutive preprocessors which can be fused.
+
+    Consecutive :class:`.CleanImgMixin` preprocessors operating on the same
+    data types with the same or inherited masks are grouped together; all
+    the others are kept as single groups.
+
+    Parameters
+    ----------
+    preprocessors : list of preprocessor-like
+        The preprocessors.
+
+    Returns
+    -------
+    list of list of preprocessor-like
+        The preprocessors grouped in order.
+
+    """
+    groups = []
+    for preprocessor in preprocessors:
+        if groups and _can_fuse(groups[-1][-1], preprocessor):
+            groups[-1].append(preprocessor)
+        else:
+            groups.append([preprocessor])
+    return groups
+
+
+def _fuse_clean_kwargs(specs: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Drop redundant operations from consecutive cleaning steps.
+
+    Detrending is dropped if the previous step already detrended without
+    filtering or censoring, as its output is detrended. Standardization is
+    dropped if the next step standardizes, as the next step's operations are
+    invariant to the per-voxel scaling.
+
+    Parameters
+    ----------
+    specs : list of dict
+        The cleaning specifications as returned by
+        :meth:`.CleanImgMixin._prepare_clean`.
+
+    Returns
+    -------
+    list of dict
+        The keyword arguments for :func:`nilearn.signal.clean` per step.
+
+    """
+    clean_kwargs = [spec["clean_kwargs"].copy() for spec in specs]
+    for t_prev, t_next in pairwise(clean_kwargs):
+        if (
+            t_prev.get("detrend", False)
+            and t_prev.get("low_pass") is None
+            and t_prev.get("high_pass") is None
+            and t_prev.get("sample_mask") is None
+        ):
+            t_next["detrend"] = False
+        if t_next.get("standardize", False):
+            t_prev["standardize"] = False
+    return clean_kwargs
+
+
+def _fused_clean(
+    preprocessors: list[CleanImgMixin],
+    input: dict[str, Any],
+    extra_input: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """Run consecutive cleaning steps in one pass.
+
+    Parameters
+    ----------
+    preprocessors : list of CleanImgMixin
+        The preprocessors to fuse.
+    input : dict
+        A single input from the Junifer Data object to preprocess.
+    extra_input : dict, optional
+        The other fields in the Junifer Data object.
+
+    Returns
+    -------
+    dict
+        The ``input`` dictionary with updated values.
+
+    """
+    specs = []
+    for preprocessor in preprocessors:
+        spec = preprocessor._prepare_clean(input, extra_input)
+        # t_r in header is set by the previous step
+        if specs and preprocessor.t_r is None:  # type: ignore
+            spec["clean_kwargs"]["t_r"] = specs[-1]["clean_kwargs"]["t_r"]
+        specs.append(spec)
+
+    # Cleaning is voxel-wise, so masks can be combined
+    masks = [
+        spec["mask_img"] for spec in specs if spec["mask_img"] is not None
+    ]
+    mask_img = None
+    if len(masks) > 0:
+        mask_img = masks[0]
+        for t_mask in masks[1:]:
+            if t_mask is not mask_img:
+                mask_img = nimg.new_img_like(
+                    mask_img,
+                    np.logical_and(
+                        nimg.get_data(mask_img) != 0,
+                        nimg.get_data(t_mask) != 0,
+                    ).astype(np.int8),
+                )
+
+    # Prepare signal for cleaning
+    bold_img = check_niimg_4d(input["data"])
+    if mask_img is not None:
+        signals = masking.apply_mask(bold_img, mask_img)
+    else:
+        signals = nimg.get_data(bold_img).reshape(-1, bold_img.shape[-1]).T
+
+    # Clean signal
+    logger.info(
+        "Cleaning image using nilearn with fused steps: "
+        f"{[p.__class__.__name__ for p in preprocessors]}"
+    )
+    for preprocessor, clean_kwargs in zip(
+        preprocessors, _fuse_clean_kwargs(specs), strict=True
+    ):
+        block_size = getattr(preprocessor, "block_size", None)
+        if block_size is not None:
+            dtype = getattr(preprocessor, "dtype", None)
+            if dtype is not None:
+                signals = signals.astype(dtype, copy=False)
+            signals = clean_signals_blockwise(
+                signals, block_size=block_size, **clean_kwargs
+            )
+        else:
+            signals = signal.clean(signals, **clean_kwargs)
+
+    # Put results back into Niimg-like object
+    if mask_img is not None:
+        cleaned_img = masking.unmask(signals, mask_img)
+    else:
+        cleaned_img = nimg.new_img_like(
+            bold_img,
+            signals.T.reshape((*bold_img.shape[:3], signals.shape[0])),
+            copy_header=True,
+        )
+    return preprocessors[-1]._finalize_clean(input, cleaned_img, specs[-1])
+
+
+def fused_clean_fit_transform(
+    preprocessors: list[PreprocessorLike],
+    input: dict[str, dict],
+) -> dict[str, dict]:
+    """Fit and transform consecutive cleaning preprocessors in one pass.
+
+    This produces the same result as running the preprocessors one after the
+    other, but masks and unmasks the data only once and skips redundant
+    detrending and standardization.
+
+    Parameters
+    ----------
+    preprocessors : list of preprocessor-like
+        The preprocessors to fuse, as grouped by
+        :func:`group_fusable_preprocessors`.
+    input : dict
+        The Junifer Data object.
+
+    Returns
+    -------
+    dict
+        The processed output of the fused preprocessors.
+
+    """
+    for preprocessor in preprocessors:
+        preprocessor.validate_component(input=list(input.keys()))
+    # Copy input to not modify the original
+    out = input.copy()
+    # For each data type, run fused cleaning
+    for type_ in preprocessors[0].on:  # type: ignore
+        # Check if data type is available
+        if type_ in input.keys():
+            logger.info(f"Preprocessing {type_}")
+            # Get data dict for data type
+            t_input = input[type_]
+            # Pass the other data types as extra input, removing
+            # the current type
+            extra_input = input.copy()
+            extra_input.pop(type_)
+            # Preprocess data
+            out[type_] = _fused_clean(
+                preprocessors,  # type: ignore
+                input=t_input,
+                extra_input=extra_input,
+            )
+            # Update metadata for steps
+            for preprocessor in preprocessors:
+                preprocessor.update_meta(out[type_], "preprocess")
+    return out
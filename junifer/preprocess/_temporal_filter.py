@@ -12,17 +12,15 @@ from typing import (
     ClassVar,
 )
 
-import nibabel as nib
-from nilearn import image as nimg
 from nilearn._utils.niimg_conversions import check_niimg_4d
 from pydantic import BeforeValidator
 
 from ..api.decorators import register_preprocessor
-from ..data import get_data
 from ..datagrabber import DataType
 from ..pipeline import WorkDirManager
 from ..typing import Dependencies
 from ..utils import ensure_list_or_none
+from ._fused_clean import CleanImgMixin
 from .base import BasePreprocessor, logger
 
 
@@ -30,7 +28,7 @@ __all__ = ["TemporalFilter"]
 
 
 @register_preprocessor
-class TemporalFilter(BasePreprocessor):
+class TemporalFilter(BasePreprocessor, CleanImgMixin):
     """Class for temporal filtering.
 
     Temporal filtering is based on :func:`nilearn.image.clean_img`.
@@ -59,6 +57,11 @@ class TemporalFilter(BasePreprocessor):
 
     _DEPENDENCIES: ClassVar[Dependencies] = {"numpy", "nilearn"}
     _VALID_DATA_TYPES: ClassVar[Sequence[DataType]] = [DataType.BOLD]
+    _CLEAN_OUTPUT_NAME: ClassVar[str] = "filtered_data.nii.gz"
+    # Use the cleaning and its cost model of the mixin, so that consecutive
+    # cleaning steps can be fused
+    preprocess = CleanImgMixin.preprocess
+    estimate_cost = CleanImgMixin.estimate_cost
 
     detrend: bool = True
     standardize: bool = True
@@ -91,12 +94,12 @@ class TemporalFilter(BasePreprocessor):
         # BOLD must be 4D niimg
         check_niimg_4d(input["data"])
 
-    def preprocess(
+    def _prepare_clean(
         self,
         input: dict[str, Any],
         extra_input: dict[str, Any] | None = None,
     ) -> dict[str, Any]:
-        """Preprocess.
+        """Prepare cleaning.
 
         Parameters
         ----------
@@ -108,8 +111,8 @@ class TemporalFilter(BasePreprocessor):
         Returns
         -------
         dict
-            The computed result as dictionary. If `self.masks` is not None,
-            then the target data computed mask is updated for further steps.
+            The cleaning specification. Check
+            :meth:`.CleanImgMixin._prepare_clean` for details.
 
         """
         # Validate data
@@ -133,39 +136,8 @@ class TemporalFilter(BasePreprocessor):
         )
 
         # Set mask data
-        mask_img = None
-        if self.masks is not None:
-            # Generate mask
-            logger.debug(f"Masking with {self.masks}")
-            mask_img = get_data(
-                kind="mask",
-                names=self.masks,
-                target_data=input,
-                extra_input=extra_input,
-            )
-            # Save generated mask for use later
-            generated_mask_img_path = element_tempdir / "generated_mask.nii.gz"
-            nib.save(mask_img, generated_mask_img_path)
-
-            # Save BOLD mask and link it to the BOLD data type dict;
-            # this allows to use "inherit" down the pipeline
-            logger.debug("Setting `BOLD.mask`")
-            input.update(
-                {
-                    "mask": {
-                        # Update path to sync with "data"
-                        "path": generated_mask_img_path,
-                        # Update data
-                        "data": mask_img,
-                        # Should be in the same space as target data
-                        "space": input["space"],
-                    }
-                }
-            )
-
-        signal_clean_kwargs = {}
+        mask_img = self._set_clean_mask(input, extra_input, element_tempdir)
 
-        # Clean image
         logger.info("Temporal filter image using nilearn")
         logger.debug(f"\tdetrend: {self.detrend}")
         logger.debug(f"\tstandardize: {self.standardize}")
@@ -173,30 +145,14 @@ class TemporalFilter(BasePreprocessor):
         logger.debug(f"\thigh_pass: {self.high_pass}")
         logger.debug(f"\tt_r: {self.t_r}")
 
-        cleaned_img = nimg.clean_img(
-            imgs=bold_img,
-            detrend=self.detrend,
-            standardize=self.standardize,
-            low_pass=self.low_pass,
-            high_pass=self.high_pass,
-            t_r=t_r,
-            mask_img=mask_img,
-            **signal_clean_kwargs,
-        )
-        # Fix t_r as nilearn messes it up
-        cleaned_img.header["pixdim"][4] = t_r
-        # Save filtered data
-        filtered_data_path = element_tempdir / "filtered_data.nii.gz"
-        nib.save(cleaned_img, filtered_data_path)
-
-        logger.debug("Updating `BOLD`")
-        input.update(
-            {
-                # Update path to sync with "data"
-                "path": filtered_data_path,
-                # Update data
-                "data": cleaned_img,
-            }
-        )
-
-        return input
+        return {
+            "clean_kwargs": {
+                "detrend": self.detrend,
+                "standardize": self.standardize,
+                "low_pass": self.low_pass,
+                "high_pass": self.high_pass,
+                "t_r": t_r,
+            },
+            "mask_img": mask_img,
+            "element_tempdir": element_tempdir,
+        }
@@ -4,27 +4,74 @@
 # License: AGPL
 
 from collections.abc import Sequence
-from typing import Any, ClassVar, Literal
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, ClassVar, Literal
 
 import nibabel as nib
 import nilearn.image as nimg
+import numpy as np
+from nibabel.openers import ImageOpener
 from pydantic import PositiveFloat
 
 from ..api.decorators import register_preprocessor
 from ..datagrabber import DataType
-from ..pipeline import WorkDirManager
+from ..pipeline import WorkDirManager, persist_data_img
 from ..typing import Dependencies
 from ..utils import raise_error
 from .base import BasePreprocessor, logger
 
 
+if TYPE_CHECKING:
+    from nibabel.nifti1 import Nifti1Image
+
+
 __all__ = ["TemporalSlicer"]
 
 
+def _slice_img(img: "Nifti1Image", index: slice) -> "Nifti1Image":
+    """Slice an image along time without copying if possible.
+
+    In-memory data and uncompressed, unscaled files (which are
+    memory-mapped) are sliced as a view sharing the parent's buffer;
+    for the others, only the sliced volumes are read.
+
+    Parameters
+    ----------
+    img : nibabel.nifti1.Nifti1Image
+        The 4D image to slice.
+    index : slice
+        The slice of volumes.
+
+    Returns
+    -------
+    nibabel.nifti1.Nifti1Image
+        The sliced image.
+
+    """
+    dataobj = img.dataobj
+    if not nib.is_proxy(dataobj):
+        data = np.asanyarray(dataobj)[..., index]
+    elif (
+        Path(str(dataobj.file_like)).suffix not in ImageOpener.compress_ext_map
+        and dataobj.slope == 1
+        and dataobj.inter == 0
+    ):
+        # Memory-mapped if allowed by the proxy
+        data = dataobj.get_unscaled()[..., index]
+    else:
+        data = dataobj[..., index]
+    return nimg.new_img_like(img, data, copy_header=True)
+
+
 @register_preprocessor
 class TemporalSlicer(BasePreprocessor):
     """Class for temporal slicing.
 
+    The sliced image shares the memory of the input image if it is in memory
+    or can be memory-mapped, and the sliced confounds share the memory of the
+    input confounds. The sliced data is only written to the element-scoped
+    temporary directory if its path is needed by a later step.
+
     Parameters
     ----------
     start : ``zero`` or positive float
@@ -42,7 +89,7 @@ class TemporalSlicer(BasePreprocessor):
 
     """
 
-    _DEPENDENCIES: ClassVar[Dependencies] = {"nilearn"}
+    _DEPENDENCIES: ClassVar[Dependencies] = {"nibabel", "nilearn", "numpy"}
     _VALID_DATA_TYPES: ClassVar[Sequence[DataType]] = [DataType.BOLD]
 
     start: Literal[0] | PositiveFloat
@@ -147,12 +194,13 @@ class TemporalSlicer(BasePreprocessor):
         )
 
         # Slice image
-        sliced_img = nimg.index_img(bold_img, index)
+        sliced_img = _slice_img(bold_img, index)
         # Fix t_r as nilearn messes it up
         sliced_img.header["pixdim"][4] = t_r
-        # Save sliced data
-        sliced_img_path = element_tempdir / "sliced_data.nii.gz"
-        nib.save(sliced_img, sliced_img_path)
+        # Defer saving sliced data
+        sliced_img_path = persist_data_img(
+            sliced_img, element_tempdir / "sliced_data.nii.gz", lazy=True
+        )
 
         logger.debug("Updating `BOLD`")
         input.update(
@@ -166,17 +214,13 @@ class TemporalSlicer(BasePreprocessor):
 
         # Check for BOLD.confounds and update if found
         if input.get("confounds") is not None:
-            # Slice confounds
+            # Slice confounds as a view
             sliced_confounds_df = input["confounds"]["data"].iloc[index, :]
-            # Save sliced confounds
+            # Defer saving sliced confounds; written on demand via
+            # ensure_data_path()
             sliced_confounds_path = (
                 element_tempdir / "sliced_confounds_regressors.tsv"
             )
-            sliced_confounds_df.to_csv(
-                sliced_confounds_path,
-                sep="\t",
-                index=False,
-            )
 
             logger.debug("Updating `BOLD.confounds`")
             input["confounds"].update(
@@ -12,8 +12,8 @@ import structlog
 from pydantic import BaseModel, BeforeValidator, ConfigDict
 
 from ..datagrabber import DataType
-from ..pipeline import PipelineStepMixin, UpdateMetaMixin
-from ..utils import ensure_list_or_none, raise_error
+from ..pipeline import PipelineStepMixin, UpdateMetaMixin, get_data_nbytes
+from ..utils import config, ensure_list_or_none, raise_error
 
 
 __all__ = ["BasePreprocessor"]
@@ -187,6 +187,42 @@ class BasePreprocessor(BaseModel, ABC, PipelineStepMixin, UpdateMetaMixin):
             klass=NotImplementedError,
         )
 
+    def estimate_cost(
+        self,
+        input: dict[str, Any],
+        extra_input: dict[str, Any] | None = None,
+    ) -> dict[str, int]:
+        """Estimate the resources needed to preprocess.
+
+        The default assumes the data is loaded as float64 and preprocessed
+        into a copy, which is written to the element-specific temporary
+        directory with the same size as the input file unless
+        ``preprocessing.lazy`` is set. Subclasses can override to provide a
+        better estimate.
+
+        Parameters
+        ----------
+        input : dict
+            A single input from the Junifer Data object as returned by
+            :func:`.read_data_headers`.
+        extra_input : dict, optional
+            The other fields in the Junifer Data object (default None).
+
+        Returns
+        -------
+        dict
+            The estimated ``"memory"``, temporary ``"disk"`` and ``"output"``
+            size in bytes.
+
+        """
+        return {
+            "memory": 2 * get_data_nbytes(input, "float64"),
+            "disk": (
+                0 if config.get("preprocessing.lazy", False) else input["size"]
+            ),
+            "output": 0,
+        }
+
     def _fit_transform(
         self,
         input: dict[str, dict],
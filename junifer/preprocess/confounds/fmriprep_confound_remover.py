@@ -19,23 +19,22 @@ from enum import Enum
 from typing import (
     Any,
     ClassVar,
+    Literal,
 )
 
-import nibabel as nib
 import numpy as np
 import pandas as pd
-from nilearn import image as nimg
 from nilearn._utils.niimg_conversions import check_niimg_4d
 from nilearn.interfaces.fmriprep.load_confounds_components import _load_scrub
 from nilearn.interfaces.fmriprep.load_confounds_utils import prepare_output
-from pydantic import BeforeValidator
+from pydantic import BeforeValidator, PositiveInt
 
 from ...api.decorators import register_preprocessor
-from ...data import get_data
 from ...datagrabber import DataType
 from ...pipeline import WorkDirManager
 from ...typing import Dependencies
 from ...utils import ensure_list_or_none, raise_error
+from .._fused_clean import CleanImgMixin
 from ..base import BasePreprocessor, logger
 
 
@@ -136,7 +135,7 @@ class Strategy(TypedDict, total=False):
 
 
 @register_preprocessor
-class fMRIPrepConfoundRemover(BasePreprocessor):
+class fMRIPrepConfoundRemover(BasePreprocessor, CleanImgMixin):
     """Class for confound removal using fMRIPrep confounds format.
 
     Read confound files and select columns according to
@@ -193,11 +192,26 @@ class fMRIPrepConfoundRemover(BasePreprocessor):
         The specification of the masks to apply to regions before extracting
         signals. Check :ref:`Using Masks <using_masks>` for more details.
         If None, will not apply any mask (default None).
+    block_size : positive int or None, optional
+        The number of voxels per block to clean at a time. If set, only the
+        voxels in ``masks`` (or, if None, the voxels which are not constantly
+        zero) are cleaned and the confound basis is computed once, bounding
+        the memory needed besides the input and output. If None, the whole
+        image is passed to :func:`nilearn.image.clean_img` (default None).
+    dtype : {"float64", "float32"} or None, optional
+        The data type to clean in and of the output. If None, the data type
+        of the image is used if it is floating point, else float32. Only used
+        if ``block_size`` is not None (default None).
 
     """
 
-    _DEPENDENCIES: ClassVar[Dependencies] = {"numpy", "nilearn"}
+    _DEPENDENCIES: ClassVar[Dependencies] = {"numpy", "nilearn", "scipy"}
     _VALID_DATA_TYPES: ClassVar[Sequence[DataType]] = [DataType.BOLD]
+    _CLEAN_OUTPUT_NAME: ClassVar[str] = "deconfounded_data.nii.gz"
+    # Use the cleaning and its cost model of the mixin, so that consecutive
+    # cleaning steps can be fused
+    preprocess = CleanImgMixin.preprocess
+    estimate_cost = CleanImgMixin.estimate_cost
 
     strategy: Strategy | None = None
     spike: float | None = None
@@ -213,6 +227,8 @@ class fMRIPrepConfoundRemover(BasePreprocessor):
         dict | str | list[dict | str] | None,
         BeforeValidator(ensure_list_or_none),
     ] = None
+    block_size: PositiveInt | None = None
+    dtype: Literal["float64", "float32"] | None = None
 
     def validate_preprocessor_params(self) -> None:
         """Run extra logical validation for preprocessor."""
@@ -559,12 +575,12 @@ class fMRIPrepConfoundRemover(BasePreprocessor):
         elif t_format != "fmriprep":
             raise_error(f"Invalid confounds format {t_format}")
 
-    def preprocess(
+    def _prepare_clean(
         self,
         input: dict[str, Any],
         extra_input: dict[str, Any] | None = None,
     ) -> dict[str, Any]:
-        """Preprocess.
+        """Prepare cleaning.
 
         Parameters
         ----------
@@ -576,8 +592,8 @@ class fMRIPrepConfoundRemover(BasePreprocessor):
         Returns
         -------
         dict
-            The computed result as dictionary. If `self.masks` is not None,
-            then the target data computed mask is updated for further steps.
+            The cleaning specification. Check
+            :meth:`.CleanImgMixin._prepare_clean` for details.
 
         """
         # Validate data
@@ -602,35 +618,7 @@ class fMRIPrepConfoundRemover(BasePreprocessor):
         )
 
         # Set mask data
-        mask_img = None
-        if self.masks is not None:
-            # Generate mask
-            logger.debug(f"Masking with {self.masks}")
-            mask_img = get_data(
-                kind="mask",
-                names=self.masks,
-                target_data=input,
-                extra_input=extra_input,
-            )
-            # Save generated mask for use later
-            generated_mask_img_path = element_tempdir / "generated_mask.nii.gz"
-            nib.save(mask_img, generated_mask_img_path)
-
-            # Save BOLD mask and link it to the BOLD data type dict;
-            # this allows to use "inherit" down the pipeline
-            logger.debug("Setting `BOLD.mask`")
-            input.update(
-                {
-                    "mask": {
-                        # Update path to sync with "data"
-                        "path": generated_mask_img_path,
-                        # Update data
-                        "data": mask_img,
-                        # Should be in the same space as target data
-                        "space": input["space"],
-                    }
-                }
-            )
+        mask_img = self._set_clean_mask(input, extra_input, element_tempdir)
 
         signal_clean_kwargs = {}
         # Set up scrubbing mask if needed
@@ -648,10 +636,9 @@ class fMRIPrepConfoundRemover(BasePreprocessor):
             )
             signal_clean_kwargs.update(
                 {
-                    "clean__sample_mask": sample_mask,
+                    "sample_mask": sample_mask,
                 }
             )
-        # Clean image
         logger.info("Cleaning image using nilearn")
         logger.debug(f"\tstrategy: {self.strategy}")
         logger.debug(f"\tspike: {self.spike}")
@@ -664,32 +651,16 @@ class fMRIPrepConfoundRemover(BasePreprocessor):
         logger.debug(f"\thigh_pass: {self.high_pass}")
         logger.debug(f"\tt_r: {self.t_r}")
 
-        # Deconfound data
-        cleaned_img = nimg.clean_img(
-            imgs=bold_img,
-            detrend=self.detrend,
-            standardize=self.standardize,
-            confounds=confounds_df.values,
-            low_pass=self.low_pass,
-            high_pass=self.high_pass,
-            t_r=t_r,
-            mask_img=mask_img,
-            **signal_clean_kwargs,
-        )
-        # Fix t_r as nilearn messes it up
-        cleaned_img.header["pixdim"][4] = t_r
-        # Save deconfounded data
-        deconfounded_img_path = element_tempdir / "deconfounded_data.nii.gz"
-        nib.save(cleaned_img, deconfounded_img_path)
-
-        logger.debug("Updating `BOLD`")
-        input.update(
-            {
-                # Update path to sync with "data"
-                "path": deconfounded_img_path,
-                # Update data
-                "data": cleaned_img,
-            }
-        )
-
-        return input
+        return {
+            "clean_kwargs": {
+                "detrend": self.detrend,
+                "standardize": self.standardize,
+                "confounds": confounds_df.values,
+                "low_pass": self.low_pass,
+                "high_pass": self.high_pass,
+                "t_r": t_r,
+                **signal_clean_kwargs,
+            },
+            "mask_img": mask_img,
+            "element_tempdir": element_tempdir,
+        }
@@ -10,7 +10,7 @@ from typing import (
 
 import nibabel as nib
 
-from ...pipeline import ExtDep, WorkDirManager
+from ...pipeline import ExtDep, WorkDirManager, ensure_data_path
 from ...typing import Dependencies, ExternalDependencies
 from ...utils import run_ext_cmd
 from ..base import logger
@@ -78,7 +78,7 @@ class AFNISmoothing:
         blur_out_path_prefix = element_tempdir / "blur"
         blur_cmd = [
             "3dBlurToFWHM",
-            f"-input {input['path'].resolve()}",
+            f"-input {ensure_data_path(input).resolve()}",
             f"-prefix {blur_out_path_prefix.resolve()}",
             "-automask",
             f"-FWHM {fwhm}",
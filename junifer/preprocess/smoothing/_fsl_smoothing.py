@@ -10,7 +10,7 @@ from typing import (
 
 import nibabel as nib
 
-from ...pipeline import ExtDep, WorkDirManager
+from ...pipeline import ExtDep, WorkDirManager, ensure_data_path
 from ...typing import Dependencies, ExternalDependencies
 from ...utils import run_ext_cmd
 from ..base import logger
@@ -83,7 +83,7 @@ class FSLSmoothing:
         # Set susan command
         susan_cmd = [
             "susan",
-            f"{input['path'].resolve()}",
+            f"{ensure_data_path(input).resolve()}",
             f"{brightness_threshold}",
             f"{fwhm}",
             "3",  # dimension
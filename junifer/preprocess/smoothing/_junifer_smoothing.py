@@ -0,0 +1,204 @@
+"""Provide class for smoothing via junifer."""
+
+# Authors: Synchon Mandal <s.mandal@fz-juelich.de>
+# License: AGPL
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Any,
+    ClassVar,
+    Literal,
+)
+
+import numpy as np
+from nilearn import image as nimg
+from nilearn._utils.niimg_conversions import check_niimg
+from numpy.typing import ArrayLike
+from scipy.ndimage import gaussian_filter1d
+
+from ...data import get_data
+from ...pipeline import WorkDirManager, persist_data_img
+from ...typing import Dependencies
+from ...utils import raise_error
+from ..base import logger
+
+
+__all__ = ["JuniferSmoothing"]
+
+
+def _fwhm_to_sigma(fwhm: ArrayLike, affine: np.ndarray) -> np.ndarray:
+    """Convert FWHM in millimeters to Gaussian sigma in voxels.
+
+    Parameters
+    ----------
+    fwhm : scalar or array-like of 3 scalars
+        The full-width at half maximum, in millimeters.
+    affine : numpy.ndarray
+        The affine of the image.
+
+    Returns
+    -------
+    numpy.ndarray
+        The sigma along each spatial axis, in voxels.
+
+    """
+    fwhm = np.asarray([fwhm]).ravel()
+    fwhm = np.asarray([0.0 if x is None else x for x in fwhm], dtype=float)
+    if fwhm.size == 1:
+        fwhm = np.repeat(fwhm, 3)
+    if fwhm.size != 3:
+        raise_error(
+            f"`fwhm` needs to be a scalar or have 3 elements, got {fwhm.size}"
+        )
+    # Keep only the scale part
+    vox_size = np.sqrt(np.sum(affine[:3, :3] ** 2, axis=0))
+    return fwhm / (np.sqrt(8 * np.log(2)) * vox_size)
+
+
+def _smooth_volume(
+    volume: np.ndarray, sigma: np.ndarray, out: np.ndarray
+) -> None:
+    """Smooth a volume with separable Gaussian kernels.
+
+    Parameters
+    ----------
+    volume : numpy.ndarray
+        The 3D volume to smooth. This is modified in-place.
+    sigma : numpy.ndarray
+        The sigma along each axis, in voxels.
+    out : numpy.ndarray
+        The 3D array to write the smoothed volume to.
+
+    """
+    # SPM tends to put NaNs in the data outside the brain
+    volume[~np.isfinite(volume)] = 0
+    for axis, s in enumerate(sigma):
+        if s > 0.0:
+            gaussian_filter1d(volume, s, output=volume, axis=axis)
+    out[...] = volume
+
+
+class JuniferSmoothing:
+    """Class for smoothing via junifer.
+
+    This class applies separable Gaussian kernels along each spatial axis
+    in-process, smoothing volumes in parallel threads. If a mask is given,
+    smoothing is restricted to the mask via normalized convolution, i.e.,
+    voxels outside the mask neither contribute to nor receive the
+    smoothed signal.
+
+    """
+
+    _DEPENDENCIES: ClassVar[Dependencies] = {"nilearn", "numpy", "scipy"}
+
+    def preprocess(
+        self,
+        input: dict[str, Any],
+        fwhm: int | float | ArrayLike,
+        extra_input: dict[str, Any] | None = None,
+        masks: str | dict | list[str | dict] | None = None,
+        dtype: Literal["float32", "float64"] = "float32",
+        n_jobs: int = 1,
+    ) -> dict[str, Any]:
+        """Preprocess using junifer.
+
+        Parameters
+        ----------
+        input : dict
+            A single input from the Junifer Data object in which to preprocess.
+        fwhm : scalar, ``numpy.ndarray``, tuple or list of scalar
+            Smoothing strength, as a full-width at half maximum, in
+            millimeters. If scalar, width is identical in all 3 directions,
+            else it must have 3 elements, giving the FWHM along each axis.
+            If any of the elements is 0 or None, smoothing is not performed
+            along that axis.
+        extra_input : dict, optional
+            The other fields in the Junifer Data object (default None).
+        masks : str, dict, list of them or None, optional
+            The specification of the masks to restrict smoothing to. Check
+            :ref:`Using Masks <using_masks>` for more details. If None, will
+            smooth the whole image (default None).
+        dtype : {"float32", "float64"}, optional
+            The data type to smooth in and of the output (default "float32").
+        n_jobs : int, optional
+            The number of threads to smooth volumes in parallel (default 1).
+
+        Returns
+        -------
+        dict
+            The ``input`` dictionary with updated values.
+
+        """
+        logger.info("Smoothing using junifer")
+
+        # Create element-scoped tempdir so that the output is
+        # available later as nibabel stores file path reference for
+        # loading on computation
+        element_tempdir = WorkDirManager().get_element_tempdir(
+            prefix="junifer_smoothing"
+        )
+
+        img = check_niimg(input["data"])
+        data = np.asanyarray(img.dataobj)
+        sigma = _fwhm_to_sigma(fwhm, img.affine)
+        logger.debug(f"\tsigma (voxels): {sigma}")
+
+        # Get mask and its smoothed version for normalization
+        mask = None
+        if masks is not None:
+            logger.debug(f"Masking with {masks}")
+            mask_img = get_data(
+                kind="mask",
+                names=masks,
+                target_data=input,
+                extra_input=extra_input,
+            )
+            mask = np.asanyarray(mask_img.dataobj) != 0
+            mask_weights = np.empty(mask.shape, dtype=dtype)
+            _smooth_volume(mask.astype(dtype), sigma, mask_weights)
+            # Avoid division by zero far away from the mask
+            mask_weights[~mask] = 1
+
+        out = np.zeros(data.shape, dtype=dtype)
+
+        def _smooth(index: tuple) -> None:
+            volume = np.array(data[index], dtype=dtype)
+            t_out = out[index]
+            if mask is not None:
+                volume[~mask] = 0
+            _smooth_volume(volume, sigma, t_out)
+            if mask is not None:
+                t_out[mask] /= mask_weights[mask]
+                t_out[~mask] = 0
+
+        # Volumes to smooth
+        if data.ndim == 3:
+            indices = [(...,)]
+        else:
+            indices = [(..., t) for t in range(data.shape[3])]
+        if n_jobs > 1 and len(indices) > 1:
+            with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+                # Propagate errors
+                list(executor.map(_smooth, indices))
+        else:
+            for index in indices:
+                _smooth(index)
+
+        smoothed_img = nimg.new_img_like(img, out, copy_header=True)
+        smoothed_img.set_data_dtype(out.dtype)
+
+        # Save smoothed output
+        smoothed_img_path = persist_data_img(
+            smoothed_img, element_tempdir / "smoothed_data.nii.gz"
+        )
+
+        logger.debug("Updating smoothed data")
+        input.update(
+            {
+                # Update path to sync with "data"
+                "path": smoothed_img_path,
+                "data": smoothed_img,
+            }
+        )
+
+        return input
@@ -9,11 +9,10 @@ from typing import (
     Literal,
 )
 
-import nibabel as nib
 from nilearn import image as nimg
 from numpy.typing import ArrayLike
 
-from ...pipeline import WorkDirManager
+from ...pipeline import WorkDirManager, persist_data_img
 from ...typing import Dependencies
 from ..base import logger
 
@@ -74,8 +73,9 @@ class NilearnSmoothing:
         smoothed_img = nimg.smooth_img(imgs=input["data"], fwhm=fwhm)
 
         # Save smoothed output
-        smoothed_img_path = element_tempdir / "smoothed_data.nii.gz"
-        nib.save(smoothed_img, smoothed_img_path)
+        smoothed_img_path = persist_data_img(
+            smoothed_img, element_tempdir / "smoothed_data.nii.gz"
+        )
 
         logger.debug("Updating smoothed data")
         input.update(
@@ -21,6 +21,7 @@ from ...utils import ensure_list_or_none
 from ..base import BasePreprocessor, logger
 from ._afni_smoothing import AFNISmoothing
 from ._fsl_smoothing import FSLSmoothing
+from ._junifer_smoothing import JuniferSmoothing
 from ._nilearn_smoothing import NilearnSmoothing
 
 
@@ -33,12 +34,14 @@ class SmoothingImpl(str, Enum):
     * ``nilearn`` : :func:`nilearn.image.smooth_img`
     * ``afni`` : AFNI's ``3dBlurToFWHM``
     * ``fsl`` : FSL SUSAN's ``susan``
+    * ``junifer`` : in-process separable Gaussian smoothing
 
     """
 
     nilearn = "nilearn"
     afni = "afni"
     fsl = "fsl"
+    junifer = "junifer"
 
 
 _on = Literal[DataType.T1w, DataType.T2w, DataType.BOLD]
@@ -88,6 +91,20 @@ class Smoothing(BasePreprocessor):
         * ``fwhm`` : float
             Spatial extent of smoothing.
 
+        else if ``using=SmoothingImpl.junifer``, then the valid keys are:
+
+        * ``fwhm`` : scalar, ``numpy.ndarray``, tuple or list of scalar
+            Smoothing strength, as a full-width at half maximum, in
+            millimeters. If scalar, width is identical in all 3 directions,
+            else it must have 3 elements, giving the FWHM along each axis.
+        * ``masks`` : str, dict, list of them or None
+            The specification of the masks to restrict smoothing to. Check
+            :ref:`Using Masks <using_masks>` for more details.
+        * ``dtype`` : {"float32", "float64"}
+            The data type to smooth in and of the output.
+        * ``n_jobs`` : int
+            The number of threads to smooth volumes in parallel.
+
     """
 
     _CONDITIONAL_DEPENDENCIES: ClassVar[ConditionalDependencies] = [
@@ -103,6 +120,10 @@ class Smoothing(BasePreprocessor):
             "using": SmoothingImpl.fsl,
             "depends_on": [FSLSmoothing],
         },
+        {
+            "using": SmoothingImpl.junifer,
+            "depends_on": [JuniferSmoothing],
+        },
     ]
     _VALID_DATA_TYPES: ClassVar[Sequence[DataType]] = [
         DataType.T1w,
@@ -152,6 +173,13 @@ class Smoothing(BasePreprocessor):
             preprocessor = AFNISmoothing()
         elif self.using == "fsl":
             preprocessor = FSLSmoothing()
+        elif self.using == "junifer":
+            # Needs extra input for masks
+            return JuniferSmoothing().preprocess(
+                input=input,
+                extra_input=extra_input,
+                **self.smoothing_params,
+            )
         # Smooth
         input = preprocessor.preprocess(
             input=input,
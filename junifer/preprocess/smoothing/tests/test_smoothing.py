@@ -3,9 +3,17 @@
 # Authors: Synchon Mandal <s.mandal@fz-juelich.de>
 # License: AGPL
 
+from pathlib import Path
+
+import nibabel as nib
+import numpy as np
 import pytest
+from nilearn import image as nimg
+from numpy.testing import assert_allclose
 
+from junifer.data import MaskRegistry
 from junifer.datareader import DefaultDataReader
+from junifer.pipeline import WorkDirManager
 from junifer.pipeline.utils import _check_afni, _check_fsl
 from junifer.preprocess import Smoothing, SmoothingImpl
 from junifer.testing.datagrabbers import SPMAuditoryTestingDataGrabber
@@ -91,3 +99,98 @@ def test_Smoothing_fsl(data_type: str) -> None:
         ).fit_transform(element_data)
 
         assert isinstance(output, dict)
+
+
+@pytest.mark.parametrize(
+    "fwhm, dtype, n_jobs",
+    [
+        (6, "float64", 1),
+        ((4, 0, 8), "float64", 2),
+        (5.0, "float32", 3),
+    ],
+)
+def test_Smoothing_junifer(
+    tmp_path: Path,
+    fwhm: float | tuple[float, float, float],
+    dtype: str,
+    n_jobs: int,
+) -> None:
+    """Test Smoothing using junifer against nilearn.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+    fwhm : float or tuple of float
+        The parametrized FWHM.
+    dtype : str
+        The parametrized data type.
+    n_jobs : int
+        The parametrized number of threads.
+
+    """
+    WorkDirManager().workdir = tmp_path
+    data = np.random.default_rng(0).random((8, 9, 7, 5))
+    data[0, 0, 0, 1] = np.nan
+    img = nib.Nifti1Image(data, np.diag([2.0, 2.5, 3.0, 1.0]))
+    element_data = {
+        "BOLD": {"data": img, "path": tmp_path / "bold.nii", "meta": {}}
+    }
+    output = Smoothing(
+        using=SmoothingImpl.junifer,
+        on="BOLD",
+        smoothing_params={"fwhm": fwhm, "dtype": dtype, "n_jobs": n_jobs},
+    ).fit_transform(element_data)
+    smoothed_img = output["BOLD"]["data"]
+    assert smoothed_img.get_data_dtype() == dtype
+    assert_allclose(
+        smoothed_img.get_fdata(),
+        nimg.smooth_img(img, fwhm=fwhm).get_fdata(),
+        rtol=1e-5,
+        atol=1e-6,
+    )
+    WorkDirManager().cleanup_elementdir()
+
+
+def test_Smoothing_junifer_masked(tmp_path: Path) -> None:
+    """Test Smoothing using junifer restricted to a mask.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+
+    """
+    WorkDirManager().workdir = tmp_path
+    affine = np.diag([2.0, 2.0, 2.0, 1.0])
+    mask = np.zeros((8, 9, 7), dtype=np.int8)
+    mask[2:6, 2:7, 1:5] = 1
+    mask_path = tmp_path / "mask.nii.gz"
+    nib.save(nib.Nifti1Image(mask, affine), mask_path)
+    MaskRegistry().register(
+        name="junifer_smoothing_mask",
+        mask_path=mask_path,
+        space="MNI152NLin6Asym",
+        overwrite=True,
+    )
+    # Constant inside the mask, noise outside
+    data = np.random.default_rng(0).random((8, 9, 7, 3)) * 100
+    data[mask.astype(bool)] = 5.0
+    element_data = {
+        "BOLD": {
+            "data": nib.Nifti1Image(data, affine),
+            "path": tmp_path / "bold.nii",
+            "space": "MNI152NLin6Asym",
+            "meta": {},
+        }
+    }
+    output = Smoothing(
+        using=SmoothingImpl.junifer,
+        on="BOLD",
+        smoothing_params={"fwhm": 6, "masks": "junifer_smoothing_mask"},
+    ).fit_transform(element_data)
+    smoothed = output["BOLD"]["data"].get_fdata()
+    # Voxels outside the mask do not leak in and are zeroed
+    assert_allclose(smoothed[mask.astype(bool)], 5.0, rtol=1e-5)
+    assert np.all(smoothed[~mask.astype(bool)] == 0)
+    WorkDirManager().cleanup_elementdir()
@@ -0,0 +1,236 @@
+"""Provide tests for masked, chunked cleaning."""
+
+# Authors: Synchon Mandal <s.mandal@fz-juelich.de>
+# License: AGPL
+
+from copy import deepcopy
+from pathlib import Path
+from typing import Any
+
+import nibabel as nib
+import numpy as np
+import pandas as pd
+import pytest
+from nilearn import image as nimg
+from nilearn import signal
+from numpy.testing import assert_allclose
+
+from junifer.data import MaskRegistry
+from junifer.pipeline import WorkDirManager
+from junifer.preprocess import fMRIPrepConfoundRemover
+from junifer.preprocess._chunked_clean import (
+    clean_img_blockwise,
+    clean_signals_blockwise,
+)
+
+
+def _make_bold_img(n_scans: int = 50) -> nib.Nifti1Image:
+    """Create a synthetic BOLD image with a zero background.
+
+    Parameters
+    ----------
+    n_scans : int, optional
+        The number of scans (default 50).
+
+    Returns
+    -------
+    nibabel.nifti1.Nifti1Image
+        The BOLD image.
+
+    """
+    rng = np.random.default_rng(7)
+    time = np.arange(n_scans)
+    bold = np.zeros((6, 7, 5, n_scans), dtype=np.float32)
+    bold[1:5, 1:6, 1:4] = (
+        100
+        + rng.standard_normal((4, 5, 3, n_scans))
+        + 0.05 * time
+        + np.sin(time / 3)
+    )
+    bold_img = nib.Nifti1Image(bold, np.diag([3.0, 3.0, 3.0, 1.0]))
+    bold_img.header.set_zooms((3.0, 3.0, 3.0, 2.0))
+    return bold_img
+
+
+@pytest.mark.parametrize(
+    "clean_kwargs",
+    [
+        {"detrend": True, "standardize": True},
+        {"detrend": False, "standardize": False, "low_pass": 0.1},
+        {"detrend": True, "standardize": True, "high_pass": 0.01},
+        {
+            "detrend": True,
+            "standardize": True,
+            "sample_mask": np.array([0, 1, 2, 5, 6, 7, 8, 10, 20, 21, 22]),
+        },
+        {
+            "detrend": True,
+            "standardize": False,
+            "low_pass": 0.1,
+            "high_pass": 0.01,
+            "sample_mask": np.arange(3, 56),
+        },
+    ],
+)
+@pytest.mark.parametrize("with_confounds", [True, False])
+def test_clean_signals_blockwise(
+    clean_kwargs: dict[str, Any], with_confounds: bool
+) -> None:
+    """Test blockwise signal cleaning against nilearn.
+
+    Parameters
+    ----------
+    clean_kwargs : dict
+        The parametrized cleaning parameters.
+    with_confounds : bool
+        The parametrized flag for using confounds.
+
+    """
+    rng = np.random.default_rng(3)
+    signals = rng.standard_normal((60, 23)) + np.arange(60)[:, None] * 0.1
+    if with_confounds:
+        clean_kwargs = {
+            **clean_kwargs,
+            "confounds": rng.standard_normal((60, 4)),
+        }
+    expected = signal.clean(signals, t_r=2.0, **clean_kwargs)
+    blockwise = clean_signals_blockwise(
+        signals, block_size=5, t_r=2.0, **clean_kwargs
+    )
+    assert_allclose(blockwise, expected, atol=1e-10)
+
+
+@pytest.mark.parametrize("use_mask", [True, False])
+@pytest.mark.parametrize("dtype", [None, "float32", "float64"])
+def test_clean_img_blockwise(use_mask: bool, dtype: str | None) -> None:
+    """Test blockwise image cleaning against nilearn.
+
+    Parameters
+    ----------
+    use_mask : bool
+        The parametrized flag for using a mask.
+    dtype : str or None
+        The parametrized data type.
+
+    """
+    bold_img = _make_bold_img()
+    mask_img = None
+    if use_mask:
+        mask = np.zeros((6, 7, 5), dtype=np.int8)
+        mask[2:5, 1:4, 1:3] = 1
+        mask_img = nib.Nifti1Image(mask, bold_img.affine)
+    confounds = np.random.default_rng(5).standard_normal((50, 3))
+    sample_mask = np.delete(np.arange(50), [10, 11, 30])
+    expected = nimg.clean_img(
+        bold_img,
+        confounds=confounds,
+        high_pass=0.01,
+        t_r=2.0,
+        mask_img=mask_img,
+        clean__sample_mask=sample_mask,
+    )
+    cleaned = clean_img_blockwise(
+        bold_img,
+        mask_img=mask_img,
+        block_size=7,
+        dtype=dtype,
+        confounds=confounds,
+        high_pass=0.01,
+        t_r=2.0,
+        sample_mask=sample_mask,
+    )
+    assert cleaned.shape == expected.shape
+    assert cleaned.get_data_dtype() == (dtype or "float32")
+    assert_allclose(cleaned.get_fdata(), expected.get_fdata(), atol=1e-4)
+
+
+def test_clean_img_blockwise_mask_mismatch() -> None:
+    """Test blockwise image cleaning with mismatching mask."""
+    bold_img = _make_bold_img()
+    mask_img = nib.Nifti1Image(
+        np.ones((3, 3, 3), dtype=np.int8), bold_img.affine
+    )
+    with pytest.raises(ValueError, match="need to match"):
+        clean_img_blockwise(bold_img, mask_img=mask_img, block_size=10)
+
+
+@pytest.mark.parametrize("use_mask", [True, False])
+def test_fMRIPrepConfoundRemover_block_size(
+    tmp_path: Path, use_mask: bool
+) -> None:
+    """Test fMRIPrepConfoundRemover with block_size and scrubbing.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+    use_mask : bool
+        The parametrized flag for using a mask.
+
+    """
+    WorkDirManager().workdir = tmp_path
+    bold_img = _make_bold_img()
+    rng = np.random.default_rng(11)
+    columns = [
+        "trans_x",
+        "trans_y",
+        "trans_z",
+        "rot_x",
+        "rot_y",
+        "rot_z",
+        "csf",
+        "white_matter",
+    ]
+    confounds_df = pd.DataFrame(
+        rng.standard_normal((50, len(columns))), columns=columns
+    )
+    confounds_df["framewise_displacement"] = np.abs(
+        rng.standard_normal(50) * 0.2
+    )
+    confounds_df.loc[[20, 35], "framewise_displacement"] = 1.0
+    confounds_df["std_dvars"] = np.abs(rng.standard_normal(50) * 0.5)
+    element_data = {
+        "BOLD": {
+            "data": bold_img,
+            "path": Path("bold.nii.gz"),
+            "space": "MNI152NLin6Asym",
+            "confounds": {"data": confounds_df, "format": "fmriprep"},
+            "meta": {},
+        }
+    }
+    params = {
+        "strategy": {"motion": "basic", "wm_csf": "basic", "scrubbing": True},
+        "low_pass": 0.1,
+    }
+    if use_mask:
+        mask_path = tmp_path / "mask.nii.gz"
+        mask = np.zeros((6, 7, 5), dtype=np.int8)
+        mask[1:4, 2:6, 1:4] = 1
+        nib.save(nib.Nifti1Image(mask, bold_img.affine), mask_path)
+        MaskRegistry().register(
+            name="chunked_clean_mask",
+            mask_path=mask_path,
+            space="MNI152NLin6Asym",
+            overwrite=True,
+        )
+        params["masks"] = "chunked_clean_mask"
+
+    expected = fMRIPrepConfoundRemover(**params).fit_transform(
+        deepcopy(element_data)
+    )
+    output = fMRIPrepConfoundRemover(
+        **params, block_size=13, dtype="float64"
+    ).fit_transform(element_data)
+
+    expected_img = expected["BOLD"]["data"]
+    output_img = output["BOLD"]["data"]
+    # Scrubbed volumes are removed
+    assert output_img.shape == expected_img.shape
+    assert output_img.shape[3] < 50
+    assert output_img.get_data_dtype() == np.float64
+    assert_allclose(
+        output_img.get_fdata(), expected_img.get_fdata(), atol=1e-4
+    )
+    assert output_img.header.get_zooms()[3] == 2.0
+    assert ("mask" in output["BOLD"]) == use_mask
+    WorkDirManager().cleanup_elementdir()
@@ -0,0 +1,311 @@
+"""Provide tests for fused cleaning."""
+
+# Authors: Synchon Mandal <s.mandal@fz-juelich.de>
+# License: AGPL
+
+from copy import deepcopy
+from pathlib import Path
+from typing import Any
+
+import nibabel as nib
+import numpy as np
+import pandas as pd
+import pytest
+from numpy.testing import assert_allclose
+
+from junifer.data import MaskRegistry
+from junifer.pipeline import WorkDirManager
+from junifer.preprocess import (
+    Smoothing,
+    TemporalFilter,
+    fMRIPrepConfoundRemover,
+    fused_clean_fit_transform,
+    group_fusable_preprocessors,
+)
+from junifer.utils import config
+
+
+def _make_element_data(n_scans: int = 60) -> dict[str, Any]:
+    """Create synthetic element data with fMRIPrep confounds.
+
+    Parameters
+    ----------
+    n_scans : int, optional
+        The number of scans (default 60).
+
+    Returns
+    -------
+    dict
+        The Junifer Data object.
+
+    """
+    rng = np.random.default_rng(42)
+    shape = (6, 7, 5)
+    time = np.arange(n_scans)
+    bold = (
+        100
+        + rng.standard_normal((*shape, n_scans))
+        + 0.05 * time
+        + np.sin(time / 3)
+    ).astype(np.float32)
+    bold_img = nib.Nifti1Image(bold, np.diag([3.0, 3.0, 3.0, 1.0]))
+    bold_img.header.set_zooms((3.0, 3.0, 3.0, 2.0))
+    columns = [
+        "trans_x",
+        "trans_y",
+        "trans_z",
+        "rot_x",
+        "rot_y",
+        "rot_z",
+        "csf",
+        "white_matter",
+    ]
+    confounds_df = pd.DataFrame(
+        rng.standard_normal((n_scans, len(columns))), columns=columns
+    )
+    confounds_df["framewise_displacement"] = np.abs(
+        rng.standard_normal(n_scans) * 0.2
+    )
+    confounds_df.loc[[20, 40], "framewise_displacement"] = 1.0
+    confounds_df["std_dvars"] = np.abs(rng.standard_normal(n_scans) * 0.5)
+    return {
+        "BOLD": {
+            "data": bold_img,
+            "path": Path("bold.nii.gz"),
+            "space": "MNI152NLin6Asym",
+            "confounds": {"data": confounds_df, "format": "fmriprep"},
+            "meta": {},
+        }
+    }
+
+
+def test_group_fusable_preprocessors() -> None:
+    """Test grouping of fusable preprocessors."""
+    confound_remover = fMRIPrepConfoundRemover()
+    temporal_filter = TemporalFilter()
+    smoothing = Smoothing(using="nilearn", on="BOLD", smoothing_params={})
+    groups = group_fusable_preprocessors(
+        [confound_remover, temporal_filter, smoothing, temporal_filter]
+    )
+    assert groups == [
+        [confound_remover, temporal_filter],
+        [smoothing],
+        [temporal_filter],
+    ]
+
+
+class _CustomTemporalFilter(TemporalFilter):
+    """TemporalFilter with a modified preprocess."""
+
+    def preprocess(
+        self,
+        input: dict[str, Any],
+        extra_input: dict[str, Any] | None = None,
+    ) -> dict[str, Any]:
+        """Preprocess.
+
+        Parameters
+        ----------
+        input : dict
+            A single input from the Junifer Data object to preprocess.
+        extra_input : dict, optional
+            The other fields in the Junifer Data object.
+
+        Returns
+        -------
+        dict
+            The computed result as dictionary.
+
+        """
+        input["custom"] = True
+        return super().preprocess(input, extra_input)
+
+
+@pytest.mark.parametrize(
+    "remover_masks, filter, fused",
+    [
+        ("a", TemporalFilter(masks="inherit"), True),
+        ("a", TemporalFilter(masks=["inherit"]), True),
+        ("a", TemporalFilter(masks="a"), True),
+        (None, TemporalFilter(), True),
+        ("a", TemporalFilter(masks="b"), False),
+        ("a", TemporalFilter(), False),
+        (None, TemporalFilter(masks="b"), False),
+        (None, _CustomTemporalFilter(), False),
+    ],
+)
+def test_group_fusable_preprocessors_refused(
+    remover_masks: str | None, filter: TemporalFilter, fused: bool
+) -> None:
+    """Test fusion is refused for other masks or modified preprocessing.
+
+    Parameters
+    ----------
+    remover_masks : str or None
+        The parametrized masks of fMRIPrepConfoundRemover.
+    filter : TemporalFilter
+        The parametrized TemporalFilter.
+    fused : bool
+        The parametrized flag for fusion.
+
+    """
+    confound_remover = fMRIPrepConfoundRemover(masks=remover_masks)
+    groups = group_fusable_preprocessors([confound_remover, filter])
+    if fused:
+        assert groups == [[confound_remover, filter]]
+    else:
+        assert groups == [[confound_remover], [filter]]
+
+
+@pytest.mark.parametrize(
+    "remover_params, filter_params, use_mask",
+    [
+        (
+            {"strategy": {"motion": "basic", "wm_csf": "basic"}},
+            {"low_pass": 0.1, "high_pass": 0.01},
+            False,
+        ),
+        (
+            {
+                "strategy": {"motion": "basic", "wm_csf": "basic"},
+                "standardize": False,
+            },
+            {"low_pass": 0.1, "detrend": False},
+            True,
+        ),
+        (
+            {
+                "strategy": {
+                    "motion": "basic",
+                    "wm_csf": "basic",
+                    "scrubbing": True,
+                },
+            },
+            {"high_pass": 0.01, "t_r": 2.0},
+            False,
+        ),
+        (
+            {
+                "strategy": {"motion": "basic", "wm_csf": "basic"},
+                "low_pass": 0.15,
+                "t_r": 2.0,
+            },
+            {"standardize": False},
+            True,
+        ),
+        (
+            {
+                "strategy": {
+                    "motion": "basic",
+                    "wm_csf": "basic",
+                    "scrubbing": True,
+                },
+                "block_size": 17,
+            },
+            {"low_pass": 0.1},
+            True,
+        ),
+    ],
+)
+def test_fused_clean_equals_sequential(
+    tmp_path: Path,
+    remover_params: dict[str, Any],
+    filter_params: dict[str, Any],
+    use_mask: bool,
+) -> None:
+    """Test fused cleaning against sequential cleaning.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+    remover_params : dict
+        The parametrized parameters for fMRIPrepConfoundRemover.
+    filter_params : dict
+        The parametrized parameters for TemporalFilter.
+    use_mask : bool
+        The parametrized flag for using a mask.
+
+    """
+    WorkDirManager().workdir = tmp_path
+    if use_mask:
+        mask_path = tmp_path / "mask.nii.gz"
+        mask = np.zeros((6, 7, 5), dtype=np.int8)
+        mask[1:5, 1:6, 1:4] = 1
+        nib.save(
+            nib.Nifti1Image(mask, np.diag([3.0, 3.0, 3.0, 1.0])), mask_path
+        )
+        MaskRegistry().register(
+            name="fused_clean_mask",
+            mask_path=mask_path,
+            space="MNI152NLin6Asym",
+            overwrite=True,
+        )
+        remover_params = {**remover_params, "masks": "fused_clean_mask"}
+        filter_params = {**filter_params, "masks": "inherit"}
+    preprocessors = [
+        fMRIPrepConfoundRemover(**remover_params),
+        TemporalFilter(**filter_params),
+    ]
+    element_data = _make_element_data()
+    # Sequential cleaning
+    sequential = deepcopy(element_data)
+    for preprocessor in preprocessors:
+        sequential = preprocessor.fit_transform(sequential)
+    # Fused cleaning
+    fused = fused_clean_fit_transform(preprocessors, element_data)
+
+    sequential_img = sequential["BOLD"]["data"]
+    fused_img = fused["BOLD"]["data"]
+    assert fused_img.shape == sequential_img.shape
+    assert_allclose(
+        fused_img.get_fdata(), sequential_img.get_fdata(), atol=1e-4
+    )
+    assert (
+        fused_img.header.get_zooms()[3] == sequential_img.header.get_zooms()[3]
+    )
+    assert fused["BOLD"]["meta"] == sequential["BOLD"]["meta"]
+    assert ("mask" in fused["BOLD"]) == use_mask
+    WorkDirManager().cleanup_elementdir()
+
+
+@pytest.mark.parametrize(
+    "block_size, dtype, memory, disk",
+    [
+        (None, None, 4 * 1000 * 8, 400),
+        (10, None, 1000 * 2 + 1000 * 4 + 3 * 10 * 10 * 8, 200),
+        (10, "float64", 1000 * 2 + 1000 * 8 + 3 * 10 * 10 * 8, 400),
+    ],
+)
+def test_clean_estimate_cost(
+    block_size: int | None, dtype: str | None, memory: int, disk: int
+) -> None:
+    """Test estimating the cost of cleaning.
+
+    Parameters
+    ----------
+    block_size : int or None
+        The parametrized number of voxels per block.
+    dtype : str or None
+        The parametrized data type to clean in.
+    memory : int
+        The parametrized expected memory.
+    disk : int
+        The parametrized expected temporary disk usage.
+
+    """
+    preprocessor = fMRIPrepConfoundRemover(
+        strategy={"wm_csf": "full"}, block_size=block_size, dtype=dtype
+    )
+    input = {"shape": [10, 10, 1, 10], "dtype": "int16", "size": 100}
+    assert preprocessor.estimate_cost(input) == {
+        "memory": memory,
+        "disk": disk,
+        "output": 0,
+    }
+    # Nothing written with lazy persistence
+    config.set(key="preprocessing.lazy", val=True)
+    try:
+        assert preprocessor.estimate_cost(input)["disk"] == 0
+    finally:
+        config.delete("preprocessing.lazy")
@@ -4,10 +4,16 @@
 # License: AGPL
 
 from contextlib import AbstractContextManager, nullcontext
+from pathlib import Path
 
+import nibabel as nib
+import numpy as np
+import pandas as pd
 import pytest
+from numpy.testing import assert_array_equal
 
 from junifer.datareader import DefaultDataReader
+from junifer.pipeline import WorkDirManager, ensure_data_path
 from junifer.preprocess import TemporalSlicer
 from junifer.testing.datagrabbers import PartlyCloudyTestingDataGrabber
 
@@ -127,3 +133,58 @@ def test_TemporalSlicer(
             assert output["BOLD"]["data"].shape[3] == expected_dim
             # Check confounds dim
             assert output["BOLD"]["confounds"]["data"].shape[0] == expected_dim
+
+
+@pytest.mark.parametrize("source", ["memory", "nii", "nii.gz"])
+def test_TemporalSlicer_zero_copy(tmp_path: Path, source: str) -> None:
+    """Test TemporalSlicer slicing without copies or temporary files.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+    source : str
+        The parametrized source of the image.
+
+    """
+    WorkDirManager().workdir = tmp_path / "workdir"
+    data = np.random.default_rng(1).random((3, 4, 5, 20)).astype(np.float32)
+    bold_img = nib.Nifti1Image(data, np.eye(4))
+    bold_img.header.set_zooms((1.0, 1.0, 1.0, 2.0))
+    if source != "memory":
+        nib.save(bold_img, tmp_path / f"bold.{source}")
+        bold_img = nib.load(tmp_path / f"bold.{source}")
+    confounds_df = pd.DataFrame(
+        np.random.default_rng(2).random((20, 3)), columns=["a", "b", "c"]
+    )
+    element_data = {
+        "BOLD": {
+            "data": bold_img,
+            "path": tmp_path / "bold.nii",
+            "space": "MNI152NLin6Asym",
+            "confounds": {"data": confounds_df, "format": "adhoc"},
+            "meta": {},
+        }
+    }
+    output = TemporalSlicer(start=4.0, stop=20.0).fit_transform(element_data)
+
+    sliced_img = output["BOLD"]["data"]
+    sliced_data = np.asanyarray(sliced_img.dataobj)
+    assert_array_equal(sliced_data, data[..., 2:10])
+    assert sliced_img.header.get_zooms()[3] == 2.0
+    if source == "memory":
+        assert np.shares_memory(sliced_data, data)
+    elif source == "nii":
+        assert isinstance(sliced_data, np.memmap)
+    sliced_confounds_df = output["BOLD"]["confounds"]["data"]
+    assert np.shares_memory(sliced_confounds_df.values, confounds_df.values)
+    # Nothing is written until needed
+    assert not output["BOLD"]["path"].exists()
+    assert not output["BOLD"]["confounds"]["path"].exists()
+    assert_array_equal(
+        nib.load(ensure_data_path(output["BOLD"])).get_fdata(),
+        data[..., 2:10],
+    )
+    ensure_data_path(output["BOLD"]["confounds"])
+    assert output["BOLD"]["confounds"]["path"].exists()
+    WorkDirManager().cleanup_elementdir()
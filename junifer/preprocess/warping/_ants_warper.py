@@ -12,7 +12,7 @@ import nibabel as nib
 import numpy as np
 
 from ...data import get_template, get_xfm
-from ...pipeline import ExtDep, WorkDirManager
+from ...pipeline import ExtDep, WorkDirManager, ensure_data_path
 from ...typing import Dependencies, ExternalDependencies
 from ...utils import raise_error, run_ext_cmd
 from ..base import logger
@@ -99,7 +99,7 @@ class ANTsWarper:
             resample_image_cmd = [
                 "ResampleImage",
                 "3",  # image dimension
-                f"{extra_input['T1w']['path'].resolve()}",
+                f"{ensure_data_path(extra_input['T1w']).resolve()}",
                 f"{resample_image_out_path.resolve()}",
                 f"{resolution}x{resolution}x{resolution}",
                 "0",  # option for spacing and not size
@@ -116,7 +116,7 @@ class ANTsWarper:
                 "-d 3",
                 "-e 3",
                 "-n LanczosWindowedSinc",
-                f"-i {input['path'].resolve()}",
+                f"-i {ensure_data_path(input).resolve()}",
                 # use resampled reference
                 f"-r {resample_image_out_path.resolve()}",
                 f"-t {warp_file_path.resolve()}",
@@ -153,7 +153,7 @@ class ANTsWarper:
                     "-d 3",
                     "-e 3",
                     "-n 'GenericLabel[NearestNeighbor]'",
-                    f"-i {input['mask']['path'].resolve()}",
+                    f"-i {ensure_data_path(input['mask']).resolve()}",
                     # use resampled reference
                     f"-r {input['reference']['path'].resolve()}",
                     f"-t {warp_file_path.resolve()}",
@@ -257,7 +257,7 @@ class ANTsWarper:
                 "-d 3",
                 "-e 3",
                 "-n LanczosWindowedSinc",
-                f"-i {input['path'].resolve()}",
+                f"-i {ensure_data_path(input).resolve()}",
                 f"-r {ref_path.resolve()}",
                 f"-t {xfm_file_path.resolve()}",
                 f"-o {warped_output_path.resolve()}",
@@ -295,7 +295,7 @@ class ANTsWarper:
                     "-d 3",
                     "-e 3",
                     "-n 'GenericLabel[NearestNeighbor]'",
-                    f"-i {input['mask']['path'].resolve()}",
+                    f"-i {ensure_data_path(input['mask']).resolve()}",
                     # use resampled reference or original
                     f"-r {ref_path.resolve()}",
                     f"-t {xfm_file_path.resolve()}",
@@ -11,7 +11,7 @@ from typing import (
 import nibabel as nib
 import numpy as np
 
-from ...pipeline import ExtDep, WorkDirManager
+from ...pipeline import ExtDep, WorkDirManager, ensure_data_path
 from ...typing import Dependencies, ExternalDependencies
 from ...utils import raise_error, run_ext_cmd
 from ..base import logger
@@ -98,8 +98,8 @@ class FSLWarper:
             flirt_cmd = [
                 "flirt",
                 "-interp spline",
-                f"-in {extra_input['T1w']['path'].resolve()}",
-                f"-ref {extra_input['T1w']['path'].resolve()}",
+                f"-in {ensure_data_path(extra_input['T1w']).resolve()}",
+                f"-ref {ensure_data_path(extra_input['T1w']).resolve()}",
                 f"-applyisoxfm {resolution}",
                 f"-out {flirt_out_path.resolve()}",
             ]
@@ -112,7 +112,7 @@ class FSLWarper:
             applywarp_cmd = [
                 "applywarp",
                 "--interp=spline",
-                f"-i {input['path'].resolve()}",
+                f"-i {ensure_data_path(input).resolve()}",
                 # use resampled reference
                 f"-r {flirt_out_path.resolve()}",
                 f"-w {warp_file_path.resolve()}",
@@ -147,7 +147,7 @@ class FSLWarper:
                 applywarp_mask_cmd = [
                     "applywarp",
                     "--interp=nn",
-                    f"-i {input['mask']['path'].resolve()}",
+                    f"-i {ensure_data_path(input['mask']).resolve()}",
                     # use resampled reference
                     f"-r {input['reference']['path'].resolve()}",
                     f"-w {warp_file_path.resolve()}",
@@ -227,7 +227,7 @@ class FSLWarper:
             applywarp_cmd = [
                 "applywarp",
                 "--interp=spline",
-                f"-i {input['path'].resolve()}",
+                f"-i {ensure_data_path(input).resolve()}",
                 # use resampled reference or original
                 f"-r {ref_path.resolve()}",
                 f"-w {warp_file_path.resolve()}",
@@ -264,7 +264,7 @@ class FSLWarper:
                 applywarp_mask_cmd = [
                     "applywarp",
                     "--interp=nn",
-                    f"-i {input['mask']['path'].resolve()}",
+                    f"-i {ensure_data_path(input['mask']).resolve()}",
                     # use resampled reference or original
                     f"-r {ref_path.resolve()}",
                     f"-w {warp_file_path.resolve()}",
@@ -0,0 +1,699 @@
+"""Provide class for in-process space warping."""
+
+# Authors: Synchon Mandal <s.mandal@fz-juelich.de>
+# License: AGPL
+
+import hashlib
+import json
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, ClassVar, Literal
+
+import h5py
+import nibabel as nib
+import numpy as np
+from scipy.io import loadmat
+from scipy.ndimage import map_coordinates
+
+from ...data import get_template, get_xfm
+from ...pipeline import WorkDirManager, persist_data_img
+from ...typing import Dependencies
+from ...utils import raise_error
+from ..base import logger
+
+
+if TYPE_CHECKING:
+    from nibabel.nifti1 import Nifti1Image
+
+
+__all__ = ["JuniferWarper"]
+
+
+# Sampling points per (warp file, reference grid)
+_POINTS_CACHE: OrderedDict[str, np.ndarray] = OrderedDict()
+_POINTS_CACHE_SIZE = 4
+
+# RAS <-> LPS
+_LPS = np.diag([-1.0, -1.0, 1.0])
+
+# Spline coefficient intent codes of FNIRT / TOPUP
+_FSL_COEFFICIENT_INTENTS = {2007, 2008, 2009, 2016, 2017}
+
+# Intent code of absolute warps, i.e., NIFTI_INTENT_POINTSET; displacement
+# fields (FSL_FNIRT_DISPLACEMENT_FIELD, NIFTI_INTENT_DISPVECT,
+# NIFTI_INTENT_VECTOR or none) are relative
+_FSL_ABSOLUTE_INTENT = 1008
+
+
+def _apply_affine(matrix: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """Apply a 4 x 4 affine to points of shape (3, N).
+
+    Parameters
+    ----------
+    matrix : numpy.ndarray
+        The affine.
+    points : numpy.ndarray
+        The points.
+
+    Returns
+    -------
+    numpy.ndarray
+        The transformed points.
+
+    """
+    return matrix[:3, :3] @ points + matrix[:3, 3:]
+
+
+def _grid_points(shape: tuple[int, ...], affine: np.ndarray) -> np.ndarray:
+    """Get the world coordinates of all voxels of a grid.
+
+    Parameters
+    ----------
+    shape : tuple of int
+        The 3D shape of the grid.
+    affine : numpy.ndarray
+        The voxel to world affine of the grid.
+
+    Returns
+    -------
+    numpy.ndarray
+        The world coordinates of shape (3, N) in C order of the voxels.
+
+    """
+    voxels = np.indices(shape[:3], dtype=np.float64).reshape(3, -1)
+    return _apply_affine(affine, voxels)
+
+
+def _sample_field(
+    field: np.ndarray, voxels: np.ndarray, outside_value: float = 0.0
+) -> np.ndarray:
+    """Linearly interpolate a vector field at continuous voxel indices.
+
+    Points outside the field's buffer get ``outside_value`` like ITK's
+    displacement field transform.
+
+    Parameters
+    ----------
+    field : numpy.ndarray
+        The vector field of shape (X, Y, Z, 3).
+    voxels : numpy.ndarray
+        The continuous voxel indices of shape (3, N).
+    outside_value : float, optional
+        The value outside the field (default 0.0).
+
+    Returns
+    -------
+    numpy.ndarray
+        The interpolated vectors of shape (3, N).
+
+    """
+    outside = np.any(
+        (voxels < -0.5)
+        | (voxels > np.asarray(field.shape[:3])[:, np.newaxis] - 0.5),
+        axis=0,
+    )
+    out = np.empty(voxels.shape, dtype=np.float64)
+    for c in range(3):
+        out[c] = map_coordinates(
+            field[..., c], voxels, order=1, mode="nearest"
+        )
+    out[:, outside] = outside_value
+    return out
+
+
+def _read_ants_transforms(path: Path) -> list[tuple[str, Any]]:
+    """Read ANTs transforms.
+
+    Supports ITK HDF5 (composite) transforms with affine and displacement
+    field components, ANTs affine ``.mat`` files and NIfTI displacement
+    fields.
+
+    Parameters
+    ----------
+    path : pathlib.Path
+        The path to the transform file.
+
+    Returns
+    -------
+    list of tuple
+        The transforms in file order as (kind, data) tuples, where kind is
+        ``"affine"`` with a 4 x 4 LPS matrix or ``"field"`` with a tuple of
+        displacement field (X, Y, Z, 3) and its LPS voxel to world affine.
+
+    Raises
+    ------
+    ValueError
+        If the transform type is not supported.
+
+    """
+    name = path.name.lower()
+    transforms = []
+    if name.endswith(".h5"):
+        with h5py.File(path, "r") as f:
+            group = f["TransformGroup"]
+            for key in sorted(group.keys(), key=int):
+                xfm = group[key]
+                xfm_type = xfm["TransformType"][0]
+                if isinstance(xfm_type, bytes):
+                    xfm_type = xfm_type.decode()
+                # Only holds the list of transforms
+                if xfm_type.startswith("CompositeTransform"):
+                    continue
+                params = np.asarray(xfm["TransformParameters"], dtype=float)
+                fixed = np.asarray(
+                    xfm["TransformFixedParameters"], dtype=float
+                )
+                if xfm_type.startswith(
+                    ("AffineTransform", "MatrixOffsetTransformBase")
+                ):
+                    transforms.append(("affine", _itk_affine(params, fixed)))
+                elif xfm_type.startswith("DisplacementFieldTransform"):
+                    size = fixed[:3].astype(int)
+                    grid = np.eye(4)
+                    grid[:3, :3] = fixed[9:18].reshape(3, 3) @ np.diag(
+                        fixed[6:9]
+                    )
+                    grid[:3, 3] = fixed[3:6]
+                    # ITK buffer order has x running fastest
+                    field = params.reshape(*size[::-1], 3).transpose(
+                        2, 1, 0, 3
+                    )
+                    transforms.append(("field", (field, grid)))
+                else:
+                    raise_error(f"Unsupported ITK transform: {xfm_type}")
+    elif name.endswith(".mat"):
+        mat = loadmat(path)
+        key = next(k for k in mat if k.startswith("AffineTransform"))
+        transforms.append(
+            (
+                "affine",
+                _itk_affine(mat[key].ravel(), mat["fixed"].ravel()),
+            )
+        )
+    elif name.endswith((".nii", ".nii.gz")):
+        img = nib.load(path)
+        field = np.asarray(img.dataobj, dtype=np.float64).reshape(
+            *img.shape[:3], 3
+        )
+        grid = np.eye(4)
+        grid[:3] = _LPS @ img.affine[:3]
+        transforms.append(("field", (field, grid)))
+    else:
+        raise_error(f"Unsupported ANTs transform file: {path}")
+    return transforms
+
+
+def _itk_affine(params: np.ndarray, fixed: np.ndarray) -> np.ndarray:
+    """Convert ITK affine parameters to a 4 x 4 matrix.
+
+    Parameters
+    ----------
+    params : numpy.ndarray
+        The 9 matrix (row-major) and 3 translation parameters.
+    fixed : numpy.ndarray
+        The center of rotation.
+
+    Returns
+    -------
+    numpy.ndarray
+        The 4 x 4 matrix in LPS.
+
+    """
+    matrix = params[:9].reshape(3, 3)
+    affine = np.eye(4)
+    affine[:3, :3] = matrix
+    affine[:3, 3] = params[9:12] + fixed[:3] - matrix @ fixed[:3]
+    return affine
+
+
+def _ants_points(
+    path: Path, ref_shape: tuple[int, ...], ref_affine: np.ndarray
+) -> np.ndarray:
+    """Get the RAS points to sample for each reference voxel with ANTs.
+
+    Parameters
+    ----------
+    path : pathlib.Path
+        The path to the transform file.
+    ref_shape : tuple of int
+        The shape of the reference grid.
+    ref_affine : numpy.ndarray
+        The affine of the reference grid.
+
+    Returns
+    -------
+    numpy.ndarray
+        The RAS world coordinates of shape (3, N).
+
+    """
+    points = _LPS @ _grid_points(ref_shape, ref_affine)
+    # Transforms are applied like a stack, last one first
+    for kind, xfm in reversed(_read_ants_transforms(path)):
+        if kind == "affine":
+            points = _apply_affine(xfm, points)
+        else:
+            field, grid = xfm
+            points = points + _sample_field(
+                field, _apply_affine(np.linalg.inv(grid), points)
+            )
+    return _LPS @ points
+
+
+def _fsl_scaled_voxel_matrix(
+    shape: tuple[int, ...], affine: np.ndarray
+) -> np.ndarray:
+    """Get FSL's voxel to scaled voxel (mm) matrix.
+
+    Parameters
+    ----------
+    shape : tuple of int
+        The shape of the image.
+    affine : numpy.ndarray
+        The affine of the image.
+
+    Returns
+    -------
+    numpy.ndarray
+        The 4 x 4 matrix.
+
+    """
+    zooms = np.sqrt(np.sum(affine[:3, :3] ** 2, axis=0))
+    matrix = np.diag([*zooms, 1.0])
+    # Radiological convention is used for neurological storage order
+    if np.linalg.det(affine[:3, :3]) > 0:
+        flip = np.eye(4)
+        flip[0, 0] = -1
+        flip[0, 3] = shape[0] - 1
+        matrix = matrix @ flip
+    return matrix
+
+
+def _fsl_points(
+    path: Path, ref_shape: tuple[int, ...], ref_affine: np.ndarray
+) -> np.ndarray:
+    """Get the FSL mm points to sample for each reference voxel.
+
+    Parameters
+    ----------
+    path : pathlib.Path
+        The path to the FNIRT / convertwarp displacement field. The warp
+        is absolute if its intent code is ``NIFTI_INTENT_POINTSET`` and
+        relative otherwise.
+    ref_shape : tuple of int
+        The shape of the reference grid.
+    ref_affine : numpy.ndarray
+        The affine of the reference grid.
+
+    Returns
+    -------
+    numpy.ndarray
+        The FSL scaled voxel coordinates in the moving image of shape
+        (3, N).
+
+    Raises
+    ------
+    ValueError
+        If the warp is a spline coefficient file.
+
+    """
+    warp_img = nib.load(path)
+    intent_code = int(warp_img.header["intent_code"])
+    if intent_code in _FSL_COEFFICIENT_INTENTS:
+        raise_error(
+            "Spline coefficient warps are not supported in-process, "
+            "convert them to a displacement field via FSL's convertwarp or "
+            "use the external warper."
+        )
+    field = np.asarray(warp_img.dataobj, dtype=np.float64).reshape(
+        *warp_img.shape[:3], 3
+    )
+    warp_matrix = _fsl_scaled_voxel_matrix(warp_img.shape, warp_img.affine)
+    points = _apply_affine(
+        _fsl_scaled_voxel_matrix(ref_shape, ref_affine),
+        np.indices(ref_shape[:3], dtype=np.float64).reshape(3, -1),
+    )
+    values = _sample_field(
+        field, _apply_affine(np.linalg.inv(warp_matrix), points)
+    )
+    if intent_code == _FSL_ABSOLUTE_INTENT:
+        logger.debug("Treating FSL warp as absolute")
+        return values
+    return points + values
+
+
+def _get_points(
+    path: Path,
+    warper: Literal["ants", "fsl"],
+    ref_shape: tuple[int, ...],
+    ref_affine: np.ndarray,
+) -> np.ndarray:
+    """Get cached sampling points for a warp file and reference grid.
+
+    Parameters
+    ----------
+    path : pathlib.Path
+        The path to the warp file.
+    warper : {"ants", "fsl"}
+        The tool which produced the warp file.
+    ref_shape : tuple of int
+        The shape of the reference grid.
+    ref_affine : numpy.ndarray
+        The affine of the reference grid.
+
+    Returns
+    -------
+    numpy.ndarray
+        The points of shape (3, N). These are RAS world coordinates for
+        ``"ants"`` and FSL scaled voxel coordinates for ``"fsl"``.
+
+    """
+    stat = Path(path).stat()
+    key = hashlib.md5(
+        json.dumps(
+            [
+                str(Path(path).resolve()),
+                stat.st_mtime_ns,
+                stat.st_size,
+                warper,
+                list(ref_shape[:3]),
+                np.round(ref_affine, 6).tolist(),
+            ]
+        ).encode("utf-8"),
+        usedforsecurity=False,
+    ).hexdigest()
+    if key in _POINTS_CACHE:
+        logger.debug(f"Using cached sampling points for {path}")
+        _POINTS_CACHE.move_to_end(key)
+        return _POINTS_CACHE[key]
+    logger.debug(f"Computing sampling points for {path}")
+    if warper == "ants":
+        points = _ants_points(Path(path), ref_shape, ref_affine)
+    else:
+        points = _fsl_points(Path(path), ref_shape, ref_affine)
+    points = points.astype(np.float32)
+    _POINTS_CACHE[key] = points
+    if len(_POINTS_CACHE) > _POINTS_CACHE_SIZE:
+        _POINTS_CACHE.popitem(last=False)
+    return points
+
+
+def _resample(
+    img: "Nifti1Image",
+    points: np.ndarray,
+    warper: Literal["ants", "fsl"],
+    ref_shape: tuple[int, ...],
+    ref_affine: np.ndarray,
+    order: int,
+    n_jobs: int,
+) -> "Nifti1Image":
+    """Resample an image at the sampling points.
+
+    Parameters
+    ----------
+    img : nibabel.nifti1.Nifti1Image
+        The 3D or 4D image to resample.
+    points : numpy.ndarray
+        The sampling points as returned by :func:`_get_points`.
+    warper : {"ants", "fsl"}
+        The tool which produced the warp file.
+    ref_shape : tuple of int
+        The shape of the reference grid.
+    ref_affine : numpy.ndarray
+        The affine of the reference grid.
+    order : int
+        The spline interpolation order; 0 for nearest neighbour.
+    n_jobs : int
+        The number of threads to resample volumes in parallel.
+
+    Returns
+    -------
+    nibabel.nifti1.Nifti1Image
+        The resampled image.
+
+    """
+    if warper == "ants":
+        to_voxel = np.linalg.inv(img.affine)
+    else:
+        to_voxel = np.linalg.inv(
+            _fsl_scaled_voxel_matrix(img.shape, img.affine)
+        )
+    voxels = _apply_affine(to_voxel, points.astype(np.float64))
+    data = np.asanyarray(img.dataobj)
+    if order == 0:
+        out_dtype = data.dtype
+    else:
+        out_dtype = np.float32
+    out = np.zeros((*ref_shape[:3], *data.shape[3:]), dtype=out_dtype)
+
+    def _resample_volume(index: tuple) -> None:
+        out[index] = map_coordinates(
+            np.asarray(data[index], dtype=np.float64),
+            voxels,
+            order=order,
+            mode="constant",
+            cval=0.0,
+        ).reshape(ref_shape[:3])
+
+    if data.ndim == 3:
+        indices = [(...,)]
+    else:
+        indices = [(..., t) for t in range(data.shape[3])]
+    if n_jobs > 1 and len(indices) > 1:
+        with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+            # Propagate errors
+            list(executor.map(_resample_volume, indices))
+    else:
+        for index in indices:
+            _resample_volume(index)
+
+    header = img.header.copy()
+    header.set_data_dtype(out_dtype)
+    return nib.Nifti1Image(out, ref_affine, header=header)
+
+
+def _resample_to_resolution(
+    img: "Nifti1Image", resolution: float
+) -> "Nifti1Image":
+    """Resample a 3D image to an isotropic resolution keeping the origin.
+
+    Parameters
+    ----------
+    img : nibabel.nifti1.Nifti1Image
+        The image to resample.
+    resolution : float
+        The isotropic resolution, in millimeters.
+
+    Returns
+    -------
+    nibabel.nifti1.Nifti1Image
+        The resampled image.
+
+    """
+    zooms = np.sqrt(np.sum(img.affine[:3, :3] ** 2, axis=0))
+    shape = tuple(
+        np.maximum(
+            np.round(np.asarray(img.shape[:3]) * zooms / resolution), 1
+        ).astype(int)
+    )
+    affine = img.affine.copy()
+    affine[:3, :3] = img.affine[:3, :3] / zooms * resolution
+    voxels = _apply_affine(
+        np.linalg.inv(img.affine) @ affine,
+        np.indices(shape, dtype=np.float64).reshape(3, -1),
+    )
+    data = map_coordinates(
+        np.asarray(img.dataobj, dtype=np.float64),
+        voxels,
+        order=3,
+        mode="nearest",
+    ).reshape(shape)
+    return nib.Nifti1Image(data.astype(np.float32), affine)
+
+
+class JuniferWarper:
+    """Class for in-process space warping.
+
+    This class applies ANTs or FSL warps without calling the external tools.
+    The warp file is read once per reference grid and the resulting sampling
+    points are cached, so that all volumes and masks are resampled via
+    :func:`scipy.ndimage.map_coordinates`, using cubic spline interpolation
+    for data and nearest neighbour interpolation for masks.
+
+    Supported warp files are ITK HDF5 composite transforms (with affine and
+    displacement field components), ANTs affine ``.mat`` files and
+    displacement fields as NIfTI for ANTs, and relative or absolute
+    displacement fields as NIfTI for FSL. FSL warps are relative unless
+    their intent code is ``NIFTI_INTENT_POINTSET``.
+
+    """
+
+    _DEPENDENCIES: ClassVar[Dependencies] = {
+        "h5py",
+        "nibabel",
+        "numpy",
+        "scipy",
+    }
+
+    def preprocess(
+        self,
+        input: dict[str, Any],
+        extra_input: dict[str, Any],
+        reference: str,
+        warper: Literal["ants", "fsl"],
+        n_jobs: int = 1,
+    ) -> dict[str, Any]:
+        """Preprocess in-process.
+
+        Parameters
+        ----------
+        input : dict
+            A single input from the Junifer Data object in which to preprocess.
+        extra_input : dict
+            The other fields in the Junifer Data object. Should have ``T1w``
+            and ``Warp`` data types.
+        reference : str
+            The data type or template space to use as reference for warping.
+        warper : {"ants", "fsl"}
+            The tool which produced the warp file.
+        n_jobs : int, optional
+            The number of threads to resample volumes in parallel
+            (default 1).
+
+        Returns
+        -------
+        dict
+            The ``input`` dictionary with updated values.
+
+        Raises
+        ------
+        RuntimeError
+            If warp file path could not be found in ``extra_input``.
+
+        """
+        # Create element-specific tempdir for storing post-warping assets
+        element_tempdir = WorkDirManager().get_element_tempdir(
+            prefix="junifer_warper"
+        )
+        input_space = input["space"]
+
+        # Native space warping
+        if reference == "T1w":
+            logger.debug(f"Using junifer to apply {warper} warp")
+            # Get warp file path
+            xfm_file_path = None
+            for entry in extra_input["Warp"]:
+                if entry["dst"] == "native":
+                    xfm_file_path = entry["path"]
+            # Resample reference to the min of the input voxel sizes
+            ref_img = _resample_to_resolution(
+                extra_input["T1w"]["data"],
+                np.min(input["data"].header.get_zooms()[:3]),
+            )
+            ref_path = element_tempdir / "resampled_reference.nii.gz"
+            warped_space = extra_input["T1w"]["space"]
+            suffix = ""
+        else:
+            logger.debug(
+                f"Using junifer to apply {warper} warp from {input_space} "
+                f"space to {reference} space"
+            )
+            # Native to MNI
+            if input_space == "native":
+                # Get warp file path
+                xfm_file_path = None
+                for entry in extra_input["Warp"]:
+                    if entry["src"] == "native" and entry["dst"] == reference:
+                        xfm_file_path = entry["path"]
+                # Resample reference if input data resolution and
+                # reference resolution don't match
+                input_res = np.min(input["data"].header.get_zooms()[:3])
+                ref_img = input["reference"]["data"]
+                ref_path = input["reference"]["path"]
+                if input_res != np.min(ref_img.header.get_zooms()[:3]):
+                    ref_img = _resample_to_resolution(ref_img, input_res)
+                    ref_path = (
+                        element_tempdir
+                        / f"resampled_reference-{reference}.nii.gz"
+                    )
+            # MNI to MNI
+            else:
+                xfm_file_path = get_xfm(src=input_space, dst=reference)
+                ref_img = get_template(
+                    space=reference,
+                    target_img=input["data"],
+                    extra_input=None,
+                )
+                ref_path = element_tempdir / f"{reference}_T1w.nii.gz"
+            warped_space = reference
+            suffix = f"_from_{input_space}_to_{reference}"
+        if xfm_file_path is None:
+            raise_error(
+                klass=RuntimeError,
+                msg="Could not find correct warp file path",
+            )
+        # Reference is needed by path for warping masks, parcellations
+        # and maps later
+        if not Path(ref_path).exists():
+            nib.save(ref_img, ref_path)
+
+        ref_shape = ref_img.shape[:3]
+        ref_affine = ref_img.affine
+        points = _get_points(xfm_file_path, warper, ref_shape, ref_affine)
+
+        warped_img = _resample(
+            input["data"],
+            points,
+            warper,
+            ref_shape,
+            ref_affine,
+            order=3,
+            n_jobs=n_jobs,
+        )
+        warped_path = persist_data_img(
+            warped_img, element_tempdir / f"warped_data{suffix}.nii.gz"
+        )
+
+        logger.debug("Updating warped data")
+        input.update(
+            {
+                # Update path to sync with "data"
+                "path": warped_path,
+                "data": warped_img,
+                "space": warped_space,
+                # Save resampled reference path
+                "reference": {"path": ref_path},
+                # Keep pre-warp space for further operations
+                "prewarp_space": input_space,
+            }
+        )
+
+        # Check for data type's mask and warp if found
+        if input.get("mask") is not None:
+            logger.debug("Warping associated mask")
+            warped_mask_img = _resample(
+                input["mask"]["data"],
+                points,
+                warper,
+                ref_shape,
+                ref_affine,
+                order=0,
+                n_jobs=1,
+            )
+            warped_mask_path = persist_data_img(
+                warped_mask_img,
+                element_tempdir / f"warped_mask{suffix}.nii.gz",
+            )
+            logger.debug("Updating warped mask data")
+            input.update(
+                {
+                    "mask": {
+                        # Update path to sync with "data"
+                        "path": warped_mask_path,
+                        "data": warped_mask_img,
+                        "space": warped_space,
+                    }
+                }
+            )
+
+        return input
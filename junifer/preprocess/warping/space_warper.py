@@ -7,7 +7,7 @@ from collections.abc import Sequence
 from enum import Enum
 from typing import Annotated, Any, ClassVar, Literal
 
-from pydantic import BeforeValidator
+from pydantic import BeforeValidator, PositiveInt
 from templateflow import api as tflow
 
 from ...api.decorators import register_preprocessor
@@ -17,6 +17,7 @@ from ...utils import ensure_list_or_none, raise_error
 from ..base import BasePreprocessor, logger
 from ._ants_warper import ANTsWarper
 from ._fsl_warper import FSLWarper
+from ._junifer_warper import JuniferWarper
 
 
 __all__ = ["SpaceWarper", "SpaceWarpingImpl"]
@@ -28,12 +29,14 @@ class SpaceWarpingImpl(str, Enum):
     * ``fsl`` : FSL's ``applywarp``
     * ``ants`` : ANTs' ``antsApplyTransforms``
     * ``auto`` : Auto-select tool when ``reference="T1w"``
+    * ``junifer`` : In-process application of ANTs' or FSL's warps
 
     """
 
     fsl = "fsl"
     ants = "ants"
     auto = "auto"
+    junifer = "junifer"
 
 
 _on = Literal[
@@ -66,6 +69,18 @@ class SpaceWarper(BasePreprocessor):
          ``DataType.FALFF``, ``DataType.GCOR``, ``DataType.LCOR``} or \
          list of them
         The data type(s) to warp.
+    n_jobs : int, optional
+        The number of threads to resample volumes in parallel, only used if
+        ``using="junifer"`` (default 1).
+
+    Notes
+    -----
+    With ``using="junifer"``, the warp is read once and the sampling
+    coordinates are cached per warp file and reference grid, so that data
+    and masks are resampled in-process without calling the external tools.
+    Data is interpolated with cubic splines instead of the external tools'
+    defaults, and FSL warps need to be displacement fields, not spline
+    coefficients.
 
     """
 
@@ -82,6 +97,10 @@ class SpaceWarper(BasePreprocessor):
             "using": SpaceWarpingImpl.auto,
             "depends_on": [FSLWarper, ANTsWarper],
         },
+        {
+            "using": SpaceWarpingImpl.junifer,
+            "depends_on": [JuniferWarper],
+        },
     ]
     _VALID_DATA_TYPES: ClassVar[Sequence[DataType]] = [
         DataType.T1w,
@@ -101,6 +120,7 @@ class SpaceWarper(BasePreprocessor):
         _on | list[_on],
         BeforeValidator(ensure_list_or_none),
     ]
+    n_jobs: PositiveInt = 1
 
     def validate_preprocessor_params(self) -> None:
         """Run extra logical validation for preprocessor."""
@@ -141,7 +161,8 @@ class SpaceWarper(BasePreprocessor):
             from native to template space.
         RuntimeError
             If warper could not be found in ``extra_input`` when
-            ``using="auto"`` or converting from native space or
+            ``using="auto"`` or ``using="junifer"`` or converting from
+            native space or
             if the data is in the correct space and does not require
             warping or
             if FSL or "auto" is used when ``reference!="T1w"``.
@@ -158,7 +179,7 @@ class SpaceWarper(BasePreprocessor):
                 )
             # Conditional preprocessor
             warper = None
-            if self.using == "auto":
+            if self.using in ["auto", "junifer"]:
                 for entry in extra_input["Warp"]:
                     if entry["dst"] == "native":
                         warper = entry["warper"]
@@ -168,7 +189,15 @@ class SpaceWarper(BasePreprocessor):
                     )
             else:
                 warper = self.using
-            if warper == "fsl":
+            if self.using == "junifer":
+                input = JuniferWarper().preprocess(
+                    input=input,
+                    extra_input=extra_input,
+                    reference=self.reference,
+                    warper=warper,
+                    n_jobs=self.n_jobs,
+                )
+            elif warper == "fsl":
                 input = FSLWarper().preprocess(
                     input=input,
                     extra_input=extra_input,
@@ -183,7 +212,10 @@ class SpaceWarper(BasePreprocessor):
         else:
             input_space = input["space"]
             # Check pre-requirements for space manipulation
-            if self.using == "ants" and self.reference == input_space:
+            if (
+                self.using in ["ants", "junifer"]
+                and self.reference == input_space
+            ):
                 raise_error(
                     (
                         f"The target data is in {self.reference} space "
@@ -219,7 +251,15 @@ class SpaceWarper(BasePreprocessor):
                     raise_error(
                         klass=RuntimeError, msg="Could not find correct warper"
                     )
-                if warper == "fsl":
+                if self.using == "junifer" and warper in ["fsl", "ants"]:
+                    input = JuniferWarper().preprocess(
+                        input=input,
+                        extra_input=extra_input,
+                        reference=input_prewarp_space,
+                        warper=warper,
+                        n_jobs=self.n_jobs,
+                    )
+                elif warper == "fsl":
                     input = FSLWarper().preprocess(
                         input=input,
                         extra_input=extra_input,
@@ -247,6 +287,14 @@ class SpaceWarper(BasePreprocessor):
                         klass=RuntimeError,
                     )
                 # Transform from MNI to MNI template space possible
+                elif self.using == "junifer":
+                    input = JuniferWarper().preprocess(
+                        input=input,
+                        extra_input={},
+                        reference=self.reference,
+                        warper="ants",
+                        n_jobs=self.n_jobs,
+                    )
                 else:
                     input = ANTsWarper().preprocess(
                         input=input,
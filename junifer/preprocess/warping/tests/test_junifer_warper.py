@@ -0,0 +1,735 @@
+"""Provide tests for JuniferWarper."""
+
+# Authors: Synchon Mandal <s.mandal@fz-juelich.de>
+# License: AGPL
+
+import socket
+from pathlib import Path
+
+import h5py
+import nibabel as nib
+import numpy as np
+import pytest
+from nilearn.image import resample_to_img
+from numpy.testing import assert_allclose, assert_array_equal
+from scipy.io import savemat
+
+from junifer.datagrabber import (
+    DataladHCP1200,
+    DataType,
+    DMCC13Benchmark,
+    DMCCPhaseEncoding,
+    DMCCRun,
+    DMCCSession,
+    DMCCTask,
+    HCP1200PhaseEncoding,
+    HCP1200Task,
+)
+from junifer.datareader import DefaultDataReader
+from junifer.pipeline import WorkDirManager
+from junifer.pipeline.utils import _check_ants, _check_fsl
+from junifer.preprocess import SpaceWarper, SpaceWarpingImpl
+from junifer.preprocess.warping import _junifer_warper
+from junifer.preprocess.warping._junifer_warper import (
+    JuniferWarper,
+    _apply_affine,
+    _fsl_scaled_voxel_matrix,
+)
+from junifer.typing import DataGrabberLike
+from junifer.utils import run_ext_cmd
+
+
+def _make_img(n_volumes: int = 3) -> nib.Nifti1Image:
+    """Create a smooth synthetic 4D image.
+
+    Parameters
+    ----------
+    n_volumes : int, optional
+        The number of volumes (default 3).
+
+    Returns
+    -------
+    nibabel.nifti1.Nifti1Image
+        The image.
+
+    """
+    x, y, z = np.meshgrid(
+        np.arange(12), np.arange(10), np.arange(8), indexing="ij"
+    )
+    data = np.stack(
+        [
+            np.sin(x / 3.0 + t) + np.cos(y / 4.0) + z / 8.0
+            for t in range(n_volumes)
+        ],
+        axis=-1,
+    ).astype(np.float32)
+    affine = np.eye(4)
+    affine[:3, 3] = [-6.0, -5.0, -4.0]
+    return nib.Nifti1Image(data, affine)
+
+
+def _write_itk_h5(path: Path, transforms: list[tuple]) -> None:
+    """Write an ITK HDF5 composite transform.
+
+    Parameters
+    ----------
+    path : pathlib.Path
+        The path to write to.
+    transforms : list of tuple
+        The (type, parameters, fixed parameters) of each transform.
+
+    """
+    with h5py.File(path, "w") as f:
+        group = f.create_group("TransformGroup")
+        xfm = group.create_group("0")
+        xfm["TransformType"] = [b"CompositeTransform_double_3_3"]
+        for i, (xfm_type, params, fixed) in enumerate(transforms, start=1):
+            xfm = group.create_group(str(i))
+            xfm["TransformType"] = [xfm_type.encode()]
+            xfm["TransformParameters"] = np.asarray(params, dtype=float)
+            xfm["TransformFixedParameters"] = np.asarray(fixed, dtype=float)
+
+
+def _translation_params(translation: list[float]) -> list[float]:
+    """Get ITK affine parameters for a translation.
+
+    Parameters
+    ----------
+    translation : list of float
+        The translation in LPS, in millimeters.
+
+    Returns
+    -------
+    list of float
+        The parameters.
+
+    """
+    return [*np.eye(3).ravel(), *translation]
+
+
+def _smooth_field(shape: tuple[int, ...]) -> np.ndarray:
+    """Create a smooth synthetic displacement field.
+
+    Parameters
+    ----------
+    shape : tuple of int
+        The 3D shape of the field.
+
+    Returns
+    -------
+    numpy.ndarray
+        The displacements of shape (X, Y, Z, 3), in millimeters.
+
+    """
+    x, y, z = np.meshgrid(
+        *[np.arange(n, dtype=float) for n in shape[:3]], indexing="ij"
+    )
+    return np.stack(
+        [
+            1.5 * np.sin(y / 4.0),
+            np.cos(x / 5.0) - 0.5,
+            0.5 * np.sin((x + z) / 6.0),
+        ],
+        axis=-1,
+    ).astype(np.float32)
+
+
+def _fsl_absolute_field(img: nib.Nifti1Image, field: np.ndarray) -> np.ndarray:
+    """Convert a relative FSL displacement field to an absolute one.
+
+    Parameters
+    ----------
+    img : nibabel.nifti1.Nifti1Image
+        The image defining the grid of the field.
+    field : numpy.ndarray
+        The relative displacements of shape (X, Y, Z, 3).
+
+    Returns
+    -------
+    numpy.ndarray
+        The absolute FSL scaled voxel coordinates of shape (X, Y, Z, 3).
+
+    """
+    points = _apply_affine(
+        _fsl_scaled_voxel_matrix(img.shape, img.affine),
+        np.indices(img.shape[:3], dtype=np.float64).reshape(3, -1),
+    )
+    return (points.T.reshape(field.shape) + field).astype(np.float32)
+
+
+def _element_data(tmp_path: Path, warp_path: Path, warper: str) -> dict:
+    """Create element data for native space warping.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+    warp_path : pathlib.Path
+        The path to the warp file.
+    warper : str
+        The warper of the warp file.
+
+    Returns
+    -------
+    dict
+        The Junifer Data object.
+
+    """
+    img = _make_img()
+    t1w_img = nib.Nifti1Image(img.get_fdata()[..., 0], img.affine)
+    mask = np.zeros(img.shape[:3], dtype=np.int8)
+    mask[3:9, 2:8, 2:6] = 1
+    mask_img = nib.Nifti1Image(mask, img.affine)
+    return {
+        "BOLD": {
+            "data": img,
+            "path": tmp_path / "bold.nii.gz",
+            "space": "MNI152NLin6Asym",
+            "mask": {"data": mask_img, "space": "MNI152NLin6Asym"},
+            "meta": {},
+        },
+        "T1w": {
+            "data": t1w_img,
+            "path": tmp_path / "t1w.nii.gz",
+            "space": "native",
+            "meta": {},
+        },
+        "Warp": [
+            {
+                "path": warp_path,
+                "src": "MNI152NLin6Asym",
+                "dst": "native",
+                "warper": warper,
+            }
+        ],
+    }
+
+
+@pytest.mark.parametrize("suffix", [".h5", ".mat", ".nii.gz", "fsl"])
+def test_JuniferWarper_identity(tmp_path: Path, suffix: str) -> None:
+    """Test JuniferWarper with identity warps.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+    suffix : str
+        The parametrized warp file type.
+
+    """
+    WorkDirManager().workdir = tmp_path
+    img = _make_img()
+    warper = "ants"
+    if suffix == ".h5":
+        warp_path = tmp_path / "warp.h5"
+        _write_itk_h5(
+            warp_path,
+            [
+                (
+                    "AffineTransform_double_3_3",
+                    _translation_params([0] * 3),
+                    [0] * 3,
+                )
+            ],
+        )
+    elif suffix == ".mat":
+        warp_path = tmp_path / "warp.mat"
+        savemat(
+            warp_path,
+            {
+                "AffineTransform_double_3_3": np.array(
+                    _translation_params([0] * 3)
+                )[:, np.newaxis],
+                "fixed": np.zeros((3, 1)),
+            },
+            format="4",
+        )
+    else:
+        warp_path = tmp_path / "warp.nii.gz"
+        field = np.zeros((*img.shape[:3], 1, 3), dtype=np.float32)
+        if suffix == "fsl":
+            warper = "fsl"
+            field = field[:, :, :, 0, :]
+        nib.save(nib.Nifti1Image(field, img.affine), warp_path)
+
+    element_data = _element_data(tmp_path, warp_path, warper)
+    output = JuniferWarper().preprocess(
+        input=element_data["BOLD"],
+        extra_input=element_data,
+        reference="T1w",
+        warper=warper,
+        n_jobs=2,
+    )
+    assert output["space"] == "native"
+    assert output["prewarp_space"] == "MNI152NLin6Asym"
+    assert output["reference"]["path"].exists()
+    assert output["data"].shape == img.shape
+    assert_allclose(output["data"].get_fdata(), img.get_fdata(), atol=1e-5)
+    assert output["mask"]["space"] == "native"
+    assert output["mask"]["data"].get_data_dtype() == np.int8
+    assert_array_equal(
+        output["mask"]["data"].get_fdata(),
+        element_data["BOLD"]["mask"]["data"].get_fdata(),
+    )
+    WorkDirManager().cleanup_elementdir()
+
+
+@pytest.mark.parametrize("kind", ["affine", "field", "fsl", "fsl_absolute"])
+def test_JuniferWarper_translation(tmp_path: Path, kind: str) -> None:
+    """Test JuniferWarper with a translation.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+    kind : str
+        The parametrized kind of warp.
+
+    """
+    WorkDirManager().workdir = tmp_path
+    img = _make_img()
+    warper = "ants"
+    if kind == "affine":
+        warp_path = tmp_path / "warp.h5"
+        # 2 mm along L is -2 mm along R
+        _write_itk_h5(
+            warp_path,
+            [
+                (
+                    "AffineTransform_double_3_3",
+                    _translation_params([2.0, 0.0, 0.0]),
+                    [1.0, 2.0, 3.0],
+                )
+            ],
+        )
+    elif kind == "field":
+        warp_path = tmp_path / "warp.h5"
+        size = np.array([14, 12, 10])
+        field = np.zeros((*size[::-1], 3))
+        field[..., 0] = 2.0
+        _write_itk_h5(
+            warp_path,
+            [
+                (
+                    "DisplacementFieldTransform_double_3_3",
+                    field.ravel(),
+                    # size, origin (LPS), spacing, direction
+                    [*size, -7.0, -6.0, -5.0, 1, 1, 1, *np.eye(3).ravel()],
+                )
+            ],
+        )
+    else:
+        warper = "fsl"
+        warp_path = tmp_path / "warp.nii.gz"
+        # Neurological storage order flips x for FSL, hence + is -
+        field = np.zeros((*img.shape[:3], 3), dtype=np.float32)
+        field[..., 0] = 2.0
+        warp_img = nib.Nifti1Image(field, img.affine)
+        # Absolute warps are told apart by their intent
+        if kind == "fsl_absolute":
+            warp_img = nib.Nifti1Image(
+                _fsl_absolute_field(img, field), img.affine
+            )
+            warp_img.header.set_intent("pointset")
+        else:
+            warp_img.header.set_intent("fnirt disp field")
+        nib.save(warp_img, warp_path)
+
+    element_data = _element_data(tmp_path, warp_path, warper)
+    output = JuniferWarper().preprocess(
+        input=element_data["BOLD"],
+        extra_input=element_data,
+        reference="T1w",
+        warper=warper,
+    )
+    warped = output["data"].get_fdata()
+    expected = img.get_fdata()
+    # Output voxel i samples input voxel i - 2
+    assert_allclose(warped[2:], expected[:-2], atol=1e-5)
+    assert_array_equal(warped[:2], 0)
+    WorkDirManager().cleanup_elementdir()
+
+
+def test_JuniferWarper_cache(tmp_path: Path) -> None:
+    """Test JuniferWarper caching of sampling points.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+
+    """
+    WorkDirManager().workdir = tmp_path
+    _junifer_warper._POINTS_CACHE.clear()
+    warp_path = tmp_path / "warp.h5"
+    _write_itk_h5(
+        warp_path,
+        [
+            (
+                "AffineTransform_double_3_3",
+                _translation_params([0] * 3),
+                [0] * 3,
+            )
+        ],
+    )
+    for _ in range(2):
+        element_data = _element_data(tmp_path, warp_path, "ants")
+        JuniferWarper().preprocess(
+            input=element_data["BOLD"],
+            extra_input=element_data,
+            reference="T1w",
+            warper="ants",
+        )
+    assert len(_junifer_warper._POINTS_CACHE) == 1
+    # Changing the file invalidates the entry
+    _write_itk_h5(
+        warp_path,
+        [
+            (
+                "AffineTransform_double_3_3",
+                _translation_params([1.0, 0, 0]),
+                [0] * 3,
+            )
+        ],
+    )
+    element_data = _element_data(tmp_path, warp_path, "ants")
+    JuniferWarper().preprocess(
+        input=element_data["BOLD"],
+        extra_input=element_data,
+        reference="T1w",
+        warper="ants",
+    )
+    assert len(_junifer_warper._POINTS_CACHE) == 2
+    WorkDirManager().cleanup_elementdir()
+
+
+def test_JuniferWarper_fsl_coefficients(tmp_path: Path) -> None:
+    """Test JuniferWarper error for FSL spline coefficients.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+
+    """
+    WorkDirManager().workdir = tmp_path
+    img = _make_img()
+    warp_img = nib.Nifti1Image(
+        np.zeros((*img.shape[:3], 3), dtype=np.float32), img.affine
+    )
+    warp_img.header.set_intent(2007)
+    warp_path = tmp_path / "coef.nii.gz"
+    nib.save(warp_img, warp_path)
+    element_data = _element_data(tmp_path, warp_path, "fsl")
+    with pytest.raises(ValueError, match="coefficient"):
+        JuniferWarper().preprocess(
+            input=element_data["BOLD"],
+            extra_input=element_data,
+            reference="T1w",
+            warper="fsl",
+        )
+    WorkDirManager().cleanup_elementdir()
+
+
+def test_SpaceWarper_junifer(tmp_path: Path) -> None:
+    """Test SpaceWarper with in-process warping.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+
+    """
+    WorkDirManager().workdir = tmp_path
+    warp_path = tmp_path / "warp.h5"
+    _write_itk_h5(
+        warp_path,
+        [
+            (
+                "AffineTransform_double_3_3",
+                _translation_params([0] * 3),
+                [0] * 3,
+            )
+        ],
+    )
+    element_data = _element_data(tmp_path, warp_path, "ants")
+    output = SpaceWarper(
+        using=SpaceWarpingImpl.junifer,
+        reference="T1w",
+        on=DataType.BOLD,
+        n_jobs=2,
+    ).preprocess(
+        input=element_data["BOLD"],
+        extra_input=element_data,
+    )
+    assert output["space"] == "native"
+    WorkDirManager().cleanup_elementdir()
+
+
+def _assert_equals_tool(
+    tmp_path: Path,
+    img: nib.Nifti1Image,
+    warp_path: Path,
+    warper: str,
+    out_path: Path,
+) -> None:
+    """Assert that JuniferWarper matches the output of an external tool.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+    img : nibabel.nifti1.Nifti1Image
+        The 3D image warped onto its own grid.
+    warp_path : pathlib.Path
+        The path to the warp file.
+    warper : str
+        The warper of the warp file.
+    out_path : pathlib.Path
+        The path to the output of the external tool.
+
+    """
+    element_data = _element_data(tmp_path, warp_path, warper)
+    element_data["BOLD"]["data"] = img
+    element_data["T1w"]["data"] = img
+    output = JuniferWarper().preprocess(
+        input=element_data["BOLD"],
+        extra_input=element_data,
+        reference="T1w",
+        warper=warper,
+    )
+    expected = nib.load(out_path).get_fdata().reshape(img.shape)
+    # Compare away from the borders
+    assert_allclose(
+        output["data"].get_fdata()[2:-2, 2:-2, 2:-2],
+        expected[2:-2, 2:-2, 2:-2],
+        atol=1e-2,
+    )
+
+
+def _apply_ants(tmp_path: Path, img: nib.Nifti1Image, warp_path: Path) -> Path:
+    """Apply a warp via antsApplyTransforms.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+    img : nibabel.nifti1.Nifti1Image
+        The 3D image warped onto its own grid.
+    warp_path : pathlib.Path
+        The path to the warp file.
+
+    Returns
+    -------
+    pathlib.Path
+        The path to the output.
+
+    """
+    img_path = tmp_path / "input.nii.gz"
+    nib.save(img, img_path)
+    out_path = tmp_path / "ants.nii.gz"
+    run_ext_cmd(
+        name="antsApplyTransforms",
+        cmd=[
+            "antsApplyTransforms",
+            "-d 3",
+            "-e 3",
+            "-n BSpline[3]",
+            f"-i {img_path}",
+            f"-r {img_path}",
+            f"-t {warp_path}",
+            f"-o {out_path}",
+        ],
+    )
+    return out_path
+
+
+def _write_ants_affine(path: Path) -> None:
+    """Write an ANTs affine with rotation, translation and center.
+
+    Parameters
+    ----------
+    path : pathlib.Path
+        The path to write to.
+
+    """
+    rotation = np.array([[0.99, -0.1, 0.0], [0.1, 0.99, 0.0], [0.0, 0.0, 1.0]])
+    savemat(
+        path,
+        {
+            "AffineTransform_double_3_3": np.array(
+                [*rotation.ravel(), 1.5, -0.5, 0.25]
+            )[:, np.newaxis],
+            "fixed": np.array([[0.5], [1.0], [0.0]]),
+        },
+        format="4",
+    )
+
+
+@pytest.mark.parametrize("kind", ["affine", "field", "composite"])
+@pytest.mark.skipif(
+    _check_ants() is False, reason="requires ANTs to be in PATH"
+)
+def test_JuniferWarper_against_ants(tmp_path: Path, kind: str) -> None:
+    """Test JuniferWarper against antsApplyTransforms.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+    kind : str
+        The parametrized kind of warp.
+
+    """
+    WorkDirManager().workdir = tmp_path
+    img = _make_img(n_volumes=1)
+    img = nib.Nifti1Image(img.get_fdata()[..., 0], img.affine)
+    affine_path = tmp_path / "affine.mat"
+    _write_ants_affine(affine_path)
+    # Displacement field in LPS as written by ANTs
+    field_path = tmp_path / "field.nii.gz"
+    field_img = nib.Nifti1Image(
+        _smooth_field(img.shape)[:, :, :, np.newaxis, :], img.affine
+    )
+    field_img.header.set_intent("vector")
+    nib.save(field_img, field_path)
+    if kind == "affine":
+        warp_path = affine_path
+    elif kind == "field":
+        warp_path = field_path
+    else:
+        warp_path = tmp_path / "composite.h5"
+        run_ext_cmd(
+            name="CompositeTransformUtil",
+            cmd=[
+                "CompositeTransformUtil",
+                "--assemble",
+                f"{warp_path}",
+                f"{affine_path}",
+                f"{field_path}",
+            ],
+        )
+    out_path = _apply_ants(tmp_path, img, warp_path)
+    _assert_equals_tool(tmp_path, img, warp_path, "ants", out_path)
+    WorkDirManager().cleanup_elementdir()
+
+
+@pytest.mark.parametrize("absolute", [False, True])
+@pytest.mark.skipif(_check_fsl() is False, reason="requires FSL to be in PATH")
+def test_JuniferWarper_against_fsl(tmp_path: Path, absolute: bool) -> None:
+    """Test JuniferWarper against FSL's applywarp.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+    absolute : bool
+        The parametrized flag for absolute warps.
+
+    """
+    WorkDirManager().workdir = tmp_path
+    img = _make_img(n_volumes=1)
+    img = nib.Nifti1Image(img.get_fdata()[..., 0], img.affine)
+    img_path = tmp_path / "input.nii.gz"
+    nib.save(img, img_path)
+    field = _smooth_field(img.shape)
+    if absolute:
+        warp_img = nib.Nifti1Image(_fsl_absolute_field(img, field), img.affine)
+        warp_img.header.set_intent("pointset")
+    else:
+        warp_img = nib.Nifti1Image(field, img.affine)
+        warp_img.header.set_intent("fnirt disp field")
+    warp_path = tmp_path / "warp.nii.gz"
+    nib.save(warp_img, warp_path)
+    out_path = tmp_path / "fsl.nii.gz"
+    run_ext_cmd(
+        name="applywarp",
+        cmd=[
+            "applywarp",
+            "--interp=spline",
+            f"-i {img_path}",
+            f"-r {img_path}",
+            f"-w {warp_path}",
+            "--abs" if absolute else "--rel",
+            f"-o {out_path}",
+        ],
+    )
+    _assert_equals_tool(tmp_path, img, warp_path, "fsl", out_path)
+    WorkDirManager().cleanup_elementdir()
+
+
+@pytest.mark.parametrize(
+    "datagrabber, element, using",
+    [
+        [
+            DMCC13Benchmark(
+                types=[DataType.BOLD, DataType.T1w, DataType.Warp],
+                sessions=DMCCSession.Wave1Bas,
+                tasks=DMCCTask.Rest,
+                phase_encodings=DMCCPhaseEncoding.AP,
+                runs=DMCCRun.One,
+                native_t1w=True,
+            ),
+            ("sub-f9057kp", "ses-wave1bas", "Rest", "AP", "1"),
+            SpaceWarpingImpl.ants,
+        ],
+        [
+            DataladHCP1200(
+                tasks=HCP1200Task.REST1,
+                phase_encodings=HCP1200PhaseEncoding.LR,
+                ica_fix=True,
+            ),
+            ("100206", "REST1", "LR"),
+            SpaceWarpingImpl.fsl,
+        ],
+    ],
+)
+@pytest.mark.skipif(_check_fsl() is False, reason="requires FSL to be in PATH")
+@pytest.mark.skipif(
+    _check_ants() is False, reason="requires ANTs to be in PATH"
+)
+@pytest.mark.skipif(
+    socket.gethostname() != "juseless",
+    reason="only for juseless",
+)
+def test_JuniferWarper_against_tools_native(
+    datagrabber: DataGrabberLike,
+    element: tuple[str, ...],
+    using: SpaceWarpingImpl,
+) -> None:
+    """Test JuniferWarper against the external tools on the testing data.
+
+    Parameters
+    ----------
+    datagrabber : DataGrabber-like object
+        The parametrized DataGrabber objects.
+    element : tuple of str
+        The parametrized elements.
+    using : SpaceWarpingImpl
+        The parametrized external implementation method.
+
+    """
+    with datagrabber as dg:
+        outputs = {}
+        for impl in [using, SpaceWarpingImpl.junifer]:
+            element_data = DefaultDataReader().fit_transform(dg[element])
+            output = SpaceWarper(
+                using=impl,
+                reference="T1w",
+                on=DataType.BOLD,
+            ).preprocess(
+                input=element_data["BOLD"],
+                extra_input=element_data,
+            )
+            outputs[impl] = nib.Nifti1Image(
+                output["data"].get_fdata()[..., 0], output["data"].affine
+            )
+    expected = outputs[using].get_fdata()
+    # Reference grids are resampled independently
+    warped = resample_to_img(
+        outputs[SpaceWarpingImpl.junifer],
+        outputs[using],
+        interpolation="continuous",
+    ).get_fdata()
+    inside = (expected != 0) & (warped != 0)
+    assert np.corrcoef(expected[inside], warped[inside])[0, 1] > 0.99
@@ -130,6 +130,25 @@ class BaseFeatureStorage(BaseModel, ABC):
             klass=NotImplementedError,
         )  # pragma: no cover
 
+    def list_element_features(self, element: dict) -> set[str]:
+        """List the features stored for an element.
+
+        Parameters
+        ----------
+        element : dict
+            The element as a dictionary.
+
+        Returns
+        -------
+        set of str
+            The MD5 of the features with data stored for ``element``.
+
+        """
+        raise_error(
+            msg="Concrete classes need to implement list_element_features().",
+            klass=NotImplementedError,
+        )
+
     @abstractmethod
     def read(
         self,
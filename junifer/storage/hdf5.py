@@ -35,6 +35,68 @@ from .utils import (
 
 __all__ = ["HDF5FeatureStorage"]
 
+# Stored elements of the features in a file by path, size and modification
+# time
+_STORED_ELEMENTS: dict[str, tuple[tuple, frozenset, dict[str, set]]] = {}
+
+
+def _element_key(element: dict) -> tuple:
+    """Get a hashable key for an element.
+
+    Parameters
+    ----------
+    element : dict
+        The element as a dictionary.
+
+    Returns
+    -------
+    tuple
+        The sorted items of ``element`` as strings.
+
+    """
+    return tuple(sorted((str(k), str(v)) for k, v in element.items()))
+
+
+def _read_stored_elements(uri: str, md5s: list[str]) -> dict[str, set]:
+    """Read the stored elements of features from a file.
+
+    Only the element list of each feature is read, not its data. The result
+    is cached until the file changes, so listing the features of many
+    elements reads the file once.
+
+    Parameters
+    ----------
+    uri : str
+        The path to the HDF5 file.
+    md5s : list of str
+        The MD5 of the features in the metadata of the file.
+
+    Returns
+    -------
+    dict
+        The keys of the stored elements by feature MD5, for the features with
+        data in the file.
+
+    """
+    stat = Path(uri).stat()
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    cached = _STORED_ELEMENTS.get(uri)
+    if cached is not None and cached[:2] == (stamp, frozenset(md5s)):
+        return cached[2]
+    logger.debug(f"Reading stored elements from: {uri}")
+    out = {}
+    for md5 in md5s:
+        if not has_hdf5(fname=uri, title=md5):
+            continue
+        out[md5] = {
+            _element_key(x)
+            for x in read_hdf5(
+                fname=uri, title=f"{md5}/key_element", slash="ignore"
+            )
+        }
+    _STORED_ELEMENTS[uri] = (stamp, frozenset(md5s), out)
+    return out
+
 
 def _create_chunk(
     chunk_data: list[np.ndarray],
@@ -582,6 +644,34 @@ class HDF5FeatureStorage(BaseFeatureStorage):
         )
         logger.debug(f"Wrote processed HDF5 data to: {fname} ...")
 
+    def list_element_features(self, element: dict) -> set[str]:
+        """List the features stored for an element.
+
+        With ``single_output=True``, only the stored elements of each feature
+        are read from the file, once until the file changes.
+
+        Parameters
+        ----------
+        element : dict
+            The element as a dictionary.
+
+        Returns
+        -------
+        set of str
+            The MD5 of the features with data stored for ``element``.
+
+        """
+        uri = self._fetch_correct_uri_for_io(element=element)
+        if not Path(uri).exists() or not has_hdf5(fname=uri, title="meta"):
+            return set()
+        md5s = list(self._read_metadata(element=element))
+        # File has data of all elements
+        if self.single_output:
+            stored = _read_stored_elements(uri=uri, md5s=md5s)
+            key = _element_key(element)
+            return {md5 for md5, keys in stored.items() if key in keys}
+        return {md5 for md5 in md5s if has_hdf5(fname=uri, title=md5)}
+
     def store_metadata(
         self,
         meta_md5: str,
@@ -12,7 +12,7 @@ import numpy as np
 import pandas as pd
 from pandas.core.base import NoNewAttributesMixin
 from pandas.io.sql import pandasSQL_builder
-from sqlalchemy import create_engine, inspect
+from sqlalchemy import create_engine, inspect, text
 from tqdm import tqdm
 
 from ..api.decorators import register_storage
@@ -217,6 +217,51 @@ class SQLiteFeatureStorage(PandasBaseFeatureStorage):
                 out[md5][k] = json.loads(v)
         return out
 
+    def list_element_features(self, element: dict) -> set[str]:
+        """List the features stored for an element.
+
+        Parameters
+        ----------
+        element : dict
+            The element as a dictionary.
+
+        Returns
+        -------
+        set of str
+            The MD5 of the features with data stored for ``element``.
+
+        """
+        prefix = element_to_prefix(element) if not self.single_output else ""
+        # Do not create the database when connecting
+        if not (self.uri.parent / f"{prefix}{self.uri.name}").exists():
+            return set()
+        engine = self.get_engine(element=element)
+        md5s = {
+            x.removeprefix("meta_")
+            for x in inspect(engine).get_table_names()
+            if x.startswith("meta_")
+        }
+        # Database only has the element's data
+        if not self.single_output:
+            return md5s
+        # Check for a row of the element in each table, via the index
+        condition = " AND ".join(
+            f'"{k}" = :value_{i}' for i, k in enumerate(element)
+        )
+        params = {f"value_{i}": v for i, v in enumerate(element.values())}
+        out = set()
+        with engine.connect() as conn:
+            for md5 in md5s:
+                row = conn.execute(
+                    text(
+                        f'SELECT 1 FROM "meta_{md5}" WHERE {condition} LIMIT 1'
+                    ),
+                    params,
+                ).first()
+                if row is not None:
+                    out.add(md5)
+        return out
+
     def read(
         self,
         feature_name: str | None = None,
@@ -1166,3 +1166,79 @@ def test_collect_error_single_output() -> None:
     ):
         storage = HDF5FeatureStorage(uri="/tmp", single_output=True)
         storage.collect()
+
+
+@pytest.mark.parametrize("single_output", [True, False])
+def test_list_element_features(
+    tmp_path: Path, single_output: bool, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test listing the features stored for an element.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+    single_output : bool
+        The parametrized single output flag.
+    monkeypatch : pytest.MonkeyPatch
+        The pytest.MonkeyPatch object.
+
+    """
+    storage = HDF5FeatureStorage(
+        uri=tmp_path / "test_list_element_features.hdf5",
+        single_output=single_output,
+    )
+    element1 = {"subject": "sub-01"}
+    element2 = {"subject": "sub-02"}
+    # Nothing stored yet
+    assert storage.list_element_features(element1) == set()
+
+    md5s = []
+    for name, elements in [("fc", [element1, element2]), ("tsnr", [element1])]:
+        for element in elements:
+            storage.store(
+                kind="vector",
+                meta={
+                    "element": element,
+                    "dependencies": ["numpy"],
+                    "marker": {"name": name},
+                    "type": "BOLD",
+                },
+                data=[1, 2],
+                col_names=["f1", "f2"],
+            )
+        md5s.append(
+            process_meta(
+                {
+                    "element": element1,
+                    "dependencies": ["numpy"],
+                    "marker": {"name": name},
+                    "type": "BOLD",
+                }
+            )[0]
+        )
+
+    # Feature data is not read
+    monkeypatch.setattr(
+        HDF5FeatureStorage,
+        "_read_data",
+        lambda *args, **kwargs: pytest.fail("Feature data read"),
+    )
+    assert storage.list_element_features(element1) == set(md5s)
+    assert storage.list_element_features(element2) == {md5s[0]}
+    assert storage.list_element_features({"subject": "sub-03"}) == set()
+
+    # Stored elements are read again once the file changes
+    monkeypatch.undo()
+    storage.store(
+        kind="vector",
+        meta={
+            "element": element2,
+            "dependencies": ["numpy"],
+            "marker": {"name": "tsnr"},
+            "type": "BOLD",
+        },
+        data=[1, 2],
+        col_names=["f1", "f2"],
+    )
+    assert storage.list_element_features(element2) == set(md5s)
@@ -827,6 +827,61 @@ def test_store_multiple_output(tmp_path: Path):
     assert_frame_equal(df3, cdf3)
 
 
+@pytest.mark.parametrize("single_output", [True, False])
+def test_list_element_features(tmp_path: Path, single_output: bool) -> None:
+    """Test listing the features stored for an element.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+    single_output : bool
+        The parametrized single output flag.
+
+    """
+    storage = SQLiteFeatureStorage(
+        uri=tmp_path / "test_list_element_features.sqlite",
+        single_output=single_output,
+    )
+    element1 = {"subject": "sub-01", "session": "ses-01"}
+    element2 = {"subject": "sub-02", "session": "ses-01"}
+    # Nothing stored yet and no database created
+    assert storage.list_element_features(element1) == set()
+    assert list(tmp_path.iterdir()) == []
+
+    md5s = []
+    for name, elements in [("fc", [element1, element2]), ("tsnr", [element1])]:
+        for element in elements:
+            storage.store(
+                kind="vector",
+                meta={
+                    "element": element,
+                    "dependencies": ["numpy"],
+                    "marker": {"name": name},
+                    "type": "BOLD",
+                },
+                data=[[1, 2]],
+                col_names=["f1", "f2"],
+            )
+        md5s.append(
+            process_meta(
+                {
+                    "element": element1,
+                    "dependencies": ["numpy"],
+                    "marker": {"name": name},
+                    "type": "BOLD",
+                }
+            )[0]
+        )
+
+    assert storage.list_element_features(element1) == set(md5s)
+    assert storage.list_element_features(element2) == {md5s[0]}
+    assert (
+        storage.list_element_features({"subject": "sub-03", "session": "x"})
+        == set()
+    )
+
+
 # TODO: can test be paramtrized?
 def test_collect(tmp_path: Path) -> None:
     """Test collect.
@@ -1,4 +1,5 @@
 __all__ = [
+    "file_hash",
     "make_executable",
     "configure_logging",
     "config",
@@ -13,7 +14,7 @@ __all__ = [
     "ConfigManager",
 ]
 
-from .fs import make_executable
+from .fs import file_hash, make_executable
 from .logging import configure_logging, logger, raise_error, warn_with_log
 from ._config import config, ConfigManager
 from .helpers import run_ext_cmd, deep_update, ensure_list, ensure_list_or_none
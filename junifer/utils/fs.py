@@ -4,11 +4,12 @@
 #          Synchon Mandal <s.mandal@fz-juelich.de>
 # License: AGPL
 
+import hashlib
 import stat
 from pathlib import Path
 
 
-__all__ = ["make_executable"]
+__all__ = ["file_hash", "make_executable"]
 
 
 def make_executable(path: Path) -> None:
@@ -22,3 +23,26 @@ def make_executable(path: Path) -> None:
     """
     st = path.stat()
     path.chmod(mode=st.st_mode | stat.S_IEXEC)
+
+
+def file_hash(path: Path, chunk_size: int = 1 << 20) -> str:
+    """Compute the MD5 hash of the content of ``path``.
+
+    Parameters
+    ----------
+    path : pathlib.Path
+        The path to the file to hash.
+    chunk_size : int, optional
+        The number of bytes to read at once (default 1 MiB).
+
+    Returns
+    -------
+    str
+        The hex digest of the MD5 hash.
+
+    """
+    md5 = hashlib.md5(usedforsecurity=False)
+    with Path(path).open("rb") as f:
+        while chunk := f.read(chunk_size):
+            md5.update(chunk)
+    return md5.hexdigest()
@@ -3,10 +3,11 @@
 # Authors: Federico Raimondo <f.raimondo@fz-juelich.de>
 #          Synchon Mandal <s.mandal@fz-juelich.de>
 # License: AGPL
+import hashlib
 import stat
 from pathlib import Path
 
-from junifer.utils.fs import make_executable
+from junifer.utils.fs import file_hash, make_executable
 
 
 def test_make_executable(tmp_path: Path) -> None:
@@ -28,3 +29,20 @@ def test_make_executable(tmp_path: Path) -> None:
     test_file_stat_final = test_file_path.stat()
     # Check final file mode
     assert stat.S_IMODE(test_file_stat_final.st_mode) & stat.S_IEXEC != 0
+
+
+def test_file_hash(tmp_path: Path) -> None:
+    """Test computing file hash.
+
+    Parameters
+    ----------
+    tmp_path : pathlib.Path
+        The path to the test directory.
+
+    """
+    test_file_path = tmp_path / "hash_me.txt"
+    test_file_path.write_bytes(b"umm" * 100)
+    expected = hashlib.md5(b"umm" * 100).hexdigest()
+    assert file_hash(test_file_path) == expected
+    # Check chunked reading
+    assert file_hash(test_file_path, chunk_size=7) == expected